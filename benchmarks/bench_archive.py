@@ -0,0 +1,58 @@
+"""Benchmark the bytes per bill of the archive formats.
+
+Compares plain SVG, per-file gzip, SVGs deflated against the preset
+dictionary of `SVGArchiveWriter` and the template-delta `ArchiveWriter`.
+
+Usage:
+    python benchmarks/bench_archive.py [count]
+"""
+
+import gzip
+import os
+import sys
+import tempfile
+
+from corpus import make_bills
+
+from chqr.archive import ArchiveWriter, SVGArchive, SVGArchiveWriter
+
+LANGUAGES = ("de", "fr", "it", "en")
+MODES = [("pretty", "path"), ("minified", "path"), ("minified", "bitmap")]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bills = make_bills(count)
+    languages = [LANGUAGES[i % len(LANGUAGES)] for i in range(count)]
+
+    print(f"{'profile':>9} {'qr':>7} {'svg':>7} {'gzip':>7} {'zdict':>7} {'delta':>7}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bills")
+        for profile, qr_style in MODES:
+            svgs = [
+                bill.generate_svg(language, profile=profile, qr_style=qr_style)
+                for bill, language in zip(bills, languages)
+            ]
+            plain = sum(len(svg.encode("utf-8")) for svg in svgs)
+            gzipped = sum(len(gzip.compress(svg.encode("utf-8"), 9)) for svg in svgs)
+
+            with SVGArchiveWriter(path, profile=profile, qr_style=qr_style) as writer:
+                for i, (bill, language) in enumerate(zip(bills, languages)):
+                    writer.append(bill, language, key=str(i))
+            with SVGArchive(path) as archive:
+                header = len(archive.dictionary)
+            zdict = os.path.getsize(path) - header
+
+            with ArchiveWriter(path, profile=profile, qr_style=qr_style) as writer:
+                for i, (bill, language) in enumerate(zip(bills, languages)):
+                    writer.append(bill, language, key=str(i))
+            delta = os.path.getsize(path)
+
+            print(
+                f"{profile:>9} {qr_style:>7} {plain / count:7.0f} "
+                f"{gzipped / count:7.0f} {zdict / count:7.0f} {delta / count:7.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
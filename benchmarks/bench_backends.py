@@ -0,0 +1,47 @@
+"""Benchmark the registered QR backends through the backend interface.
+
+Additional engines can be registered before running, e.g. from a module
+passed on the command line which calls `chqr.backends.register_backend`.
+
+Usage:
+    python benchmarks/bench_backends.py [count] [module ...]
+"""
+
+import importlib
+import sys
+import time
+
+from corpus import make_bills
+
+from chqr.backends import available_backends, get_backend
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    for module in sys.argv[2:]:
+        importlib.import_module(module)
+    payloads = [bill.build_data_string() for bill in make_bills(count)]
+
+    print(f"{'backend':>10} {'encode ms':>10} {'svg ms':>8} {'png ms':>8}")
+    for name in available_backends():
+        engine = get_backend(name)
+
+        start = time.perf_counter()
+        symbols = [engine.encode(p) for p in payloads]
+        encoded = time.perf_counter()
+        for symbol in symbols:
+            engine.to_svg(symbol)
+        serialised = time.perf_counter()
+        for symbol in symbols:
+            engine.to_png(symbol, scale=4)
+        rastered = time.perf_counter()
+
+        print(
+            f"{name:>10} {(encoded - start) / count * 1000:10.2f} "
+            f"{(serialised - encoded) / count * 1000:8.2f} "
+            f"{(rastered - serialised) / count * 1000:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""Benchmark output size and throughput of the SVG profiles and SVGZ.
+
+Usage:
+    python benchmarks/bench_output.py [count]
+"""
+
+import io
+import sys
+import time
+
+from corpus import make_bills
+
+from chqr.svg_output import write_svgz
+
+MODES = [
+    ("pretty", "path", None),
+    ("minified", "path", None),
+    ("pretty", "path", 6),
+    ("minified", "path", 1),
+    ("minified", "path", 6),
+    ("minified", "path", 9),
+    ("minified", "bitmap", None),
+    ("minified", "bitmap", 6),
+]
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    bills = make_bills(count)
+    # Encode once so that the timings only cover SVG assembly and writing
+    symbols = {id(bill): bill.generate_qr_code() for bill in bills}
+    for bill in bills:
+        bill.generate_qr_code = lambda *args, _s=symbols[id(bill)]: _s
+
+    print(f"{'profile':>9} {'qr':>7} {'level':>5} {'bytes/bill':>10} {'bills/s':>8}")
+    for profile, qr_style, level in MODES:
+        total = 0
+        start = time.perf_counter()
+        for bill in bills:
+            svg = bill.generate_svg(profile=profile, qr_style=qr_style)
+            if level is None:
+                total += len(svg.encode("utf-8"))
+            else:
+                total += write_svgz(svg, io.BytesIO(), level)
+        elapsed = time.perf_counter() - start
+        print(
+            f"{profile:>9} {qr_style:>7} {level if level is not None else '-':>5} "
+            f"{total / count:10.0f} {count / elapsed:8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Benchmark direct QR code and full bill rasterisation.
+
+QR codes are compared against segno's PNG writer, which can only scale by whole pixels per module, so it is run with the
+scale closest to the print size.
+
+Usage:
+    python benchmarks/bench_raster.py [count]
+"""
+
+import sys
+import time
+
+from corpus import make_bills
+
+from chqr.backends import get_backend
+from chqr.bill_raster import rasterize_bill
+from chqr.glyphs import load_atlas
+from chqr.qr_raster import PRINT_DPI, mm_to_pixels, render_qr_bitmap
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    segno = get_backend("segno")
+    bills = make_bills(count)
+    symbols = [bill.generate_qr_code() for bill in bills]
+
+    print(f"{'dpi':>4} {'writer':>8} {'bytes':>7} {'ms/code':>8}")
+    for dpi in PRINT_DPI:
+        for name, render in (
+            ("png", lambda s, dpi=dpi: render_qr_bitmap(s.matrix, "png", dpi)),
+            ("pbm", lambda s, dpi=dpi: render_qr_bitmap(s.matrix, "pbm", dpi)),
+            (
+                "segno",
+                lambda s, dpi=dpi: segno.to_png(
+                    s, round(mm_to_pixels(46, dpi) / len(s.matrix))
+                ),
+            ),
+        ):
+            total = 0
+            start = time.perf_counter()
+            for symbol in symbols:
+                total += len(render(symbol))
+            elapsed = time.perf_counter() - start
+            print(
+                f"{dpi:>4} {name:>8} {total / count:7.0f} {elapsed * 1000 / count:8.2f}"
+            )
+
+    start = time.perf_counter()
+    load_atlas()
+    print(f"\nglyph atlas loaded in {(time.perf_counter() - start) * 1000:.0f} ms")
+    print(f"{'dpi':>4} {'raster':>8} {'png':>8} {'pbm':>8}  (ms/bill)")
+    for dpi in PRINT_DPI:
+        timings = [0.0, 0.0, 0.0]
+        for bill in bills:
+            start = time.perf_counter()
+            raster = rasterize_bill(bill, dpi=dpi, mask=0)
+            timings[0] += time.perf_counter() - start
+            for i, encode in enumerate((raster.to_png, raster.to_pbm), 1):
+                start = time.perf_counter()
+                encode()
+                timings[i] += time.perf_counter() - start
+        print(f"{dpi:>4}" + "".join(f" {t * 1000 / count:8.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
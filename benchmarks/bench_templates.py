@@ -0,0 +1,66 @@
+"""Benchmark filling an invoice template with pre-rendered bills.
+
+Compares a compiled template against a regex substitution pass per document
+producing the same output, with the bill markup rendered beforehand so that
+only the filling is timed. "bytes" includes encoding the result to UTF-8.
+
+Usage:
+    python benchmarks/bench_templates.py [count]
+"""
+
+import sys
+import time
+
+from corpus import make_bills
+
+from chqr.svg_generator import escape_xml
+from chqr.templates import SLOT_PATTERN, Markup, Template, bill_fields
+
+INVOICE = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<svg width="210mm" height="297mm" xmlns="http://www.w3.org/2000/svg">\n'
+    + "".join(
+        f'  <rect x="20mm" y="{y}mm" width="170mm" height="6mm" fill="#eee"/>\n'
+        for y in range(60, 180, 8)
+    )
+    + '  <text x="20mm" y="40mm">{{ creditor_name }}, {{ creditor_address }}</text>\n'
+    '  <text x="20mm" y="50mm">{{ debtor_name }}, {{ debtor_address }}</text>\n'
+    '  <text x="150mm" y="50mm">{{ currency }} {{ amount }}</text>\n'
+    '  <svg x="0mm" y="186mm">{{ bill }}</svg>\n'
+    "</svg>"
+)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    bills = make_bills(min(count, 200))
+    values = [bill_fields(bill) for bill in bills]
+    values = (values * (count // len(values) + 1))[:count]
+
+    def substitute(match, fields):
+        value = fields[match.group(1)]
+        return value if isinstance(value, Markup) else escape_xml(value)
+
+    start = time.perf_counter()
+    for fields in values:
+        SLOT_PATTERN.sub(lambda m, fields=fields: substitute(m, fields), INVOICE)
+    regex = time.perf_counter() - start
+
+    template = Template(INVOICE)
+    start = time.perf_counter()
+    for fields in values:
+        template.render(fields)
+    compiled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for fields in values:
+        template.render_bytes(fields)
+    encoded = time.perf_counter() - start
+
+    print(f"{'method':>10} {'us/doc':>8}")
+    for name, elapsed in (("regex", regex), ("compiled", compiled), ("bytes", encoded)):
+        print(f"{name:>10} {elapsed * 1e6 / count:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
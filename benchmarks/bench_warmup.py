@@ -0,0 +1,98 @@
+"""Benchmark the time to the first bill, with and without `chqr.warmup`.
+
+Every measurement runs in a fresh interpreter. "cold" renders bills
+(SVG and a 300 dpi PNG each) right after importing chqr, "warm" calls
+`warmup` first and "forked" renders in a child forked after the parent's
+warm-up, like the worker of a pre-fork server; "thawed" forks without
+freezing the warmed-up objects. The memory column is the private dirty
+memory of the process rendering, after a full collection.
+
+Usage:
+    python benchmarks/bench_warmup.py [count]
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+CHILD = textwrap.dedent(
+    """
+    import gc, os, sys, time
+    sys.path.insert(0, {benchmarks!r})
+    start = time.perf_counter()
+    import chqr
+    from corpus import make_bills
+    bills = make_bills({count})
+    imported = time.perf_counter()
+    if {mode!r} != "cold":
+        chqr.warmup(freeze={mode!r} != "thawed")
+    warm = time.perf_counter()
+
+    def render(bills):
+        times = []
+        for bill in bills:
+            began = time.perf_counter()
+            bill.generate_svg()
+            bill.generate_bitmap()
+            times.append(time.perf_counter() - began)
+        return times
+
+    def private_dirty():
+        try:
+            with open("/proc/self/smaps_rollup") as smaps:
+                for line in smaps:
+                    if line.startswith("Private_Dirty:"):
+                        return int(line.split()[1])
+        except OSError:
+            pass
+        return 0
+
+    if {mode!r} in ("forked", "thawed") and hasattr(os, "fork"):
+        read, write = os.pipe()
+        if os.fork() == 0:
+            times = render(bills)
+            gc.collect()
+            os.write(write, repr((times, private_dirty())).encode())
+            os._exit(0)
+        os.close(write)
+        times, memory = eval(os.read(read, 1 << 20))
+        os.wait()
+    else:
+        times = render(bills)
+        gc.collect()
+        memory = private_dirty()
+    print(repr((imported - start, warm - imported, times, memory)))
+    """
+)
+
+
+def run(mode: str, count: int) -> tuple[float, float, list[float], int]:
+    """Measure in a fresh interpreter."""
+    code = CHILD.format(
+        benchmarks=os.path.dirname(os.path.abspath(__file__)), count=count, mode=mode
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return eval(output)
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(
+        f"{'mode':>8} {'import ms':>10} {'warmup ms':>10} {'1st ms':>8} "
+        f"{'2nd ms':>8} {'median ms':>10} {'dirty KiB':>10}"
+    )
+    for mode in ("cold", "warm", "forked", "thawed"):
+        imported, warm, times, memory = run(mode, max(count, 2))
+        median = sorted(times)[len(times) // 2]
+        print(
+            f"{mode:>8} {imported * 1e3:10.1f} {warm * 1e3:10.1f} "
+            f"{times[0] * 1e3:8.1f} {times[1] * 1e3:8.1f} {median * 1e3:10.1f} "
+            f"{memory:10d}"
+        )
+
+
+if __name__ == "__main__":
+    main()
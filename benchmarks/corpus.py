@@ -0,0 +1,90 @@
+"""Realistic QR-bill corpus shared by the benchmark scripts."""
+
+import random
+from decimal import Decimal
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.validators import _calculate_mod10_recursive_check_digit
+
+STREETS = ["Musterstrasse", "Bahnhofstrasse", "Rue du Marché", "Via Cantonale"]
+CITIES = [("8000", "Zürich"), ("3011", "Bern"), ("1204", "Genève"), ("6900", "Lugano")]
+NAMES = ["Max Muster & Söhne", "Pia-Maria Rutschmann-Schnyder", "Robert Schneider AG"]
+MESSAGES = [
+    "",
+    "Auftrag vom 15.06.2020",
+    "Rechnung Nr. 3139 für Gartenarbeiten und Entsorgung des Schnittmaterials",
+    "Facture mensuelle – abonnement annuel, période du 01.01. au 31.12., "
+    "veuillez indiquer le numéro de client lors de tout paiement",
+]
+BILLING = "//S1/10/10201409/11/170309/20/14000000/30/106017086/31/180508"
+
+
+def make_bills(count: int, seed: int = 42) -> list[QRBill]:
+    """Build a reproducible mix of QRR, SCOR and NON bills.
+
+    Args:
+        count: Number of bills to generate
+        seed: Seed of the random generator
+
+    Returns:
+        List of QRBill instances
+    """
+    rng = random.Random(seed)
+    bills = []
+    for i in range(count):
+        postal_code, city = rng.choice(CITIES)
+        creditor = Creditor(
+            name=rng.choice(NAMES),
+            street=rng.choice(STREETS),
+            building_number=str(rng.randint(1, 200)),
+            postal_code=postal_code,
+            city=city,
+            country="CH",
+        )
+        debtor = None
+        if rng.random() < 0.8:
+            postal_code, city = rng.choice(CITIES)
+            debtor = UltimateDebtor(
+                name=rng.choice(NAMES),
+                street=rng.choice(STREETS),
+                building_number=str(rng.randint(1, 200)),
+                postal_code=postal_code,
+                city=city,
+                country="CH",
+            )
+        amount = None
+        if rng.random() < 0.9:
+            amount = Decimal(rng.randint(1, 10_000_000)) / 100
+
+        kind = i % 3
+        if kind == 0:
+            base = f"{rng.randint(0, 10**26 - 1):026d}"
+            check = _calculate_mod10_recursive_check_digit(base)
+            account, reference_type, reference = (
+                "CH4431999123000889012",
+                "QRR",
+                f"{base}{check}",
+            )
+        elif kind == 1:
+            account, reference_type, reference = (
+                "CH5800791123000889012",
+                "SCOR",
+                "RF18539007547034",
+            )
+        else:
+            account, reference_type, reference = "CH5800791123000889012", "NON", None
+
+        bills.append(
+            QRBill(
+                account=account,
+                creditor=creditor,
+                currency=rng.choice(["CHF", "EUR"]),
+                amount=amount,
+                reference_type=reference_type,
+                reference=reference,
+                additional_information=rng.choice(MESSAGES),
+                debtor=debtor,
+                billing_information=BILLING if rng.random() < 0.3 else None,
+            )
+        )
+    return bills
@@ -3,6 +3,7 @@
 from .creditor import Creditor
 from .debtor import UltimateDebtor
 from .exceptions import ValidationError
+from .preload import warmup
 from .qr_bill import QRBill
 
-__all__ = ["Creditor", "UltimateDebtor", "QRBill", "ValidationError"]
+__all__ = ["Creditor", "UltimateDebtor", "QRBill", "ValidationError", "warmup"]
@@ -0,0 +1,195 @@
+"""asyncio API rendering QR-bills off the event loop.
+
+Encoding a QR code takes milliseconds of CPU time, which would stall every
+other request of an asyncio service. The coroutines of this module hand
+the work to an executor, by default the loop's thread pool, or one set with
+`set_executor`, e.g. a process pool for true parallelism::
+
+    set_executor(ProcessPoolExecutor(4))
+    svg = await qr_bill.generate_svg_async(language="de")
+    async for svg in render_stream(rows):
+        ...
+
+Concurrent requests for the same document share one rendering, and a
+cancelled request cancels the rendering once no other request waits for it.
+"""
+
+import asyncio
+import weakref
+from collections import deque
+from collections.abc import AsyncIterable, AsyncIterator, Iterable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING
+
+from .backends import QRBackend, get_backend
+from .masking import MASK_FULL
+from .render import Row, bill_from_row, render_row
+from .svg_generator import validate_svg_options
+
+if TYPE_CHECKING:
+    from .qr_bill import QRBill
+
+_executor: Executor | None = None
+
+# Renderings in progress by event loop and request
+_in_flight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def set_executor(executor: Executor | None) -> None:
+    """Set the executor rendering for the coroutines of this module.
+
+    Process pools look backends up by name, so they must be registered in
+    the worker processes as well.
+
+    Args:
+        executor: A thread or process pool, or None for the default
+            executor of the running event loop
+    """
+    global _executor
+    _executor = executor
+
+
+def get_executor() -> Executor | None:
+    """Return the executor set with `set_executor`, None for the default."""
+    return _executor
+
+
+class _Rendering:
+    """A rendering shared by concurrent requests."""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+async def generate_svg_async(
+    qr_bill: "QRBill",
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+    executor: Executor | None = None,
+) -> str:
+    """Generate the SVG of a QR-bill in an executor.
+
+    Args:
+        qr_bill: The QRBill instance
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+        executor: Executor to render in, defaults to `get_executor`
+
+    Returns:
+        SVG string
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+    validate_svg_options(qr_style, profile)
+    options = (language, mask, get_backend(backend), qr_style, profile)
+    return await _render(qr_bill.build_data_string(), options, executor)
+
+
+async def render_stream(
+    rows: Iterable[Row] | AsyncIterable[Row],
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+    executor: Executor | None = None,
+    max_in_flight: int = 8,
+) -> AsyncIterator[str]:
+    """Render input rows to SVG in an executor, in order.
+
+    Args:
+        rows: Input rows, see `chqr.render.bill_from_row`; consumed lazily
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+        executor: Executor to render in, defaults to `get_executor`
+        max_in_flight: Rows pulled but not yet yielded at most
+
+    Yields:
+        The SVG of each row, in input order.
+
+    Raises:
+        ValidationError: When the row of an invalid bill is reached
+        ValueError: If an option is invalid
+    """
+    validate_svg_options(qr_style, profile)
+    if max_in_flight < 1:
+        raise ValueError(f"At least one bill must be in flight, got {max_in_flight}")
+    options = (language, mask, get_backend(backend), qr_style, profile)
+    pending: deque[asyncio.Task] = deque()
+
+    def submit(row: Row) -> None:
+        try:
+            data = bill_from_row(row).build_data_string()
+        except Exception as error:
+            task = asyncio.get_running_loop().create_future()
+            task.set_exception(error)
+        else:
+            task = asyncio.ensure_future(_render(data, options, executor))
+        pending.append(task)
+
+    try:
+        if isinstance(rows, AsyncIterable):
+            async for row in rows:
+                submit(row)
+                if len(pending) >= max_in_flight:
+                    yield await pending.popleft()
+        else:
+            for row in rows:
+                submit(row)
+                if len(pending) >= max_in_flight:
+                    yield await pending.popleft()
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                # Mark the failure of a row never reached as retrieved
+                task.exception()
+
+
+async def _render(data: str, options: tuple, executor: Executor | None) -> str:
+    """Render a data string, sharing the rendering with identical requests."""
+    language, mask, engine, qr_style, profile = options
+    key = (data, language, str(mask), engine.name, qr_style, profile)
+    loop = asyncio.get_running_loop()
+    renderings = _in_flight.setdefault(loop, {})
+    rendering = renderings.get(key)
+    if rendering is None:
+        executor = executor if executor is not None else _executor
+        # Worker processes receive the backend's name, threads the instance
+        backend = engine.name if isinstance(executor, ProcessPoolExecutor) else engine
+        future = loop.run_in_executor(
+            executor, render_row, data, language, mask, backend, qr_style, profile
+        )
+        rendering = renderings[key] = _Rendering(future)
+        future.add_done_callback(lambda _: _forget(renderings, key, rendering))
+
+    rendering.waiters += 1
+    try:
+        return await asyncio.shield(rendering.future)
+    finally:
+        rendering.waiters -= 1
+        if not rendering.waiters:
+            # Nobody waits for it anymore, e.g. all requests were cancelled
+            rendering.future.cancel()
+
+
+def _forget(renderings: dict, key: tuple, rendering: _Rendering) -> None:
+    """Remove a finished rendering, unless it was replaced already."""
+    if renderings.get(key) is rendering:
+        del renderings[key]
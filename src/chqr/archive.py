@@ -0,0 +1,550 @@
+"""Template-delta archive of generated QR-bills.
+
+An SVG of a bill is a pure function of the bill's QR code data string, its
+language and the rendering options, for a given version of the markup
+(`SVG_TEMPLATE_VERSION`). The archive therefore stores the options and
+template version once and, per bill, only the language and the data string:
+a few hundred bytes instead of the full SVG. `Archive.reconstruct`
+regenerates the byte-identical SVG on demand. The formatted strings of a
+bill are derived from its data string and need not be stored.
+
+Archive format (big-endian)::
+
+    header:  magic "CQDA", u16 format version, u16 template version,
+             mask, backend, QR style, profile
+    record:  language, key (u16 length), payload (u32 length)
+    index:   u32 count, entries of key (u16 length) and u64 record offset
+    trailer: u64 index offset, magic "CQDI"
+
+Strings are UTF-8 with a u8 length unless noted. The key of a bill,
+usually its reference, is repeated in its record, so the index of an
+archive which was not closed properly is rebuilt by scanning the records.
+
+Where the SVGs themselves are to be kept, `SVGArchiveWriter` stores each
+bill deflated against a preset dictionary of the static markup, in the same
+container with magic "CQDZ" and the dictionary (u32 length) closing the
+header. Every record remains independently decompressible.
+"""
+
+import struct
+import zlib
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import BinaryIO, NamedTuple, TypeVar
+
+from .backends import QRBackend, get_backend
+from .layout import TRANSLATIONS, Element, QRCode, Section
+from .masking import MASK_FULL
+from .preload import sample_bills
+from .qr_bill import QRBill
+from .svg_generator import (
+    SVG_TEMPLATE_VERSION,
+    generate_svg,
+    serialize_document,
+    validate_svg_options,
+)
+
+ARCHIVE_MAGIC = b"CQDA"
+SVG_ARCHIVE_MAGIC = b"CQDZ"
+ARCHIVE_VERSION = 1
+INDEX_MAGIC = b"CQDI"
+
+# Raw deflate: the dictionary is part of the archive, so the zlib header
+# and its dictionary checksum would only add six bytes to every bill
+COMPRESSION_LEVEL = 9
+WINDOW_BITS = -15
+
+_TRAILER = struct.Struct(">Q4s")
+
+
+_T = TypeVar("_T")
+
+
+class ArchivedBill(NamedTuple):
+    """A bill as stored in an archive."""
+
+    key: str
+    language: str
+    payload: str
+
+
+class ArchivedSVG(NamedTuple):
+    """A bill as stored in an SVG archive."""
+
+    key: str
+    language: str
+    svg: str
+
+
+class ArchiveOptions(NamedTuple):
+    """Rendering options shared by all bills of an archive."""
+
+    template_version: int
+    mask: int | str
+    backend: str
+    qr_style: str
+    profile: str
+
+
+class _Writer:
+    """Records, index and trailer common to the archive writers."""
+
+    def __init__(self, path: str | Path, header: bytes):
+        self._handle = open(path, "wb")
+        self._index: list[tuple[str, int]] = []
+        self._handle.write(header)
+
+    def _append(self, key: str, language: str, payload: bytes) -> None:
+        """Write a record and index it."""
+        self._index.append((key, self._handle.tell()))
+        self._handle.write(_encode_record(key, language, payload))
+
+    def close(self) -> None:
+        """Write the index and close the file."""
+        if self._handle.closed:
+            return
+        offset = self._handle.tell()
+        parts = [struct.pack(">I", len(self._index))]
+        for key, record_offset in self._index:
+            encoded = key.encode("utf-8")
+            parts.append(struct.pack(">H", len(encoded)) + encoded)
+            parts.append(struct.pack(">Q", record_offset))
+        parts.append(_TRAILER.pack(offset, INDEX_MAGIC))
+        self._handle.write(b"".join(parts))
+        self._handle.close()
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ArchiveWriter(_Writer):
+    """Write bills to a new archive.
+
+    Args:
+        path: Archive file, replaced if it exists
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process
+            default; reconstructing requires a backend of the same name
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        qr_style: str = "path",
+        profile: str = "pretty",
+    ):
+        validate_svg_options(qr_style, profile)
+        self.options = ArchiveOptions(
+            SVG_TEMPLATE_VERSION, mask, get_backend(backend).name, qr_style, profile
+        )
+        super().__init__(path, _encode_header(ARCHIVE_MAGIC, self.options))
+
+    def append(self, qr_bill: QRBill, language: str = "en", key: str | None = None):
+        """Add a bill.
+
+        Args:
+            qr_bill: The QRBill instance
+            language: Language code (en, de, fr, it)
+            key: Lookup key, defaults to the bill's reference; bills with an
+                empty key are stored but not indexed, and a later bill with
+                the key of an earlier one supersedes it in lookups
+        """
+        if key is None:
+            key = qr_bill.reference
+        self._append(key, language, qr_bill.build_data_string().encode("utf-8"))
+
+
+class SVGArchiveWriter(_Writer):
+    """Write the SVGs of bills to a new archive, compressed bill by bill.
+
+    Each SVG is deflated on its own against a preset dictionary built from
+    the static markup of the options, see `build_dictionary`, so that it
+    compresses like the tail of one long document while staying readable
+    without its neighbours. Arguments are those of `ArchiveWriter`.
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        qr_style: str = "path",
+        profile: str = "pretty",
+    ):
+        validate_svg_options(qr_style, profile)
+        self._backend = get_backend(backend)
+        self.options = ArchiveOptions(
+            SVG_TEMPLATE_VERSION, mask, self._backend.name, qr_style, profile
+        )
+        self.dictionary = build_dictionary(mask, self._backend, qr_style, profile)
+        header = _encode_header(SVG_ARCHIVE_MAGIC, self.options)
+        header += struct.pack(">I", len(self.dictionary)) + self.dictionary
+        super().__init__(path, header)
+
+    def append(self, qr_bill: QRBill, language: str = "en", key: str | None = None):
+        """Render and add a bill, see `ArchiveWriter.append`."""
+        if key is None:
+            key = qr_bill.reference
+        options = self.options
+        svg = generate_svg(
+            qr_bill,
+            language,
+            options.mask,
+            self._backend,
+            options.qr_style,
+            options.profile,
+        )
+        self._append(key, language, compress_svg(svg, self.dictionary))
+
+
+class _Reader:
+    """Header, index and records common to the archive readers."""
+
+    magic = ARCHIVE_MAGIC
+
+    def __init__(self, path: str | Path):
+        self._handle = open(path, "rb")
+        try:
+            self.options = _decode_header(self._handle, self.magic)
+            self._read_header(self._handle)
+            self._data_start = self._handle.tell()
+            self._offsets = self._read_index()
+        except BaseException:
+            self._handle.close()
+            raise
+        self._by_key = {key: offset for key, offset in self._offsets if key}
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._by_key
+
+    def keys(self) -> list[str]:
+        """Return the distinct keys of the indexed bills."""
+        return list(self._by_key)
+
+    def close(self) -> None:
+        """Close the file."""
+        self._handle.close()
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _read_header(self, handle: BinaryIO) -> None:
+        """Read the header fields following the options."""
+
+    def _read(self, offset: int) -> tuple[str, str, bytes]:
+        """Read the key, language and payload of the record at an offset."""
+        self._handle.seek(offset)
+        return _decode_record(self._handle)[:3]
+
+    def _read_index(self) -> list[tuple[str, int]]:
+        """Read the index, or rebuild it from the records if it is missing."""
+        handle = self._handle
+        size = handle.seek(0, 2)
+        if size - self._data_start >= _TRAILER.size:
+            handle.seek(size - _TRAILER.size)
+            index_offset, magic = _TRAILER.unpack(handle.read(_TRAILER.size))
+            if magic == INDEX_MAGIC and self._data_start <= index_offset < size:
+                handle.seek(index_offset)
+                (count,) = struct.unpack(">I", handle.read(4))
+                offsets = []
+                for _ in range(count):
+                    (length,) = struct.unpack(">H", handle.read(2))
+                    key = handle.read(length).decode("utf-8")
+                    (offset,) = struct.unpack(">Q", handle.read(8))
+                    offsets.append((key, offset))
+                return offsets
+
+        # Unterminated archive: scan the records, dropping a truncated last one
+        offsets = []
+        offset = self._data_start
+        handle.seek(offset)
+        while True:
+            try:
+                key, _, _, end = _decode_record(handle)
+            except (struct.error, UnicodeDecodeError, EOFError):
+                return offsets
+            offsets.append((key, offset))
+            offset = end
+
+
+class Archive(_Reader):
+    """Read an archive with random access by key.
+
+    Args:
+        path: Archive file
+
+    Raises:
+        ValueError: If the file is not an archive of a supported version
+    """
+
+    def __iter__(self) -> Iterator[ArchivedBill]:
+        for _, offset in self._offsets:
+            yield self._record(offset)
+
+    def read(self, key: str) -> ArchivedBill:
+        """Return the stored bill of a key, the latest one for reissued keys.
+
+        Raises:
+            KeyError: If no bill has the key
+        """
+        return self._record(self._by_key[key])
+
+    def bill(self, key: str) -> QRBill:
+        """Rebuild the QR-bill of a key, see `read`."""
+        return QRBill.from_data_string(self.read(key).payload)
+
+    def reconstruct(self, key: str) -> str:
+        """Regenerate the SVG of a bill, byte-identical to the original.
+
+        Raises:
+            KeyError: If no bill has the key
+            ValueError: If the archive was written with another template
+                version or its backend is not registered
+        """
+        return self.render(self.read(key))
+
+    def render(self, record: ArchivedBill) -> str:
+        """Regenerate the SVG of a stored bill, see `reconstruct`."""
+        options = self.options
+        if options.template_version != SVG_TEMPLATE_VERSION:
+            raise ValueError(
+                f"Archive holds SVG template version {options.template_version}, "
+                f"this version of chqr renders version {SVG_TEMPLATE_VERSION}"
+            )
+        return generate_svg(
+            QRBill.from_data_string(record.payload),
+            record.language,
+            options.mask,
+            options.backend,
+            options.qr_style,
+            options.profile,
+        )
+
+    def _record(self, offset: int) -> ArchivedBill:
+        """Read the bill at an offset."""
+        key, language, payload = self._read(offset)
+        return ArchivedBill(key, language, payload.decode("utf-8"))
+
+
+class SVGArchive(_Reader):
+    """Read an SVG archive with random access by key.
+
+    Args:
+        path: Archive file
+
+    Raises:
+        ValueError: If the file is not an SVG archive of a supported version
+    """
+
+    magic = SVG_ARCHIVE_MAGIC
+
+    def __iter__(self) -> Iterator[ArchivedSVG]:
+        for _, offset in self._offsets:
+            yield self._record(offset)
+
+    def read(self, key: str) -> str:
+        """Return the SVG of a key, the latest one for reissued keys.
+
+        Raises:
+            KeyError: If no bill has the key
+        """
+        return self._record(self._by_key[key]).svg
+
+    def _read_header(self, handle: BinaryIO) -> None:
+        """Read the preset dictionary."""
+        try:
+            (length,) = struct.unpack(">I", handle.read(4))
+        except struct.error:
+            raise ValueError("Truncated QR-bill archive") from None
+        self.dictionary = _read_exactly(handle, length)
+
+    def _record(self, offset: int) -> ArchivedSVG:
+        """Read and decompress the SVG at an offset."""
+        key, language, payload = self._read(offset)
+        return ArchivedSVG(key, language, decompress_svg(payload, self.dictionary))
+
+
+def build_dictionary(
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> bytes:
+    """Build the preset dictionary of an SVG archive.
+
+    The dictionary holds the markup of sample bills in every language, with
+    blank QR codes unless the backend serialises them, which is what the
+    SVGs of a set of bills have in common. Arguments are those of
+    `ArchiveWriter`.
+
+    Returns:
+        The dictionary, at most the 32 KiB deflate can refer back to.
+    """
+    engine = get_backend(backend)
+    documents = []
+    for language in TRANSLATIONS:
+        for qr_bill in sample_bills():
+            layout = qr_bill.layout(language, mask, engine)
+            if qr_style != "backend":
+                elements = tuple(_blank_qr_code(e) for e in layout.elements)
+                layout = layout._replace(elements=elements)
+            documents.append(serialize_document(layout, engine, qr_style, profile))
+    return "".join(documents).encode("utf-8")[-32768:]
+
+
+def compress_svg(svg: str, dictionary: bytes) -> bytes:
+    """Deflate an SVG against a preset dictionary, see `decompress_svg`."""
+    compressor = zlib.compressobj(
+        COMPRESSION_LEVEL, zlib.DEFLATED, WINDOW_BITS, zdict=dictionary
+    )
+    return compressor.compress(svg.encode("utf-8")) + compressor.flush()
+
+
+def decompress_svg(data: bytes, dictionary: bytes) -> str:
+    """Inflate an SVG compressed by `compress_svg` with the same dictionary."""
+    decompressor = zlib.decompressobj(WINDOW_BITS, zdict=dictionary)
+    return (decompressor.decompress(data) + decompressor.flush()).decode("utf-8")
+
+
+def write_archive(
+    path: str | Path,
+    bills: Iterable[QRBill],
+    language: str = "en",
+    **options,
+) -> int:
+    """Archive bills, see `ArchiveWriter`.
+
+    Args:
+        path: Archive file, replaced if it exists
+        bills: QR-bills to archive, keyed by their reference
+        language: Language code (en, de, fr, it)
+        **options: Rendering options of `ArchiveWriter`
+
+    Returns:
+        Number of bills written.
+    """
+    count = 0
+    with ArchiveWriter(path, **options) as writer:
+        for qr_bill in bills:
+            writer.append(qr_bill, language)
+            count += 1
+    return count
+
+
+def _encode_header(magic: bytes, options: ArchiveOptions) -> bytes:
+    """Encode the file header."""
+    parts = [struct.pack(">4sHH", magic, ARCHIVE_VERSION, options.template_version)]
+    for value in (
+        str(options.mask),
+        options.backend,
+        options.qr_style,
+        options.profile,
+    ):
+        parts.append(_short_string(value))
+    return b"".join(parts)
+
+
+def _decode_header(handle: BinaryIO, magic: bytes) -> ArchiveOptions:
+    """Decode the options of the file header."""
+    try:
+        found, version, template_version = struct.unpack(">4sHH", handle.read(8))
+    except struct.error:
+        raise ValueError("Not a QR-bill archive") from None
+    if found != magic or version != ARCHIVE_VERSION:
+        raise ValueError("Unsupported QR-bill archive")
+    mask, backend, qr_style, profile = (_read_short_string(handle) for _ in range(4))
+    return ArchiveOptions(
+        template_version,
+        int(mask) if mask.isdigit() else mask,
+        backend,
+        qr_style,
+        profile,
+    )
+
+
+def _encode_record(key: str, language: str, payload: bytes) -> bytes:
+    """Encode a bill record."""
+    encoded = key.encode("utf-8")
+    return b"".join(
+        (
+            _short_string(language),
+            struct.pack(">H", len(encoded)),
+            encoded,
+            struct.pack(">I", len(payload)),
+            payload,
+        )
+    )
+
+
+def _decode_record(handle: BinaryIO) -> tuple[str, str, bytes, int]:
+    """Decode the record at the file position.
+
+    Returns:
+        The key, language and payload of the record, and its end.
+    """
+    language = _read_short_string(handle)
+    (length,) = struct.unpack(">H", handle.read(2))
+    key = _read_exactly(handle, length).decode("utf-8")
+    (length,) = struct.unpack(">I", handle.read(4))
+    payload = _read_exactly(handle, length)
+    return key, language, payload, handle.tell()
+
+
+def _blank_qr_code(element: Element) -> Element:
+    """Replace the QR code of a layout element by one without dark modules."""
+    if isinstance(element, QRCode):
+        size = len(element.symbol.matrix)
+        blank = _BlankSymbol([bytes(size)] * size, element.symbol.mask)
+        return element._replace(symbol=blank)
+    if isinstance(element, Section):
+        elements = tuple(_blank_qr_code(child) for child in element.elements)
+        return element._replace(elements=elements)
+    return element
+
+
+class _BlankSymbol(NamedTuple):
+    """A QR code symbol without dark modules."""
+
+    matrix: list[bytes]
+    mask: int
+    version: int = 1
+    error: str = "M"
+
+
+def _short_string(value: str) -> bytes:
+    """Encode a string with a u8 length."""
+    encoded = value.encode("utf-8")
+    return bytes([len(encoded)]) + encoded
+
+
+def _read_short_string(handle: BinaryIO) -> str:
+    """Read a string with a u8 length."""
+    (length,) = struct.unpack(">B", handle.read(1))
+    return _read_exactly(handle, length).decode("utf-8")
+
+
+def _read_exactly(handle: BinaryIO, size: int) -> bytes:
+    """Read exactly size bytes."""
+    data = handle.read(size)
+    if len(data) != size:
+        raise EOFError("Truncated QR-bill archive")
+    return data
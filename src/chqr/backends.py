@@ -0,0 +1,180 @@
+"""Pluggable QR code engines.
+
+A backend turns a QR-bill data string into a module matrix and serialises
+that matrix for the output formats. segno is the default engine; other
+engines can be registered and selected per process or per call.
+"""
+
+import io
+import os
+from collections.abc import Sequence
+from typing import Protocol, runtime_checkable
+
+from .masking import MASK_FULL, make_qr_code
+
+DEFAULT_BACKEND = "segno"
+
+# Environment variable selecting the process-wide default backend
+BACKEND_ENV_VAR = "CHQR_QR_BACKEND"
+
+
+class QRSymbol(Protocol):
+    """An encoded QR code symbol.
+
+    The matrix holds one row per module line without quiet zone, with ``1``
+    for dark and ``0`` for light modules.
+    """
+
+    matrix: Sequence[bytes | bytearray]
+    mask: int
+
+    @property
+    def version(self) -> int: ...
+
+    @property
+    def error(self) -> str: ...
+
+
+@runtime_checkable
+class QRBackend(Protocol):
+    """Interface of a QR code engine."""
+
+    name: str
+
+    def encode(self, data: str, mask: int | str = MASK_FULL) -> QRSymbol:
+        """Encode a data string with error correction level M.
+
+        Args:
+            data: The QR-bill data string
+            mask: "full", "fast" or a fixed mask pattern number (0-7)
+
+        Returns:
+            The encoded symbol.
+        """
+        ...
+
+    def to_svg(self, symbol: QRSymbol) -> str:
+        """Serialise a symbol to an SVG fragment.
+
+        Args:
+            symbol: A symbol returned by `encode`
+
+        Returns:
+            An ``<svg>`` element whose viewBox spans one unit per module.
+        """
+        ...
+
+    def to_png(self, symbol: QRSymbol, scale: int) -> bytes:
+        """Serialise a symbol to a PNG image without quiet zone.
+
+        Args:
+            symbol: A symbol returned by `encode`
+            scale: Size of a module in pixels
+
+        Returns:
+            PNG file content.
+        """
+        ...
+
+
+class SegnoBackend:
+    """QR code engine based on segno."""
+
+    name = "segno"
+
+    def encode(self, data: str, mask: int | str = MASK_FULL) -> QRSymbol:
+        """Encode a data string with segno, see `QRBackend.encode`."""
+        return make_qr_code(data, mask)
+
+    def to_svg(self, symbol: QRSymbol) -> str:
+        """Serialise a segno symbol with segno's SVG writer."""
+        buffer = io.BytesIO()
+        symbol.save(
+            buffer,
+            kind="svg",
+            xmldecl=False,
+            svgns=False,
+            svgclass=None,
+            lineclass=None,
+            omitsize=True,
+            border=0,
+        )
+        return buffer.getvalue().decode("utf-8").strip()
+
+    def to_png(self, symbol: QRSymbol, scale: int) -> bytes:
+        """Serialise a segno symbol with segno's PNG writer."""
+        buffer = io.BytesIO()
+        symbol.save(buffer, kind="png", scale=scale, border=0)
+        return buffer.getvalue()
+
+
+_backends: dict[str, QRBackend] = {DEFAULT_BACKEND: SegnoBackend()}
+_default_backend: str | None = None
+
+
+def register_backend(backend: QRBackend) -> None:
+    """Register a QR code engine under its name.
+
+    Args:
+        backend: The backend instance; replaces any backend of the same name
+
+    Raises:
+        TypeError: If the object does not implement the backend interface
+    """
+    if not isinstance(backend, QRBackend):
+        raise TypeError(f"{backend!r} does not implement the QRBackend interface")
+    _backends[backend.name] = backend
+
+
+def available_backends() -> list[str]:
+    """Return the names of all registered backends."""
+    return sorted(_backends)
+
+
+def set_default_backend(backend: str | QRBackend) -> None:
+    """Select the backend used when none is passed explicitly.
+
+    Args:
+        backend: Name of a registered backend or a backend instance, which
+            is registered on the fly
+
+    Raises:
+        ValueError: If no backend of that name is registered
+    """
+    global _default_backend
+
+    if not isinstance(backend, str):
+        register_backend(backend)
+        backend = backend.name
+    elif backend not in _backends:
+        raise ValueError(_unknown_backend_message(backend))
+    _default_backend = backend
+
+
+def get_backend(backend: str | QRBackend | None = None) -> QRBackend:
+    """Resolve a backend selection.
+
+    Args:
+        backend: A backend instance, the name of a registered backend, or
+            None for the process default (set with `set_default_backend`, the
+            ``CHQR_QR_BACKEND`` environment variable, or segno)
+
+    Returns:
+        The backend instance.
+
+    Raises:
+        ValueError: If no backend of that name is registered
+    """
+    if backend is None:
+        backend = _default_backend or os.environ.get(BACKEND_ENV_VAR, DEFAULT_BACKEND)
+    if not isinstance(backend, str):
+        return backend
+    try:
+        return _backends[backend]
+    except KeyError:
+        raise ValueError(_unknown_backend_message(backend)) from None
+
+
+def _unknown_backend_message(name: str) -> str:
+    """Build the error message for an unregistered backend name."""
+    return f"Unknown QR backend {name!r}, available: {', '.join(available_backends())}"
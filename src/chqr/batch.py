@@ -0,0 +1,228 @@
+"""Checkpointed, resumable batch runs into a sharded directory.
+
+`run_batch` renders bills into a `ShardedDirectorySink` and regularly
+records a checkpoint next to the output: the number of input bills done and
+the size of the manifest listing them, written atomically once the sink
+has been synced. A rerun after a crash cuts the manifest back to the
+checkpoint and resumes with the next input bill, so no bill is listed
+twice or skipped, provided the input yields the bills in the same order::
+
+    run_batch(read_bills("invoices.csv"), "out", language="de")
+
+Input bill ``n``, counted from 1, is written as ``bill-<n>-<reference>.svg``
+like `chqr.sinks.write_bills` names it (see `chqr.sinks.document_name`) and
+listed on line ``n`` of the manifest. `verify_batch` cross-checks the
+manifest, the checkpoint and the files.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple
+
+from .backends import QRBackend, get_backend
+from .masking import MASK_FULL
+from .qr_bill import QRBill
+from .sinks import MANIFEST_NAME, ShardedDirectorySink, _sync_path, document_name
+from .svg_generator import generate_svg, validate_svg_options
+
+CHECKPOINT_NAME = "checkpoint.json"
+
+
+class Checkpoint(NamedTuple):
+    """Progress of a batch run.
+
+    Attributes:
+        done: Number of input bills written, the offset to resume at
+        manifest_size: Size of the manifest listing them, in bytes
+        options: Rendering options of the run
+    """
+
+    done: int
+    manifest_size: int
+    options: dict
+
+
+class BatchResult(NamedTuple):
+    """Outcome of `run_batch`."""
+
+    total: int
+    resumed_at: int
+
+    @property
+    def written(self) -> int:
+        """Number of bills written by this run."""
+        return self.total - self.resumed_at
+
+
+@dataclass
+class VerifyReport:
+    """Outcome of `verify_batch`.
+
+    Attributes:
+        rows: Number of documents listed in the manifest
+        checkpointed: Number of bills done according to the checkpoint
+        missing: Listed documents whose file does not exist
+        corrupt: Listed documents whose file differs in size or digest
+        unlisted: Files not listed in the manifest, relative to the root
+    """
+
+    rows: int = 0
+    checkpointed: int | None = None
+    missing: list[str] = field(default_factory=list)
+    corrupt: list[str] = field(default_factory=list)
+    unlisted: list[str] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        """Whether every checkpointed bill is listed once and intact."""
+        return (
+            not self.missing
+            and not self.corrupt
+            and not self.unlisted
+            and self.checkpointed == self.rows
+        )
+
+
+def run_batch(
+    bills: Iterable[QRBill],
+    root: str | Path,
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+    checkpoint_every: int = 1000,
+    fsync: str = "close",
+) -> BatchResult:
+    """Render bills into a directory, resuming an interrupted run.
+
+    Args:
+        bills: QR-bills to render, in the same order on every run
+        root: Output directory, see `ShardedDirectorySink`
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+        checkpoint_every: Number of bills between checkpoints
+        fsync: Fsync policy of the output, see `chqr.sinks.FSYNC_POLICIES`;
+            checkpoints are as durable as the output they describe
+
+    Returns:
+        The number of bills in the input and the offset the run resumed at.
+
+    Raises:
+        ValueError: If an option is invalid, or differs from the options of
+            the run being resumed
+    """
+    validate_svg_options(qr_style, profile)
+    engine = get_backend(backend)
+    options = {
+        "language": language,
+        "mask": mask,
+        "backend": engine.name,
+        "qr_style": qr_style,
+        "profile": profile,
+    }
+    root = Path(root)
+    checkpoint = read_checkpoint(root)
+    if checkpoint is None:
+        checkpoint = Checkpoint(0, 0, options)
+    elif checkpoint.options != options:
+        raise ValueError(
+            f"Cannot resume the batch in {root} with other options: "
+            f"{checkpoint.options} were used"
+        )
+
+    row = checkpoint.done
+    with ShardedDirectorySink(
+        root, fsync=fsync, manifest_size=checkpoint.manifest_size
+    ) as sink:
+        for qr_bill in islice(bills, checkpoint.done, None):
+            svg = generate_svg(qr_bill, language, mask, engine, qr_style, profile)
+            sink.write(document_name(row + 1, qr_bill), svg.encode("utf-8"))
+            row += 1
+            if (row - checkpoint.done) % checkpoint_every == 0:
+                _write_checkpoint(root, Checkpoint(row, sink.sync(), options))
+        _write_checkpoint(root, Checkpoint(row, sink.sync(), options))
+    return BatchResult(row, checkpoint.done)
+
+
+def read_checkpoint(root: str | Path) -> Checkpoint | None:
+    """Return the checkpoint of a batch directory, None if there is none."""
+    try:
+        with open(Path(root) / CHECKPOINT_NAME, encoding="utf-8") as handle:
+            state = json.load(handle)
+    except FileNotFoundError:
+        return None
+    return Checkpoint(state["done"], state["manifest_size"], state["options"])
+
+
+def verify_batch(root: str | Path) -> VerifyReport:
+    """Cross-check the manifest of a batch directory against its files.
+
+    Every listed file must exist with the listed size and digest, every file
+    must be listed, and the manifest must end at the checkpoint.
+
+    Args:
+        root: Output directory of `run_batch`
+
+    Returns:
+        The findings.
+    """
+    root = Path(root)
+    report = VerifyReport()
+    checkpoint = read_checkpoint(root)
+    if checkpoint is not None:
+        report.checkpointed = checkpoint.done
+
+    listed = set()
+    manifest = root / MANIFEST_NAME
+    if manifest.exists():
+        with open(manifest, encoding="utf-8") as handle:
+            for line in handle:
+                entry = json.loads(line)
+                report.rows += 1
+                listed.add(entry["path"])
+                try:
+                    data = (root / entry["path"]).read_bytes()
+                except FileNotFoundError:
+                    report.missing.append(entry["path"])
+                    continue
+                digest = hashlib.sha256(data).hexdigest()
+                if len(data) != entry["size"] or digest != entry["sha256"]:
+                    report.corrupt.append(entry["path"])
+
+    for directory, _, files in os.walk(root):
+        for name in files:
+            relative = (Path(directory) / name).relative_to(root).as_posix()
+            if relative not in listed and relative not in (
+                MANIFEST_NAME,
+                CHECKPOINT_NAME,
+            ):
+                report.unlisted.append(relative)
+    report.unlisted.sort()
+    return report
+
+
+def _write_checkpoint(root: Path, checkpoint: Checkpoint) -> None:
+    """Replace the checkpoint of a batch directory atomically."""
+    state = json.dumps(checkpoint._asdict()).encode("utf-8")
+    handle, temporary = tempfile.mkstemp(dir=root, prefix=".checkpoint-")
+    try:
+        with os.fdopen(handle, "wb") as file:
+            file.write(state)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, root / CHECKPOINT_NAME)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    # The rename is durable once the directory entry is on disk
+    _sync_path(root)
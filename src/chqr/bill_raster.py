@@ -0,0 +1,194 @@
+"""Bitmap rendering of complete QR-bills.
+
+Renders the layout of `QRBill.layout`, the one `generate_svg` serialises
+(210 x 108 mm, the bill starting 3 mm below the top), straight to a 1-bit
+raster. Text is drawn by blitting glyphs of the bundled atlas, the QR code
+comes from `rasterize_qr`, so neither a font engine nor an SVG rasteriser is
+involved.
+
+Like the QR raster, every pixel row is an integer with one bit per pixel.
+Each text line is composed on its own narrow rows first and then merged into
+the page with a single OR per row.
+"""
+
+from collections.abc import Sequence
+from typing import TYPE_CHECKING
+
+from .backends import QRBackend
+from .bitmap import Raster
+from .glyphs import Bitmap, Face, get_artwork, get_face
+from .layout import Layout, Line, QRCode, Symbol, TextRun
+from .masking import MASK_FULL
+from .qr_raster import mm_to_pixels, rasterize_qr
+
+if TYPE_CHECKING:
+    from .qr_bill import QRBill
+
+
+def rasterize_bill(
+    qr_bill: "QRBill",
+    language: str = "en",
+    dpi: int = 300,
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+) -> Raster:
+    """Render a QR-bill to a 1-bit raster.
+
+    Args:
+        qr_bill: The QRBill instance
+        language: Language code (en, de, fr, it)
+        dpi: Output resolution, one of the atlas resolutions (300, 600)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+
+    Returns:
+        The raster of the 210 x 108 mm bill.
+
+    Raises:
+        ValueError: If the glyph atlas does not cover the resolution
+    """
+    return rasterize_layout(qr_bill.layout(language, mask, backend), dpi)
+
+
+def rasterize_layout(layout: Layout, dpi: int = 300) -> Raster:
+    """Render a layout to a 1-bit raster, see `rasterize_bill`."""
+    page = _Page(layout.width, layout.height, dpi)
+    for element in layout.flatten():
+        if isinstance(element, TextRun):
+            face = get_face(element.size, element.bold, dpi)
+            page.text(face, element.text, element.x, element.y, element.anchor == "end")
+        elif isinstance(element, Line):
+            page.line(element)
+        elif isinstance(element, Symbol):
+            bitmap = get_artwork(element.name, dpi)
+            page.blit(bitmap, page.px(element.x), page.px(element.y))
+        elif isinstance(element, QRCode):
+            raster = rasterize_qr(element.symbol.matrix, dpi)
+            page.paste(raster, page.px(element.x), page.px(element.y))
+    return page.to_raster()
+
+
+def render_bill_bitmap(
+    qr_bill: "QRBill",
+    format: str = "png",
+    dpi: int = 300,
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+) -> bytes:
+    """Render a QR-bill as a 1-bit image file, see `rasterize_bill`.
+
+    Args:
+        qr_bill: The QRBill instance
+        format: "png" (default) or "pbm"
+        dpi: Output resolution, one of the atlas resolutions (300, 600)
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+
+    Returns:
+        Image file content.
+
+    Raises:
+        ValueError: If the format is unknown or the resolution not available
+    """
+    return rasterize_bill(qr_bill, language, dpi, mask, backend).encode(format)
+
+
+class _Page:
+    """A white 1-bit page to draw on."""
+
+    def __init__(self, width: float, height: float, dpi: int):
+        self.dpi = dpi
+        self.width = mm_to_pixels(width, dpi)
+        self.height = mm_to_pixels(height, dpi)
+        self.rows = [0] * self.height
+        self._scale = dpi / 25.4
+
+    def px(self, mm: float) -> int:
+        """Convert millimetres to whole pixels."""
+        return round(mm * self._scale)
+
+    def line(self, line: Line) -> None:
+        """Draw a horizontal or vertical line."""
+        x1, y1, x2, y2 = line.x1, line.y1, line.x2, line.y2
+        thickness = max(1, self.px(line.width))
+        if y1 == y2:
+            top = round(y1 * self._scale - thickness / 2)
+            self.fill(self.px(x1), top, self.px(x2), top + thickness)
+        else:
+            left = round(x1 * self._scale - thickness / 2)
+            self.fill(left, self.px(y1), left + thickness, self.px(y2))
+
+    def fill(self, left: int, top: int, right: int, bottom: int) -> None:
+        """Paint a black rectangle (pixels), clipped to the page."""
+        left, right = max(0, left), min(self.width, right)
+        if left >= right:
+            return
+        bits = ((1 << (right - left)) - 1) << (self.width - right)
+        for y in range(max(0, top), min(self.height, bottom)):
+            self.rows[y] |= bits
+
+    def blit(self, bitmap: Bitmap, x: int, y: int) -> None:
+        """Draw the dark pixels of a bitmap placed at a point (pixels)."""
+        self.blit_rows(bitmap.rows, bitmap.width, x + bitmap.left, y + bitmap.top)
+
+    def blit_rows(self, rows: Sequence[int], width: int, x: int, y: int) -> None:
+        """Draw the dark pixels of bit rows with their top left at x, y."""
+        shift = self.width - x - width
+        full = (1 << self.width) - 1
+        for i, row in enumerate(rows, y):
+            if 0 <= i < self.height:
+                bits = row << shift if shift >= 0 else row >> -shift
+                self.rows[i] |= bits & full if x < 0 else bits
+
+    def paste(self, raster: Raster, x: int, y: int) -> None:
+        """Draw a raster at a point (pixels), replacing what lies beneath."""
+        shift = self.width - x - raster.width
+        padding = -raster.width % 8
+        clear = ~(((1 << raster.width) - 1) << shift)
+        for i, row in enumerate(raster.rows, y):
+            if 0 <= i < self.height:
+                bits = int.from_bytes(row, "big") >> padding
+                self.rows[i] = self.rows[i] & clear | bits << shift
+
+    def text(
+        self,
+        face: Face,
+        text: str,
+        x: float,
+        baseline: float,
+        align_right: bool = False,
+    ) -> None:
+        """Draw a single line of text, positions in mm."""
+        pen = x * self._scale
+        if align_right:
+            pen -= face.text_width(text)
+
+        # Compose the line on narrow rows relative to its bounding box
+        placed = []
+        for char in text:
+            glyph = face.glyph(char)
+            if glyph.bitmap.rows:
+                placed.append((round(pen) + glyph.bitmap.left, glyph.bitmap))
+            pen += glyph.advance
+        if not placed:
+            return
+        left = min(gx for gx, _ in placed)
+        right = max(gx + bitmap.width for gx, bitmap in placed)
+        top = min(bitmap.top for _, bitmap in placed)
+        bottom = max(bitmap.top + len(bitmap.rows) for _, bitmap in placed)
+        rows = [0] * (bottom - top)
+        for gx, bitmap in placed:
+            shift = right - gx - bitmap.width
+            for i, row in enumerate(bitmap.rows, bitmap.top - top):
+                rows[i] |= row << shift
+
+        self.blit_rows(rows, right - left, left, round(baseline * self._scale) + top)
+
+    def to_raster(self) -> Raster:
+        """Pack the page into a raster."""
+        padding = -self.width % 8
+        stride = (self.width + padding) // 8
+        rows = [(row << padding).to_bytes(stride, "big") for row in self.rows]
+        return Raster(rows, self.width, self.height, self.dpi)
@@ -0,0 +1,262 @@
+"""Content-addressed cache of rendered bills for incremental re-runs.
+
+The SVG of a bill is determined by its QR code data string, the language,
+the output options and the version of chqr. `fingerprint` hashes these, and
+`RenderCache` stores rendered SVGs under their fingerprint in memory and,
+optionally, on disk, so that a restarted or re-issued run only encodes and
+renders the bills which changed::
+
+    cache = RenderCache("cache")
+    for qr_bill, svg in render_cached(bills, cache, language="de"):
+        ...
+    print(cache.stats.summary())
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from importlib import metadata
+from pathlib import Path
+
+from .backends import QRBackend, get_backend
+from .masking import MASK_FULL
+from .qr_bill import QRBill
+from .svg_generator import SVG_TEMPLATE_VERSION, generate_svg, validate_svg_options
+
+try:
+    CHQR_VERSION = metadata.version("chqr")
+except metadata.PackageNotFoundError:  # pragma: no cover - source checkout
+    CHQR_VERSION = "unknown"
+
+
+def fingerprint(
+    qr_bill: QRBill,
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
+    """Return the stable fingerprint of a bill's SVG.
+
+    Args:
+        qr_bill: The QRBill instance
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+
+    Returns:
+        Hex SHA-256 digest of the data string, language, options and the
+        versions of chqr and its SVG template.
+    """
+    key = [
+        CHQR_VERSION,
+        SVG_TEMPLATE_VERSION,
+        qr_bill.build_data_string(),
+        language,
+        str(mask),
+        get_backend(backend).name,
+        qr_style,
+        profile,
+    ]
+    encoded = json.dumps(key, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+@dataclass
+class CacheStats:
+    """Lookups of a `RenderCache` by outcome."""
+
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Number of lookups served from the cache."""
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def lookups(self) -> int:
+        """Number of lookups."""
+        return self.reused + self.misses
+
+    def summary(self) -> str:
+        """Describe the reuse, e.g. for the log of a run."""
+        share = self.reused / self.lookups if self.lookups else 0
+        return (
+            f"reused {self.reused} of {self.lookups} bills ({share:.1%}; "
+            f"{self.memory_hits} from memory, {self.disk_hits} from disk), "
+            f"rendered {self.misses}"
+        )
+
+
+class RenderCache:
+    """Rendered documents by fingerprint, in memory in front of a disk tier.
+
+    The memory tier keeps the most recently used documents. The disk tier
+    stores one file per fingerprint, ``<directory>/ab/<fingerprint>``, written
+    atomically, and is shared by successive runs.
+
+    Args:
+        directory: Disk tier, created if missing; memory only if None
+        memory_entries: Documents kept in memory at most
+    """
+
+    def __init__(self, directory: str | Path | None = None, memory_entries: int = 1024):
+        self.directory = Path(directory) if directory is not None else None
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+        self.memory_entries = memory_entries
+        self.stats = CacheStats()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._memory:
+            return True
+        return self.directory is not None and self._path(key).exists()
+
+    def get(self, key: str) -> bytes | None:
+        """Return the document of a fingerprint, or None, counting the lookup."""
+        data = self._memory.get(key)
+        if data is not None:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return data
+        if self.directory is not None:
+            try:
+                data = self._path(key).read_bytes()
+            except FileNotFoundError:
+                pass
+            else:
+                self._remember(key, data)
+                self.stats.disk_hits += 1
+                return data
+        self.stats.misses += 1
+        return None
+
+    def check(self, key: str) -> bool:
+        """Tell whether a fingerprint is cached, counting the lookup like `get`.
+
+        Unlike `get`, a document on disk is neither read nor kept in memory.
+        """
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.stats.memory_hits += 1
+            return True
+        if self.directory is not None and self._path(key).exists():
+            self.stats.disk_hits += 1
+            return True
+        self.stats.misses += 1
+        return False
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store the document of a fingerprint in both tiers."""
+        self._remember(key, data)
+        if self.directory is None:
+            return
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        handle, temporary = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(handle, "wb") as file:
+                file.write(data)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def render(
+        self,
+        qr_bill: QRBill,
+        language: str = "en",
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        qr_style: str = "path",
+        profile: str = "pretty",
+    ) -> str:
+        """Return the SVG of a bill, rendering it only on a cache miss.
+
+        Arguments are those of `fingerprint`.
+
+        Raises:
+            ValueError: If the QR style or the profile is unknown
+        """
+        validate_svg_options(qr_style, profile)
+        engine = get_backend(backend)
+        key = fingerprint(qr_bill, language, mask, engine, qr_style, profile)
+        data = self.get(key)
+        if data is not None:
+            return data.decode("utf-8")
+        svg = generate_svg(qr_bill, language, mask, engine, qr_style, profile)
+        self.put(key, svg.encode("utf-8"))
+        return svg
+
+    def clear(self) -> None:
+        """Empty the memory tier; the disk tier is left in place."""
+        self._memory.clear()
+
+    def _remember(self, key: str, data: bytes) -> None:
+        """Keep a document in memory, evicting the least recently used."""
+        self._memory[key] = data
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        """Return the disk tier file of a fingerprint."""
+        return self.directory / key[:2] / key
+
+
+def render_cached(
+    bills: Iterable[QRBill],
+    cache: RenderCache,
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+    incremental: bool = False,
+) -> Iterator[tuple[QRBill, str]]:
+    """Render bills through a cache, lazily.
+
+    Args:
+        bills: QR-bills to render
+        cache: The render cache, whose `stats` count the reuse
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+        incremental: Only yield the bills whose fingerprint is not cached,
+            i.e. changed since an earlier run with the same cache; unchanged
+            bills are counted as reused without being read
+
+    Yields:
+        The bills with their SVG.
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+    validate_svg_options(qr_style, profile)
+    engine = get_backend(backend)
+    for qr_bill in bills:
+        key = fingerprint(qr_bill, language, mask, engine, qr_style, profile)
+        if incremental:
+            if cache.check(key):
+                continue
+            data = None
+        else:
+            data = cache.get(key)
+        if data is None:
+            svg = generate_svg(qr_bill, language, mask, engine, qr_style, profile)
+            cache.put(key, svg.encode("utf-8"))
+        else:
+            svg = data.decode("utf-8")
+        yield qr_bill, svg
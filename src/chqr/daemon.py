@@ -0,0 +1,431 @@
+"""Render daemon on a Unix domain socket, speaking a compact binary protocol.
+
+Local batch clients avoid the HTTP and JSON overhead of `chqr.serve` by
+talking to the daemon over one persistent connection::
+
+    python -m chqr.daemon --socket /run/chqr.sock --workers 4
+
+Requests and responses are length-prefixed frames (big-endian)::
+
+    request:  u32 frame length, u32 request id, u8 format, u8 language,
+              u8 mask, u8 QR style, u8 profile, u16 dpi,
+              QR code data string (UTF-8)
+    response: u32 frame length, u32 request id, u8 status,
+              document, or error message (UTF-8)
+
+The bill record is its QR code data string: the fields of the bill in the
+order of the specification, separated by newlines, which fields cannot
+contain. The option bytes index `FORMATS`, `LANGUAGES`, `QR_STYLES` and
+`PROFILES`; the mask byte is a fixed mask 0-7, `MASK_CODE_FAST` or
+`MASK_CODE_FULL`. A status other than `STATUS_OK` comes with an error
+message.
+
+Clients may pipeline: send any number of requests without waiting for the
+responses, which come back in request order. The daemon renders up to
+`MAX_PIPELINED` requests of a connection concurrently and stops reading
+from a connection whose responses are not read. Rendering uses a
+`chqr.serve.RenderService`, with its warm worker processes, cache and
+coalescing of identical requests.
+"""
+
+import argparse
+import os
+import queue
+import socket
+import socketserver
+import stat
+import struct
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import Future
+from pathlib import Path
+from typing import TypeVar
+
+from .backends import get_backend
+from .exceptions import ValidationError
+from .masking import MASK_FAST, MASK_FULL
+from .qr_svg import QR_STYLES
+from .serve import RenderOptions, RenderService, document_key
+from .svg_output import PROFILES
+
+FORMATS = ("svg", "html", "png", "pbm")
+LANGUAGES = ("en", "de", "fr", "it")
+MASK_CODE_FAST = 0xFE
+MASK_CODE_FULL = 0xFF
+
+STATUS_OK = 0
+STATUS_INVALID = 1  # The bill is invalid or cannot be rendered as requested
+STATUS_BAD_REQUEST = 2  # The request holds an unknown option code
+STATUS_ERROR = 3  # The daemon failed, e.g. a worker process died
+
+# Largest accepted request frame in bytes
+MAX_FRAME_SIZE = 64 * 1024
+
+# Requests of a connection rendered concurrently at most
+MAX_PIPELINED = 256
+
+_LENGTH = struct.Struct(">I")
+_REQUEST = struct.Struct(">IBBBBBH")
+_RESPONSE = struct.Struct(">IB")
+
+_T = TypeVar("_T")
+
+
+def pack_request(request_id: int, data: str, options: RenderOptions) -> bytes:
+    """Encode a request frame.
+
+    Args:
+        request_id: Number echoed in the response
+        data: QR code data string of the bill
+        options: Format and options of the document; the backend is the
+            daemon's
+
+    Raises:
+        ValueError: If an option cannot be encoded
+    """
+    mask = options.mask
+    if mask == MASK_FULL:
+        mask = MASK_CODE_FULL
+    elif mask == MASK_FAST:
+        mask = MASK_CODE_FAST
+    try:
+        fields = _REQUEST.pack(
+            request_id,
+            FORMATS.index(options.format),
+            LANGUAGES.index(options.language),
+            mask,
+            QR_STYLES.index(options.qr_style),
+            PROFILES.index(options.profile),
+            options.dpi,
+        )
+    except (ValueError, struct.error) as error:
+        raise ValueError(f"Cannot encode options {options}: {error}") from None
+    body = fields + data.encode("utf-8")
+    return _LENGTH.pack(len(body)) + body
+
+
+def unpack_request(frame: bytes, backend: str) -> tuple[int, str, RenderOptions]:
+    """Decode a request frame without its length prefix.
+
+    Args:
+        frame: The frame
+        backend: Backend name to put into the options
+
+    Returns:
+        The request id, the data string and the options.
+
+    Raises:
+        ValueError: If the frame holds an unknown option code or invalid
+            UTF-8
+    """
+    request_id, format, language, mask, qr_style, profile, dpi = _REQUEST.unpack_from(
+        frame
+    )
+    mask = {MASK_CODE_FULL: MASK_FULL, MASK_CODE_FAST: MASK_FAST}.get(mask, mask)
+    try:
+        if isinstance(mask, int) and mask > 7:
+            raise IndexError
+        options = RenderOptions(
+            FORMATS[format],
+            LANGUAGES[language],
+            mask,
+            backend,
+            QR_STYLES[qr_style],
+            PROFILES[profile],
+            dpi,
+        )
+    except IndexError:
+        raise ValueError(f"Unknown option code in request {request_id}") from None
+    try:
+        data = frame[_REQUEST.size :].decode("utf-8")
+    except UnicodeDecodeError:
+        raise ValueError(f"Invalid UTF-8 in request {request_id}") from None
+    return request_id, data, options
+
+
+def pack_response(request_id: int, status: int, body: bytes) -> bytes:
+    """Encode a response frame."""
+    return (
+        _LENGTH.pack(_RESPONSE.size + len(body))
+        + _RESPONSE.pack(request_id, status)
+        + body
+    )
+
+
+class RenderDaemon(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server of a `RenderService`, one thread per connection.
+
+    Args:
+        path: Socket path; a stale socket left by a daemon which is no
+            longer running is replaced
+        service: The render service
+
+    Raises:
+        OSError: If the path is in use, e.g. by a running daemon
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str | Path, service: RenderService):
+        self.path = Path(path)
+        self._bound = False
+        if _is_stale_socket(self.path):
+            self.path.unlink()
+        super().__init__(str(self.path), _Connection)
+        self.service = service
+        self.backend = get_backend().name
+
+    def server_bind(self) -> None:
+        super().server_bind()
+        self._bound = True
+
+    def server_close(self) -> None:
+        """Close the socket and remove its file, unless binding failed."""
+        super().server_close()
+        if self._bound:
+            self.path.unlink(missing_ok=True)
+
+
+class _Connection(socketserver.StreamRequestHandler):
+    """Connection of a client, read and answered in pipelined fashion."""
+
+    server: RenderDaemon
+    wbufsize = 64 * 1024
+
+    def handle(self) -> None:
+        responses: queue.Queue = queue.Queue(MAX_PIPELINED)
+        writer = threading.Thread(target=self._write, args=(responses,))
+        writer.start()
+        try:
+            while frame := self._read_frame():
+                responses.put(self._submit(frame))
+        finally:
+            responses.put(None)
+            writer.join()
+
+    def _read_frame(self) -> bytes | None:
+        """Read the next request frame, None at the end of the connection."""
+        header = self.rfile.read(_LENGTH.size)
+        if len(header) < _LENGTH.size:
+            return None
+        (length,) = _LENGTH.unpack(header)
+        if not _REQUEST.size <= length <= MAX_FRAME_SIZE:
+            # Framing is lost, end the connection
+            return None
+        frame = self.rfile.read(length)
+        return frame if len(frame) == length else None
+
+    def _submit(self, frame: bytes) -> tuple[int, Future | None, str]:
+        """Start rendering a request."""
+        try:
+            request_id, data, options = unpack_request(frame, self.server.backend)
+        except ValueError as error:
+            return _REQUEST.unpack_from(frame)[0], None, str(error)
+        key = document_key(data, options)
+        return request_id, self.server.service.submit(key, data, options), ""
+
+    def _write(self, responses: queue.Queue) -> None:
+        """Send the responses in request order as they are rendered."""
+        broken = False
+        while (response := responses.get()) is not None:
+            if broken:
+                continue
+            request_id, future, message = response
+            if future is None:
+                frame = pack_response(
+                    request_id, STATUS_BAD_REQUEST, message.encode("utf-8")
+                )
+            else:
+                try:
+                    frame = pack_response(request_id, STATUS_OK, future.result())
+                except (ValidationError, ValueError) as error:
+                    frame = pack_response(
+                        request_id, STATUS_INVALID, str(error).encode("utf-8")
+                    )
+                except Exception as error:
+                    frame = pack_response(
+                        request_id, STATUS_ERROR, repr(error).encode("utf-8")
+                    )
+            try:
+                self.wfile.write(frame)
+                if responses.empty():
+                    self.wfile.flush()
+            except OSError:
+                # The client is gone, drain the queue so the reader finishes
+                broken = True
+
+
+class DaemonClient:
+    """Client of a `RenderDaemon`.
+
+    Args:
+        path: Socket path of the daemon
+        window: Requests sent ahead of the responses read at most; requests
+            are sent, and responses read, in batches of half of it. The
+            daemon queues at most `MAX_PIPELINED` responses, so a larger
+            window would leave both ends waiting for the other.
+
+    Raises:
+        OSError: If the daemon cannot be reached
+        ValueError: If the window is not between 1 and `MAX_PIPELINED`
+    """
+
+    def __init__(self, path: str | Path, window: int = MAX_PIPELINED):
+        if not 1 <= window <= MAX_PIPELINED:
+            raise ValueError(
+                f"The window must be between 1 and {MAX_PIPELINED}, got {window}"
+            )
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            self._socket.connect(str(path))
+        except OSError:
+            self._socket.close()
+            raise
+        self._reader = self._socket.makefile("rb")
+        self.window = window
+        # Request ids are unique per connection; sent requests are answered
+        # in order
+        self._next_id = 0
+        self._outstanding: deque[int] = deque()
+
+    def render(self, data: str, options: RenderOptions = RenderOptions()) -> bytes:
+        """Render a single bill.
+
+        Raises:
+            ValidationError: If the bill is invalid or cannot be rendered
+            ValueError: If the options are invalid
+        """
+        return next(self.render_many([(data, options)]))
+
+    def render_many(
+        self, requests: Iterable[tuple[str, RenderOptions]]
+    ) -> Iterator[bytes]:
+        """Render bills, pipelining the requests.
+
+        Args:
+            requests: Data strings of the bills with the options
+
+        Yields:
+            The documents, in request order.
+
+        Raises:
+            ValidationError: When the response of an invalid bill is reached
+            ValueError: If the options are invalid
+            RuntimeError: If the daemon failed to render a bill
+        """
+        half = max(1, self.window // 2)
+        batch: list[bytes] = []
+        ids: list[int] = []
+        try:
+            for data, options in requests:
+                batch.append(pack_request(self._next_id, data, options))
+                ids.append(self._next_id)
+                self._next_id = (self._next_id + 1) % 2**32
+                if len(batch) == half:
+                    self._send(batch, ids)
+                    batch, ids = [], []
+                    while len(self._outstanding) > half:
+                        yield self._receive()
+            self._send(batch, ids)
+            while self._outstanding:
+                yield self._receive()
+        finally:
+            # Stopped early, e.g. by an invalid bill: read the responses
+            # left on the socket, so they are not taken for later ones
+            self._drain()
+
+    def close(self) -> None:
+        """Close the connection."""
+        self._outstanding.clear()
+        self._reader.close()
+        self._socket.close()
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _send(self, batch: list[bytes], ids: list[int]) -> None:
+        """Send request frames and expect their responses."""
+        if batch:
+            self._socket.sendall(b"".join(batch))
+            self._outstanding.extend(ids)
+
+    def _drain(self) -> None:
+        """Read and discard the responses to all sent requests."""
+        while self._outstanding:
+            try:
+                self._receive()
+            except (ValidationError, ValueError, RuntimeError):
+                pass
+            except OSError:
+                # The connection is closed, nothing is left to read
+                break
+
+    def _receive(self) -> bytes:
+        """Read the next response and return its document."""
+        header = self._reader.read(_LENGTH.size)
+        (length,) = _LENGTH.unpack(header) if len(header) == _LENGTH.size else (0,)
+        frame = self._reader.read(length)
+        if length < _RESPONSE.size or len(frame) < length:
+            self.close()
+            raise ConnectionError("The daemon closed the connection")
+        request_id, status = _RESPONSE.unpack_from(frame)
+        expected = self._outstanding.popleft()
+        if request_id != expected:
+            self.close()
+            raise ConnectionError(
+                f"Response to request {request_id} received, expected {expected}"
+            )
+        body = frame[_RESPONSE.size :]
+        if status == STATUS_OK:
+            return body
+        message = body.decode("utf-8")
+        if status == STATUS_INVALID:
+            raise ValidationError(message)
+        if status == STATUS_BAD_REQUEST:
+            raise ValueError(message)
+        raise RuntimeError(message)
+
+
+def _is_stale_socket(path: Path) -> bool:
+    """Tell whether a path is a socket nobody listens on."""
+    try:
+        if not stat.S_ISSOCK(path.stat().st_mode):
+            return False
+    except FileNotFoundError:
+        return False
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except ConnectionRefusedError:
+            return True
+    return False
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the daemon until interrupted."""
+    parser = argparse.ArgumentParser(
+        prog="python -m chqr.daemon",
+        description="Render QR-bills for local clients over a Unix socket.",
+    )
+    parser.add_argument("--socket", required=True, help="socket path")
+    parser.add_argument("--workers", type=int, help="worker processes")
+    parser.add_argument("--cache-size", type=int, default=1024, help="cached documents")
+    args = parser.parse_args(argv)
+
+    service = RenderService(workers=args.workers, cache_size=args.cache_size)
+    with RenderDaemon(args.socket, service) as daemon:
+        print(f"Serving QR-bills on {daemon.path} (pid {os.getpid()})", flush=True)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
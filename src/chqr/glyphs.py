@@ -0,0 +1,224 @@
+"""Pre-rasterised glyph atlas for bitmap output.
+
+The atlas bundled in ``chqr/data`` holds 1-bit bitmaps of every character of
+the Swiss Payment Standards character set for the font faces used on a
+QR-bill, at fixed print resolutions, plus the scissors artwork. Rendering
+text is then a matter of blitting bitmaps: no font engine is needed at
+runtime. The atlas is built with ``tools/build_glyph_atlas.py``.
+
+Atlas format (zlib-compressed, big-endian)::
+
+    magic "CQGA", u16 version, u16 face count, u16 artwork count
+    face:    u16 dpi, u16 size in tenths of a point, u8 bold, u16 glyph count
+    glyph:   u32 code point, i32 advance in 1/64 pixel, bitmap
+    artwork: u8 name length, name, u16 dpi, bitmap
+    bitmap:  i16 left, i16 top, u16 width, u16 height, packed rows
+
+Glyph bitmaps are positioned relative to the pen on the baseline, artwork
+relative to its placement point; ``top`` is the offset of the first row.
+"""
+
+import struct
+import zlib
+from functools import lru_cache
+from importlib import resources
+from typing import NamedTuple
+
+ATLAS_MAGIC = b"CQGA"
+ATLAS_VERSION = 1
+ATLAS_RESOURCE = "glyphs.bin"
+
+# Resolutions and (size in pt, bold) faces of the bundled atlas
+ATLAS_DPI = (300, 600)
+ATLAS_FACES = ((6, True), (8, False), (8, True), (10, False), (11, True))
+
+# Swiss Payment Standards character set
+CHARSET = "".join(
+    chr(code)
+    for code in (
+        *range(0x20, 0x7F),
+        *range(0xA0, 0x180),
+        0x218,
+        0x219,
+        0x21A,
+        0x21B,
+        0x20AC,
+    )
+)
+
+# Drawn in place of characters outside of the character set
+REPLACEMENT_CHARACTER = "?"
+
+
+class Bitmap(NamedTuple):
+    """A 1-bit bitmap with its offset to the placement point, in pixels.
+
+    Every row is an integer of ``width`` bits, the leftmost pixel being the
+    most significant bit.
+    """
+
+    left: int
+    top: int
+    width: int
+    rows: tuple[int, ...]
+
+
+class Glyph(NamedTuple):
+    """A rasterised character."""
+
+    advance: float
+    bitmap: Bitmap
+
+
+class Face(NamedTuple):
+    """The glyphs of a font face at a given size and resolution."""
+
+    dpi: int
+    size: float
+    bold: bool
+    glyphs: dict[str, Glyph]
+
+    def glyph(self, char: str) -> Glyph:
+        """Return the glyph of a character, or of the replacement character."""
+        glyph = self.glyphs.get(char)
+        if glyph is None:
+            return self.glyphs[REPLACEMENT_CHARACTER]
+        return glyph
+
+    def text_width(self, text: str) -> float:
+        """Return the advance width of a text in pixels."""
+        return sum(self.glyph(char).advance for char in text)
+
+
+class Atlas(NamedTuple):
+    """Font faces and artwork of a glyph atlas."""
+
+    faces: dict[tuple[int, float, bool], Face]
+    artwork: dict[tuple[str, int], Bitmap]
+
+
+def get_face(size: float, bold: bool, dpi: int) -> Face:
+    """Return a face of the bundled atlas.
+
+    Args:
+        size: Font size in points
+        bold: Whether to use the bold face
+        dpi: Output resolution in pixels per inch
+
+    Returns:
+        The face.
+
+    Raises:
+        ValueError: If the atlas has no such face
+    """
+    try:
+        return load_atlas().faces[(dpi, size, bold)]
+    except KeyError:
+        weight = "bold" if bold else "regular"
+        raise ValueError(
+            f"The glyph atlas has no {size} pt {weight} face at {dpi} dpi, "
+            f"available resolutions: {', '.join(map(str, ATLAS_DPI))}"
+        ) from None
+
+
+def get_artwork(name: str, dpi: int) -> Bitmap:
+    """Return artwork of the bundled atlas, see `get_face` for errors."""
+    try:
+        return load_atlas().artwork[(name, dpi)]
+    except KeyError:
+        raise ValueError(f"The glyph atlas has no {name!r} at {dpi} dpi") from None
+
+
+@lru_cache(maxsize=None)
+def load_atlas() -> Atlas:
+    """Load the atlas bundled with the package (cached)."""
+    data = resources.files("chqr").joinpath("data", ATLAS_RESOURCE).read_bytes()
+    return decode_atlas(data)
+
+
+def decode_atlas(data: bytes) -> Atlas:
+    """Decode a glyph atlas.
+
+    Args:
+        data: Atlas file content
+
+    Returns:
+        The decoded atlas.
+
+    Raises:
+        ValueError: If the data is not an atlas of a supported version
+    """
+    payload = zlib.decompress(data)
+    magic, version, face_count, artwork_count = struct.unpack_from(">4sHHH", payload)
+    if magic != ATLAS_MAGIC or version != ATLAS_VERSION:
+        raise ValueError("Unsupported glyph atlas")
+    offset = 10
+
+    faces = {}
+    for _ in range(face_count):
+        dpi, size, bold, glyph_count = struct.unpack_from(">HHBH", payload, offset)
+        offset += 7
+        glyphs = {}
+        for _ in range(glyph_count):
+            code, advance = struct.unpack_from(">Ii", payload, offset)
+            bitmap, offset = _decode_bitmap(payload, offset + 8)
+            glyphs[chr(code)] = Glyph(advance / 64, bitmap)
+        face = Face(dpi, size / 10, bool(bold), glyphs)
+        faces[(face.dpi, face.size, face.bold)] = face
+
+    artwork = {}
+    for _ in range(artwork_count):
+        length = payload[offset]
+        name = payload[offset + 1 : offset + 1 + length].decode("ascii")
+        (dpi,) = struct.unpack_from(">H", payload, offset + 1 + length)
+        bitmap, offset = _decode_bitmap(payload, offset + 3 + length)
+        artwork[(name, dpi)] = bitmap
+
+    return Atlas(faces, artwork)
+
+
+def encode_atlas(
+    faces: list[Face], artwork: dict[tuple[str, int], Bitmap], level: int = 9
+) -> bytes:
+    """Encode font faces and artwork as a glyph atlas, see `decode_atlas`."""
+    parts = [
+        struct.pack(">4sHHH", ATLAS_MAGIC, ATLAS_VERSION, len(faces), len(artwork))
+    ]
+    for face in faces:
+        size = round(face.size * 10)
+        parts.append(struct.pack(">HHBH", face.dpi, size, face.bold, len(face.glyphs)))
+        for char, glyph in face.glyphs.items():
+            parts.append(struct.pack(">Ii", ord(char), round(glyph.advance * 64)))
+            parts.append(_encode_bitmap(glyph.bitmap))
+    for (name, dpi), bitmap in artwork.items():
+        encoded = name.encode("ascii")
+        parts.append(bytes([len(encoded)]) + encoded + struct.pack(">H", dpi))
+        parts.append(_encode_bitmap(bitmap))
+    return zlib.compress(b"".join(parts), level)
+
+
+def _decode_bitmap(payload: bytes, offset: int) -> tuple[Bitmap, int]:
+    """Decode a bitmap, returning it with the offset of the next record."""
+    left, top, width, height = struct.unpack_from(">hhHH", payload, offset)
+    offset += 8
+    stride = (width + 7) // 8
+    if not stride:
+        return Bitmap(left, top, width, ()), offset
+    padding = stride * 8 - width
+    rows = tuple(
+        int.from_bytes(payload[start : start + stride], "big") >> padding
+        for start in range(offset, offset + height * stride, stride)
+    )
+    return Bitmap(left, top, width, rows), offset + height * stride
+
+
+def _encode_bitmap(bitmap: Bitmap) -> bytes:
+    """Encode a bitmap with its rows packed to whole bytes."""
+    stride = (bitmap.width + 7) // 8
+    padding = stride * 8 - bitmap.width
+    header = struct.pack(
+        ">hhHH", bitmap.left, bitmap.top, bitmap.width, len(bitmap.rows)
+    )
+    return header + b"".join(
+        (row << padding).to_bytes(stride, "big") for row in bitmap.rows
+    )
@@ -0,0 +1,301 @@
+"""HTML generation for Swiss QR-bills.
+
+A document holds any number of bills. The stylesheet and the static SVG
+artwork (scissors, Swiss cross) are written once in the document head, each
+bill is a small block of HTML with its QR code as an inline SVG path. The
+document is produced in chunks, so it can be streamed to a file or an HTTP
+response while bills are still being rendered.
+"""
+
+import io
+from collections.abc import Iterable, Iterator
+from typing import TYPE_CHECKING, NamedTuple, TextIO
+
+from .backends import QRBackend, get_backend
+from .layout import TRANSLATIONS, BlockLine, QRCode, Section, TextBlock, TextRun
+from .qr_svg import qr_path_svg
+from .svg_generator import (
+    SCISSORS_PATHS,
+    SCISSORS_SIDE_ID,
+    SCISSORS_TOP_ID,
+    SWISS_CROSS,
+    SWISS_CROSS_ID,
+    escape_xml,
+)
+
+if TYPE_CHECKING:
+    from .qr_bill import QRBill
+
+
+# Font sizes and line spacing from the style guide
+STYLESHEET = """\
+.qr-bill{position:relative;width:210mm;height:105mm;margin-top:3mm;\
+box-sizing:border-box;border-top:.1mm solid #000;background:#fff;color:#000;\
+font-family:Arial,Helvetica,"Liberation Sans",sans-serif;\
+break-inside:avoid;page-break-inside:avoid}
+.qr-bill h1,.qr-bill h2,.qr-bill p{margin:0}
+.qr-bill h1{font-size:11pt;font-weight:bold;line-height:1}
+.qr-bill h2{font-weight:bold}
+.qr-bill section{position:absolute;top:0;height:105mm;box-sizing:border-box;\
+padding:5mm}
+.qr-bill .receipt{left:0;width:62mm;border-right:.1mm solid #000}
+.qr-bill .payment{left:62mm;width:148mm}
+.qr-bill .info,.qr-bill .amount,.qr-bill .qr,.qr-bill .acceptance{\
+position:absolute}
+.qr-bill .receipt .info{left:5mm;top:12mm;width:52mm}
+.qr-bill .receipt h2{font-size:6pt;line-height:9pt;margin-top:9pt}
+.qr-bill .receipt p{font-size:8pt;line-height:9pt}
+.qr-bill .payment .info{left:56mm;top:5mm;width:87mm}
+.qr-bill .payment h2{font-size:8pt;line-height:11pt;margin-top:11pt}
+.qr-bill .payment .info h2:first-child{margin-top:0}
+.qr-bill .payment p{font-size:10pt;line-height:11pt}
+.qr-bill .qr{left:5mm;top:17mm;width:46mm;height:46mm}
+.qr-bill .amount{left:5mm;top:66mm;display:flex;gap:5mm}
+.qr-bill .amount div{min-width:17mm}
+.qr-bill .amount h2{margin-top:0}
+.qr-bill .acceptance{right:5mm;top:82mm;font-size:6pt;font-weight:bold}
+.qr-bill .scissors{position:absolute;width:3mm;height:3mm;background:#fff}
+.qr-bill .scissors.top{left:202mm;top:-1.5mm}
+.qr-bill .scissors.side{left:60.5mm;top:99mm}"""
+
+
+def generate_html(
+    qr_bills: Iterable["QRBill"],
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    title: str = "QR-bills",
+) -> str:
+    """Generate an HTML document holding the given QR-bills.
+
+    Args:
+        qr_bills: The QRBill instances, in order
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        title: Document title
+
+    Returns:
+        HTML string
+    """
+    return "".join(iter_html(qr_bills, language, mask, backend, title))
+
+
+def write_html(
+    qr_bills: Iterable["QRBill"],
+    file: TextIO | io.BufferedIOBase | io.RawIOBase,
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    title: str = "QR-bills",
+) -> int:
+    """Stream an HTML document into a file object.
+
+    Each bill is written as soon as it is rendered, binary targets (e.g. the
+    ``wfile`` of an HTTP request handler) receive UTF-8 encoded bytes.
+
+    Args:
+        qr_bills: The QRBill instances, in order
+        file: Text or binary file object
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        title: Document title
+
+    Returns:
+        Number of bills written.
+    """
+    binary = isinstance(file, (io.BufferedIOBase, io.RawIOBase))
+    written = 0
+
+    def counted() -> Iterator["QRBill"]:
+        nonlocal written
+        for qr_bill in qr_bills:
+            yield qr_bill
+            written += 1
+
+    for chunk in iter_html(counted(), language, mask, backend, title):
+        file.write(chunk.encode("utf-8") if binary else chunk)
+    return written
+
+
+def iter_html(
+    qr_bills: Iterable["QRBill"],
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    title: str = "QR-bills",
+) -> Iterator[str]:
+    """Generate an HTML document chunk by chunk.
+
+    Args:
+        qr_bills: The QRBill instances, in order; consumed lazily
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        title: Document title
+
+    Yields:
+        The document head, one chunk per bill, and the document tail.
+    """
+    engine = get_backend(backend)
+    yield html_head(language, title)
+    for qr_bill in qr_bills:
+        yield html_bill(qr_bill, language, mask, engine)
+    yield "</body>\n</html>\n"
+
+
+def html_head(language: str = "en", title: str = "QR-bills") -> str:
+    """Build the document head with the shared stylesheet and symbols.
+
+    Args:
+        language: Language code (en, de, fr, it)
+        title: Document title
+
+    Returns:
+        HTML from the doctype up to and including the opening body tag.
+    """
+    scissors = []
+    for symbol_id, rotation in ((SCISSORS_TOP_ID, -180), (SCISSORS_SIDE_ID, -90)):
+        paths = "".join(
+            f'<path transform="rotate({rotation} 6 6)" d="{path_data}"/>'
+            for path_data in SCISSORS_PATHS
+        )
+        scissors.append(
+            f'<symbol id="{symbol_id}" viewBox="0 0 12 12">{paths}</symbol>'
+        )
+    lang = language if language in TRANSLATIONS else "en"
+    return (
+        "<!DOCTYPE html>\n"
+        f'<html lang="{lang}">\n'
+        "<head>\n"
+        '<meta charset="utf-8">\n'
+        f"<title>{escape_xml(title)}</title>\n"
+        f"<style>\n{STYLESHEET}\n</style>\n"
+        "</head>\n"
+        "<body>\n"
+        '<svg width="0" height="0" style="position:absolute" aria-hidden="true">'
+        f"{''.join(scissors)}"
+        f'<symbol id="{SWISS_CROSS_ID}" viewBox="0 0 36 36">{SWISS_CROSS}</symbol>'
+        "</svg>\n"
+    )
+
+
+def html_bill(
+    qr_bill: "QRBill",
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+) -> str:
+    """Build the HTML block of a single QR-bill.
+
+    The block relies on the stylesheet and symbols of `html_head`.
+
+    Args:
+        qr_bill: The QRBill instance
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+
+    Returns:
+        HTML string
+    """
+    layout = qr_bill.layout(language, mask, get_backend(backend))
+    sections = {
+        element.name: _Part.of(element)
+        for element in layout.elements
+        if isinstance(element, Section)
+    }
+    receipt, payment = sections["receipt"], sections["payment"]
+    symbol = payment.qr_code.symbol
+    qr_svg = qr_path_svg(symbol.matrix)
+
+    return (
+        '<div class="qr-bill">'
+        '<section class="receipt">'
+        f"<h1>{escape_xml(receipt.title)}</h1>"
+        f'<div class="info">{receipt.info}</div>'
+        f"{receipt.amount}"
+        f'<div class="acceptance">{escape_xml(receipt.acceptance)}</div>'
+        "</section>"
+        '<section class="payment">'
+        f"<h1>{escape_xml(payment.title)}</h1>"
+        f'<svg class="qr" viewBox="0 0 46 46">{qr_svg}'
+        f'<use href="#{SWISS_CROSS_ID}" x="19.5" y="19.5" width="7" height="7"/>'
+        "</svg>"
+        f"{payment.amount}"
+        f'<div class="info">{payment.info}</div>'
+        "</section>"
+        f'<svg class="scissors top"><use href="#{SCISSORS_TOP_ID}"/></svg>'
+        f'<svg class="scissors side"><use href="#{SCISSORS_SIDE_ID}"/></svg>'
+        "</div>\n"
+    )
+
+
+class _Part(NamedTuple):
+    """The HTML pieces of the receipt or the payment part."""
+
+    title: str
+    info: str
+    amount: str
+    acceptance: str
+    qr_code: QRCode | None
+
+    @classmethod
+    def of(cls, section: Section) -> "_Part":
+        """Translate the laid out elements of a part.
+
+        The first run is the title and a right-aligned run the acceptance
+        point; the other runs are the currency and amount fields, a column
+        each.
+        """
+        title, *elements = section.elements
+        info = acceptance = ""
+        qr_code = None
+        columns: dict[float, list[TextRun]] = {}
+        for element in elements:
+            if isinstance(element, TextBlock):
+                info = _info(element)
+            elif isinstance(element, QRCode):
+                qr_code = element
+            elif element.anchor == "end":
+                acceptance = element.text
+            else:
+                columns.setdefault(element.x, []).append(element)
+        amount = "".join(
+            f"<div>{_block(*_heading_and_values(runs))}</div>"
+            for runs in columns.values()
+        )
+        return cls(
+            title.text, info, f'<div class="amount">{amount}</div>', acceptance, qr_code
+        )
+
+
+def _info(block: TextBlock) -> str:
+    """Build the headings and values of a text block."""
+    html = []
+    lines: list[BlockLine] = []
+    for line in block.lines:
+        if line.bold and lines:
+            html.append(_block(*_heading_and_values(lines)))
+            lines = []
+        lines.append(line)
+    if lines:
+        html.append(_block(*_heading_and_values(lines)))
+    return "".join(html)
+
+
+def _heading_and_values(
+    lines: list[BlockLine] | list[TextRun],
+) -> tuple[str, list[str]]:
+    """Split lines into the bold heading and the value lines."""
+    heading = next((line.text for line in lines if line.bold), "")
+    return heading, [line.text for line in lines if not line.bold]
+
+
+def _block(heading: str, lines: list[str]) -> str:
+    """Build a heading followed by its value lines."""
+    html = f"<h2>{escape_xml(heading)}</h2>"
+    if lines:
+        html += f"<p>{'<br>'.join(escape_xml(line) for line in lines)}</p>"
+    return html
@@ -0,0 +1,213 @@
+"""Imposition of QR-bills onto printable pages.
+
+Bills are stacked from the bottom edge of the page, e.g. a single bill at
+the bottom of an A4 invoice or two bills per A4 sheet. Pages are produced
+one at a time, so long booklets are never held in memory as a whole.
+"""
+
+from collections.abc import Iterable, Iterator
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from .backends import QRBackend
+from .svg_generator import (
+    QR_CODE_ID,
+    build_svg_parts,
+    build_symbol_defs,
+    validate_svg_options,
+)
+from .svg_output import SVG_PROFILES, write_svgz
+
+if TYPE_CHECKING:
+    from .qr_bill import QRBill
+
+A4_SIZE = (210, 297)
+BILL_WIDTH_MM = 210
+BILL_HEIGHT_MM = 105
+
+# The bill SVG starts 3 mm above the perforation to hold the scissors
+BILL_OFFSET_MM = 3
+
+
+class PageLayout(NamedTuple):
+    """Page size and bill positions in millimetres.
+
+    Each slot is the y position of the top edge (perforation) of a bill.
+    """
+
+    width: float
+    height: float
+    slots: tuple[float, ...]
+
+
+def make_layout(per_page: int, page_size: tuple[float, float] = A4_SIZE) -> PageLayout:
+    """Build a layout stacking bills from the bottom edge of the page.
+
+    Args:
+        per_page: Number of bills per page
+        page_size: Page width and height in millimetres
+
+    Returns:
+        The page layout.
+
+    Raises:
+        ValueError: If the bills do not fit onto the page
+    """
+    width, height = page_size
+    if per_page < 1:
+        raise ValueError(f"At least one bill per page is required, got {per_page}")
+    if width < BILL_WIDTH_MM or per_page * BILL_HEIGHT_MM > height:
+        raise ValueError(
+            f"{per_page} bills of {BILL_WIDTH_MM}x{BILL_HEIGHT_MM} mm do not fit "
+            f"on a {width}x{height} mm page"
+        )
+    slots = tuple(height - BILL_HEIGHT_MM * (per_page - k) for k in range(per_page))
+    return PageLayout(width, height, slots)
+
+
+LAYOUTS = {
+    "invoice": make_layout(1),
+    "2-up": make_layout(2),
+}
+
+
+def iter_pages(
+    bills: Iterable["QRBill"],
+    layout: str | PageLayout = "invoice",
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> Iterator[str]:
+    """Place bills onto pages and yield one SVG document per page.
+
+    Bills are consumed lazily from the iterable, one page at a time. The
+    scissors, the Swiss cross and the font declaration are defined once per
+    page and shared by all bills on it.
+
+    Args:
+        bills: QR-bills to place, in order
+        layout: Name of a layout in `LAYOUTS` or a `PageLayout`
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+
+    Yields:
+        SVG documents, the last page may hold fewer bills.
+
+    Raises:
+        ValueError: If the layout, QR style or profile is unknown
+    """
+    validate_svg_options(qr_style, profile)
+    if isinstance(layout, str):
+        try:
+            layout = LAYOUTS[layout]
+        except KeyError:
+            raise ValueError(
+                f"Unknown layout {layout!r}, expected one of {', '.join(LAYOUTS)}"
+            ) from None
+
+    iterator = iter(bills)
+    while page_bills := list(islice(iterator, len(layout.slots))):
+        yield render_page(
+            page_bills, layout, language, mask, backend, qr_style, profile
+        )
+
+
+def render_page(
+    bills: list["QRBill"],
+    layout: PageLayout,
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
+    """Render a single page holding up to one bill per layout slot.
+
+    See `iter_pages` for the arguments.
+
+    Returns:
+        SVG document of the page.
+    """
+    p = SVG_PROFILES[profile]
+    mm = p.mm
+    width, height = layout.width, layout.height
+    namespaces = (
+        'xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink"'
+    )
+    if p.units:
+        svg_parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<svg width="{width}mm" height="{height}mm" {namespaces}',
+            f'  font-family="{p.font_family}">',
+        ]
+    else:
+        svg_parts = [
+            f'<svg width="{width}mm" height="{height}mm" '
+            f'viewBox="0 0 {mm(width)} {mm(height)}" {namespaces} '
+            f'font-family="{p.font_family}">'
+        ]
+
+    svg_parts.extend(build_symbol_defs(profile))
+    slots = layout.slots[: len(bills)]
+    for top in slots:
+        svg_parts.append(
+            f'{p.indent}<rect x="{mm(0)}" y="{mm(top)}" width="{mm(BILL_WIDTH_MM)}"'
+            f' height="{mm(BILL_HEIGHT_MM)}" fill="{p.white}"{p.close}'
+        )
+    for number, (top, bill) in enumerate(zip(slots, bills), 1):
+        svg_parts.append(
+            f'{p.indent}<svg class="qr-bill" x="{mm(0)}" '
+            f'y="{mm(top - BILL_OFFSET_MM)}" width="{mm(BILL_WIDTH_MM)}"'
+            f' height="{mm(BILL_HEIGHT_MM + BILL_OFFSET_MM)}">'
+        )
+        svg_parts.extend(
+            build_svg_parts(
+                bill,
+                language,
+                mask,
+                backend,
+                qr_style,
+                shared_symbols=True,
+                background=False,
+                profile=profile,
+                qr_code_id=f"{QR_CODE_ID}-{number}",
+            )
+        )
+        svg_parts.append(f"{p.indent}</svg>")
+    svg_parts.append("</svg>")
+    return p.newline.join(svg_parts)
+
+
+def write_pages(
+    bills: Iterable["QRBill"],
+    path_pattern: str,
+    layout: str | PageLayout = "invoice",
+    **options,
+) -> int:
+    """Write every page to its own file.
+
+    Args:
+        bills: QR-bills to place, in order
+        path_pattern: Target path with a format field for the 1-based page
+            number, e.g. "booklet-{:04d}.svg"; a ".svgz" suffix writes
+            gzip-compressed files
+        layout: Name of a layout in `LAYOUTS` or a `PageLayout`
+        **options: Further arguments of `iter_pages`
+
+    Returns:
+        Number of pages written.
+    """
+    count = 0
+    for count, page in enumerate(iter_pages(bills, layout, **options), start=1):
+        path = Path(path_pattern.format(count))
+        if path.suffix == ".svgz":
+            write_svgz(page, path)
+        else:
+            path.write_text(page, encoding="utf-8")
+    return count
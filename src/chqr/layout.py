@@ -0,0 +1,541 @@
+"""Format-neutral layout of a QR-bill.
+
+`compute_layout` places every element of a bill once: separator lines,
+scissors, text runs and blocks, and the QR code with its encoded symbol.
+Serialisers for SVG, bitmaps and other formats only translate these elements
+into their own syntax. `QRBill.layout` caches the result, so a bill rendered
+to several formats is laid out and encoded once.
+
+All coordinates are in millimetres with the origin at the top left, font
+sizes and line spacing are in points. The layout spans 210 x 108 mm: the bill
+itself starts below the 3 mm strip holding the top separator line. Elements
+of a `Section` are positioned relative to the section's content box.
+"""
+
+from decimal import Decimal
+from typing import TYPE_CHECKING, NamedTuple
+
+from .backends import QRBackend, QRSymbol, get_backend
+from .text_metrics import MM_PER_PT, wrap_text
+
+if TYPE_CHECKING:
+    from .creditor import Creditor
+    from .debtor import UltimateDebtor
+    from .qr_bill import QRBill
+
+# Language translations for QR-bill headings
+TRANSLATIONS = {
+    "en": {
+        "payment_part": "Payment part",
+        "receipt": "Receipt",
+        "account_payable_to": "Account / Payable to",
+        "reference": "Reference",
+        "additional_information": "Additional information",
+        "currency": "Currency",
+        "amount": "Amount",
+        "acceptance_point": "Acceptance point",
+        "payable_by": "Payable by",
+        "payable_by_name_address": "Payable by (name/address)",
+    },
+    "de": {
+        "payment_part": "Zahlteil",
+        "receipt": "Empfangsschein",
+        "account_payable_to": "Konto / Zahlbar an",
+        "reference": "Referenz",
+        "additional_information": "Zusätzliche Informationen",
+        "currency": "Währung",
+        "amount": "Betrag",
+        "acceptance_point": "Annahmestelle",
+        "payable_by": "Zahlbar durch",
+        "payable_by_name_address": "Zahlbar durch (Name/Adresse)",
+    },
+    "fr": {
+        "payment_part": "Section paiement",
+        "receipt": "Récépissé",
+        "account_payable_to": "Compte / Payable à",
+        "reference": "Référence",
+        "additional_information": "Informations supplémentaires",
+        "currency": "Monnaie",
+        "amount": "Montant",
+        "acceptance_point": "Point de dépôt",
+        "payable_by": "Payable par",
+        "payable_by_name_address": "Payable par (nom/adresse)",
+    },
+    "it": {
+        "payment_part": "Sezione pagamento",
+        "receipt": "Ricevuta",
+        "account_payable_to": "Conto / Pagabile a",
+        "reference": "Riferimento",
+        "additional_information": "Informazioni supplementari",
+        "currency": "Valuta",
+        "amount": "Importo",
+        "acceptance_point": "Punto di accettazione",
+        "payable_by": "Pagabile da",
+        "payable_by_name_address": "Pagabile da (nome/indirizzo)",
+    },
+}
+
+LAYOUT_WIDTH_MM = 210
+LAYOUT_HEIGHT_MM = 108
+LINE_WIDTH_MM = 0.1
+QR_SIZE_MM = 46
+
+# Components of a bill which can be laid out on their own
+COMPONENTS = ("bill", "payment", "receipt", "qr")
+RECEIPT_WIDTH_MM = 62
+PAYMENT_WIDTH_MM = 148
+PART_HEIGHT_MM = 105
+
+# Width of the text columns of the receipt and payment part; longer field
+# lines wrap, up to MAX_FIELD_LINES lines each
+RECEIPT_COLUMN_MM = 52
+PAYMENT_COLUMN_MM = 87
+MAX_FIELD_LINES = 3
+
+# Rotation of the scissors artwork, in degrees
+SCISSORS_ROTATIONS = {"scissors-top": -180, "scissors-side": -90}
+
+# Swiss cross within the QR code
+CROSS_OFFSET_MM = 19.5
+CROSS_SIZE_MM = 7
+
+
+class Line(NamedTuple):
+    """A straight black line."""
+
+    x1: float
+    y1: float
+    x2: float
+    y2: float
+    width: float = LINE_WIDTH_MM
+
+
+class Symbol(NamedTuple):
+    """Static artwork, e.g. ``"scissors-top"`` or ``"scissors-side"``."""
+
+    name: str
+    x: float
+    y: float
+    width: float
+    height: float
+
+
+class TextRun(NamedTuple):
+    """A single line of text, ``y`` being its baseline.
+
+    ``anchor`` is ``"start"`` for left-aligned text and ``"end"`` for text
+    right-aligned to ``x``.
+    """
+
+    x: float
+    y: float
+    text: str
+    size: float
+    bold: bool = False
+    anchor: str = "start"
+
+
+class BlockLine(NamedTuple):
+    """A line of a `TextBlock`, ``dy`` (pt) below the previous baseline."""
+
+    dy: float
+    text: str
+    size: float
+    bold: bool = False
+
+
+class TextBlock(NamedTuple):
+    """Lines of text flowing down from ``y``, all starting at ``x``."""
+
+    x: float
+    y: float
+    lines: tuple[BlockLine, ...]
+
+    def runs(self) -> list[TextRun]:
+        """Return the lines as runs with absolute baselines."""
+        runs = []
+        y = self.y
+        for line in self.lines:
+            y += line.dy * MM_PER_PT
+            runs.append(TextRun(self.x, y, line.text, line.size, line.bold))
+        return runs
+
+
+class QRCode(NamedTuple):
+    """The QR code, overlaid with the Swiss cross in its centre."""
+
+    x: float
+    y: float
+    size: float
+    symbol: QRSymbol
+
+
+class Section(NamedTuple):
+    """The receipt or the payment part.
+
+    The content box is inset by ``padding`` on every side, its elements are
+    positioned relative to it.
+    """
+
+    name: str
+    x: float
+    y: float
+    width: float
+    height: float
+    padding: float
+    elements: tuple["Element", ...]
+
+
+Element = Line | Symbol | TextRun | TextBlock | QRCode | Section
+
+
+class Layout(NamedTuple):
+    """The positioned elements of a QR-bill, in painting order."""
+
+    width: float
+    height: float
+    language: str
+    elements: tuple[Element, ...]
+
+    def flatten(self) -> list[Element]:
+        """Return all elements in layout coordinates, without sections.
+
+        Text blocks are split into runs.
+        """
+        return list(_flatten(self.elements, 0, 0))
+
+
+def compute_layout(
+    qr_bill: "QRBill",
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    component: str = "bill",
+) -> Layout:
+    """Lay out a QR-bill, see `QRBill.layout` for the cached variant.
+
+    Components other than the whole bill are laid out on their own, with the
+    origin at their top left corner. Only the payment part and the QR code
+    encode the QR code.
+
+    Args:
+        qr_bill: The QRBill instance
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        component: One of `COMPONENTS`: "bill" (default), "payment" for the
+            payment part, "receipt" or "qr" for the QR code with the cross
+
+    Returns:
+        The layout.
+
+    Raises:
+        ValueError: If the component is unknown
+    """
+    if component == "qr":
+        qr_code = qr_bill.generate_qr_code(mask, backend)
+        qr = QRCode(0, 0, QR_SIZE_MM, qr_code)
+        return Layout(QR_SIZE_MM, QR_SIZE_MM, language, (qr,))
+    if component == "receipt":
+        receipt = _receipt(qr_bill, language, 0, 0)
+        return Layout(receipt.width, receipt.height, language, (receipt,))
+    if component == "payment":
+        payment = _payment_part(qr_bill, language, mask, backend, 0, 0)
+        return Layout(payment.width, payment.height, language, (payment,))
+    if component != "bill":
+        raise ValueError(
+            f"Invalid component {component!r}, expected one of {', '.join(COMPONENTS)}"
+        )
+
+    elements = (
+        # Separator lines with gaps for the scissors
+        Line(0, 3, 202.5, 3),
+        Line(204.8, 3, 210, 3),
+        Line(62, 3, 62, 102.5),
+        Line(62, 104.8, 62, 110),
+        Symbol("scissors-top", 202, 1.5, 3, 3),
+        Symbol("scissors-side", 60.5, 102, 3, 3),
+        _receipt(qr_bill, language, 0, 3),
+        _payment_part(qr_bill, language, mask, backend, RECEIPT_WIDTH_MM, 3),
+    )
+    return Layout(LAYOUT_WIDTH_MM, LAYOUT_HEIGHT_MM, language, elements)
+
+
+def format_iban(iban: str) -> str:
+    """Format IBAN in groups of 4 characters.
+
+    Args:
+        iban: The IBAN string (21 characters for Swiss IBAN)
+
+    Returns:
+        Formatted IBAN with spaces
+
+    Example:
+        CH4431999123000889012 -> CH44 3199 9123 0008 8901 2
+    """
+    # Remove any existing spaces
+    iban = iban.replace(" ", "")
+
+    # Group in 4s
+    groups = []
+    for i in range(0, len(iban), 4):
+        groups.append(iban[i : i + 4])
+
+    return " ".join(groups)
+
+
+def format_qr_reference(reference: str) -> str:
+    """Format QR reference in groups of 5 characters.
+
+    Args:
+        reference: The QR reference string (27 characters)
+
+    Returns:
+        Formatted reference with spaces
+
+    Example:
+        210000000003139471430009017 -> 21 00000 00003 13947 14300 09017
+    """
+    # Remove any existing spaces
+    reference = reference.replace(" ", "")
+
+    # First 2 chars, then groups of 5
+    if len(reference) < 2:
+        return reference
+
+    result = reference[:2]
+    remainder = reference[2:]
+
+    groups = []
+    for i in range(0, len(remainder), 5):
+        groups.append(remainder[i : i + 5])
+
+    return result + " " + " ".join(groups)
+
+
+def format_creditor_reference(reference: str) -> str:
+    """Format SCOR/Creditor reference in groups of 4 characters.
+
+    Args:
+        reference: The creditor reference string
+
+    Returns:
+        Formatted reference with spaces
+
+    Example:
+        RF18539007547034 -> RF18 5390 0754 7034
+    """
+    # Remove any existing spaces
+    reference = reference.replace(" ", "")
+
+    # Group in 4s
+    groups = []
+    for i in range(0, len(reference), 4):
+        groups.append(reference[i : i + 4])
+
+    return " ".join(groups)
+
+
+def format_amount(amount: Decimal) -> str:
+    """Format amount with space as thousands separator.
+
+    Args:
+        amount: The amount as Decimal
+
+    Returns:
+        Formatted amount string
+
+    Example:
+        1949.75 -> 1 949.75
+        50 -> 50.00
+    """
+    # Format with 2 decimal places
+    formatted = f"{amount:.2f}"
+
+    # Split into integer and decimal parts
+    parts = formatted.split(".")
+    integer_part = parts[0]
+    decimal_part = parts[1]
+
+    # Add space as thousands separator
+    # Reverse, group by 3, reverse back
+    integer_reversed = integer_part[::-1]
+    groups = []
+    for i in range(0, len(integer_reversed), 3):
+        groups.append(integer_reversed[i : i + 3])
+
+    integer_formatted = " ".join(groups)[::-1]
+
+    return f"{integer_formatted}.{decimal_part}"
+
+
+def format_reference(qr_bill: "QRBill") -> str | None:
+    """Format the reference of a QR-bill for display.
+
+    Returns:
+        The QR or creditor reference in groups, None without reference.
+    """
+    if qr_bill.reference:
+        if qr_bill.reference_type == "QRR":
+            return format_qr_reference(qr_bill.reference)
+        if qr_bill.reference_type == "SCOR":
+            return format_creditor_reference(qr_bill.reference)
+    return None
+
+
+def address_lines(party: "Creditor | UltimateDebtor") -> list[str]:
+    """Build the name and address lines of a creditor or debtor."""
+    lines = [party.name]
+    street = f"{party.street} {party.building_number}".strip()
+    if street:
+        lines.append(street)
+    city = f"{party.postal_code} {party.city}".strip()
+    if city:
+        lines.append(city)
+    return lines
+
+
+def payable_by(t: dict[str, str], debtor: list[str] | None) -> tuple[str, list[str]]:
+    """Build the "Payable by" block, with a blank heading without debtor.
+
+    Args:
+        t: Translations of the headings, see `TRANSLATIONS`
+        debtor: Address lines of the debtor, if any
+
+    Returns:
+        The heading and its value lines.
+    """
+    if debtor:
+        return t["payable_by"], debtor
+    return t["payable_by_name_address"], []
+
+
+def _receipt(qr_bill: "QRBill", language: str, x: float, y: float) -> Section:
+    """Lay out the receipt at a position."""
+    t = TRANSLATIONS.get(language, TRANSLATIONS["en"])
+    fields = _Fields.of(qr_bill)
+
+    # 6 pt headings, 8 pt values, 9 pt line spacing
+    blocks = [(t["account_payable_to"], fields.creditor)]
+    if fields.reference:
+        blocks.append((t["reference"], [fields.reference]))
+    blocks.append(payable_by(t, fields.debtor))
+
+    elements = (
+        TextRun(0, 3, t["receipt"], 11, True),
+        _text_block(0, 3.65, blocks, 6, 8, 9, RECEIPT_COLUMN_MM),
+        *_amount(t, qr_bill.currency, fields.amount, 6, 8),
+        TextRun(52, 80, t["acceptance_point"], 6, True, "end"),
+    )
+    return Section("receipt", x, y, RECEIPT_WIDTH_MM, PART_HEIGHT_MM, 5, elements)
+
+
+def _payment_part(
+    qr_bill: "QRBill",
+    language: str,
+    mask: int | str,
+    backend: str | QRBackend | None,
+    x: float,
+    y: float,
+) -> Section:
+    """Lay out the payment part at a position, encoding the QR code."""
+    t = TRANSLATIONS.get(language, TRANSLATIONS["en"])
+    fields = _Fields.of(qr_bill)
+    qr_code = qr_bill.generate_qr_code(mask, get_backend(backend))
+
+    # 8 pt headings, 10 pt values, 11 pt line spacing
+    blocks = [(t["account_payable_to"], fields.creditor)]
+    if fields.reference:
+        blocks.append((t["reference"], [fields.reference]))
+    if qr_bill.additional_information:
+        blocks.append((t["additional_information"], [qr_bill.additional_information]))
+    blocks.append(payable_by(t, fields.debtor))
+
+    elements = (
+        TextRun(0, 3, t["payment_part"], 11, True),
+        QRCode(0, 12, QR_SIZE_MM, qr_code),
+        *_amount(t, qr_bill.currency, fields.amount, 8, 10),
+        _text_block(51, -4.76, blocks, 8, 10, 11, PAYMENT_COLUMN_MM),
+    )
+    return Section("payment", x, y, PAYMENT_WIDTH_MM, PART_HEIGHT_MM, 5, elements)
+
+
+class _Fields(NamedTuple):
+    """The formatted data fields shown on both parts."""
+
+    creditor: list[str]
+    debtor: list[str] | None
+    reference: str | None
+    amount: str | None
+
+    @classmethod
+    def of(cls, qr_bill: "QRBill") -> "_Fields":
+        """Format the fields of a QR-bill."""
+        return cls(
+            creditor=[format_iban(qr_bill.account), *address_lines(qr_bill.creditor)],
+            debtor=address_lines(qr_bill.debtor) if qr_bill.debtor else None,
+            reference=format_reference(qr_bill),
+            amount=format_amount(qr_bill.amount) if qr_bill.amount else None,
+        )
+
+
+def _text_block(
+    x: float,
+    y: float,
+    blocks: list[tuple[str, list[str]]],
+    heading_size: float,
+    value_size: float,
+    line_spacing: float,
+    width: float,
+) -> TextBlock:
+    """Stack headings and their values, with a blank line between blocks.
+
+    Values wider than the column are wrapped, see `MAX_FIELD_LINES`.
+    """
+    lines = []
+    for heading, values in blocks:
+        lines.append(BlockLine(2 * line_spacing, heading, heading_size, True))
+        for value in values:
+            wrapped = wrap_text(value, width, value_size, max_lines=MAX_FIELD_LINES)
+            lines.extend(BlockLine(line_spacing, line, value_size) for line in wrapped)
+    return TextBlock(x, y, tuple(lines))
+
+
+def _amount(
+    t: dict[str, str],
+    currency: str,
+    amount: str | None,
+    heading_size: float,
+    value_size: float,
+) -> list[TextRun]:
+    """Build the currency and amount fields."""
+    runs = [
+        TextRun(0, 66, t["currency"], heading_size, True),
+        TextRun(0, 70, currency, value_size),
+        TextRun(22, 66, t["amount"], heading_size, True),
+    ]
+    if amount:
+        runs.append(TextRun(22, 70, amount, value_size))
+    return runs
+
+
+def _flatten(elements, dx: float, dy: float):
+    """Yield elements translated by dx, dy, expanding sections and blocks."""
+    for element in elements:
+        if isinstance(element, Section):
+            inset = element.padding
+            yield from _flatten(
+                element.elements, dx + element.x + inset, dy + element.y + inset
+            )
+        elif isinstance(element, TextBlock):
+            for run in element.runs():
+                yield run._replace(x=run.x + dx, y=run.y + dy)
+        elif isinstance(element, Line):
+            yield element._replace(
+                x1=element.x1 + dx,
+                y1=element.y1 + dy,
+                x2=element.x2 + dx,
+                y2=element.y2 + dy,
+            )
+        else:
+            yield element._replace(x=element.x + dx, y=element.y + dy)
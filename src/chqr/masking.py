@@ -0,0 +1,185 @@
+"""Data mask selection strategies for QR code encoding.
+
+Evaluating all eight data mask patterns on the full module matrix is the most
+expensive step of encoding a QR-bill symbol. This module lets callers trade
+a little penalty score for speed:
+
+- ``"full"``: segno evaluates every mask on the full matrix (default)
+- ``0`` .. ``7``: the given mask is applied without any evaluation
+- ``"fast"``: every mask is scored on a subsample of rows and columns
+"""
+
+import re
+from functools import lru_cache
+
+import segno
+from segno import encoder
+
+MASK_FULL = "full"
+MASK_FAST = "fast"
+
+# Every n-th row and column is scored by the fast heuristic
+FAST_SAMPLE_STEP = 2
+
+_N1_RUNS = re.compile(rb"\x00{5,}|\x01{5,}")
+_N3_PATTERNS = (
+    b"\x00\x00\x00\x00\x01\x00\x01\x01\x01\x00\x01",
+    b"\x01\x00\x01\x01\x01\x00\x01\x00\x00\x00\x00",
+)
+
+
+def validate_mask(mask: int | str) -> None:
+    """Validate a mask strategy.
+
+    Args:
+        mask: "full", "fast" or a fixed mask pattern number (0-7)
+
+    Raises:
+        ValueError: If the mask strategy is unknown
+    """
+    if mask in (MASK_FULL, MASK_FAST):
+        return
+    if isinstance(mask, int) and not isinstance(mask, bool) and 0 <= mask <= 7:
+        return
+    raise ValueError(f"Invalid mask strategy {mask!r}: expected 'full', 'fast' or 0-7")
+
+
+def make_qr_code(data: str, mask: int | str = MASK_FULL) -> segno.QRCode:
+    """Encode a QR-bill data string using the given mask strategy.
+
+    Args:
+        data: The QR-bill data string
+        mask: "full", "fast" or a fixed mask pattern number (0-7)
+
+    Returns:
+        QRCode object with error correction level M.
+
+    Raises:
+        ValueError: If the mask strategy is unknown
+    """
+    validate_mask(mask)
+
+    if mask == MASK_FULL:
+        return segno.make(content=data, version=None, error="M")
+    if mask == MASK_FAST:
+        return segno.QRCode(_encode_fast(data))
+    return segno.make(content=data, version=None, error="M", mask=mask)
+
+
+def _encode_fast(data: str) -> encoder.Code:
+    """Encode with mask 0, then switch to the best mask of a sampled scoring.
+
+    Since masking is an XOR over the encoding region, any other mask is
+    obtained from the mask 0 matrix by XOR-ing the difference of both patterns.
+    """
+    code = encoder.encode(data, error="M", mask=0, micro=False)
+    matrix = code.matrix
+    size = len(matrix)
+    deltas = _mask_deltas(size)
+
+    row_ints = [int.from_bytes(row, "big") for row in matrix]
+    columns = [bytes(col) for col in zip(*matrix)]
+    col_ints = [int.from_bytes(col, "big") for col in columns]
+
+    best_mask = 0
+    best_score = None
+    for mask_number, (row_deltas, col_deltas) in enumerate(deltas):
+        score = _sampled_penalty(row_ints, row_deltas, col_ints, col_deltas, size)
+        if best_score is None or score < best_score:
+            best_score = score
+            best_mask = mask_number
+
+    if best_mask:
+        row_deltas = deltas[best_mask][0]
+        for i, row in enumerate(matrix):
+            row[:] = (row_ints[i] ^ row_deltas[i]).to_bytes(size, "big")
+        encoder.add_format_info(matrix, code.version, code.error, best_mask)
+
+    return encoder.Code(matrix, code.version, code.error, best_mask, code.segments)
+
+
+def _sampled_penalty(
+    row_ints: list[int],
+    row_deltas: tuple[int, ...],
+    col_ints: list[int],
+    col_deltas: tuple[int, ...],
+    size: int,
+) -> int:
+    """Approximate the ISO/IEC 18004 penalty score on sampled lines.
+
+    Rows and columns are held as big integers with one byte per module, so a
+    mask is applied with a single XOR and the scoring runs on bytes.
+    """
+    score = 0
+    dark = 0
+    sampled = range(0, size, FAST_SAMPLE_STEP)
+
+    for i in sampled:
+        row = row_ints[i] ^ row_deltas[i]
+        line = row.to_bytes(size, "big")
+        dark += line.count(1)
+        score += _line_penalty(line)
+
+        # N2: 2x2 blocks between this row and the next one
+        if i + 1 < size:
+            below = row_ints[i + 1] ^ row_deltas[i + 1]
+            vertical = row ^ below
+            blocks = vertical | (vertical >> 8) | (row ^ (row >> 8))
+            score += 3 * blocks.to_bytes(size, "big").count(0, 1)
+
+    for j in sampled:
+        line = (col_ints[j] ^ col_deltas[j]).to_bytes(size, "big")
+        score += _line_penalty(line)
+
+    # N4: proportion of dark modules
+    sampled_modules = len(sampled) * size
+    percent = dark * 100 / sampled_modules
+    score += 10 * int(abs(percent - 50) / 5)
+    return score
+
+
+def _line_penalty(line: bytes) -> int:
+    """Return the N1 and N3 penalty of a single row or column."""
+    score = 0
+    for run in _N1_RUNS.finditer(line):
+        score += run.end() - run.start() - 2
+    for pattern in _N3_PATTERNS:
+        score += 40 * line.count(pattern)
+    return score
+
+
+@lru_cache(maxsize=None)
+def _mask_deltas(size: int) -> tuple[tuple[tuple[int, ...], tuple[int, ...]], ...]:
+    """Precompute the XOR difference to mask 0 for every mask pattern.
+
+    Args:
+        size: Width of the QR code matrix in modules
+
+    Returns:
+        For every mask, a tuple of row deltas and column deltas as integers.
+    """
+    function_matrix = encoder.make_matrix(size, size)
+    encoder.add_finder_patterns(function_matrix, size, size)
+    encoder.add_alignment_patterns(function_matrix, size, size)
+    function_matrix[-8][8] = 0x1
+    region = [[value > 0x1 for value in row] for row in function_matrix]
+
+    patterns = encoder.get_data_mask_functions(is_micro=False)
+    base = patterns[0]
+    deltas = []
+    for pattern in patterns:
+        rows = [
+            bytes(
+                1 if region[i][j] and base(i, j) != pattern(i, j) else 0
+                for j in range(size)
+            )
+            for i in range(size)
+        ]
+        columns = [bytes(col) for col in zip(*rows)]
+        deltas.append(
+            (
+                tuple(int.from_bytes(row, "big") for row in rows),
+                tuple(int.from_bytes(col, "big") for col in columns),
+            )
+        )
+    return tuple(deltas)
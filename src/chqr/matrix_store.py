@@ -0,0 +1,302 @@
+"""Persistent store of bit-packed QR code matrices shared by processes.
+
+Encoding the QR code, above all evaluating the data masks, is the most
+expensive step of a bill. `MatrixStore` keeps encoded module matrices in
+one append-only file, eight modules per byte (1.7 KB for a version 25
+symbol), keyed by a hash of the backend, mask strategy and data string.
+Readers map the file into memory, so all worker processes share the page
+cache of one warm store, and unpack a matrix in microseconds.
+
+`StoredBackend` wraps a backend with a store; registered under the name of
+the wrapped backend, it makes every bill of the process use the store::
+
+    register_backend(StoredBackend(get_backend(), MatrixStore("qr.store")))
+
+Store format (big-endian)::
+
+    header:  magic "CQMS", u16 format version
+    record:  marker "CQMR", u32 CRC-32 of the rest of the record,
+             16-byte key, u8 size, u8 mask, u8 version, error level (ASCII),
+             size * size modules, row by row, MSB first, padded to bytes
+
+Records are appended with a single write on a file opened for appending,
+so processes may add to the same store concurrently; a short write is
+continued with further writes. The CRC lets readers stop at a record still
+being written. A record torn by a writer which died, or split by the
+appends of others, fails its CRC; readers then resume at the next marker
+starting a valid record.
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+import zlib
+from pathlib import Path
+from typing import NamedTuple, TypeVar
+
+from .backends import QRBackend, QRSymbol
+from .masking import MASK_FULL
+
+STORE_MAGIC = b"CQMS"
+STORE_VERSION = 2
+RECORD_MARKER = b"CQMR"
+
+_HEADER = struct.Struct(">4sH")
+# Record marker and CRC
+_PREFIX = struct.Struct(">4sI")
+_FIELDS = struct.Struct(">16sBBBc")
+_RECORD_HEADER = _PREFIX.size + _FIELDS.size
+
+_TO_DIGITS = bytes.maketrans(b"\x00\x01", b"01")
+_FROM_DIGITS = bytes.maketrans(b"01", b"\x00\x01")
+
+_T = TypeVar("_T")
+
+
+class StoredSymbol(NamedTuple):
+    """A QR code symbol read from a `MatrixStore`.
+
+    The data string is not stored; it is the one the symbol was looked up
+    with.
+    """
+
+    matrix: tuple[bytes, ...]
+    mask: int
+    version: int
+    error: str
+    data: str
+
+
+def matrix_key(data: str, mask: int | str, backend: str) -> bytes:
+    """Return the store key of a data string encoded by a backend."""
+    key = f"{backend}\n{mask}\n{data}".encode("utf-8")
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+def pack_matrix(matrix) -> bytes:
+    """Pack a square module matrix into bits, row by row, MSB first."""
+    size = len(matrix)
+    digits = b"".join(bytes(row) for row in matrix).translate(_TO_DIGITS)
+    length = (size * size + 7) // 8
+    value = int(digits, 2) << (length * 8 - size * size) if size else 0
+    return value.to_bytes(length, "big")
+
+
+def unpack_matrix(packed: bytes, size: int) -> tuple[bytes, ...]:
+    """Unpack a square module matrix packed by `pack_matrix`."""
+    modules = size * size
+    value = int.from_bytes(packed, "big") >> (len(packed) * 8 - modules)
+    flat = format(value, f"0{modules}b").encode("ascii").translate(_FROM_DIGITS)
+    return tuple(flat[i : i + size] for i in range(0, modules, size))
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """Write all of data, continuing after short writes.
+
+    A record completed by a second write may interleave with the appends of
+    other processes; readers then skip it as invalid.
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
+def _record_end(mapped: mmap.mmap, offset: int) -> int | None:
+    """Return the end of the record at an offset, None unless it is valid."""
+    if offset + _RECORD_HEADER > len(mapped):
+        return None
+    marker, crc = _PREFIX.unpack_from(mapped, offset)
+    modules = _FIELDS.unpack_from(mapped, offset + _PREFIX.size)[1]
+    end = offset + _RECORD_HEADER + (modules * modules + 7) // 8
+    if marker != RECORD_MARKER or end > len(mapped):
+        return None
+    if zlib.crc32(mapped[offset + _PREFIX.size : end]) != crc:
+        return None
+    return end
+
+
+def _next_record(mapped: mmap.mmap, start: int) -> int | None:
+    """Return the offset of the first valid record from start on, if any."""
+    offset = mapped.find(RECORD_MARKER, start)
+    while offset != -1:
+        if _record_end(mapped, offset) is not None:
+            return offset
+        offset = mapped.find(RECORD_MARKER, offset + 1)
+    return None
+
+
+class MatrixStore:
+    """Append-only file of QR code matrices, read through `mmap`.
+
+    Args:
+        path: Store file, created if missing
+
+    Raises:
+        ValueError: If the file is not a matrix store of a supported version
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        try:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_EXCL | os.O_APPEND)
+        except FileExistsError:
+            fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+        else:
+            _write_all(fd, _HEADER.pack(STORE_MAGIC, STORE_VERSION))
+        self._fd = fd
+        self._map: mmap.mmap | None = None
+        self._scanned = 0
+        self._offsets: dict[bytes, int] = {}
+        try:
+            self.refresh()
+        except BaseException:
+            self.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def get(self, data: str, mask: int | str, backend: str) -> StoredSymbol | None:
+        """Look up the matrix of a data string.
+
+        Matrices added since the last lookup, also by other processes, are
+        found as well.
+
+        Args:
+            data: The QR-bill data string
+            mask: The mask strategy it was encoded with
+            backend: Name of the backend which encoded it
+
+        Returns:
+            The symbol, or None if it is not stored.
+        """
+        key = matrix_key(data, mask, backend)
+        offset = self._offsets.get(key)
+        if offset is None:
+            self.refresh()
+            offset = self._offsets.get(key)
+            if offset is None:
+                return None
+        fields = _FIELDS.unpack_from(self._map, offset + _PREFIX.size)
+        _, size, symbol_mask, version, error = fields
+        start = offset + _RECORD_HEADER
+        packed = self._map[start : start + (size * size + 7) // 8]
+        matrix = unpack_matrix(packed, size)
+        return StoredSymbol(matrix, symbol_mask, version, error.decode("ascii"), data)
+
+    def put(self, data: str, mask: int | str, backend: str, symbol: QRSymbol) -> bool:
+        """Store the matrix of a data string.
+
+        Args:
+            data: The QR-bill data string
+            mask: The mask strategy it was encoded with
+            backend: Name of the backend which encoded it
+            symbol: The encoded symbol
+
+        Returns:
+            Whether the symbol was stored; Micro QR symbols are not.
+        """
+        if not isinstance(symbol.version, int):
+            return False
+        body = _FIELDS.pack(
+            matrix_key(data, mask, backend),
+            len(symbol.matrix),
+            symbol.mask,
+            symbol.version,
+            symbol.error.encode("ascii"),
+        ) + pack_matrix(symbol.matrix)
+        _write_all(self._fd, _PREFIX.pack(RECORD_MARKER, zlib.crc32(body)) + body)
+        return True
+
+    def refresh(self) -> None:
+        """Map the records added since the last refresh.
+
+        Raises:
+            ValueError: If the file is not a matrix store
+        """
+        size = os.fstat(self._fd).st_size
+        if size < _HEADER.size or (self._map is not None and size == len(self._map)):
+            return
+        if self._map is not None:
+            self._map.close()
+        self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        if not self._scanned:
+            if _HEADER.unpack_from(self._map) != (STORE_MAGIC, STORE_VERSION):
+                raise ValueError("Not a QR matrix store of a supported version")
+            self._scanned = _HEADER.size
+
+        offset = self._scanned
+        mapped = self._map
+        while offset + _RECORD_HEADER <= size:
+            end = _record_end(mapped, offset)
+            if end is None:
+                # Torn, or possibly still being written if no valid record
+                # follows; then it is read on the next refresh
+                following = _next_record(mapped, offset + 1)
+                if following is None:
+                    break
+                offset = following
+                continue
+            key = _FIELDS.unpack_from(mapped, offset + _PREFIX.size)[0]
+            self._offsets[key] = offset
+            offset = end
+        self._scanned = offset
+
+    def close(self) -> None:
+        """Unmap and close the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class StoredBackend:
+    """A backend encoding through a `MatrixStore`.
+
+    Symbols found in the store are returned without encoding, others are
+    encoded by the wrapped backend and stored. The wrapper has the wrapped
+    backend's name, as it produces the same matrices.
+
+    Args:
+        backend: The wrapped backend
+        store: The matrix store
+    """
+
+    def __init__(self, backend: QRBackend, store: MatrixStore):
+        self.backend = backend
+        self.store = store
+        self.name = backend.name
+
+    def encode(self, data: str, mask: int | str = MASK_FULL) -> QRSymbol:
+        """Return the stored symbol of a data string, encoding it if needed."""
+        symbol = self.store.get(data, mask, self.name)
+        if symbol is None:
+            symbol = self.backend.encode(data, mask)
+            self.store.put(data, mask, self.name, symbol)
+        return symbol
+
+    def to_svg(self, symbol: QRSymbol) -> str:
+        """Serialise a symbol with the wrapped backend's SVG writer."""
+        return self.backend.to_svg(self._native(symbol))
+
+    def to_png(self, symbol: QRSymbol, scale: int) -> bytes:
+        """Serialise a symbol with the wrapped backend's PNG writer."""
+        return self.backend.to_png(self._native(symbol), scale)
+
+    def _native(self, symbol: QRSymbol) -> QRSymbol:
+        """Re-encode a stored symbol for the wrapped backend's serialisers.
+
+        The stored mask is applied, so no mask evaluation takes place.
+        """
+        if isinstance(symbol, StoredSymbol):
+            return self.backend.encode(symbol.data, symbol.mask)
+        return symbol
@@ -0,0 +1,308 @@
+"""Pack file holding the rendered bills of a run in a single file.
+
+Writing one file per bill exhausts inodes and slows down directory listings
+at millions of bills. A pack appends the documents to one file and closes
+it with an index sorted by key hash, which a reader maps into memory and
+binary searches: a lookup neither opens a file nor loads the index.
+
+Pack format (big-endian)::
+
+    header:  magic "CQPK", u16 format version
+    record:  key (u16 length), document (u32 length)
+    index:   entries of u64 key hash, u64 record offset, u32 document length,
+             sorted by hash and then offset
+    trailer: u64 index offset, u32 entry count, magic "CQPI"
+
+Keys are UTF-8, usually the bill's reference. Hashes are 8-byte BLAKE2b
+digests of the key; the key stored in the record resolves collisions. The
+index of a pack which was not closed properly is rebuilt by scanning the
+records.
+"""
+
+import hashlib
+import mmap
+import struct
+from bisect import bisect_left
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import TypeVar
+
+from .backends import QRBackend, get_backend
+from .masking import MASK_FULL
+from .qr_bill import QRBill
+from .svg_generator import generate_svg, validate_svg_options
+
+PACK_MAGIC = b"CQPK"
+PACK_VERSION = 1
+INDEX_MAGIC = b"CQPI"
+
+_HEADER = struct.Struct(">4sH")
+_ENTRY = struct.Struct(">8sQI")
+_TRAILER = struct.Struct(">QI4s")
+
+_T = TypeVar("_T")
+
+
+def key_hash(key: str) -> bytes:
+    """Return the 8-byte index hash of a key."""
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+
+
+class PackWriter:
+    """Append rendered bills to a new pack file.
+
+    Args:
+        path: Pack file, replaced if it exists
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        qr_style: str = "path",
+        profile: str = "pretty",
+    ):
+        validate_svg_options(qr_style, profile)
+        self._options = (mask, get_backend(backend), qr_style, profile)
+        self._handle = open(path, "wb")
+        self._entries: list[tuple[bytes, int, int]] = []
+        self._handle.write(_HEADER.pack(PACK_MAGIC, PACK_VERSION))
+
+    def append(
+        self, qr_bill: QRBill, language: str = "en", key: str | None = None
+    ) -> str:
+        """Render a bill to SVG and add it.
+
+        Args:
+            qr_bill: The QRBill instance
+            language: Language code (en, de, fr, it)
+            key: Lookup key, defaults to the bill's reference or, for bills
+                without one, the hash of the SVG
+
+        Returns:
+            The key of the bill.
+        """
+        svg = generate_svg(qr_bill, language, *self._options).encode("utf-8")
+        if key is None:
+            key = qr_bill.reference or hashlib.blake2b(svg, digest_size=16).hexdigest()
+        self.write(key, svg)
+        return key
+
+    def write(self, key: str, document: bytes) -> None:
+        """Add a document under a key.
+
+        A later document with the key of an earlier one supersedes it in
+        lookups.
+        """
+        encoded = key.encode("utf-8")
+        offset = self._handle.tell()
+        self._handle.write(
+            b"".join(
+                (
+                    struct.pack(">H", len(encoded)),
+                    encoded,
+                    struct.pack(">I", len(document)),
+                    document,
+                )
+            )
+        )
+        self._entries.append((key_hash(key), offset, len(document)))
+
+    def close(self) -> None:
+        """Write the sorted index and close the file."""
+        if self._handle.closed:
+            return
+        self._entries.sort()
+        offset = self._handle.tell()
+        self._handle.write(b"".join(_ENTRY.pack(*entry) for entry in self._entries))
+        self._handle.write(_TRAILER.pack(offset, len(self._entries), INDEX_MAGIC))
+        self._handle.close()
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Pack:
+    """Read documents from a pack file by key.
+
+    Args:
+        path: Pack file
+
+    Raises:
+        ValueError: If the file is not a pack of a supported version
+    """
+
+    def __init__(self, path: str | Path):
+        with open(path, "rb") as handle:
+            self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version = _HEADER.unpack_from(self._map)
+        except struct.error:
+            magic, version = None, None
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self._map.close()
+            raise ValueError("Not a QR-bill pack of a supported version")
+        try:
+            self._index = self._read_index()
+        except BaseException:
+            self._map.close()
+            raise
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, key: str) -> bool:
+        return self._find(key) is not None
+
+    def __iter__(self) -> Iterator[tuple[str, bytes]]:
+        """Iterate over the keys and documents in file order."""
+        for offset, length in sorted(self._index.locations()):
+            yield self._record(offset, length)
+
+    def read(self, key: str) -> bytes:
+        """Return the document of a key, the latest one for reissued keys.
+
+        Raises:
+            KeyError: If no document has the key
+        """
+        location = self._find(key)
+        if location is None:
+            raise KeyError(key)
+        return self._record(*location)[1]
+
+    def read_svg(self, key: str) -> str:
+        """Return the SVG of a key, see `read`."""
+        return self.read(key).decode("utf-8")
+
+    def close(self) -> None:
+        """Unmap the file."""
+        self._index = _Index(b"", 0, 0)
+        self._map.close()
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _find(self, key: str) -> tuple[int, int] | None:
+        """Binary search the index for the last document of a key."""
+        digest = key_hash(key)
+        encoded = key.encode("utf-8")
+        index = self._index
+        found = None
+        position = bisect_left(index, digest)
+        while position < len(index) and index[position] == digest:
+            offset, length = index.location(position)
+            if self._key(offset) == encoded:
+                found = offset, length
+            position += 1
+        return found
+
+    def _key(self, offset: int) -> bytes:
+        """Return the encoded key of the record at an offset."""
+        (size,) = struct.unpack_from(">H", self._map, offset)
+        return self._map[offset + 2 : offset + 2 + size]
+
+    def _record(self, offset: int, length: int) -> tuple[str, bytes]:
+        """Return the key and document of the record at an offset."""
+        key = self._key(offset)
+        start = offset + 6 + len(key)
+        return key.decode("utf-8"), self._map[start : start + length]
+
+    def _read_index(self) -> "_Index":
+        """Locate the index, or rebuild it from the records if it is missing."""
+        data = self._map
+        size = len(data)
+        if size - _HEADER.size >= _TRAILER.size:
+            offset, count, magic = _TRAILER.unpack_from(data, size - _TRAILER.size)
+            end = size - _TRAILER.size
+            if magic == INDEX_MAGIC and offset + count * _ENTRY.size == end:
+                return _Index(data, offset, count)
+
+        # Unterminated pack: scan the records, dropping a truncated last one
+        entries = []
+        offset = _HEADER.size
+        while offset + 6 <= size:
+            (key_length,) = struct.unpack_from(">H", data, offset)
+            start = offset + 2 + key_length
+            if start + 4 > size:
+                break
+            (length,) = struct.unpack_from(">I", data, start)
+            if start + 4 + length > size:
+                break
+            key = data[offset + 2 : start].decode("utf-8", "replace")
+            entries.append((key_hash(key), offset, length))
+            offset = start + 4 + length
+        entries.sort()
+        index = b"".join(_ENTRY.pack(*entry) for entry in entries)
+        return _Index(index, 0, len(entries))
+
+
+class _Index:
+    """Sorted index entries, as a sequence of key hashes for `bisect`.
+
+    Args:
+        data: Buffer holding the entries, the mapped pack file
+        start: Offset of the first entry in the buffer
+        count: Number of entries
+    """
+
+    def __init__(self, data: bytes | mmap.mmap, start: int, count: int):
+        self._data = data
+        self._start = start
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, position: int) -> bytes:
+        start = self._start + position * _ENTRY.size
+        return self._data[start : start + 8]
+
+    def location(self, position: int) -> tuple[int, int]:
+        """Return the record offset and document length of an entry."""
+        entry = self._start + position * _ENTRY.size
+        _, offset, length = _ENTRY.unpack_from(self._data, entry)
+        return offset, length
+
+    def locations(self) -> Iterator[tuple[int, int]]:
+        """Iterate over the record offsets and document lengths."""
+        for position in range(self._count):
+            yield self.location(position)
+
+
+def write_pack(
+    path: str | Path,
+    bills: Iterable[QRBill],
+    language: str = "en",
+    **options,
+) -> int:
+    """Render bills into a pack file, see `PackWriter`.
+
+    Args:
+        path: Pack file, replaced if it exists
+        bills: QR-bills, keyed by their reference
+        language: Language code (en, de, fr, it)
+        **options: Rendering options of `PackWriter`
+
+    Returns:
+        Number of bills written.
+    """
+    count = 0
+    with PackWriter(path, **options) as writer:
+        for qr_bill in bills:
+            writer.append(qr_bill, language)
+            count += 1
+    return count
@@ -0,0 +1,489 @@
+"""Multi-stage rendering pipeline with per-stage parallelism.
+
+The steps of a run differ widely in cost: building bills from input rows
+and assembling the SVG are cheap, encoding the QR code is CPU-bound and
+writing the output waits on I/O. A `Pipeline` runs each step as a stage
+with its own workers, threads or processes, connected by bounded queues,
+so every step can be given the parallelism it needs while the number of
+items in flight stays bounded::
+
+    pipeline = bill_pipeline(sink, language="de", workers={"encode": 4})
+    for _ in pipeline.run(rows):
+        pass
+    print(pipeline.report())
+
+Each stage records how long its workers were busy, starved of input and
+blocked on a full output queue; the stage with the highest utilisation is
+the bottleneck of the run.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, NamedTuple
+
+from .backends import QRBackend, QRSymbol, get_backend
+from .masking import MASK_FULL
+from .matrix_store import StoredSymbol
+from .qr_bill import QRBill
+from .render import bill_from_row
+from .sinks import Sink, document_name
+from .svg_generator import generate_svg, validate_svg_options
+
+STAGE_KINDS = ("thread", "process")
+
+# Stages of `bill_pipeline`, in order
+BILL_STAGES = ("parse", "payload", "encode", "render", "sink")
+
+# Polling interval of blocked workers checking whether the run was stopped
+_POLL_SECONDS = 0.05
+
+
+class Stage(NamedTuple):
+    """A step of a pipeline.
+
+    Attributes:
+        name: Name of the stage in the statistics
+        function: Function applied to every item; a process stage needs a
+            picklable function, e.g. a module-level one
+        workers: Number of items processed concurrently
+        kind: "thread" or "process"; a process stage is driven by one thread
+            per worker submitting to a pool of as many processes
+        ordered: Process the items in input order, with a single worker
+        numbered: Call the function with the 0-based input position of the
+            item and the item, instead of the item alone
+    """
+
+    name: str
+    function: Callable[..., Any]
+    workers: int = 1
+    kind: str = "thread"
+    ordered: bool = False
+    numbered: bool = False
+
+
+@dataclass
+class StageStats:
+    """Time spent by the workers of a stage, in seconds, summed over workers.
+
+    Attributes:
+        name: Name of the stage
+        workers: Number of workers
+        items: Number of items processed
+        busy: Time spent processing items
+        starved: Time spent waiting for input
+        blocked: Time spent waiting for room in the output queue
+    """
+
+    name: str
+    workers: int
+    items: int = 0
+    busy: float = 0.0
+    starved: float = 0.0
+    blocked: float = 0.0
+
+    def utilisation(self, elapsed: float) -> float:
+        """Return the share of the run's worker time spent processing."""
+        return self.busy / (elapsed * self.workers) if elapsed else 0.0
+
+
+class _Failed(NamedTuple):
+    """An exception raised for an item, passed on to the end of the pipeline."""
+
+    error: BaseException
+
+
+class _Done:
+    """End of input marker."""
+
+
+_DONE = _Done()
+
+# Sequence number of the failure of the input iterable
+_INPUT_FAILED = -1
+
+
+class _Stopped(Exception):
+    """Raised in workers when the run is stopped."""
+
+
+class Pipeline:
+    """Stages connected by bounded queues.
+
+    Args:
+        stages: The stages, in order
+        queue_size: Capacity of the queue in front of each stage and of the
+            output queue
+
+    Raises:
+        ValueError: If a stage is invalid
+    """
+
+    def __init__(self, stages: Iterable[Stage], queue_size: int = 64):
+        self.stages = list(stages)
+        if not self.stages:
+            raise ValueError("A pipeline needs at least one stage")
+        for stage in self.stages:
+            if stage.kind not in STAGE_KINDS:
+                raise ValueError(
+                    f"Unknown kind {stage.kind!r} of stage {stage.name!r}, "
+                    f"expected one of {', '.join(STAGE_KINDS)}"
+                )
+            if stage.workers < 1 or (stage.ordered and stage.workers != 1):
+                raise ValueError(
+                    f"Invalid number of workers of stage {stage.name!r}: "
+                    f"{stage.workers}, ordered stages have exactly one"
+                )
+        if queue_size < 1:
+            raise ValueError(f"Queue size must be at least 1, got {queue_size}")
+        self.queue_size = queue_size
+        self.stats = [StageStats(stage.name, stage.workers) for stage in self.stages]
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+
+    @property
+    def bottleneck(self) -> str | None:
+        """Name of the stage with the highest utilisation in the last run."""
+        if not self.elapsed:
+            return None
+        return max(self.stats, key=lambda s: s.utilisation(self.elapsed)).name
+
+    def report(self) -> str:
+        """Describe the utilisation of the stages in the last run."""
+        lines = [
+            f"{'stage':<10} {'workers':>7} {'items':>8} {'busy':>6} "
+            f"{'starved':>7} {'blocked':>7}"
+        ]
+        for stats in self.stats:
+            capacity = (self.elapsed * stats.workers) or 1
+            lines.append(
+                f"{stats.name:<10} {stats.workers:>7} {stats.items:>8} "
+                f"{stats.busy / capacity:>6.0%} {stats.starved / capacity:>7.0%} "
+                f"{stats.blocked / capacity:>7.0%}"
+            )
+        lines.append(f"elapsed {self.elapsed:.2f} s, bottleneck: {self.bottleneck}")
+        return "\n".join(lines)
+
+    def run(self, items: Iterable) -> Iterator:
+        """Pass items through the stages, lazily.
+
+        Items are pulled from the iterable as the first queue has room, so at
+        most the capacity of the queues and workers is in flight. The
+        statistics are complete once the results are exhausted.
+
+        Args:
+            items: Input of the first stage
+
+        Yields:
+            The results of the last stage, in input order.
+
+        Raises:
+            Exception: The exception a stage raised for an item, when the
+                item is reached
+        """
+        self._stop.clear()
+        self.stats = [StageStats(stage.name, stage.workers) for stage in self.stages]
+        self.elapsed = 0.0
+        queues = [queue.Queue(self.queue_size) for _ in range(len(self.stages) + 1)]
+        pools = []
+        threads = [
+            threading.Thread(target=self._feed, args=(items, queues[0]), daemon=True)
+        ]
+        start = None
+        try:
+            for position, stage in enumerate(self.stages):
+                pool = None
+                if stage.kind == "process":
+                    pool = ProcessPoolExecutor(stage.workers)
+                    pools.append(pool)
+                    # Start the processes before the threads, which they
+                    # would otherwise be forked from
+                    pool.submit(int).result()
+                remaining = [stage.workers]
+                lock = threading.Lock()
+                for _ in range(stage.workers):
+                    threads.append(
+                        threading.Thread(
+                            target=self._work,
+                            args=(position, pool, queues, remaining, lock),
+                            name=f"chqr-{stage.name}",
+                            daemon=True,
+                        )
+                    )
+
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            yield from self._collect(queues[-1])
+        finally:
+            self._stop.set()
+            for thread in threads:
+                if thread.is_alive():
+                    thread.join()
+            if start is not None:
+                self.elapsed = time.perf_counter() - start
+            for pool in pools:
+                pool.shutdown(cancel_futures=True)
+
+    def _feed(self, items: Iterable, output: queue.Queue) -> None:
+        """Put the numbered items into the first queue."""
+        try:
+            try:
+                for item in enumerate(items):
+                    self._put(output, item)
+            except _Stopped:
+                raise
+            except BaseException as error:
+                # Raised by the consumer after the items read so far
+                self._put(output, (_INPUT_FAILED, _Failed(error)))
+            self._put(output, _DONE)
+        except _Stopped:
+            pass
+
+    def _work(
+        self,
+        position: int,
+        pool: ProcessPoolExecutor | None,
+        queues: list[queue.Queue],
+        remaining: list[int],
+        lock: threading.Lock,
+    ) -> None:
+        """Process the items of a stage until its input ends."""
+        stage = self.stages[position]
+        source, target = queues[position], queues[position + 1]
+        stats = StageStats(stage.name, 1)
+        waiting: dict[int, Any] = {}
+        expected = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                entry = self._get(source)
+                stats.starved += time.perf_counter() - started
+                if entry is _DONE:
+                    break
+                if not stage.ordered:
+                    self._process(stage, stats, pool, entry, target)
+                    continue
+                waiting[entry[0]] = entry[1]
+                while expected in waiting:
+                    entry = expected, waiting.pop(expected)
+                    self._process(stage, stats, pool, entry, target)
+                    expected += 1
+            # Only a failure of the input is left
+            for sequence, item in waiting.items():
+                self._process(stage, stats, pool, (sequence, item), target)
+
+            # The last worker of the stage ends the input of the next one
+            self._put(source, _DONE)
+            with lock:
+                remaining[0] -= 1
+                last = not remaining[0]
+            if last:
+                self._put(target, _DONE)
+        except _Stopped:
+            pass
+        finally:
+            total = self.stats[position]
+            with lock:
+                total.items += stats.items
+                total.busy += stats.busy
+                total.starved += stats.starved
+                total.blocked += stats.blocked
+
+    def _process(
+        self,
+        stage: Stage,
+        stats: StageStats,
+        pool: ProcessPoolExecutor | None,
+        entry: tuple[int, Any],
+        target: queue.Queue,
+    ) -> None:
+        """Apply the function of a stage to an item and pass the result on."""
+        sequence, item = entry
+        if not isinstance(item, _Failed):
+            args = (sequence, item) if stage.numbered else (item,)
+            started = time.perf_counter()
+            try:
+                if pool is None:
+                    item = stage.function(*args)
+                else:
+                    item = pool.submit(stage.function, *args).result()
+            except Exception as error:
+                item = _Failed(error)
+            stats.busy += time.perf_counter() - started
+            stats.items += 1
+        started = time.perf_counter()
+        self._put(target, (sequence, item))
+        stats.blocked += time.perf_counter() - started
+
+    def _collect(self, output: queue.Queue) -> Iterator:
+        """Yield the results of the last stage in input order."""
+        waiting: dict[int, Any] = {}
+        expected = 0
+        failure = None
+        while True:
+            entry = self._get(output)
+            if entry is _DONE:
+                break
+            sequence, item = entry
+            if sequence == _INPUT_FAILED:
+                failure = item
+                continue
+            waiting[sequence] = item
+            while expected in waiting:
+                item = waiting.pop(expected)
+                if isinstance(item, _Failed):
+                    raise item.error
+                yield item
+                expected += 1
+        if failure is not None:
+            raise failure.error
+
+    def _put(self, target: queue.Queue, item: Any) -> None:
+        """Put an item into a queue, giving up when the run is stopped."""
+        while True:
+            try:
+                target.put(item, timeout=_POLL_SECONDS)
+                return
+            except queue.Full:
+                if self._stop.is_set():
+                    raise _Stopped from None
+
+    def _get(self, source: queue.Queue) -> Any:
+        """Get an item from a queue, giving up when the run is stopped."""
+        while True:
+            try:
+                return source.get(timeout=_POLL_SECONDS)
+            except queue.Empty:
+                if self._stop.is_set():
+                    raise _Stopped from None
+
+
+class _EncodedBackend:
+    """A backend returning a symbol encoded earlier, e.g. in another process.
+
+    Args:
+        backend: The backend which encoded the symbol
+        symbol: The symbol
+    """
+
+    def __init__(self, backend: QRBackend, symbol: StoredSymbol):
+        self.backend = backend
+        self.symbol = symbol
+        self.name = backend.name
+
+    def encode(self, data: str, mask: int | str = MASK_FULL) -> QRSymbol:
+        """Return the encoded symbol, or encode other data."""
+        if data == self.symbol.data:
+            return self.symbol
+        return self.backend.encode(data, mask)
+
+    def to_svg(self, symbol: QRSymbol) -> str:
+        """Serialise a symbol with the wrapped backend's SVG writer."""
+        return self.backend.to_svg(self._native(symbol))
+
+    def to_png(self, symbol: QRSymbol, scale: int) -> bytes:
+        """Serialise a symbol with the wrapped backend's PNG writer."""
+        return self.backend.to_png(self._native(symbol), scale)
+
+    def _native(self, symbol: QRSymbol) -> QRSymbol:
+        """Re-encode the symbol with its mask for the wrapped serialisers."""
+        if isinstance(symbol, StoredSymbol):
+            return self.backend.encode(symbol.data, symbol.mask)
+        return symbol
+
+
+def _payload(qr_bill: QRBill) -> tuple[QRBill, str]:
+    """Build the QR code data string of a bill."""
+    return qr_bill, qr_bill.build_data_string()
+
+
+def _encode(
+    item: tuple[QRBill, str], mask: int | str, backend: str
+) -> tuple[QRBill, StoredSymbol]:
+    """Encode the data string of a bill into a portable symbol."""
+    qr_bill, data = item
+    symbol = get_backend(backend).encode(data, mask)
+    matrix = tuple(bytes(row) for row in symbol.matrix)
+    return qr_bill, StoredSymbol(
+        matrix, symbol.mask, symbol.version, symbol.error, data
+    )
+
+
+def bill_pipeline(
+    sink: Sink | None = None,
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+    workers: Mapping[str, int] | None = None,
+    queue_size: int = 64,
+) -> Pipeline:
+    """Build the pipeline rendering input rows into a sink.
+
+    The stages are `BILL_STAGES`: "parse" builds and validates the bill of
+    a row (see `chqr.render.bill_from_row`), "payload" builds its QR code
+    data string, "encode" encodes the QR code in worker processes, "render"
+    assembles the SVG and "sink" writes it in input order, named by
+    `chqr.sinks.document_name` from the 1-based input position like
+    `chqr.sinks.write_bills` does.
+    The pipeline yields the document names, or the SVGs if there is no sink.
+
+    Args:
+        sink: Output sink, left open; None ends the pipeline at "render"
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default;
+            the encoding processes look it up by name
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+        workers: Workers by stage name, defaulting to one per stage and one
+            encoding process per CPU; "sink" always has one
+        queue_size: Capacity of the queues between the stages
+
+    Returns:
+        The pipeline.
+
+    Raises:
+        ValueError: If an option or stage name is invalid
+    """
+    validate_svg_options(qr_style, profile)
+    engine = get_backend(backend)
+    counts = {name: 1 for name in BILL_STAGES}
+    counts["encode"] = os.cpu_count() or 1
+    unknown = set(workers or ()) - set(BILL_STAGES)
+    if unknown:
+        raise ValueError(
+            f"Unknown stages {', '.join(sorted(unknown))}, "
+            f"expected some of {', '.join(BILL_STAGES)}"
+        )
+    counts.update(workers or {})
+
+    def render(item: tuple[QRBill, StoredSymbol]) -> str | tuple[QRBill, str]:
+        qr_bill, symbol = item
+        prepared = _EncodedBackend(engine, symbol)
+        svg = generate_svg(qr_bill, language, mask, prepared, qr_style, profile)
+        return svg if sink is None else (qr_bill, svg)
+
+    def write(sequence: int, item: tuple[QRBill, str]) -> str:
+        qr_bill, svg = item
+        name = document_name(sequence + 1, qr_bill)
+        sink.write(name, svg.encode("utf-8"))
+        return name
+
+    encode = partial(_encode, mask=mask, backend=engine.name)
+    stages = [
+        Stage("parse", bill_from_row, counts["parse"]),
+        Stage("payload", _payload, counts["payload"]),
+        Stage("encode", encode, counts["encode"], "process"),
+        Stage("render", render, counts["render"]),
+    ]
+    if sink is not None:
+        stages.append(Stage("sink", write, ordered=True, numbered=True))
+    return Pipeline(stages, queue_size)
@@ -0,0 +1,137 @@
+"""Warm-up of chqr for pre-fork servers.
+
+chqr computes some of its state on first use: the glyph atlas, lookup
+tables per QR code size and print resolution, and caches of text measures.
+In a server forking its workers, each worker would build this state again
+on its first requests, which are slow, and keep its own copy in memory.
+Calling `warmup` in the parent before forking does the work once::
+
+    import chqr
+
+    chqr.warmup()
+    # fork the workers, e.g. start gunicorn's workers with preload_app
+
+`warmup` then moves all objects into the permanent generation of the
+garbage collector (`gc.freeze`), so that collections in the workers do not
+write to them and their pages stay shared copy-on-write.
+"""
+
+import gc
+from collections.abc import Iterable
+from decimal import Decimal
+
+from .backends import QRBackend, get_backend
+from .creditor import Creditor
+from .debtor import UltimateDebtor
+from .glyphs import load_atlas
+from .layout import TRANSLATIONS
+from .masking import MASK_FULL, _mask_deltas
+from .qr_bill import QRBill
+from .qr_raster import (
+    PRINT_DPI,
+    _cross_masks,
+    _module_masks,
+    _pixel_modules,
+    mm_to_pixels,
+)
+from .qr_svg import QR_CODE_SIZE_MM, hidden_modules
+
+# QR code versions of QR-bills; the data string fits into version 25
+QR_VERSIONS = range(1, 26)
+
+# Warm-ups done in this process, inherited by forked workers
+_done: set[tuple] = set()
+
+
+def sample_bills() -> tuple[QRBill, QRBill]:
+    """Return a bill with all optional fields and one with none."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        street="Rue du Lac",
+        building_number="1268",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    debtor = UltimateDebtor(
+        name="Pia-Maria Rutschmann-Schnyder",
+        street="Grosse Marktgasse",
+        building_number="28",
+        postal_code="9400",
+        city="Rorschach",
+        country="CH",
+    )
+    return (
+        QRBill(
+            account="CH9300762011623852957",
+            creditor=creditor,
+            currency="CHF",
+        ),
+        QRBill(
+            account="CH4431999123000889012",
+            creditor=creditor,
+            amount=Decimal("1949.75"),
+            currency="CHF",
+            reference_type="QRR",
+            reference="210000000003139471430009017",
+            additional_information="Auftrag vom 15.06.2020",
+            debtor=debtor,
+        ),
+    )
+
+
+def warmup(
+    languages: Iterable[str] = tuple(TRANSLATIONS),
+    dpis: Iterable[int] = PRINT_DPI,
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    freeze: bool = True,
+) -> None:
+    """Initialise everything chqr computes on first use.
+
+    The tables of every QR code size are computed, the glyph atlas is
+    loaded and sample bills are rendered in every output format, which
+    also warms the QR engine and the caches of text measures. Repeated
+    calls with the same arguments, also in forked workers, return at once.
+
+    Args:
+        languages: Languages of the bills to be rendered
+        dpis: Resolutions of the bitmaps to be rendered, none for SVG only
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        freeze: Move all objects into the permanent generation of the
+            garbage collector afterwards, see `gc.freeze`
+
+    Raises:
+        ValueError: If a resolution is not available for bitmaps
+    """
+    languages, dpis = tuple(languages), tuple(dpis)
+    engine = get_backend(backend)
+    key = (languages, dpis, str(mask), engine.name, freeze)
+    if key in _done:
+        return
+
+    load_atlas()
+    for version in QR_VERSIONS:
+        size = 17 + 4 * version
+        hidden_modules(size)
+        _mask_deltas(size)
+        for dpi in dpis:
+            pixels = mm_to_pixels(QR_CODE_SIZE_MM, dpi)
+            _pixel_modules(size, pixels)
+            _module_masks(size, pixels)
+    for dpi in dpis:
+        _cross_masks(mm_to_pixels(QR_CODE_SIZE_MM, dpi))
+
+    for language in languages:
+        for qr_bill in sample_bills():
+            qr_bill.generate_svg(language, mask, engine)
+            qr_bill.generate_svg(language, mask, engine, "bitmap", "minified")
+            qr_bill.generate_html(language, mask, engine)
+            for dpi in dpis:
+                qr_bill.generate_bitmap(language, "png", dpi, mask, engine)
+
+    _done.add(key)
+    if freeze:
+        gc.collect()
+        gc.freeze()
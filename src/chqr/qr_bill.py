@@ -1,9 +1,15 @@
 """QR-bill generation for Swiss payment standards."""
 
 from decimal import Decimal
-import segno
+from .backends import QRBackend, QRSymbol, get_backend
+from .bill_raster import render_bill_bitmap
 from .creditor import Creditor
 from .debtor import UltimateDebtor
+from .exceptions import ValidationError
+from .html_generator import generate_html
+from .layout import Layout, compute_layout
+from .masking import MASK_FULL
+from .qr_raster import render_qr_bitmap
 from .svg_generator import generate_svg
 
 from .validators import (
@@ -79,6 +85,10 @@ class QRBill:
         self.billing_information = billing_information or ""
         self.alternative_procedures = alternative_procedures or []
 
+        # Layouts of the current data, see `layout`
+        self._layout_data: str | None = None
+        self._layouts: dict[tuple, Layout] = {}
+
     def build_data_string(self) -> str:
         """Build the QR code data string.
 
@@ -147,29 +157,147 @@ class QRBill:
 
         return "\n".join(elements)
 
-    def generate_qr_code(self) -> segno.QRCode:
+    @classmethod
+    def from_data_string(cls, data: str) -> "QRBill":
+        """Rebuild a QR-bill from its QR code data string.
+
+        This is the inverse of `build_data_string`: the rebuilt bill has the
+        same data string and renders identically.
+
+        Args:
+            data: QR code data string with elements separated by newlines
+
+        Returns:
+            The QR-bill, validated like any other.
+
+        Raises:
+            ValidationError: If the data is not a QR-bill data string
+        """
+        elements = data.split("\n")
+        if len(elements) < 31 or elements[:3] != ["SPC", "0200", "1"]:
+            raise ValidationError("Not a QR-bill data string")
+        if elements[30] != "EPD":
+            raise ValidationError("QR-bill data string lacks the EPD trailer")
+
+        creditor = Creditor(
+            name=elements[5],
+            street=elements[6],
+            building_number=elements[7],
+            postal_code=elements[8],
+            city=elements[9],
+            country=elements[10],
+        )
+        debtor = None
+        if elements[20]:
+            debtor = UltimateDebtor(
+                name=elements[21],
+                street=elements[22],
+                building_number=elements[23],
+                postal_code=elements[24],
+                city=elements[25],
+                country=elements[26],
+            )
+
+        # Billing information starts with "//", alternative procedures follow
+        trailing = elements[31:]
+        billing_information = None
+        if trailing and trailing[0].startswith("//"):
+            billing_information = trailing.pop(0)
+
+        return cls(
+            account=elements[3],
+            creditor=creditor,
+            currency=elements[19],
+            amount=Decimal(elements[18]) if elements[18] else None,
+            reference_type=elements[27],
+            reference=elements[28],
+            additional_information=elements[29],
+            debtor=debtor,
+            billing_information=billing_information,
+            alternative_procedures=trailing,
+        )
+
+    def generate_qr_code(
+        self,
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+    ) -> QRSymbol:
         """Generate a QR code for the Swiss QR-bill.
 
+        Args:
+            mask: Data mask strategy. "full" evaluates all eight mask patterns
+                (default), "fast" scores them on a subsample of the matrix and
+                an integer 0-7 applies that mask without evaluation.
+            backend: QR engine (name or instance). Defaults to the process
+                default backend, which is segno unless configured otherwise.
+
         Returns:
-            QRCode object configured with Swiss QR-bill specifications.
+            QR code symbol configured with Swiss QR-bill specifications
+            (a segno QRCode with the default backend).
             - Error correction level M (~15% redundancy)
             - Version auto-selected (max 25)
             - UTF-8 encoding
         """
         data = self.build_data_string()
-        qr = segno.make(
-            content=data,
-            version=None,  # Auto-select version
-            error="M",  # Error correction level M
-        )
+        return get_backend(backend).encode(data, mask)
+
+    def layout(
+        self,
+        language: str = "en",
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        component: str = "bill",
+    ) -> Layout:
+        """Lay out the QR-bill for rendering.
+
+        The layout, including the encoded QR code, is computed once per
+        component, language, mask strategy and backend and shared by all
+        output formats. It is recomputed when the bill's data changes.
 
-        return qr
+        Args:
+            language: Language code (en, de, fr, it). Defaults to "en".
+            mask: Data mask strategy of the QR code, see `generate_qr_code`.
+            backend: QR engine (name or instance), see `generate_qr_code`.
+            component: "bill" (default) for the complete bill, or "payment",
+                "receipt" or "qr" to lay out that component on its own.
+
+        Returns:
+            The format-neutral layout, see `chqr.layout`.
 
-    def generate_svg(self, language: str = "en") -> str:
+        Raises:
+            ValueError: If the component is unknown
+        """
+        data = self.build_data_string()
+        if data != self._layout_data:
+            self._layout_data = data
+            self._layouts = {}
+        engine = get_backend(backend)
+        key = (component, language, mask, engine)
+        layout = self._layouts.get(key)
+        if layout is None:
+            layout = compute_layout(self, language, mask, engine, component)
+            self._layouts[key] = layout
+        return layout
+
+    def generate_svg(
+        self,
+        language: str = "en",
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        qr_style: str = "path",
+        profile: str = "pretty",
+    ) -> str:
         """Generate SVG for the QR-bill.
 
         Args:
             language: Language code (en, de, fr, it). Defaults to "en".
+            mask: Data mask strategy of the QR code, see `generate_qr_code`.
+            backend: QR engine (name or instance), see `generate_qr_code`.
+            qr_style: QR code serialisation: "path" (default), "bitmap" for an
+                embedded 1-bit PNG, or "backend" for the engine's own SVG,
+                which was the output of chqr 1.0.0.
+            profile: "pretty" (default) or "minified" markup without
+                whitespace and with unitless millimetre coordinates.
 
         Returns:
             SVG string representing the complete QR-bill.
@@ -180,4 +308,99 @@ class QRBill:
             >>> with open("qr_bill.svg", "w") as f:
             ...     f.write(svg_string)
         """
-        return generate_svg(self, language)
+        return generate_svg(self, language, mask, backend, qr_style, profile)
+
+    async def generate_svg_async(
+        self,
+        language: str = "en",
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+        qr_style: str = "path",
+        profile: str = "pretty",
+    ) -> str:
+        """Generate SVG for the QR-bill without blocking the event loop.
+
+        The bill is rendered in the executor of `chqr.aio.set_executor`,
+        sharing the work with concurrent requests for the same document.
+        Arguments and result are those of `generate_svg`.
+        """
+        # Imported here, as chqr.aio builds on this module
+        from .aio import generate_svg_async
+
+        return await generate_svg_async(
+            self, language, mask, backend, qr_style, profile
+        )
+
+    def generate_html(
+        self,
+        language: str = "en",
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+    ) -> str:
+        """Generate an HTML document for the QR-bill.
+
+        Use `chqr.html_generator.write_html` to stream many bills into a
+        single document.
+
+        Args:
+            language: Language code (en, de, fr, it). Defaults to "en".
+            mask: Data mask strategy of the QR code, see `generate_qr_code`.
+            backend: QR engine (name or instance), see `generate_qr_code`.
+
+        Returns:
+            HTML string representing the complete QR-bill.
+        """
+        return generate_html([self], language, mask, backend)
+
+    def generate_qr_bitmap(
+        self,
+        format: str = "png",
+        dpi: int = 300,
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+    ) -> bytes:
+        """Generate the 46 x 46 mm QR code with the Swiss cross as a bitmap.
+
+        The image is rendered straight from the module matrix, without going
+        through SVG.
+
+        Args:
+            format: "png" (default, 1-bit with resolution) or "pbm".
+            dpi: Print resolution, e.g. 300 (default) or 600.
+            mask: Data mask strategy of the QR code, see `generate_qr_code`.
+            backend: QR engine (name or instance), see `generate_qr_code`.
+
+        Returns:
+            Image file content.
+
+        Example:
+            >>> with open("qr_code.png", "wb") as f:
+            ...     f.write(qr_bill.generate_qr_bitmap(dpi=600))
+        """
+        qr_code = self.generate_qr_code(mask, backend)
+        return render_qr_bitmap(qr_code.matrix, format, dpi)
+
+    def generate_bitmap(
+        self,
+        language: str = "en",
+        format: str = "png",
+        dpi: int = 300,
+        mask: int | str = MASK_FULL,
+        backend: str | QRBackend | None = None,
+    ) -> bytes:
+        """Generate a 1-bit bitmap of the complete QR-bill.
+
+        Text is drawn from the bundled glyph atlas, so no font engine or
+        SVG rasteriser is needed.
+
+        Args:
+            language: Language code (en, de, fr, it). Defaults to "en".
+            format: "png" (default) or "pbm".
+            dpi: Print resolution, 300 (default) or 600.
+            mask: Data mask strategy of the QR code, see `generate_qr_code`.
+            backend: QR engine (name or instance), see `generate_qr_code`.
+
+        Returns:
+            Image file content of the 210 x 108 mm layout of `generate_svg`.
+        """
+        return render_bill_bitmap(self, format, dpi, language, mask, backend)
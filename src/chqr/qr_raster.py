@@ -0,0 +1,142 @@
+"""Direct rasterisation of QR codes to 1-bit bitmaps at print resolution.
+
+The module matrix is scaled to the 46 x 46 mm print size by mapping every
+pixel to the module beneath its centre, and the Swiss cross is painted on top.
+Pixel rows are held as integers with one bit per pixel: a module row becomes
+the sum of the precomputed pixel masks of its dark modules, and is packed once
+and reused for all pixel rows it covers. Only the rows crossing the Swiss
+cross are painted individually, with two precomputed masks each.
+"""
+
+from collections.abc import Sequence
+from fractions import Fraction
+from functools import lru_cache
+from itertools import compress
+
+from .bitmap import Raster
+from .qr_svg import CROSS_START_MM, QR_CODE_SIZE_MM
+
+MM_PER_INCH = Fraction(254, 10)
+
+PRINT_DPI = (300, 600)
+
+# Swiss cross artwork in units of its 36 x 36 viewBox, painted in order:
+# white border, black square, white vertical and horizontal bar
+CROSS_UNITS = 36
+CROSS_SIZE_MM = Fraction(7)
+CROSS_SHAPES = (
+    (0, 0, 36, 36, 0),
+    (2, 2, 34, 34, 1),
+    (15, 8, 21, 28, 0),
+    (8, 15, 28, 21, 0),
+)
+
+
+def mm_to_pixels(mm: Fraction | int, dpi: int) -> int:
+    """Convert a length in millimetres to whole pixels at a resolution."""
+    return round(Fraction(mm) * dpi / MM_PER_INCH)
+
+
+def rasterize_qr(
+    matrix: Sequence[bytes | bytearray], dpi: int = 300, cross: bool = True
+) -> Raster:
+    """Rasterise a QR code matrix to its 46 x 46 mm print size.
+
+    Args:
+        matrix: One row per module line, 1 for dark and 0 for light
+        dpi: Output resolution in pixels per inch
+        cross: Whether to paint the Swiss cross on top
+
+    Returns:
+        The raster with packed pixel rows.
+
+    Raises:
+        ValueError: If the resolution is too low to show every module
+    """
+    size = len(matrix)
+    pixels = mm_to_pixels(QR_CODE_SIZE_MM, dpi)
+    if pixels < size:
+        raise ValueError(f"Resolution of {dpi} dpi is too low for {size} modules")
+
+    stride = (pixels + 7) // 8
+    module_masks = _module_masks(size, pixels)
+    # The pixel masks of the modules are disjoint, so summing them is an OR
+    row_bits = [sum(compress(module_masks, row)) for row in matrix]
+    packed = [bits.to_bytes(stride, "big") for bits in row_bits]
+    modules = _pixel_modules(size, pixels)
+    rows = [packed[module] for module in modules]
+
+    if cross:
+        for y, (keep, dark) in _cross_masks(pixels).items():
+            rows[y] = (row_bits[modules[y]] & keep | dark).to_bytes(stride, "big")
+
+    return Raster(rows, pixels, pixels, dpi)
+
+
+def render_qr_bitmap(
+    matrix: Sequence[bytes | bytearray], format: str = "png", dpi: int = 300
+) -> bytes:
+    """Render a QR code with the Swiss cross as a 1-bit image file.
+
+    Args:
+        matrix: One row per module line, 1 for dark and 0 for light
+        format: "png" (default) or "pbm"
+        dpi: Output resolution in pixels per inch, e.g. 300 or 600
+
+    Returns:
+        Image file content.
+
+    Raises:
+        ValueError: If the format is unknown or the resolution too low
+    """
+    return rasterize_qr(matrix, dpi).encode(format)
+
+
+@lru_cache(maxsize=None)
+def _pixel_modules(size: int, pixels: int) -> tuple[int, ...]:
+    """Return the module index beneath the centre of every pixel."""
+    return tuple((2 * x + 1) * size // (2 * pixels) for x in range(pixels))
+
+
+@lru_cache(maxsize=None)
+def _module_masks(size: int, pixels: int) -> tuple[int, ...]:
+    """Return the pixel row bits covered by every module column."""
+    masks = [0] * size
+    for x, module in enumerate(_pixel_modules(size, pixels)):
+        masks[module] |= _pixel_bit(x, pixels)
+    return tuple(masks)
+
+
+@lru_cache(maxsize=None)
+def _cross_masks(pixels: int) -> dict[int, tuple[int, int]]:
+    """Compute the Swiss cross masks of every pixel row it crosses.
+
+    Args:
+        pixels: Width of the QR code raster in pixels
+
+    Returns:
+        For every pixel row crossing the Swiss cross, the bits to keep from
+        the QR code and the dark bits of the cross, so that a row becomes
+        ``row & keep | dark``.
+    """
+    pixel_mm = QR_CODE_SIZE_MM / pixels
+    unit_mm = CROSS_SIZE_MM / CROSS_UNITS
+
+    def edge(unit: int) -> int:
+        return round((CROSS_START_MM + unit * unit_mm) / pixel_mm)
+
+    full = (1 << ((pixels + 7) // 8 * 8)) - 1
+    masks: dict[int, tuple[int, int]] = {}
+    for x0, y0, x1, y1, value in CROSS_SHAPES:
+        span = sum(_pixel_bit(x, pixels) for x in range(edge(x0), edge(x1)))
+        for y in range(edge(y0), edge(y1)):
+            keep, dark = masks.get(y, (full, 0))
+            keep &= ~span
+            dark = dark | span if value else dark & ~span
+            masks[y] = (keep, dark)
+    return masks
+
+
+def _pixel_bit(x: int, pixels: int) -> int:
+    """Return the bit of pixel column x in a packed row, MSB first."""
+    return 1 << ((pixels + 7) // 8 * 8 - 1 - x)
@@ -0,0 +1,126 @@
+"""Compact SVG serialisation of QR code matrices.
+
+The Swiss cross is painted on top of the QR code, so modules lying entirely
+beneath it are never visible. These serialisers drop them and merge each
+horizontal run of dark modules into a single relative path command.
+"""
+
+import base64
+import re
+from collections.abc import Sequence
+from fractions import Fraction
+from functools import lru_cache
+
+from .bitmap import encode_png, pack_matrix
+
+# Edges of the 7 mm Swiss cross within the 46 mm QR code
+QR_CODE_SIZE_MM = Fraction(46)
+CROSS_START_MM = Fraction(39, 2)
+CROSS_END_MM = Fraction(53, 2)
+
+QR_STYLES = ("path", "bitmap", "backend")
+
+_DARK_RUNS = re.compile(rb"\x01+")
+
+
+@lru_cache(maxsize=None)
+def hidden_modules(size: int) -> range:
+    """Return the module indices fully covered by the Swiss cross.
+
+    The covered area is square and centred, so the same range applies to
+    rows and columns.
+
+    Args:
+        size: Width of the QR code matrix in modules
+
+    Returns:
+        Range of covered row (and column) indices, possibly empty.
+    """
+    module = QR_CODE_SIZE_MM / size
+    first = -(-CROSS_START_MM // module)  # ceil
+    last = CROSS_END_MM // module
+    return range(int(first), max(int(first), int(last)))
+
+
+def qr_path_data(matrix: Sequence[bytes | bytearray], occlude: bool = True) -> str:
+    """Build the path data of a QR code drawn with 1 unit wide strokes.
+
+    Args:
+        matrix: One row per module line, 1 for dark and 0 for light
+        occlude: Whether to skip modules hidden beneath the Swiss cross
+
+    Returns:
+        Value of the ``d`` attribute for a path with ``stroke-width`` 1.
+    """
+    hidden = hidden_modules(len(matrix)) if occlude else range(0)
+    commands = []
+    x = y = None
+    for i, row in enumerate(matrix):
+        runs = [m.span() for m in _DARK_RUNS.finditer(row)]
+        if i in hidden:
+            runs = _clip_runs(runs, hidden.start, hidden.stop)
+        for start, end in runs:
+            if x is None:
+                commands.append(f"M{start} {i}.5h{end - start}")
+            else:
+                commands.append(f"m{start - x} {i - y}h{end - start}")
+            x, y = end, i
+    return "".join(commands)
+
+
+def _clip_runs(
+    runs: list[tuple[int, int]], start: int, stop: int
+) -> list[tuple[int, int]]:
+    """Remove the columns start..stop-1 from a list of runs."""
+    clipped = []
+    for run_start, run_end in runs:
+        if run_start < start:
+            clipped.append((run_start, min(run_end, start)))
+        if run_end > stop:
+            clipped.append((max(run_start, stop), run_end))
+    return clipped
+
+
+def qr_path_svg(matrix: Sequence[bytes | bytearray], occlude: bool = True) -> str:
+    """Serialise a QR code matrix to an SVG fragment with a single path.
+
+    Args:
+        matrix: One row per module line, 1 for dark and 0 for light
+        occlude: Whether to skip modules hidden beneath the Swiss cross
+
+    Returns:
+        An ``<svg>`` element whose viewBox spans one unit per module.
+    """
+    size = len(matrix)
+    return (
+        f'<svg viewBox="0 0 {size} {size}">'
+        f'<path stroke="#000" d="{qr_path_data(matrix, occlude)}"/></svg>'
+    )
+
+
+def qr_bitmap_svg(matrix: Sequence[bytes | bytearray], occlude: bool = True) -> str:
+    """Serialise a QR code matrix to an SVG fragment embedding a 1-bit PNG.
+
+    Args:
+        matrix: One row per module line, 1 for dark and 0 for light
+        occlude: Whether to clear modules hidden beneath the Swiss cross,
+            which improves compression of the image
+
+    Returns:
+        An ``<svg>`` element whose viewBox spans one unit per module.
+    """
+    size = len(matrix)
+    if occlude:
+        hidden = hidden_modules(size)
+        blank = bytes(len(hidden))
+        matrix = [
+            row[: hidden.start] + blank + row[hidden.stop :] if i in hidden else row
+            for i, row in enumerate(matrix)
+        ]
+    png = encode_png(pack_matrix(matrix), size, size)
+    data = base64.b64encode(png).decode("ascii")
+    return (
+        f'<svg viewBox="0 0 {size} {size}">'
+        f'<image width="{size}" height="{size}" image-rendering="optimizeSpeed"'
+        f' href="data:image/png;base64,{data}"/></svg>'
+    )
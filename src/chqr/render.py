@@ -0,0 +1,169 @@
+"""Lazy rendering of input rows with bounded memory.
+
+`iter_render` pulls rows from any iterable, e.g. a CSV reader or a database
+cursor, turns each into a validated `QRBill`, renders it and yields the
+SVGs in input order. Only a bounded number of bills is in flight at any
+time, also when the work is spread over a pool of worker processes, so the
+memory use of a run does not grow with its size::
+
+    for svg in iter_render(csv.DictReader(handle), language="de", workers=4):
+        sink.write(...)
+
+A consumer which stops pulling stops the production of further bills.
+"""
+
+from collections import deque
+from collections.abc import Iterable, Iterator, Mapping, Sequence
+from concurrent.futures import Future, ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+from .backends import QRBackend, get_backend
+from .creditor import Creditor
+from .debtor import UltimateDebtor
+from .exceptions import ValidationError
+from .masking import MASK_FULL
+from .qr_bill import QRBill
+from .svg_generator import generate_svg, validate_svg_options
+
+Row = QRBill | str | Mapping
+
+
+def bill_from_row(row: Row) -> QRBill:
+    """Build a validated QR-bill from an input row.
+
+    Args:
+        row: A `QRBill`, a QR code data string, or a mapping of the keyword
+            arguments of `QRBill` in which the creditor and the debtor may be
+            mappings of their keyword arguments and the amount a string;
+            empty values are treated as missing
+
+    Returns:
+        The QR-bill.
+
+    Raises:
+        ValidationError: If the row does not describe a valid QR-bill
+    """
+    if isinstance(row, QRBill):
+        return row
+    if isinstance(row, str):
+        return QRBill.from_data_string(row)
+
+    fields = {key: value for key, value in row.items() if value not in (None, "")}
+    for key, party in (("creditor", Creditor), ("debtor", UltimateDebtor)):
+        values = fields.get(key)
+        if values is None or isinstance(values, party):
+            continue
+        if not isinstance(values, Mapping):
+            raise ValidationError(f"The {key} must be a mapping, got {values!r}")
+        try:
+            fields[key] = party(
+                **{
+                    name: value
+                    for name, value in values.items()
+                    if value not in (None, "")
+                }
+            )
+        except (TypeError, AttributeError) as error:
+            raise ValidationError(f"Invalid {key}: {error}") from None
+    procedures = fields.get("alternative_procedures")
+    if procedures is not None and (
+        isinstance(procedures, str)
+        or not isinstance(procedures, Sequence)
+        or not all(isinstance(procedure, str) for procedure in procedures)
+    ):
+        raise ValidationError(
+            f"Alternative procedures must be a list of strings, got {procedures!r}"
+        )
+    amount = fields.get("amount")
+    if amount is not None:
+        try:
+            if not isinstance(amount, Decimal):
+                amount = fields["amount"] = Decimal(str(amount))
+            if not amount.is_finite():
+                raise InvalidOperation
+        except InvalidOperation:
+            raise ValidationError(f"Invalid amount: {amount!r}") from None
+    try:
+        return QRBill(**fields)
+    except (TypeError, AttributeError, ArithmeticError) as error:
+        # Values of the wrong type, or amounts beyond the decimal context
+        raise ValidationError(f"Invalid QR-bill row: {error}") from None
+
+
+def render_row(
+    row: Row,
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
+    """Validate, encode and render a single input row to SVG.
+
+    See `iter_render` for the arguments.
+
+    Raises:
+        ValidationError: If the row does not describe a valid QR-bill
+    """
+    qr_bill = bill_from_row(row)
+    return generate_svg(qr_bill, language, mask, backend, qr_style, profile)
+
+
+def iter_render(
+    rows: Iterable[Row],
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+    workers: int = 0,
+    max_in_flight: int | None = None,
+) -> Iterator[str]:
+    """Render input rows to SVG lazily, in order.
+
+    Args:
+        rows: Input rows, see `bill_from_row`; consumed lazily
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default;
+            worker processes look the backend up by its name, so it must be
+            registered there as well
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+        workers: Number of worker processes, 0 renders in this process
+        max_in_flight: Rows pulled but not yet yielded at most, defaults to
+            twice the number of workers; always 1 without workers
+
+    Yields:
+        The SVG of each row, in input order.
+
+    Raises:
+        ValidationError: When the row of an invalid bill is reached
+        ValueError: If an option is invalid
+    """
+    validate_svg_options(qr_style, profile)
+    if workers < 0:
+        raise ValueError(f"The number of workers cannot be negative, got {workers}")
+    if max_in_flight is None:
+        max_in_flight = 2 * workers
+    elif max_in_flight < 1:
+        raise ValueError(f"At least one bill must be in flight, got {max_in_flight}")
+    engine = get_backend(backend)
+
+    if not workers:
+        for row in rows:
+            yield render_row(row, language, mask, engine, qr_style, profile)
+        return
+
+    options = (language, mask, engine.name, qr_style, profile)
+    pool = ProcessPoolExecutor(workers)
+    pending: deque[Future] = deque()
+    try:
+        for row in rows:
+            pending.append(pool.submit(render_row, row, *options))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        pool.shutdown(cancel_futures=True)
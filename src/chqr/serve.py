@@ -0,0 +1,484 @@
+"""Local HTTP service rendering QR-bills, for applications not written in Python.
+
+Starting an interpreter and importing segno for every bill costs far more
+than rendering it. The service keeps a pool of warmed-up worker processes
+and renders bills posted as JSON::
+
+    python -m chqr.serve --port 8000 --workers 4
+
+    curl -X POST 'http://127.0.0.1:8000/render?format=svg&language=de' \\
+         -d '{"account": "CH9300762011623852957", "currency": "CHF",
+              "creditor": {"name": "Muster AG", "postal_code": "8000",
+                           "city": "Zürich", "country": "CH"}}'
+
+The body is a bill row as accepted by `chqr.render.bill_from_row`, or a
+QR code data string as a JSON string. Query parameters select the format
+(svg, html, png or pbm) and the options: language, mask, backend, qr_style
+and profile for SVG, dpi for bitmaps. Errors are JSON objects with an
+``error`` message, with status 422 for invalid bills.
+
+Documents are kept in an LRU cache and served with an ETag, the hash of the
+bill data and options, so ``If-None-Match`` requests are answered with 304
+before anything is rendered. Identical requests arriving while the first
+one is rendered wait for its result instead of rendering again. ``GET
+/metrics`` exposes request counts, cache statistics and latency histograms
+in the Prometheus text format, ``GET /health`` answers when the service is
+ready.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import NamedTuple
+from urllib.parse import parse_qs, urlsplit
+
+from .backends import get_backend
+from .cache import CHQR_VERSION, RenderCache
+from .exceptions import ValidationError
+from .masking import MASK_FULL, validate_mask
+from .preload import warmup
+from .render import bill_from_row
+from .svg_generator import SVG_TEMPLATE_VERSION, validate_svg_options
+
+CONTENT_TYPES = {
+    "svg": "image/svg+xml",
+    "html": "text/html; charset=utf-8",
+    "png": "image/png",
+    "pbm": "image/x-portable-bitmap",
+}
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+
+# Largest accepted request body in bytes
+MAX_BODY_SIZE = 64 * 1024
+
+# Paths with metrics of their own, others are counted as "other"
+ROUTES = ("/render", "/metrics", "/health")
+
+
+class RenderOptions(NamedTuple):
+    """Format and options of a requested document."""
+
+    format: str = "svg"
+    language: str = "en"
+    mask: int | str = MASK_FULL
+    backend: str = ""
+    qr_style: str = "path"
+    profile: str = "pretty"
+    dpi: int = 300
+
+    @classmethod
+    def from_query(cls, query: str) -> "RenderOptions":
+        """Read the options from a URL query string.
+
+        Raises:
+            ValueError: If an option is invalid
+        """
+        values = {key: items[-1] for key, items in parse_qs(query).items()}
+        unknown = set(values) - set(cls._fields)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        if "mask" in values and values["mask"].isdigit():
+            values["mask"] = int(values["mask"])
+        if "dpi" in values:
+            if not values["dpi"].isdigit():
+                raise ValueError(f"Invalid resolution: {values['dpi']!r}")
+            values["dpi"] = int(values["dpi"])
+        values.setdefault("backend", get_backend().name)
+        options = cls(**values)
+        if options.format not in CONTENT_TYPES:
+            raise ValueError(
+                f"Unknown format {options.format!r}, "
+                f"expected one of {', '.join(CONTENT_TYPES)}"
+            )
+        get_backend(options.backend)
+        validate_mask(options.mask)
+        validate_svg_options(options.qr_style, options.profile)
+        return options
+
+
+def document_key(data: str, options: RenderOptions) -> str:
+    """Return the cache key and ETag of a document.
+
+    Args:
+        data: QR code data string of the bill
+        options: Format and options of the document
+
+    Returns:
+        Hex SHA-256 digest of the data, the options and the versions of chqr
+        and its SVG template.
+    """
+    key = [CHQR_VERSION, SVG_TEMPLATE_VERSION, data, *map(str, options)]
+    encoded = json.dumps(key, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def render_document(data: str, options: RenderOptions) -> bytes:
+    """Render the document of a QR code data string, in a worker process.
+
+    Raises:
+        ValidationError: If the data is not a valid QR-bill data string
+        ValueError: If the resolution is not available
+    """
+    qr_bill = bill_from_row(data)
+    language, mask, backend = options.language, options.mask, options.backend
+    if options.format == "svg":
+        svg = qr_bill.generate_svg(
+            language, mask, backend, options.qr_style, options.profile
+        )
+        return svg.encode("utf-8")
+    if options.format == "html":
+        return qr_bill.generate_html(language, mask, backend).encode("utf-8")
+    return qr_bill.generate_bitmap(language, options.format, options.dpi, mask, backend)
+
+
+class Histogram:
+    """Cumulative histogram of durations in the Prometheus style.
+
+    Args:
+        buckets: Upper bounds of the buckets in seconds, ascending
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        """Number of observations."""
+        return sum(self.counts)
+
+    def observe(self, seconds: float) -> None:
+        """Count a duration."""
+        position = next(
+            (i for i, bound in enumerate(self.buckets) if seconds <= bound),
+            len(self.buckets),
+        )
+        with self._lock:
+            self.counts[position] += 1
+            self.sum += seconds
+
+    def exposition(self, name: str, labels: str = "") -> list[str]:
+        """Return the sample lines of the histogram.
+
+        Args:
+            name: Metric name
+            labels: Label pairs without braces, e.g. ``path="/render"``
+        """
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, "+Inf"), self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {cumulative}")
+        return lines
+
+
+class RenderService:
+    """Renders documents in an executor, with a response cache and coalescing.
+
+    Args:
+        executor: Executor rendering the documents; defaults to a pool of
+            ``workers`` warmed-up processes, shut down by `close`
+        workers: Number of worker processes, defaults to the number of CPUs
+        cache_size: Documents kept in the LRU cache at most
+    """
+
+    def __init__(
+        self,
+        executor: Executor | None = None,
+        workers: int | None = None,
+        cache_size: int = 1024,
+    ):
+        self._owned = executor is None
+        if executor is None:
+            workers = workers or os.cpu_count() or 1
+            # Forked workers inherit the warm state, others build their own
+            warmup()
+            executor = ProcessPoolExecutor(workers, initializer=warmup)
+            # Start the workers before serving the first request
+            executor.submit(int).result()
+        self.executor = executor
+        self.cache = RenderCache(memory_entries=cache_size)
+        self.coalesced = 0
+        self.render_latency = Histogram()
+        # Reentrant, as a callback added to a finished future runs at once
+        self._lock = threading.RLock()
+        self._pending: dict[str, Future] = {}
+
+    def document(self, key: str, data: str, options: RenderOptions) -> bytes:
+        """Return a document from the cache, or render it.
+
+        A request for a document being rendered waits for that rendering.
+
+        Args:
+            key: `document_key` of the document
+            data: QR code data string of the bill
+            options: Format and options of the document
+
+        Raises:
+            ValidationError: If the data is not a valid QR-bill data string
+            ValueError: If the resolution is not available
+        """
+        return self.submit(key, data, options).result()
+
+    def submit(self, key: str, data: str, options: RenderOptions) -> Future:
+        """Look up or start the rendering of a document, without waiting.
+
+        Arguments are those of `document`.
+
+        Returns:
+            A future of the document, done at once for cached documents and
+            shared with the pending request for the same document.
+        """
+        with self._lock:
+            document = self.cache.get(key)
+            if document is not None:
+                future = Future()
+                future.set_result(document)
+                return future
+            future = self._pending.get(key)
+            if future is None:
+                started = time.perf_counter()
+                future = self.executor.submit(render_document, data, options)
+                self._pending[key] = future
+                future.add_done_callback(lambda done: self._finish(key, done, started))
+            else:
+                self.coalesced += 1
+        return future
+
+    def close(self) -> None:
+        """Shut down the worker processes of the service."""
+        if self._owned:
+            self.executor.shutdown(cancel_futures=True)
+
+    def _finish(self, key: str, future: Future, started: float) -> None:
+        """Cache a rendered document and release its key."""
+        self.render_latency.observe(time.perf_counter() - started)
+        with self._lock:
+            del self._pending[key]
+            if not future.cancelled() and future.exception() is None:
+                self.cache.put(key, future.result())
+
+
+class RenderServer(ThreadingHTTPServer):
+    """HTTP server of a `RenderService`.
+
+    Args:
+        address: Host and port, port 0 picks a free one
+        service: The render service
+        quiet: Do not log requests to stderr
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self, address: tuple[str, int], service: RenderService, quiet: bool = False
+    ):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.quiet = quiet
+        self.requests: dict[tuple[str, int], int] = {}
+        self.latency: dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        """Base URL of the server."""
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, path: str, status: int, seconds: float) -> None:
+        """Count a request and its latency.
+
+        Requests are counted by route, one of `ROUTES` or "other", so that
+        arbitrary paths do not add series.
+        """
+        route = path if path in ROUTES else "other"
+        with self._lock:
+            self.requests[route, status] = self.requests.get((route, status), 0) + 1
+            histogram = self.latency.setdefault(route, Histogram())
+        histogram.observe(seconds)
+
+    def metrics(self) -> str:
+        """Return the metrics in the Prometheus text format."""
+        service = self.service
+        stats = service.cache.stats
+        with self._lock:
+            requests = sorted(self.requests.items())
+            latency = sorted(self.latency.items())
+        lines = [
+            "# TYPE chqr_requests_total counter",
+            *(
+                f'chqr_requests_total{{route="{route}",status="{status}"}} {count}'
+                for (route, status), count in requests
+            ),
+            "# TYPE chqr_request_duration_seconds histogram",
+        ]
+        for route, histogram in latency:
+            lines += histogram.exposition(
+                "chqr_request_duration_seconds", f'route="{route}"'
+            )
+        lines += [
+            "# TYPE chqr_render_duration_seconds histogram",
+            *service.render_latency.exposition("chqr_render_duration_seconds"),
+            "# TYPE chqr_cache_hits_total counter",
+            f"chqr_cache_hits_total {stats.reused}",
+            "# TYPE chqr_cache_misses_total counter",
+            f"chqr_cache_misses_total {stats.misses}",
+            "# TYPE chqr_coalesced_total counter",
+            f"chqr_coalesced_total {service.coalesced}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Request handler of a `RenderServer`."""
+
+    server: RenderServer
+    protocol_version = "HTTP/1.1"
+    _status = int(HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    def do_GET(self) -> None:
+        started = time.perf_counter()
+        path = urlsplit(self.path).path
+        try:
+            if path == "/metrics":
+                self._respond(
+                    HTTPStatus.OK,
+                    self.server.metrics().encode("utf-8"),
+                    "text/plain; version=0.0.4",
+                )
+            elif path == "/health":
+                self._respond(HTTPStatus.OK, b"ok\n", "text/plain")
+            else:
+                self._error(HTTPStatus.NOT_FOUND, f"No such resource: {path}")
+        finally:
+            self.server.record(path, self._status, time.perf_counter() - started)
+
+    def do_POST(self) -> None:
+        started = time.perf_counter()
+        url = urlsplit(self.path)
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if not 0 <= length <= MAX_BODY_SIZE:
+                self.close_connection = True
+                if length < 0:
+                    self._error(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+                else:
+                    self._error(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+            elif url.path != "/render":
+                self.rfile.read(length)
+                self._error(HTTPStatus.NOT_FOUND, f"No such resource: {url.path}")
+            else:
+                self._render(url.query, self.rfile.read(length))
+        except ValueError:
+            self.close_connection = True
+            self._error(HTTPStatus.BAD_REQUEST, "Invalid Content-Length")
+        except OSError:
+            # The client is gone
+            raise
+        except Exception as error:
+            # Answer instead of dropping the connection, then carry on serving
+            self.log_error("Rendering failed: %r", error)
+            self.close_connection = True
+            self._error(HTTPStatus.INTERNAL_SERVER_ERROR, "Internal server error")
+        finally:
+            self.server.record(url.path, self._status, time.perf_counter() - started)
+
+    def _render(self, query: str, body: bytes) -> None:
+        """Answer a render request."""
+        try:
+            options = RenderOptions.from_query(query)
+            row = json.loads(body)
+        except ValueError as error:
+            self._error(HTTPStatus.BAD_REQUEST, str(error))
+            return
+        if not isinstance(row, (str, dict)):
+            self._error(HTTPStatus.BAD_REQUEST, "Expected a JSON object or string")
+            return
+        try:
+            data = bill_from_row(row).build_data_string()
+        except ValidationError as error:
+            self._error(HTTPStatus.UNPROCESSABLE_ENTITY, str(error))
+            return
+
+        key = document_key(data, options)
+        etag = f'"{key}"'
+        if etag in self.headers.get("If-None-Match", ""):
+            self._respond(HTTPStatus.NOT_MODIFIED, b"", etag=etag)
+            return
+        try:
+            document = self.server.service.document(key, data, options)
+        except (ValidationError, ValueError) as error:
+            self._error(HTTPStatus.UNPROCESSABLE_ENTITY, str(error))
+            return
+        self._respond(HTTPStatus.OK, document, CONTENT_TYPES[options.format], etag)
+
+    def _error(self, status: HTTPStatus, message: str) -> None:
+        """Send an error as JSON."""
+        body = json.dumps({"error": message}).encode("utf-8") + b"\n"
+        self._respond(status, body, "application/json")
+
+    def _respond(
+        self,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str | None = None,
+        etag: str | None = None,
+    ) -> None:
+        """Send a complete response."""
+        self._status = int(status)
+        self.send_response(status)
+        if content_type is not None:
+            self.send_header("Content-Type", content_type)
+        if etag is not None:
+            self.send_header("ETag", etag)
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    """Run the service until interrupted."""
+    parser = argparse.ArgumentParser(
+        prog="python -m chqr.serve", description="Render QR-bills over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to bind")
+    parser.add_argument("--port", type=int, default=8000, help="port to bind")
+    parser.add_argument("--workers", type=int, help="worker processes")
+    parser.add_argument("--cache-size", type=int, default=1024, help="cached documents")
+    parser.add_argument("--quiet", action="store_true", help="do not log requests")
+    args = parser.parse_args(argv)
+
+    service = RenderService(workers=args.workers, cache_size=args.cache_size)
+    with RenderServer((args.host, args.port), service, args.quiet) as server:
+        print(f"Serving QR-bills on {server.url}", flush=True)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            service.close()
+
+
+if __name__ == "__main__":
+    main()
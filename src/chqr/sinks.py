@@ -0,0 +1,623 @@
+"""Output sinks for batch runs.
+
+A sink takes named documents, usually the SVGs of a batch of bills, and
+stores them::
+
+    with ShardedDirectorySink("out") as sink:
+        write_bills(sink, bills, language="de")
+
+Available targets:
+
+- `ShardedDirectorySink`: one file per document in hash-prefixed
+  subdirectories, listed in a JSONL manifest
+- `TarSink` and `ZipSink`: a single archive streamed to a file or pipe,
+  with the members compressed in a thread pool (zlib releases the GIL)
+- `WriteBehindSink`: wraps any sink and writes on a background thread, so
+  that rendering never waits for the disk
+
+`chqr.pack.PackWriter` is a sink too. Sinks take an fsync policy, one of
+`FSYNC_POLICIES`: "never" leaves flushing to the operating system, "close"
+(default) syncs the files written once when the sink is closed and "always"
+after every document.
+"""
+
+import hashlib
+import io
+import json
+import os
+import queue
+import struct
+import tarfile
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import BinaryIO, Protocol, TypeVar, runtime_checkable
+
+from .backends import QRBackend, get_backend
+from .masking import MASK_FULL
+from .qr_bill import QRBill
+from .svg_generator import generate_svg, validate_svg_options
+from .svg_output import GZIP_WBITS
+
+FSYNC_POLICIES = ("never", "close", "always")
+
+MANIFEST_NAME = "manifest.jsonl"
+
+# Members larger than this would need ZIP64 sizes, which bills never do
+_ZIP_MAX_MEMBER = 0xFFFFFFFF
+# Beyond these, the offsets and counts of a zip file move to ZIP64 records
+_ZIP64_OFFSET = 0xFFFFFFFF
+_ZIP64_COUNT = 0xFFFF
+
+_T = TypeVar("_T")
+
+
+@runtime_checkable
+class Sink(Protocol):
+    """Interface of an output sink."""
+
+    def write(self, name: str, data: bytes) -> None:
+        """Store a document.
+
+        Args:
+            name: File name of the document, without directories
+            data: Document content
+        """
+        ...
+
+    def close(self) -> None:
+        """Store pending documents and release the target."""
+        ...
+
+
+class _BaseSink:
+    """Context management common to the sinks."""
+
+    def close(self) -> None:
+        """Store pending documents and release the target."""
+
+    def __enter__(self: _T) -> _T:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ShardedDirectorySink(_BaseSink):
+    """Write each document to its own file in a sharded directory tree.
+
+    A document named ``name`` is stored under ``<root>/ab/cd/name``, where
+    ``abcd`` starts the hex BLAKE2b digest of the name, which keeps
+    directories small at millions of files. Every document is listed with
+    its path, size and SHA-256 digest in a JSONL manifest at the root, in
+    the order written.
+
+    Args:
+        root: Output directory, created if missing
+        levels: Number of shard directory levels, 256 directories each
+        fsync: Fsync policy, see `FSYNC_POLICIES`; besides the documents
+            and the manifest, the directories holding new entries are synced
+        manifest_size: Size in bytes to cut an existing manifest to, as
+            returned by `sync`, to resume an interrupted run; by default
+            documents are listed after the existing ones
+
+    Raises:
+        ValueError: If the fsync policy is unknown
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        levels: int = 2,
+        fsync: str = "close",
+        manifest_size: int | None = None,
+    ):
+        self.fsync = _validate_fsync(fsync)
+        self.root = Path(root)
+        self.levels = levels
+        # Files and directories written since the last sync
+        self._unsynced: set[Path] = set()
+        created = _make_directories(self.root)
+        self._manifest = open(self.root / MANIFEST_NAME, "ab")
+        if manifest_size is not None:
+            self._manifest.truncate(manifest_size)
+            # tell() still reports the old end of an appending file
+            self._manifest.seek(manifest_size)
+        self._written({self.root, *(path.parent for path in created)})
+
+    def path(self, name: str) -> Path:
+        """Return the path of a document relative to the root."""
+        digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).hexdigest()
+        shards = [digest[2 * i : 2 * i + 2] for i in range(self.levels)]
+        return Path(*shards, name)
+
+    def write(self, name: str, data: bytes) -> None:
+        """Store a document, replacing one of the same name.
+
+        Raises:
+            ValueError: If the name is not a plain file name
+        """
+        _validate_name(name)
+        relative = self.path(name)
+        path = self.root / relative
+        created = _make_directories(path.parent)
+        with open(path, "wb") as handle:
+            handle.write(data)
+            if self.fsync == "always":
+                _sync(handle)
+            else:
+                self._written({path})
+        self._written({path.parent, *(directory.parent for directory in created)})
+        entry = {
+            "name": name,
+            "path": relative.as_posix(),
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+        }
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        self._manifest.write(line.encode("utf-8"))
+        if self.fsync == "always":
+            _sync(self._manifest)
+
+    def sync(self) -> int:
+        """Flush the documents and the manifest as the fsync policy asks.
+
+        Returns:
+            Size of the manifest in bytes.
+        """
+        if self.fsync == "never":
+            self._manifest.flush()
+        else:
+            _sync(self._manifest)
+        for path in sorted(self._unsynced):
+            _sync_path(path)
+        self._unsynced.clear()
+        return self._manifest.tell()
+
+    def _written(self, paths: set[Path]) -> None:
+        """Sync written files and directories as the fsync policy asks."""
+        if self.fsync == "always":
+            for path in sorted(paths):
+                _sync_path(path)
+        elif self.fsync == "close":
+            self._unsynced |= paths
+
+    def close(self) -> None:
+        """Sync and close the manifest."""
+        if self._manifest.closed:
+            return
+        self.sync()
+        self._manifest.close()
+
+
+class _ArchiveSink(_BaseSink, ABC):
+    """Streamed archive whose members are compressed in a thread pool.
+
+    Compressed members are written in the order of `write` by the calling
+    thread once they are ready, while at most ``2 * workers`` documents are
+    in flight.
+    """
+
+    def __init__(
+        self,
+        target: str | Path | BinaryIO,
+        workers: int | None,
+        fsync: str,
+    ):
+        self.fsync = _validate_fsync(fsync)
+        if isinstance(target, (str, os.PathLike)):
+            self._handle: BinaryIO = open(target, "wb")
+            self._owned = True
+        else:
+            self._handle = target
+            self._owned = False
+        workers = workers or min(4, os.cpu_count() or 1)
+        self._pool = ThreadPoolExecutor(workers, thread_name_prefix="chqr-compress")
+        self._pending: deque[tuple[str, int, Future]] = deque()
+        self._max_pending = 2 * workers
+        self._closed = False
+
+    def write(self, name: str, data: bytes) -> None:
+        """Queue a document for compression and store the ready ones.
+
+        Raises:
+            ValueError: If the name is not a plain file name
+        """
+        _validate_name(name)
+        future = self._pool.submit(self._compress, data)
+        self._pending.append((name, len(data), future))
+        while len(self._pending) > self._max_pending:
+            self._store_next()
+
+    def close(self) -> None:
+        """Store the queued documents and finish the archive."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            while self._pending:
+                self._store_next()
+            self._finish()
+            if self.fsync != "never":
+                _sync(self._handle)
+        finally:
+            self._pool.shutdown()
+            if self._owned:
+                self._handle.close()
+
+    def _store_next(self) -> None:
+        """Store the oldest queued document once it is compressed."""
+        name, size, future = self._pending.popleft()
+        self._store(name, size, future.result())
+        if self.fsync == "always":
+            _sync(self._handle)
+
+    @abstractmethod
+    def _compress(self, data: bytes):
+        """Compress a document, on a pool thread."""
+
+    @abstractmethod
+    def _store(self, name: str, size: int, compressed) -> None:
+        """Append a compressed document to the archive."""
+
+    def _finish(self) -> None:
+        """Write the end of the archive."""
+
+
+class TarSink(_ArchiveSink):
+    """Stream documents into an uncompressed tar archive.
+
+    The tar stream itself is never compressed, so it can be written to a
+    pipe or socket; with ``compress`` set, each member is gzipped on its own
+    instead (".svg" members become ".svgz", others get ".gz" appended).
+
+    Args:
+        target: Archive path or writable binary stream
+        compress: Whether to gzip the members
+        level: zlib compression level (0-9)
+        workers: Compression threads, defaults to up to four
+        fsync: Fsync policy, see `FSYNC_POLICIES`
+
+    Raises:
+        ValueError: If the fsync policy is unknown
+    """
+
+    def __init__(
+        self,
+        target: str | Path | BinaryIO,
+        compress: bool = False,
+        level: int = 6,
+        workers: int | None = None,
+        fsync: str = "close",
+    ):
+        super().__init__(target, workers, fsync)
+        self.compress = compress
+        self.level = level
+        self._mtime = int(time.time())
+        self._tar = tarfile.open(
+            fileobj=self._handle, mode="w|", format=tarfile.PAX_FORMAT
+        )
+
+    def _compress(self, data: bytes) -> bytes:
+        """Gzip a document, unless the members are stored as is."""
+        if not self.compress:
+            return data
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, GZIP_WBITS)
+        return compressor.compress(data) + compressor.flush()
+
+    def _store(self, name: str, size: int, compressed: bytes) -> None:
+        """Append a tar member."""
+        if self.compress:
+            name = name + "z" if name.endswith(".svg") else name + ".gz"
+        info = tarfile.TarInfo(name)
+        info.size = len(compressed)
+        info.mtime = self._mtime
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(compressed))
+
+    def _finish(self) -> None:
+        """Write the end-of-archive blocks."""
+        self._tar.close()
+
+
+class ZipSink(_ArchiveSink):
+    """Stream documents into a zip archive.
+
+    Members are deflated, and their checksums computed, in the thread pool;
+    the archive is written sequentially without seeking, so the target may
+    be a pipe. ZIP64 records are added once the archive outgrows the classic
+    format's 65535 members or 4 GiB.
+
+    Args:
+        target: Archive path or writable binary stream
+        compress: Whether to deflate the members, otherwise they are stored
+        level: zlib compression level (0-9)
+        workers: Compression threads, defaults to up to four
+        fsync: Fsync policy, see `FSYNC_POLICIES`
+
+    Raises:
+        ValueError: If the fsync policy is unknown
+    """
+
+    def __init__(
+        self,
+        target: str | Path | BinaryIO,
+        compress: bool = True,
+        level: int = 6,
+        workers: int | None = None,
+        fsync: str = "close",
+    ):
+        super().__init__(target, workers, fsync)
+        self.compress = compress
+        self.level = level
+        self._time, self._date = _dos_time(time.localtime())
+        self._offset = 0
+        self._directory: list[bytes] = []
+
+    def _compress(self, data: bytes) -> tuple[int, bytes]:
+        """Return the CRC-32 and the deflated or stored document."""
+        crc = zlib.crc32(data)
+        if not self.compress:
+            return crc, data
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, -zlib.MAX_WBITS)
+        return crc, compressor.compress(data) + compressor.flush()
+
+    def _store(self, name: str, size: int, compressed: tuple[int, bytes]) -> None:
+        """Append a local file header and the member data."""
+        crc, data = compressed
+        if size > _ZIP_MAX_MEMBER or len(data) > _ZIP_MAX_MEMBER:
+            raise ValueError(f"Document {name!r} is too large for a zip member")
+        encoded = name.encode("utf-8")
+        method = zlib.DEFLATED if self.compress else 0
+        # Version needed, UTF-8 name flag, method, time, date, CRC, sizes
+        fields = (20, 0x0800, method, self._time, self._date, crc, len(data), size)
+        header = struct.pack("<IHHHHHIII", 0x04034B50, *fields)
+        self._handle.write(header + struct.pack("<HH", len(encoded), 0) + encoded)
+        self._handle.write(data)
+
+        # Central directory entry, with the offset in a ZIP64 extra field
+        # once it exceeds 32 bits
+        extra = b""
+        offset = self._offset
+        if offset >= _ZIP64_OFFSET:
+            extra = struct.pack("<HHQ", 1, 8, offset)
+            offset = 0xFFFFFFFF
+            fields = (45, *fields[1:])
+        entry = struct.pack(
+            "<IHHHHHHIIIHHHHHII",
+            0x02014B50,
+            3 << 8 | fields[0],  # Made by Unix, for the file mode
+            *fields,
+            len(encoded),
+            len(extra),
+            0,
+            0,
+            0,
+            0o100644 << 16,
+            offset,
+        )
+        self._directory.append(entry + encoded + extra)
+        self._offset += 30 + len(encoded) + len(data)
+
+    def _finish(self) -> None:
+        """Write the central directory and the end records."""
+        start = self._offset
+        directory = b"".join(self._directory)
+        self._handle.write(directory)
+        count = len(self._directory)
+        end = start + len(directory)
+        if count >= _ZIP64_COUNT or start >= _ZIP64_OFFSET or end >= _ZIP64_OFFSET:
+            self._handle.write(
+                struct.pack(
+                    "<IQHHIIQQQQ",
+                    0x06064B50,
+                    44,
+                    45,
+                    45,
+                    0,
+                    0,
+                    count,
+                    count,
+                    len(directory),
+                    start,
+                )
+            )
+            self._handle.write(struct.pack("<IIQI", 0x07064B50, 0, end, 1))
+            count = min(count, 0xFFFF)
+            start = min(start, 0xFFFFFFFF)
+        self._handle.write(
+            struct.pack(
+                "<IHHHHIIH",
+                0x06054B50,
+                0,
+                0,
+                count,
+                count,
+                min(len(directory), 0xFFFFFFFF),
+                start,
+                0,
+            )
+        )
+
+
+class WriteBehindSink(_BaseSink):
+    """Hand documents to a background thread which writes them to a sink.
+
+    `write` returns as soon as the document is queued, and only blocks while
+    ``max_pending`` documents are waiting, so a slow disk throttles rather
+    than stalls the renderer. Once the background thread fails, its error is
+    raised by every later `write` and by `close`, and no further documents
+    are written.
+
+    Args:
+        sink: The sink written to, closed with this one
+        max_pending: Queued documents at most
+    """
+
+    def __init__(self, sink: Sink, max_pending: int = 256):
+        self.sink = sink
+        self._queue: queue.Queue = queue.Queue(max_pending)
+        self._error: BaseException | None = None
+        self._thread = threading.Thread(
+            target=self._run, name="chqr-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, name: str, data: bytes) -> None:
+        """Queue a document.
+
+        Raises:
+            Exception: The error of an earlier write in the background
+        """
+        self._raise()
+        self._queue.put((name, data))
+
+    def close(self) -> None:
+        """Write the queued documents and close the sink."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+            self._raise()
+
+    def _run(self) -> None:
+        """Write queued documents until `close`, then close the sink."""
+        try:
+            while (item := self._queue.get()) is not None:
+                if self._error is None:
+                    self.sink.write(*item)
+        except BaseException as error:
+            self._error = error
+            # Keep draining so that writers are not blocked on a full queue
+            while self._queue.get() is not None:
+                pass
+        try:
+            self.sink.close()
+        except BaseException as error:
+            self._error = self._error or error
+
+    def _raise(self) -> None:
+        """Raise the error of the background thread, if it failed."""
+        if self._error is not None:
+            raise self._error
+
+
+def write_bills(
+    sink: Sink,
+    bills: Iterable[QRBill],
+    language: str = "en",
+    mask: int | str = MASK_FULL,
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> int:
+    """Render bills to SVG and write them to a sink.
+
+    Documents are named by `document_name`, so bills sharing a reference
+    do not replace each other.
+
+    Args:
+        sink: The output sink, left open
+        bills: QR-bills to render
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
+
+    Returns:
+        Number of bills written.
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+    validate_svg_options(qr_style, profile)
+    engine = get_backend(backend)
+    count = 0
+    for count, qr_bill in enumerate(bills, 1):
+        svg = generate_svg(qr_bill, language, mask, engine, qr_style, profile)
+        sink.write(document_name(count, qr_bill), svg.encode("utf-8"))
+    return count
+
+
+def document_name(position: int, qr_bill: QRBill) -> str:
+    """Return the name of a bill's document, unique within a run.
+
+    Args:
+        position: Position of the bill in the run, from 1
+        qr_bill: The bill
+
+    Returns:
+        ``bill-<position>-<reference>.svg``, or ``bill-<position>.svg`` for
+        bills without a reference.
+    """
+    if qr_bill.reference:
+        return f"bill-{position}-{qr_bill.reference}.svg"
+    return f"bill-{position}.svg"
+
+
+def _validate_fsync(fsync: str) -> str:
+    """Return a valid fsync policy.
+
+    Raises:
+        ValueError: If the fsync policy is unknown
+    """
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(
+            f"Invalid fsync policy {fsync!r}, "
+            f"expected one of {', '.join(FSYNC_POLICIES)}"
+        )
+    return fsync
+
+
+def _validate_name(name: str) -> None:
+    """Reject document names which are not plain file names."""
+    if not name or name in (".", "..") or "/" in name or "\\" in name:
+        raise ValueError(f"Invalid document name {name!r}")
+
+
+def _sync(handle: BinaryIO) -> None:
+    """Flush a file to disk, if it is one."""
+    handle.flush()
+    try:
+        os.fsync(handle.fileno())
+    except (OSError, AttributeError, io.UnsupportedOperation):
+        pass
+
+
+def _sync_path(path: Path) -> None:
+    """Flush a file or directory to disk by its path, where supported."""
+    try:
+        descriptor = os.open(path, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on Windows
+        return
+    try:
+        os.fsync(descriptor)
+    except OSError:
+        pass
+    finally:
+        os.close(descriptor)
+
+
+def _make_directories(path: Path) -> list[Path]:
+    """Create a directory and its missing parents, returning the new ones."""
+    missing = []
+    while not path.is_dir():
+        missing.append(path)
+        path = path.parent
+    for directory in reversed(missing):
+        directory.mkdir(exist_ok=True)
+    return missing
+
+
+def _dos_time(moment: time.struct_time) -> tuple[int, int]:
+    """Return the MS-DOS time and date of a local time."""
+    dos_time = moment.tm_hour << 11 | moment.tm_min << 5 | moment.tm_sec // 2
+    year = max(moment.tm_year, 1980)
+    dos_date = (year - 1980) << 9 | moment.tm_mon << 5 | moment.tm_mday
+    return dos_time, dos_date
@@ -1,172 +1,56 @@
 """SVG generation for Swiss QR-bills."""
 
-from decimal import Decimal
-import io
+from collections.abc import Iterable
+from itertools import groupby
 from typing import TYPE_CHECKING
 
+from .backends import QRBackend, get_backend
+from .layout import (  # noqa: F401 - formatting helpers re-exported
+    CROSS_OFFSET_MM,
+    CROSS_SIZE_MM,
+    SCISSORS_ROTATIONS,
+    TRANSLATIONS,
+    Element,
+    Layout,
+    Line,
+    QRCode,
+    Section,
+    Symbol,
+    TextBlock,
+    TextRun,
+    format_amount,
+    format_creditor_reference,
+    format_iban,
+    format_qr_reference,
+)
+from .qr_svg import QR_STYLES, qr_bitmap_svg, qr_path_svg
+from .svg_output import PROFILES, SVG_PROFILES, SVGProfile
+
 if TYPE_CHECKING:
     from .qr_bill import QRBill
 
 
-# Language translations for QR-bill headings
-TRANSLATIONS = {
-    "en": {
-        "payment_part": "Payment part",
-        "receipt": "Receipt",
-        "account_payable_to": "Account / Payable to",
-        "reference": "Reference",
-        "additional_information": "Additional information",
-        "currency": "Currency",
-        "amount": "Amount",
-        "acceptance_point": "Acceptance point",
-        "payable_by": "Payable by",
-        "payable_by_name_address": "Payable by (name/address)",
-    },
-    "de": {
-        "payment_part": "Zahlteil",
-        "receipt": "Empfangsschein",
-        "account_payable_to": "Konto / Zahlbar an",
-        "reference": "Referenz",
-        "additional_information": "Zusätzliche Informationen",
-        "currency": "Währung",
-        "amount": "Betrag",
-        "acceptance_point": "Annahmestelle",
-        "payable_by": "Zahlbar durch",
-        "payable_by_name_address": "Zahlbar durch (Name/Adresse)",
-    },
-    "fr": {
-        "payment_part": "Section paiement",
-        "receipt": "Récépissé",
-        "account_payable_to": "Compte / Payable à",
-        "reference": "Référence",
-        "additional_information": "Informations supplémentaires",
-        "currency": "Monnaie",
-        "amount": "Montant",
-        "acceptance_point": "Point de dépôt",
-        "payable_by": "Payable par",
-        "payable_by_name_address": "Payable par (nom/adresse)",
-    },
-    "it": {
-        "payment_part": "Sezione pagamento",
-        "receipt": "Ricevuta",
-        "account_payable_to": "Conto / Pagabile a",
-        "reference": "Riferimento",
-        "additional_information": "Informazioni supplementari",
-        "currency": "Valuta",
-        "amount": "Importo",
-        "acceptance_point": "Punto di accettazione",
-        "payable_by": "Pagabile da",
-        "payable_by_name_address": "Pagabile da (nome/indirizzo)",
-    },
-}
-
-
-def format_iban(iban: str) -> str:
-    """Format IBAN in groups of 4 characters.
-
-    Args:
-        iban: The IBAN string (21 characters for Swiss IBAN)
-
-    Returns:
-        Formatted IBAN with spaces
-
-    Example:
-        CH4431999123000889012 -> CH44 3199 9123 0008 8901 2
-    """
-    # Remove any existing spaces
-    iban = iban.replace(" ", "")
-
-    # Group in 4s
-    groups = []
-    for i in range(0, len(iban), 4):
-        groups.append(iban[i : i + 4])
-
-    return " ".join(groups)
-
-
-def format_qr_reference(reference: str) -> str:
-    """Format QR reference in groups of 5 characters.
-
-    Args:
-        reference: The QR reference string (27 characters)
-
-    Returns:
-        Formatted reference with spaces
-
-    Example:
-        210000000003139471430009017 -> 21 00000 00003 13947 14300 09017
-    """
-    # Remove any existing spaces
-    reference = reference.replace(" ", "")
-
-    # First 2 chars, then groups of 5
-    if len(reference) < 2:
-        return reference
-
-    result = reference[:2]
-    remainder = reference[2:]
-
-    groups = []
-    for i in range(0, len(remainder), 5):
-        groups.append(remainder[i : i + 5])
-
-    return result + " " + " ".join(groups)
-
+# Static artwork, identical on every QR-bill
+SCISSORS_PATHS = (
+    "M3 1a2 2 0 0 1 1.72 3L6 5.3L9.65 1.65a0.35 0.35 45 0 1 0.7 0.7L6.7 6h-1.4L4 4.72A2 2 0 1 1 3 1v1a1 1 0 0 0 -1 1a1 1 0 1 0 1 -1z",
+    "M3 11a2 2 0 0 0 1.72 -3L6.7 6h-1.4L4 7.28A2 2 0 1 0 3 11v-1a1 1 0 0 1 -1 -1a1 1 0 1 1 1 1zM7.15 7.85L9.65 10.35a0.35 0.35 45 0 0 0.7 -0.7L7.85 7.15a0.35 0.35 45 0 0 -0.7 0.7z",
+)
+SWISS_CROSS = '<path d="m0 0h36v36h-36z" fill="#fff" /><path d="m2 2h32v32h-32z" fill="#000" /><path d="m15 8h6v7h7v6h-7v7h-6v-7h-7v-6h7z" fill="#fff" />'
+FONT_FAMILY = "Arial, Helvetica, Liberation Sans, sans-serif"
 
-def format_creditor_reference(reference: str) -> str:
-    """Format SCOR/Creditor reference in groups of 4 characters.
+# Version of the markup emitted for a bill, bumped whenever the output of
+# `generate_svg` changes for the same data and options
+SVG_TEMPLATE_VERSION = 2
 
-    Args:
-        reference: The creditor reference string
-
-    Returns:
-        Formatted reference with spaces
-
-    Example:
-        RF18539007547034 -> RF18 5390 0754 7034
-    """
-    # Remove any existing spaces
-    reference = reference.replace(" ", "")
-
-    # Group in 4s
-    groups = []
-    for i in range(0, len(reference), 4):
-        groups.append(reference[i : i + 4])
-
-    return " ".join(groups)
-
-
-def format_amount(amount: Decimal) -> str:
-    """Format amount with space as thousands separator.
-
-    Args:
-        amount: The amount as Decimal
+# Symbol ids of the static artwork in documents holding several bills
+SCISSORS_TOP_ID = "chqr-scissors-top"
+SCISSORS_SIDE_ID = "chqr-scissors-side"
+SWISS_CROSS_ID = "chqr-swiss-cross"
 
-    Returns:
-        Formatted amount string
-
-    Example:
-        1949.75 -> 1 949.75
-        50 -> 50.00
-    """
-    # Format with 2 decimal places
-    formatted = f"{amount:.2f}"
-
-    # Split into integer and decimal parts
-    parts = formatted.split(".")
-    integer_part = parts[0]
-    decimal_part = parts[1]
-
-    # Add space as thousands separator
-    # Reverse, group by 3, reverse back
-    integer_reversed = integer_part[::-1]
-    groups = []
-    for i in range(0, len(integer_reversed), 3):
-        groups.append(integer_reversed[i : i + 3])
-
-    integer_formatted = " ".join(groups)[::-1]
+# Id of the element holding the QR code, suffixed per bill on pages
+QR_CODE_ID = "qr_code_svg"
 
-    return f"{integer_formatted}.{decimal_part}"
+SYMBOL_IDS = {"scissors-top": SCISSORS_TOP_ID, "scissors-side": SCISSORS_SIDE_ID}
 
 
 def escape_xml(text: str) -> str:
@@ -187,330 +71,452 @@ def escape_xml(text: str) -> str:
     )
 
 
-def generate_svg(qr_bill: "QRBill", language: str = "en") -> str:
+def generate_svg(
+    qr_bill: "QRBill",
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
     """Generate SVG for QR-bill.
 
     Args:
         qr_bill: The QRBill instance
         language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation: "path" (merged runs, modules under
+            the Swiss cross omitted), "bitmap" (embedded 1-bit PNG) or
+            "backend" (the backend's own SVG serialiser)
+        profile: Markup profile: "pretty" (indented, lengths in mm/pt) or
+            "minified" (no whitespace, unitless millimetre coordinates)
 
     Returns:
         SVG string
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
     """
-    # Get translations
-    t = TRANSLATIONS.get(language, TRANSLATIONS["en"])
-
-    # Format data
-    formatted_iban = format_iban(qr_bill.account)
-    formatted_amount = format_amount(qr_bill.amount) if qr_bill.amount else None
-
-    # Format reference based on type
-    formatted_reference = None
-    if qr_bill.reference:
-        if qr_bill.reference_type == "QRR":
-            formatted_reference = format_qr_reference(qr_bill.reference)
-        elif qr_bill.reference_type == "SCOR":
-            formatted_reference = format_creditor_reference(qr_bill.reference)
-
-    # Build SVG
-    svg_parts = []
-
-    # SVG header
-    svg_parts.append('<?xml version="1.0" encoding="UTF-8"?>')
-    svg_parts.append(
-        '<svg width="210mm" height="108mm" xmlns="http://www.w3.org/2000/svg"'
+    return _render_component(
+        qr_bill, "bill", language, mask, backend, qr_style, profile
     )
-    svg_parts.append('  font-family="Arial, Helvetica, Liberation Sans, sans-serif">')
 
-    # Background
-    svg_parts.append(
-        '  <rect x="0mm" y="0mm" width="210mm" height="108mm" fill="white" />'
-    )
 
-    # Separator lines (4 lines with gaps for scissors)
-    # Horizontal top line (left part)
-    svg_parts.append(
-        '  <line x1="0mm" y1="3mm" x2="202.5mm" y2="3mm" stroke="black" stroke-width="0.1mm" />'
-    )
-    # Horizontal top line (right part, after scissors)
-    svg_parts.append(
-        '  <line x1="204.8mm" y1="3mm" x2="210mm" y2="3mm" stroke="black" stroke-width="0.1mm" />'
-    )
-    # Vertical line (top part)
-    svg_parts.append(
-        '  <line x1="62mm" y1="3mm" x2="62mm" y2="102.5mm" stroke="black" stroke-width="0.1mm" />'
-    )
-    # Vertical line (bottom part, after scissors)
-    svg_parts.append(
-        '  <line x1="62mm" y1="104.8mm" x2="62mm" y2="110mm" stroke="black" stroke-width="0.1mm" />'
-    )
+def render_payment_part(
+    qr_bill: "QRBill",
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
+    """Generate SVG for the 148 x 105 mm payment part only.
 
-    # Scissors symbols
-    # Top scissors (horizontal separator)
-    svg_parts.append(
-        '  <svg x="202mm" y="1.5mm" width="3mm" height="3mm" viewBox="0 0 12 12">'
-    )
-    svg_parts.append('    <path fill="#000" transform="rotate(-180 6 6)"')
-    svg_parts.append(
-        '      d="M3 1a2 2 0 0 1 1.72 3L6 5.3L9.65 1.65a0.35 0.35 45 0 1 0.7 0.7L6.7 6h-1.4L4 4.72A2 2 0 1 1 3 1v1a1 1 0 0 0 -1 1a1 1 0 1 0 1 -1z" />'
-    )
-    svg_parts.append('    <path fill="#000" transform="rotate(-180 6 6)"')
-    svg_parts.append(
-        '      d="M3 11a2 2 0 0 0 1.72 -3L6.7 6h-1.4L4 7.28A2 2 0 1 0 3 11v-1a1 1 0 0 1 -1 -1a1 1 0 1 1 1 1zM7.15 7.85L9.65 10.35a0.35 0.35 45 0 0 0.7 -0.7L7.85 7.15a0.35 0.35 45 0 0 -0.7 0.7z" />'
-    )
-    svg_parts.append("  </svg>")
+    The receipt, separator lines and scissors are neither laid out nor
+    serialised. Arguments are those of `generate_svg`.
 
-    # Side scissors (vertical separator)
-    svg_parts.append(
-        '  <svg x="60.5mm" y="102mm" width="3mm" height="3mm" viewBox="0 0 12 12">'
-    )
-    svg_parts.append('    <path fill="#000" transform="rotate(-90 6 6)"')
-    svg_parts.append(
-        '      d="M3 1a2 2 0 0 1 1.72 3L6 5.3L9.65 1.65a0.35 0.35 45 0 1 0.7 0.7L6.7 6h-1.4L4 4.72A2 2 0 1 1 3 1v1a1 1 0 0 0 -1 1a1 1 0 1 0 1 -1z" />'
-    )
-    svg_parts.append('    <path fill="#000" transform="rotate(-90 6 6)"')
-    svg_parts.append(
-        '      d="M3 11a2 2 0 0 0 1.72 -3L6.7 6h-1.4L4 7.28A2 2 0 1 0 3 11v-1a1 1 0 0 1 -1 -1a1 1 0 1 1 1 1zM7.15 7.85L9.65 10.35a0.35 0.35 45 0 0 0.7 -0.7L7.85 7.15a0.35 0.35 45 0 0 -0.7 0.7z" />'
-    )
-    svg_parts.append("  </svg>")
+    Returns:
+        SVG string with the origin at the payment part's top left corner.
 
-    # Receipt section (starts at y=3mm after separator line)
-    svg_parts.append(
-        '  <svg class="receipt" x="0mm" y="3mm" width="62mm" height="105mm">'
-    )
-    svg_parts.append(
-        '    <svg class="innerReceipt" x="5mm" y="5mm" width="52mm" height="95mm">'
-    )
-    svg_parts.append(
-        f'      <text x="0mm" y="3mm" font-size="11pt" font-weight="bold">{escape_xml(t["receipt"])}</text>'
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+    return _render_component(
+        qr_bill, "payment", language, mask, backend, qr_style, profile
     )
 
-    # Receipt information section
-    svg_parts.append('      <text x="0mm" y="3.65mm">')
-    svg_parts.append(
-        f'        <tspan x="0mm" dy="18pt" font-size="6pt" font-weight="bold">{escape_xml(t["account_payable_to"])}</tspan>'
-    )
-    svg_parts.append(
-        f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(formatted_iban)}</tspan>'
-    )
-    svg_parts.append(
-        f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(qr_bill.creditor.name)}</tspan>'
-    )
 
-    # Creditor address
-    creditor_address_line = (
-        f"{qr_bill.creditor.street} {qr_bill.creditor.building_number}".strip()
-    )
-    if creditor_address_line:
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(creditor_address_line)}</tspan>'
-        )
+def render_receipt(
+    qr_bill: "QRBill", language: str = "en", profile: str = "pretty"
+) -> str:
+    """Generate SVG for the 62 x 105 mm receipt only.
 
-    creditor_city_line = (
-        f"{qr_bill.creditor.postal_code} {qr_bill.creditor.city}".strip()
-    )
-    if creditor_city_line:
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(creditor_city_line)}</tspan>'
-        )
+    The QR code is not encoded. Arguments are those of `generate_svg`.
 
-    # Reference (if present)
-    if formatted_reference:
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="18pt" font-size="6pt" font-weight="bold">{escape_xml(t["reference"])}</tspan>'
-        )
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(formatted_reference)}</tspan>'
-        )
+    Returns:
+        SVG string with the origin at the receipt's top left corner.
 
-    # Payable by
-    if qr_bill.debtor:
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="18pt" font-size="6pt" font-weight="bold">{escape_xml(t["payable_by"])}</tspan>'
-        )
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(qr_bill.debtor.name)}</tspan>'
-        )
+    Raises:
+        ValueError: If the profile is unknown
+    """
+    return _render_component(qr_bill, "receipt", language, profile=profile)
 
-        debtor_address_line = (
-            f"{qr_bill.debtor.street} {qr_bill.debtor.building_number}".strip()
-        )
-        if debtor_address_line:
-            svg_parts.append(
-                f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(debtor_address_line)}</tspan>'
-            )
 
-        debtor_city_line = f"{qr_bill.debtor.postal_code} {qr_bill.debtor.city}".strip()
-        if debtor_city_line:
-            svg_parts.append(
-                f'        <tspan x="0mm" dy="9pt" font-size="8pt">{escape_xml(debtor_city_line)}</tspan>'
-            )
-    else:
-        svg_parts.append(
-            f'        <tspan x="0mm" dy="18pt" font-size="6pt" font-weight="bold">{escape_xml(t["payable_by_name_address"])}</tspan>'
-        )
+def render_qr_block(
+    qr_bill: "QRBill",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
+    """Generate SVG for the 46 x 46 mm QR code with the Swiss cross only.
 
-    svg_parts.append("      </text>")
+    No text is laid out. Arguments are those of `generate_svg`.
 
-    # Amount section
-    svg_parts.append(
-        f'      <text x="0mm" y="66mm" font-size="6pt" font-weight="bold">{escape_xml(t["currency"])}</text>'
-    )
-    svg_parts.append(
-        f'      <text x="0mm" y="70mm" font-size="8pt">{escape_xml(qr_bill.currency)}</text>'
-    )
-    svg_parts.append(
-        f'      <text x="22mm" y="66mm" font-size="6pt" font-weight="bold">{escape_xml(t["amount"])}</text>'
+    Returns:
+        SVG string with the origin at the QR code's top left corner.
+
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+    return _render_component(
+        qr_bill, "qr", mask=mask, backend=backend, qr_style=qr_style, profile=profile
     )
 
-    if formatted_amount:
-        svg_parts.append(
-            f'      <text x="22mm" y="70mm" font-size="8pt">{escape_xml(formatted_amount)}</text>'
-        )
 
-    # Acceptance point
-    svg_parts.append(
-        f'      <text x="52mm" y="80mm" text-anchor="end" font-size="6pt" font-weight="bold">{escape_xml(t["acceptance_point"])}</text>'
-    )
+def _render_component(
+    qr_bill: "QRBill",
+    component: str,
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> str:
+    """Generate a standalone SVG document of a component of a QR-bill."""
+    validate_svg_options(qr_style, profile)
+    engine = get_backend(backend)
+    layout = qr_bill.layout(language, mask, engine, component)
+    return serialize_document(layout, engine, qr_style, profile)
 
-    svg_parts.append("    </svg>")
-    svg_parts.append("  </svg>")
 
-    # Payment part section (starts at y=3mm after separator line)
-    svg_parts.append(
-        '  <svg class="payment" x="62mm" y="3mm" width="148mm" height="105mm">'
-    )
-    svg_parts.append(
-        '    <svg class="innerPayment" x="5mm" y="5mm" width="138mm" height="95mm">'
-    )
-    svg_parts.append(
-        f'      <text x="0mm" y="3mm" font-size="11pt" font-weight="bold">{escape_xml(t["payment_part"])}</text>'
-    )
+def serialize_document(
+    layout: Layout, backend: QRBackend, qr_style: str = "path", profile: str = "pretty"
+) -> str:
+    """Serialise a layout to a standalone SVG document.
 
-    # QR Code section with actual QR code
-    svg_parts.append(
-        '      <svg id="qr_code_svg" width="46mm" height="46mm" x="0mm" y="12mm">'
-    )
-    # Generate and insert the actual QR code
-    qr_code = qr_bill.generate_qr_code()
-    buffer = io.BytesIO()
-    qr_code.save(
-        buffer,
-        kind="svg",
-        xmldecl=False,
-        svgns=False,
-        svgclass=None,
-        lineclass=None,
-        omitsize=True,
-        border=0,
-    )
-    qr_svg_content = buffer.getvalue().decode("utf-8")
-    svg_parts.append(f"        {qr_svg_content.strip()}")
+    Args:
+        layout: Layout from `QRBill.layout`
+        backend: QR engine which encoded the layout's QR code
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
 
-    # Swiss cross overlay (must be on top of QR code)
-    svg_parts.append(
-        '        <svg width="7mm" height="7mm" x="19.5mm" y="19.5mm" viewBox="0 0 36 36"><path d="m0 0h36v36h-36z" fill="#fff" /><path d="m2 2h32v32h-32z" fill="#000" /><path d="m15 8h6v7h7v6h-7v7h-6v-7h-7v-6h7z" fill="#fff" /></svg>'
-    )
-    svg_parts.append(
-        "      </svg>",
-    )
+    Returns:
+        SVG string
+    """
+    p = SVG_PROFILES[profile]
+    width, height = f"{layout.width:g}mm", f"{layout.height:g}mm"
+    if p.units:
+        svg_parts = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<svg width="{width}" height="{height}" '
+            'xmlns="http://www.w3.org/2000/svg"',
+            f'  font-family="{p.font_family}">',
+        ]
+    else:
+        # A viewBox in millimetres makes all nested lengths unitless
+        svg_parts = [
+            f'<svg width="{width}" height="{height}" '
+            f'viewBox="0 0 {p.mm(layout.width)} {p.mm(layout.height)}" '
+            f'xmlns="http://www.w3.org/2000/svg" font-family="{p.font_family}">'
+        ]
+    svg_parts.extend(serialize_layout(layout, backend, qr_style, profile=profile))
+    svg_parts.append("</svg>")
+    return p.newline.join(svg_parts)
 
-    # Currency and Amount (bottom left)
-    svg_parts.append(
-        f'      <text x="0mm" y="66mm" font-size="8pt" font-weight="bold">{escape_xml(t["currency"])}</text>'
-    )
-    svg_parts.append(
-        f'      <text x="0mm" y="70mm" font-size="10pt">{escape_xml(qr_bill.currency)}</text>'
-    )
-    svg_parts.append(
-        f'      <text x="22mm" y="66mm" font-size="8pt" font-weight="bold">{escape_xml(t["amount"])}</text>'
-    )
 
-    if formatted_amount:
-        svg_parts.append(
-            f'      <text x="22mm" y="70mm" font-size="10pt">{escape_xml(formatted_amount)}</text>'
-        )
+def validate_svg_options(qr_style: str, profile: str) -> None:
+    """Validate the QR style and markup profile of an SVG output.
 
-    # Information section (right side)
-    svg_parts.append('      <text x="51mm" y="-4.76mm">')
-    svg_parts.append(
-        f'        <tspan x="51mm" dy="22pt" font-size="8pt" font-weight="bold">{escape_xml(t["account_payable_to"])}</tspan>'
-    )
-    svg_parts.append(
-        f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(formatted_iban)}</tspan>'
-    )
-    svg_parts.append(
-        f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(qr_bill.creditor.name)}</tspan>'
-    )
+    Args:
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile ("pretty" or "minified")
 
-    # Creditor full address in payment part
-    creditor_street_full = (
-        f"{qr_bill.creditor.street} {qr_bill.creditor.building_number}".strip()
-    )
-    if creditor_street_full:
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(creditor_street_full)}</tspan>'
+    Raises:
+        ValueError: If the QR style or the profile is unknown
+    """
+    if qr_style not in QR_STYLES:
+        raise ValueError(
+            f"Invalid QR style {qr_style!r}, expected one of {', '.join(QR_STYLES)}"
         )
+    if profile not in PROFILES:
+        raise ValueError(
+            f"Invalid profile {profile!r}, expected one of {', '.join(PROFILES)}"
+        )
+
+
+def build_svg_parts(
+    qr_bill: "QRBill",
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    shared_symbols: bool = False,
+    background: bool = True,
+    profile: str = "pretty",
+    qr_code_id: str = QR_CODE_ID,
+) -> list[str]:
+    """Build the SVG elements of a QR-bill without the root element.
+
+    The elements are laid out for a 210x108 mm viewport and inherit the
+    font family from the enclosing element.
+
+    Args:
+        qr_bill: The QRBill instance
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR code ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        shared_symbols: Reference the scissors and the Swiss cross from the
+            symbols of `build_symbol_defs` instead of inlining them
+        background: Whether to paint a white background
+        profile: Markup profile ("pretty" or "minified"); minified elements
+            belong into a root with a millimetre viewBox
+        qr_code_id: Id of the element holding the QR code, which must be
+            unique among the bills of a document
 
-    creditor_city_full = (
-        f"{qr_bill.creditor.postal_code} {qr_bill.creditor.city}".strip()
+    Returns:
+        List of SVG lines, or of elements in the minified profile.
+    """
+    engine = get_backend(backend)
+    layout = qr_bill.layout(language, mask, engine)
+    return serialize_layout(
+        layout, engine, qr_style, shared_symbols, background, profile, qr_code_id
     )
-    if creditor_city_full:
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(creditor_city_full)}</tspan>'
-        )
 
-    # Reference (if present)
-    if formatted_reference:
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="22pt" font-size="8pt" font-weight="bold">{escape_xml(t["reference"])}</tspan>'
-        )
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(formatted_reference)}</tspan>'
-        )
 
-    # Additional information (if present)
-    if qr_bill.additional_information:
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="22pt" font-size="8pt" font-weight="bold">{escape_xml(t["additional_information"])}</tspan>'
-        )
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(qr_bill.additional_information)}</tspan>'
-        )
+def serialize_layout(
+    layout: Layout,
+    backend: QRBackend,
+    qr_style: str = "path",
+    shared_symbols: bool = False,
+    background: bool = True,
+    profile: str = "pretty",
+    qr_code_id: str = QR_CODE_ID,
+) -> list[str]:
+    """Serialise a layout to SVG elements, see `build_svg_parts`.
 
-    # Payable by
-    if qr_bill.debtor:
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="22pt" font-size="8pt" font-weight="bold">{escape_xml(t["payable_by"])}</tspan>'
-        )
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(qr_bill.debtor.name)}</tspan>'
-        )
+    Args:
+        layout: Layout from `QRBill.layout`
+        backend: QR engine which encoded the layout's QR code
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        shared_symbols: Reference the scissors and the Swiss cross from the
+            symbols of `build_symbol_defs` instead of inlining them
+        background: Whether to paint a white background
+        profile: Markup profile ("pretty" or "minified")
+        qr_code_id: Id of the element holding the QR code
 
-        debtor_street_full = (
-            f"{qr_bill.debtor.street} {qr_bill.debtor.building_number}".strip()
+    Returns:
+        List of SVG lines, or of elements in the minified profile.
+    """
+    p = SVG_PROFILES[profile]
+    writer = _Writer(p, backend, qr_style, shared_symbols, qr_code_id)
+    if background:
+        writer.parts.append(
+            f'{p.indent}<rect x="{p.mm(0)}" y="{p.mm(0)}" '
+            f'width="{p.mm(layout.width)}" height="{p.mm(layout.height)}" '
+            f'fill="{p.white}"{p.close}'
         )
-        if debtor_street_full:
-            svg_parts.append(
-                f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(debtor_street_full)}</tspan>'
+    writer.write(layout.elements, p.indent)
+    return writer.parts
+
+
+class _Writer:
+    """Serialiser of layout elements in an output profile."""
+
+    def __init__(
+        self,
+        profile: SVGProfile,
+        backend: QRBackend,
+        qr_style: str,
+        shared_symbols: bool,
+        qr_code_id: str,
+    ):
+        self.profile = profile
+        self.backend = backend
+        self.qr_style = qr_style
+        self.shared_symbols = shared_symbols
+        self.qr_code_id = qr_code_id
+        self.parts: list[str] = []
+
+    def write(self, elements: Iterable[Element], indent: str) -> None:
+        """Append the SVG of elements, grouping runs of lines if asked to."""
+        p = self.profile
+        if not p.group_lines:
+            for element in elements:
+                self.element(element, indent)
+            return
+        for is_line, run in groupby(
+            elements, lambda element: isinstance(element, Line)
+        ):
+            run = list(run)
+            widths = {line.width for line in run} if is_line else set()
+            if len(widths) != 1:
+                for element in run:
+                    self.element(element, indent)
+                continue
+            self.parts.append(
+                f'{indent}<g stroke="{p.black}" stroke-width="{p.mm(widths.pop())}">'
             )
+            for line in run:
+                self.parts.append(
+                    f"{indent}{p.indent}<line {self.coordinates(line)}{p.close}"
+                )
+            self.parts.append(f"{indent}</g>")
+
+    def coordinates(self, line: Line) -> str:
+        """Build the end point attributes of a line."""
+        mm = self.profile.mm
+        return (
+            f'x1="{mm(line.x1)}" y1="{mm(line.y1)}" '
+            f'x2="{mm(line.x2)}" y2="{mm(line.y2)}"'
+        )
 
-        debtor_city_full = f"{qr_bill.debtor.postal_code} {qr_bill.debtor.city}".strip()
-        if debtor_city_full:
-            svg_parts.append(
-                f'        <tspan x="51mm" dy="11pt" font-size="10pt">{escape_xml(debtor_city_full)}</tspan>'
+    def element(self, element: Element, indent: str) -> None:
+        """Append the SVG of a layout element."""
+        p = self.profile
+        parts = self.parts
+        mm = p.mm
+        if isinstance(element, TextRun):
+            anchor = ' text-anchor="end"' if element.anchor == "end" else ""
+            parts.append(
+                f'{indent}<text x="{mm(element.x)}" y="{mm(element.y)}"{anchor}'
+                f"{self.font(element.size, element.bold)}>"
+                f"{escape_xml(element.text)}</text>"
             )
-    else:
-        svg_parts.append(
-            f'        <tspan x="51mm" dy="22pt" font-size="8pt" font-weight="bold">{escape_xml(t["payable_by_name_address"])}</tspan>'
+        elif isinstance(element, TextBlock):
+            x = mm(element.x)
+            parts.append(f'{indent}<text x="{x}" y="{mm(element.y)}">')
+            for line in element.lines:
+                parts.append(
+                    f'{indent}{p.indent}<tspan x="{x}" dy="{p.pt(line.dy)}"'
+                    f"{self.font(line.size, line.bold)}>"
+                    f"{escape_xml(line.text)}</tspan>"
+                )
+            parts.append(f"{indent}</text>")
+        elif isinstance(element, Line):
+            parts.append(
+                f'{indent}<line {self.coordinates(element)} stroke="{p.black}" '
+                f'stroke-width="{mm(element.width)}"{p.close}'
+            )
+        elif isinstance(element, Symbol):
+            parts.extend(
+                _scissors(
+                    mm(element.x),
+                    mm(element.y),
+                    SCISSORS_ROTATIONS[element.name],
+                    SYMBOL_IDS[element.name],
+                    self.shared_symbols,
+                    p,
+                )
+            )
+        elif isinstance(element, QRCode):
+            self.qr_code(element, indent)
+        elif isinstance(element, Section):
+            inner = "inner" + element.name.capitalize()
+            inset = element.padding
+            parts.append(
+                f'{indent}<svg class="{element.name}" x="{mm(element.x)}" '
+                f'y="{mm(element.y)}" width="{mm(element.width)}" '
+                f'height="{mm(element.height)}">'
+            )
+            parts.append(
+                f'{indent}{p.indent}<svg class="{inner}" x="{mm(inset)}" '
+                f'y="{mm(inset)}" width="{mm(element.width - 2 * inset)}" '
+                f'height="{mm(element.height - 2 * inset)}">'
+            )
+            self.write(element.elements, indent + 2 * p.indent)
+            parts.append(f"{indent}{p.indent}</svg>")
+            parts.append(f"{indent}</svg>")
+
+    def qr_code(self, element: QRCode, indent: str) -> None:
+        """Append the QR code with the Swiss cross on top."""
+        p = self.profile
+        mm = p.mm
+        self.parts.append(
+            f'{indent}<svg id="{self.qr_code_id}" width="{mm(element.size)}" '
+            f'height="{mm(element.size)}" x="{mm(element.x)}" y="{mm(element.y)}">'
+        )
+        if self.qr_style == "path":
+            content = qr_path_svg(element.symbol.matrix)
+        elif self.qr_style == "bitmap":
+            content = qr_bitmap_svg(element.symbol.matrix)
+        else:
+            content = self.backend.to_svg(element.symbol)
+        self.parts.append(f"{indent}{p.indent}{content}")
+
+        cross = (
+            f'width="{mm(CROSS_SIZE_MM)}" height="{mm(CROSS_SIZE_MM)}" '
+            f'x="{mm(CROSS_OFFSET_MM)}" y="{mm(CROSS_OFFSET_MM)}"'
         )
+        if self.shared_symbols:
+            self.parts.append(
+                f'{indent}{p.indent}<use xlink:href="#{SWISS_CROSS_ID}" '
+                f"{cross}{p.close}"
+            )
+        else:
+            self.parts.append(
+                f'{indent}{p.indent}<svg {cross} viewBox="0 0 36 36">'
+                f"{_swiss_cross(p)}</svg>"
+            )
+        self.parts.append(f"{indent}</svg>")
 
-    svg_parts.append("      </text>")
+    def font(self, size: float, bold: bool) -> str:
+        """Build the font attributes of a text or tspan element."""
+        weight = ' font-weight="bold"' if bold else ""
+        return f' font-size="{self.profile.pt(size)}"{weight}'
 
-    svg_parts.append("    </svg>")
-    svg_parts.append("  </svg>")
 
-    # Close SVG
-    svg_parts.append("</svg>")
+def _swiss_cross(profile: SVGProfile) -> str:
+    """Return the markup of the Swiss cross in a profile."""
+    return SWISS_CROSS.replace(" />", profile.close)
+
+
+def build_symbol_defs(profile: str = "pretty") -> list[str]:
+    """Build the symbol definitions referenced with ``shared_symbols``.
 
-    return "\n".join(svg_parts)
+    The enclosing document must declare the xlink namespace.
+
+    Args:
+        profile: Markup profile ("pretty" or "minified")
+
+    Returns:
+        List of SVG lines forming a ``<defs>`` element.
+    """
+    p = SVG_PROFILES[profile]
+    svg_parts = [f"{p.indent}<defs>"]
+    for symbol_id, rotation in ((SCISSORS_TOP_ID, -180), (SCISSORS_SIDE_ID, -90)):
+        svg_parts.append(f'{p.indent * 2}<symbol id="{symbol_id}" viewBox="0 0 12 12">')
+        svg_parts.extend(_scissors_paths(rotation, p))
+        svg_parts.append(f"{p.indent * 2}</symbol>")
+    svg_parts.append(
+        f'{p.indent * 2}<symbol id="{SWISS_CROSS_ID}" viewBox="0 0 36 36">'
+        f"{_swiss_cross(p)}</symbol>"
+    )
+    svg_parts.append(f"{p.indent}</defs>")
+    return svg_parts
+
+
+def _scissors(
+    x: str,
+    y: str,
+    rotation: int,
+    symbol_id: str,
+    shared_symbols: bool,
+    profile: SVGProfile,
+) -> list[str]:
+    """Build a 3 mm scissors symbol, inline or as a reference."""
+    p = profile
+    size = f'width="{p.mm(3)}" height="{p.mm(3)}"'
+    if shared_symbols:
+        return [
+            f'{p.indent}<use xlink:href="#{symbol_id}" x="{x}" y="{y}" {size}{p.close}'
+        ]
+    return [
+        f'{p.indent}<svg x="{x}" y="{y}" {size} viewBox="0 0 12 12">',
+        *_scissors_paths(rotation, p),
+        f"{p.indent}</svg>",
+    ]
+
+
+def _scissors_paths(rotation: int, profile: SVGProfile) -> list[str]:
+    """Build the two paths of the scissors rotated around their centre."""
+    p = profile
+    # The pretty profile breaks the long tags before the path data
+    separator = f"{p.newline}{p.indent * 3}" if p.newline else " "
+    return [
+        f'{p.indent * 2}<path fill="#000" transform="rotate({rotation} 6 6)"'
+        f'{separator}d="{path_data}"{p.close}'
+        for path_data in SCISSORS_PATHS
+    ]
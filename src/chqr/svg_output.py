@@ -0,0 +1,134 @@
+"""Output profiles and compressed writers for QR-bill SVG documents."""
+
+import os
+import zlib
+from collections.abc import Iterable
+from typing import BinaryIO, NamedTuple
+
+PROFILES = ("pretty", "minified")
+
+MM_PER_PT = 25.4 / 72
+
+# gzip container for zlib (required by the .svgz format)
+GZIP_WBITS = 31
+
+# Size of the chunks handed to the compressor when writing SVGZ files
+SVGZ_CHUNK_SIZE = 64 * 1024
+
+
+def format_number(value: float) -> str:
+    """Format a number with at most 3 decimals and no redundant characters.
+
+    Args:
+        value: The number to format
+
+    Returns:
+        Shortest representation, e.g. 0.1 -> ".1", 62.0 -> "62"
+
+    Example:
+        -4.76 -> -4.76
+        0.3528 -> .353
+    """
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    if text.startswith("0."):
+        text = text[1:]
+    elif text.startswith("-0."):
+        text = "-" + text[2:]
+    return text if text not in ("", "-0", "-") else "0"
+
+
+class SVGProfile(NamedTuple):
+    """Syntax of an output profile, applied as the SVG is serialised."""
+
+    name: str
+    # Indentation step and line separator of the markup
+    indent: str
+    newline: str
+    # Whether lengths carry units, otherwise they are millimetre user units
+    units: bool
+    # End of an empty element
+    close: str
+    black: str
+    white: str
+    font_family: str
+    # Whether consecutive lines share their stroke style in a group
+    group_lines: bool
+
+    def mm(self, value: float) -> str:
+        """Format a length in millimetres."""
+        return f"{value:g}mm" if self.units else format_number(value)
+
+    def pt(self, value: float) -> str:
+        """Format a length in points."""
+        return f"{value:g}pt" if self.units else format_number(value * MM_PER_PT)
+
+
+SVG_PROFILES = {
+    # Indented, lengths in mm and pt, readable colour names
+    "pretty": SVGProfile(
+        "pretty",
+        "  ",
+        "\n",
+        True,
+        " />",
+        "black",
+        "white",
+        "Arial, Helvetica, Liberation Sans, sans-serif",
+        False,
+    ),
+    # No whitespace between elements, unitless millimetres in a viewBox
+    "minified": SVGProfile(
+        "minified",
+        "",
+        "",
+        False,
+        "/>",
+        "#000",
+        "#fff",
+        "Arial,Helvetica,Liberation Sans,sans-serif",
+        True,
+    ),
+}
+
+
+def write_svgz(
+    svg: str | Iterable[str],
+    file: str | os.PathLike | BinaryIO,
+    level: int = 9,
+) -> int:
+    """Write an SVG document gzip-compressed (.svgz).
+
+    The document is encoded and compressed chunk by chunk, so iterables of
+    SVG fragments are streamed without joining them first.
+
+    Args:
+        svg: SVG document or iterable of document fragments
+        file: Target path or binary file object
+        level: zlib compression level (0-9)
+
+    Returns:
+        Number of compressed bytes written.
+    """
+    chunks = _split(svg) if isinstance(svg, str) else svg
+    if isinstance(file, (str, os.PathLike)):
+        with open(file, "wb") as handle:
+            return _write_compressed(chunks, handle, level)
+    return _write_compressed(chunks, file, level)
+
+
+def _split(text: str) -> Iterable[str]:
+    """Split a document into chunks of `SVGZ_CHUNK_SIZE` characters."""
+    for i in range(0, len(text), SVGZ_CHUNK_SIZE):
+        yield text[i : i + SVGZ_CHUNK_SIZE]
+
+
+def _write_compressed(chunks: Iterable[str], handle: BinaryIO, level: int) -> int:
+    """Stream text chunks through a gzip compressor into a binary file."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, GZIP_WBITS)
+    written = 0
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            written += handle.write(data)
+    written += handle.write(compressor.flush())
+    return written
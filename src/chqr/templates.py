@@ -0,0 +1,226 @@
+"""Invoice templates with named slots, filled by concatenation.
+
+A template is an SVG or HTML document with ``{{ name }}`` placeholders. It is
+parsed once into the static chunks between the slots; filling it joins the
+chunks with the slot values, so no pattern matching happens per document.
+
+Values are escaped for XML unless they are `Markup`, which the rendered bill
+components are. `fill_bills` renders only the bill fields the template uses::
+
+    template = Template.from_path("invoice.svg")
+    for svg in fill_bills(template, bills, fields=customers, language="de"):
+        ...
+"""
+
+import re
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from pathlib import Path
+from typing import TYPE_CHECKING, NamedTuple
+
+from .backends import QRBackend
+from .layout import (
+    address_lines,
+    format_amount,
+    format_iban,
+    format_reference,
+)
+from .svg_generator import (
+    escape_xml,
+    generate_svg,
+    render_payment_part,
+    render_qr_block,
+    render_receipt,
+)
+
+if TYPE_CHECKING:
+    from .creditor import Creditor
+    from .debtor import UltimateDebtor
+    from .qr_bill import QRBill
+
+SLOT_PATTERN = re.compile(r"\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}")
+
+
+class Markup(str):
+    """Trusted markup, inserted into a template without escaping."""
+
+
+class FieldOptions(NamedTuple):
+    """Rendering options of the bill fields of a template."""
+
+    language: str = "en"
+    mask: int | str = "full"
+    backend: str | QRBackend | None = None
+    qr_style: str = "path"
+    profile: str = "pretty"
+
+
+class Template:
+    """A document compiled into static chunks and named slots.
+
+    Args:
+        source: Template text with ``{{ name }}`` placeholders
+    """
+
+    def __init__(self, source: str):
+        chunks = []
+        slots = []
+        position = 0
+        for match in SLOT_PATTERN.finditer(source):
+            chunks.append(source[position : match.start()])
+            slots.append(match.group(1))
+            position = match.end()
+        chunks.append(source[position:])
+
+        self.source = source
+        # Slot names in order of appearance, each between two chunks
+        self.slots = tuple(slots)
+        self.names = frozenset(slots)
+        self._chunks = tuple(chunks)
+        self._encoded = tuple(chunk.encode("utf-8") for chunk in chunks)
+
+    @classmethod
+    def from_path(cls, path: str | Path) -> "Template":
+        """Compile a UTF-8 encoded template file."""
+        return cls(Path(path).read_text(encoding="utf-8"))
+
+    def render(self, values: Mapping[str, str]) -> str:
+        """Fill the slots of the template.
+
+        Args:
+            values: Value of every slot, plain strings are XML-escaped
+
+        Returns:
+            The filled document.
+
+        Raises:
+            ValueError: If a slot has no value
+        """
+        chunks = self._chunks
+        parts = [chunks[0]]
+        for name, chunk in zip(self.slots, chunks[1:]):
+            parts.append(self._value(values, name))
+            parts.append(chunk)
+        return "".join(parts)
+
+    def render_bytes(self, values: Mapping[str, str]) -> bytes:
+        """Fill the slots of the template as UTF-8, see `render`."""
+        encoded = self._encoded
+        parts = [encoded[0]]
+        for name, chunk in zip(self.slots, encoded[1:]):
+            parts.append(self._value(values, name).encode("utf-8"))
+            parts.append(chunk)
+        return b"".join(parts)
+
+    @staticmethod
+    def _value(values: Mapping[str, str], name: str) -> str:
+        """Return the value of a slot, escaped unless it is markup."""
+        try:
+            value = values[name]
+        except KeyError:
+            raise ValueError(f"Missing value for template slot {name!r}") from None
+        if isinstance(value, Markup):
+            return value
+        return escape_xml(str(value))
+
+
+def fill_bills(
+    template: Template,
+    bills: Iterable["QRBill"],
+    fields: Iterable[Mapping[str, str]] | None = None,
+    language: str = "en",
+    mask: int | str = "full",
+    backend: str | QRBackend | None = None,
+    qr_style: str = "path",
+    profile: str = "pretty",
+) -> Iterator[str]:
+    """Fill a template once per bill, lazily.
+
+    Args:
+        template: The compiled template
+        bills: QR-bills, one document each
+        fields: Further slot values per bill, e.g. customer data, paired with
+            the bills in order; they take precedence over the bill fields
+        language: Language code (en, de, fr, it)
+        mask: Data mask strategy of the QR codes ("full", "fast" or 0-7)
+        backend: QR engine (name or instance), defaults to the process default
+        qr_style: QR code serialisation ("path", "bitmap" or "backend")
+        profile: Markup profile of the rendered components
+
+    Yields:
+        The filled documents.
+
+    Raises:
+        ValueError: If a slot has no value, or fields and bills differ in
+            length
+    """
+    options = FieldOptions(language, mask, backend, qr_style, profile)
+    names = [name for name in template.names if name in BILL_FIELDS]
+    if fields is None:
+        for qr_bill in bills:
+            yield template.render(bill_fields(qr_bill, names, options))
+        return
+    for qr_bill, extra in zip(bills, fields, strict=True):
+        wanted = [name for name in names if name not in extra]
+        values = bill_fields(qr_bill, wanted, options)
+        values.update(extra)
+        yield template.render(values)
+
+
+def bill_fields(
+    qr_bill: "QRBill",
+    names: Iterable[str] | None = None,
+    options: FieldOptions | None = None,
+) -> dict[str, str]:
+    """Compute the template values of a bill, see `BILL_FIELDS`.
+
+    Args:
+        qr_bill: The QRBill instance
+        names: Fields to compute, all by default
+        options: Rendering options of the markup fields, defaults apply if None
+
+    Returns:
+        The values by field name.
+    """
+    if options is None:
+        options = FieldOptions()
+    if names is None:
+        names = BILL_FIELDS
+    return {name: BILL_FIELDS[name](qr_bill, options) for name in names}
+
+
+def _fragment(svg: str) -> Markup:
+    """Strip the XML declaration so that an SVG document can be embedded."""
+    if svg.startswith("<?xml"):
+        svg = svg.split("\n", 1)[1]
+    return Markup(svg)
+
+
+def _address(party: "Creditor | UltimateDebtor | None") -> str:
+    """Join the address of a party, without its name, to a single line."""
+    if party is None:
+        return ""
+    return ", ".join(address_lines(party)[1:])
+
+
+# Template fields provided by chqr, computed only when a template uses them
+BILL_FIELDS: dict[str, Callable[["QRBill", FieldOptions], str]] = {
+    "bill": lambda b, o: _fragment(
+        generate_svg(b, o.language, o.mask, o.backend, o.qr_style, o.profile)
+    ),
+    "payment_part": lambda b, o: _fragment(
+        render_payment_part(b, o.language, o.mask, o.backend, o.qr_style, o.profile)
+    ),
+    "receipt": lambda b, o: _fragment(render_receipt(b, o.language, o.profile)),
+    "qr_code": lambda b, o: _fragment(
+        render_qr_block(b, o.mask, o.backend, o.qr_style, o.profile)
+    ),
+    "account": lambda b, o: format_iban(b.account),
+    "amount": lambda b, o: format_amount(b.amount) if b.amount else "",
+    "currency": lambda b, o: b.currency,
+    "reference": lambda b, o: format_reference(b) or "",
+    "additional_information": lambda b, o: b.additional_information,
+    "creditor_name": lambda b, o: b.creditor.name,
+    "creditor_address": lambda b, o: _address(b.creditor),
+    "debtor_name": lambda b, o: b.debtor.name if b.debtor else "",
+    "debtor_address": lambda b, o: _address(b.debtor),
+}
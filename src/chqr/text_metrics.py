@@ -0,0 +1,206 @@
+"""Text measurement and wrapping with the metrics of the QR-bill fonts.
+
+QR-bills are set in Arial, Helvetica or Liberation Sans, which share their
+advance widths. The tables below hold the advance width in 1/1000 em of
+every character of the Swiss Payment Standards character set, indexed by
+code point, so measuring a text is one array lookup per character.
+
+The regular widths are those of Liberation Sans, metric-compatible with
+Arial. The bold widths come from the Adobe Core 35 AFM metrics of
+Helvetica-Bold; characters missing there use the width of their base
+letter. Characters outside of the character set are measured like the
+replacement character they are drawn with.
+"""
+
+import re
+from array import array
+from functools import lru_cache
+
+from .glyphs import REPLACEMENT_CHARACTER
+
+MM_PER_PT = 25.4 / 72
+
+# Appended to text truncated to fit its column
+ELLIPSIS = "..."
+
+# Words, between which lines are broken
+_WORD_PATTERN = re.compile(r"\S+")
+
+# Code points of the tables start at U+0020, unused entries are 0
+_TABLE_START = 0x20
+# Rows of 16 code points, U+0020 to U+017F
+# fmt: off
+_REGULAR_WIDTHS = array("H", (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    278, 333, 556, 556, 556, 556, 260, 556, 333, 737, 370, 556, 584, 333, 737, 552,
+    400, 549, 333, 333, 333, 576, 537, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    667, 667, 667, 667, 667, 667, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 500, 556, 556, 556, 556, 278, 278, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 549, 611, 556, 556, 556, 556, 500, 556, 500,
+    667, 556, 667, 556, 667, 556, 722, 500, 722, 500, 722, 500, 722, 500, 722, 615,
+    722, 556, 667, 556, 667, 556, 667, 556, 667, 556, 667, 556, 778, 556, 778, 556,
+    778, 556, 778, 556, 722, 556, 722, 556, 278, 278, 278, 278, 278, 278, 278, 222,
+    278, 278, 735, 444, 500, 222, 667, 500, 500, 556, 222, 556, 222, 556, 292, 556,
+    334, 556, 222, 722, 556, 722, 556, 722, 556, 604, 723, 556, 778, 556, 778, 556,
+    778, 556, 1000, 944, 722, 333, 722, 333, 722, 333, 667, 500, 667, 500, 667, 500,
+    667, 500, 611, 278, 611, 375, 611, 278, 722, 556, 722, 556, 722, 556, 722, 556,
+    722, 556, 722, 556, 944, 722, 667, 500, 667, 611, 500, 611, 500, 611, 500, 222,
+))
+
+_BOLD_WIDTHS = array("H", (
+    278, 333, 474, 556, 556, 889, 722, 238, 333, 333, 389, 584, 278, 333, 278, 278,
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 333, 333, 584, 584, 584, 611,
+    975, 722, 722, 722, 722, 667, 611, 778, 722, 278, 556, 722, 611, 833, 722, 778,
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 333, 278, 333, 584, 556,
+    333, 556, 611, 556, 611, 556, 333, 611, 611, 278, 278, 556, 278, 889, 611, 611,
+    611, 611, 389, 556, 333, 611, 556, 778, 556, 556, 500, 389, 280, 389, 584, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0,
+    278, 333, 556, 556, 556, 556, 280, 556, 333, 737, 370, 556, 584, 333, 737, 333,
+    400, 584, 333, 333, 333, 611, 556, 278, 333, 333, 365, 556, 834, 834, 834, 611,
+    722, 722, 722, 722, 722, 722, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,
+    556, 556, 556, 556, 556, 556, 889, 556, 556, 556, 556, 556, 278, 278, 278, 278,
+    611, 611, 611, 611, 611, 611, 611, 584, 611, 611, 611, 611, 611, 556, 611, 556,
+    722, 556, 722, 556, 722, 556, 722, 556, 722, 556, 722, 556, 722, 556, 722, 743,
+    722, 611, 667, 556, 667, 556, 667, 556, 667, 556, 667, 556, 778, 611, 778, 611,
+    778, 611, 778, 611, 722, 611, 722, 611, 278, 278, 278, 278, 278, 278, 278, 278,
+    278, 278, 834, 556, 556, 278, 722, 556, 556, 611, 278, 611, 278, 611, 400, 611,
+    556, 611, 278, 722, 611, 722, 611, 722, 611, 889, 722, 611, 778, 611, 778, 611,
+    778, 611, 1000, 944, 722, 389, 722, 389, 722, 389, 667, 556, 667, 556, 667, 556,
+    667, 556, 611, 333, 611, 389, 611, 333, 722, 611, 722, 611, 722, 611, 722, 611,
+    722, 611, 722, 611, 944, 778, 667, 556, 667, 611, 500, 611, 500, 611, 500, 333,
+))
+# fmt: on
+
+# Characters of the character set beyond the tables
+_REGULAR_EXTRA = {0x218: 667, 0x219: 500, 0x21A: 611, 0x21B: 278, 0x20AC: 556}
+_BOLD_EXTRA = {0x218: 667, 0x219: 556, 0x21A: 611, 0x21B: 333, 0x20AC: 556}
+
+
+@lru_cache(maxsize=4096)
+def text_width(text: str, size: float, bold: bool = False) -> float:
+    """Return the advance width of a single line of text.
+
+    Args:
+        text: The text
+        size: Font size in points
+        bold: Whether the text is set in bold
+
+    Returns:
+        The width in millimetres.
+    """
+    return _em_width(text, bold) * size * MM_PER_PT / 1000
+
+
+@lru_cache(maxsize=4096)
+def wrap_text(
+    text: str,
+    width: float,
+    size: float,
+    bold: bool = False,
+    max_lines: int | None = None,
+) -> tuple[str, ...]:
+    """Break text into lines fitting a column.
+
+    Lines are broken at spaces. Words wider than the column are broken
+    between characters. Text beyond ``max_lines`` is dropped and the last
+    line ends with an ellipsis.
+
+    Args:
+        text: The text
+        width: Column width in millimetres
+        size: Font size in points
+        bold: Whether the text is set in bold
+        max_lines: Maximum number of lines, unlimited if None
+
+    Returns:
+        The lines, at least one.
+    """
+    limit = width * 1000 / (size * MM_PER_PT)
+    if _em_width(text, bold) <= limit:
+        return (text,)
+
+    # Lines are slices of the text, keeping the spacing between their words
+    lines: list[tuple[int, int]] = []
+    start = end = 0
+    line_width = None
+    for word in _WORD_PATTERN.finditer(text):
+        word_start, word_end = word.span()
+        word_width = _em_width(word.group(), bold)
+        if line_width is not None:
+            gap_width = _em_width(text[end:word_start], bold)
+            if line_width + gap_width + word_width <= limit:
+                end = word_end
+                line_width += gap_width + word_width
+                continue
+            lines.append((start, end))
+        while word_width > limit:
+            head = _fit(text[word_start:word_end], limit, bold)
+            lines.append((word_start, word_start + len(head)))
+            word_start += len(head)
+            word_width = _em_width(text[word_start:word_end], bold)
+        start, end, line_width = word_start, word_end, word_width
+    if line_width is None:
+        # Only spaces, wider than the column
+        return ("",)
+    lines.append((start, end))
+
+    wrapped = [text[start:end] for start, end in lines]
+    if max_lines is not None and len(lines) > max_lines:
+        rest = text[lines[max_lines - 1][0] :].rstrip()
+        wrapped[max_lines - 1 :] = [truncate_text(rest, width, size, bold)]
+    return tuple(wrapped)
+
+
+def truncate_text(text: str, width: float, size: float, bold: bool = False) -> str:
+    """Shorten text to fit a column, ending it with an ellipsis if shortened.
+
+    Args:
+        text: The text
+        width: Column width in millimetres
+        size: Font size in points
+        bold: Whether the text is set in bold
+
+    Returns:
+        The text, or its longest prefix which fits with the ellipsis.
+    """
+    limit = width * 1000 / (size * MM_PER_PT)
+    if _em_width(text, bold) <= limit:
+        return text
+    head = _fit(text, limit - _em_width(ELLIPSIS, bold), bold)
+    return head.rstrip() + ELLIPSIS
+
+
+def _em_width(text: str, bold: bool) -> int:
+    """Return the advance width of text in 1/1000 em."""
+    table = _BOLD_WIDTHS if bold else _REGULAR_WIDTHS
+    extra = _BOLD_EXTRA if bold else _REGULAR_EXTRA
+    replacement = table[ord(REPLACEMENT_CHARACTER) - _TABLE_START]
+    total = 0
+    for code in map(ord, text):
+        index = code - _TABLE_START
+        width = table[index] if 0 <= index < len(table) else extra.get(code, 0)
+        total += width or replacement
+    return total
+
+
+def _fit(text: str, limit: float, bold: bool) -> str:
+    """Return the longest prefix of text within a width in 1/1000 em.
+
+    At least one character is returned, so that breaking always progresses.
+    """
+    total = 0
+    for i, char in enumerate(text):
+        total += _em_width(char, bold)
+        if total > limit:
+            return text[: max(i, 1)]
+    return text
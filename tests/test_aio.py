@@ -0,0 +1,178 @@
+"""Tests for the asyncio API."""
+
+import asyncio
+import gc
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, ValidationError, aio
+
+CREDITOR = Creditor(
+    name="Robert Schneider AG",
+    postal_code="2501",
+    city="Biel",
+    country="CH",
+)
+
+
+def make_bill(amount):
+    """Create a QR-bill for an amount."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=CREDITOR,
+        amount=Decimal(amount),
+        currency="CHF",
+    )
+
+
+@pytest.fixture
+def calls(monkeypatch):
+    """Count the renderings done in the executor."""
+    calls = []
+    render_row = aio.render_row
+
+    def counting(data, *options):
+        calls.append(data)
+        return render_row(data, *options)
+
+    monkeypatch.setattr(aio, "render_row", counting)
+    return calls
+
+
+@pytest.fixture
+def blocked(monkeypatch):
+    """Make renderings wait until the returned event is set."""
+    release = threading.Event()
+    render_row = aio.render_row
+
+    def waiting(*args):
+        release.wait(5)
+        return render_row(*args)
+
+    monkeypatch.setattr(aio, "render_row", waiting)
+    yield release
+    release.set()
+
+
+class TestGenerateSVGAsync:
+    """Test rendering single bills."""
+
+    def test_same_as_sync(self):
+        """The document equals the synchronous one."""
+        qr_bill = make_bill("12.50")
+        svg = asyncio.run(qr_bill.generate_svg_async("fr", profile="minified"))
+        assert svg == qr_bill.generate_svg("fr", profile="minified")
+
+    def test_coalesced(self, calls):
+        """Concurrent identical requests share one rendering."""
+
+        async def main():
+            requests = [make_bill("1.00").generate_svg_async() for _ in range(5)]
+            requests.append(make_bill("2.00").generate_svg_async())
+            return await asyncio.gather(*requests)
+
+        svgs = asyncio.run(main())
+        assert len(set(svgs[:5])) == 1 and svgs[5] != svgs[0]
+        assert len(calls) == 2
+
+    def test_cancellation(self, blocked):
+        """A rendering is cancelled once no request waits for it anymore."""
+
+        async def main():
+            qr_bill = make_bill("3.00")
+            first = asyncio.create_task(qr_bill.generate_svg_async())
+            second = asyncio.create_task(qr_bill.generate_svg_async())
+            await asyncio.sleep(0.01)
+            (rendering,) = aio._in_flight[asyncio.get_running_loop()].values()
+            first.cancel()
+            await asyncio.sleep(0.01)
+            assert not rendering.future.cancelled()
+            second.cancel()
+            await asyncio.sleep(0.01)
+            assert rendering.future.cancelled()
+            assert not aio._in_flight[asyncio.get_running_loop()]
+            blocked.set()
+
+        asyncio.run(main())
+
+    def test_executor(self, monkeypatch):
+        """The configured executor renders."""
+        with ThreadPoolExecutor(1, thread_name_prefix="configured") as executor:
+            monkeypatch.setattr(aio, "_executor", executor)
+            names = []
+            render_row = aio.render_row
+
+            def recording(*args):
+                names.append(threading.current_thread().name)
+                return render_row(*args)
+
+            monkeypatch.setattr(aio, "render_row", recording)
+            asyncio.run(make_bill("4.00").generate_svg_async())
+        assert names[0].startswith("configured")
+
+
+class TestRenderStream:
+    """Test rendering streams of rows."""
+
+    def test_order(self):
+        """Documents are yielded in input order, also from async input."""
+        bills = [make_bill(f"{i}.00") for i in range(1, 7)]
+
+        async def rows():
+            for qr_bill in bills:
+                yield qr_bill
+
+        async def main():
+            return [svg async for svg in aio.render_stream(rows(), max_in_flight=3)]
+
+        assert asyncio.run(main()) == [qr_bill.generate_svg() for qr_bill in bills]
+
+    def test_invalid_row(self):
+        """A validation error is raised when its row is reached."""
+        rows = [make_bill("1.00").build_data_string(), "SPC\n0200"]
+
+        async def main():
+            stream = aio.render_stream(rows)
+            assert (await anext(stream)).startswith("<?xml")
+            with pytest.raises(ValidationError):
+                await anext(stream)
+
+        asyncio.run(main())
+
+    def test_close_retrieves_failures(self):
+        """Failures of rows never reached are not reported as unretrieved."""
+        rows = [make_bill("1.00").build_data_string(), "SPC\n0200"]
+        reported = []
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            loop.set_exception_handler(lambda loop, context: reported.append(context))
+            stream = aio.render_stream(rows, max_in_flight=3)
+            assert (await anext(stream)).startswith("<?xml")
+            await stream.aclose()
+            del stream
+            gc.collect()
+
+        asyncio.run(main())
+        assert reported == []
+
+    def test_close_cancels(self, blocked):
+        """Closing the stream cancels the pending renderings."""
+
+        async def main():
+            bills = [make_bill(f"{i}.00") for i in range(1, 5)]
+            stream = aio.render_stream(bills, max_in_flight=2)
+            waiting = asyncio.create_task(anext(stream))
+            await asyncio.sleep(0.01)
+            renderings = aio._in_flight[asyncio.get_running_loop()]
+            assert len(renderings) == 2
+            waiting.cancel()
+            await asyncio.sleep(0.01)
+            await stream.aclose()
+            assert not renderings
+            blocked.set()
+
+        asyncio.run(main())
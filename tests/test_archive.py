@@ -0,0 +1,176 @@
+"""Tests for the template-delta archive."""
+
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr.archive import (
+    Archive,
+    ArchivedBill,
+    ArchivedSVG,
+    ArchiveWriter,
+    SVGArchive,
+    SVGArchiveWriter,
+    build_dictionary,
+    compress_svg,
+    decompress_svg,
+    write_archive,
+)
+from chqr.svg_generator import SVG_TEMPLATE_VERSION
+
+
+def make_bill(reference, amount="100.00"):
+    """Create a QR-bill with a creditor reference."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal(amount),
+        currency="CHF",
+        reference_type="SCOR",
+        reference=reference,
+    )
+
+
+@pytest.fixture
+def bills():
+    """Create bills with distinct references."""
+    return [
+        make_bill("RF18539007547034", "10.00"),
+        make_bill("RF6820160001", "20.00"),
+        make_bill("RF93123456789", "30.00"),
+    ]
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Return the path of an archive file."""
+    return tmp_path / "bills.cqda"
+
+
+class TestArchive:
+    """Test writing and reading archives."""
+
+    def test_reconstruct_byte_identical(self, bills, path):
+        """Reconstructed SVGs equal the originals."""
+        assert write_archive(path, bills, "de", profile="minified") == 3
+        with Archive(path) as archive:
+            for qr_bill in bills:
+                expected = qr_bill.generate_svg("de", profile="minified")
+                assert archive.reconstruct(qr_bill.reference) == expected
+
+    def test_smaller_than_svg(self, bills, path):
+        """Only the data strings are stored."""
+        write_archive(path, bills)
+        svg_size = sum(len(qr_bill.generate_svg()) for qr_bill in bills)
+        assert path.stat().st_size < svg_size / 10
+
+    def test_lookup(self, bills, path):
+        """Bills are found by key and iterated in archive order."""
+        write_archive(path, bills, "fr")
+        with Archive(path) as archive:
+            assert len(archive) == 3
+            assert archive.keys() == [qr_bill.reference for qr_bill in bills]
+            assert "RF6820160001" in archive
+            assert "RF00" not in archive
+            assert archive.read("RF6820160001") == ArchivedBill(
+                "RF6820160001", "fr", bills[1].build_data_string()
+            )
+            assert archive.bill("RF93123456789").amount == Decimal("30.00")
+            assert [record.key for record in archive] == archive.keys()
+            with pytest.raises(KeyError):
+                archive.read("RF00")
+
+    def test_options_stored(self, bills, path):
+        """Rendering options are stored once for the archive."""
+        write_archive(path, bills, mask=3, qr_style="bitmap")
+        with Archive(path) as archive:
+            assert archive.options.mask == 3
+            assert archive.options.qr_style == "bitmap"
+            assert archive.reconstruct(bills[0].reference) == bills[0].generate_svg(
+                mask=3, qr_style="bitmap"
+            )
+
+    def test_reissued_key(self, bills, path):
+        """A later bill with the key of an earlier one is the one found."""
+        reissued = make_bill(bills[0].reference, "99.00")
+        write_archive(path, [*bills, reissued])
+        with Archive(path) as archive:
+            assert len(archive) == 4
+            assert archive.bill(bills[0].reference).amount == Decimal("99.00")
+
+    def test_unkeyed_bills(self, path):
+        """Bills without a key are stored but not indexed."""
+        with ArchiveWriter(path) as writer:
+            writer.append(make_bill("RF18539007547034"), key="")
+        with Archive(path) as archive:
+            assert len(archive) == 1
+            assert archive.keys() == []
+
+    def test_template_version_mismatch(self, bills, path, monkeypatch):
+        """Archives of another markup version are not reconstructed."""
+        write_archive(path, bills)
+        version = SVG_TEMPLATE_VERSION
+        monkeypatch.setattr("chqr.archive.SVG_TEMPLATE_VERSION", version + 1)
+        with Archive(path) as archive:
+            with pytest.raises(ValueError, match=f"template version {version}"):
+                archive.reconstruct(bills[0].reference)
+
+    def test_recovery_without_index(self, bills, path):
+        """The index of an unterminated archive is rebuilt from its records."""
+        write_archive(path, bills)
+        with Archive(path) as archive:
+            offset = archive._by_key[bills[2].reference]
+        data = path.read_bytes()
+        path.write_bytes(data[: offset + 10])
+        with Archive(path) as archive:
+            assert archive.keys() == [bills[0].reference, bills[1].reference]
+
+    def test_not_an_archive(self, path):
+        """Other files are rejected."""
+        path.write_bytes(b"<svg/>")
+        with pytest.raises(ValueError):
+            Archive(path)
+
+
+class TestSVGArchive:
+    """Test archives of SVGs compressed against a preset dictionary."""
+
+    def test_roundtrip(self, bills, path):
+        """Stored SVGs are read back unchanged, each on its own."""
+        with SVGArchiveWriter(path, profile="minified") as writer:
+            for qr_bill, language in zip(bills, ("de", "fr", "it")):
+                writer.append(qr_bill, language)
+        with SVGArchive(path) as archive:
+            assert len(archive) == 3
+            assert archive.read("RF93123456789") == bills[2].generate_svg(
+                "it", profile="minified"
+            )
+            assert [record.language for record in archive] == ["de", "fr", "it"]
+            assert isinstance(next(iter(archive)), ArchivedSVG)
+
+    def test_dictionary_improves_compression(self, bills):
+        """The preset dictionary beats compressing each bill on its own."""
+        svg = bills[0].generate_svg("fr")
+        dictionary = build_dictionary()
+        compressed = compress_svg(svg, dictionary)
+        assert len(dictionary) <= 32768
+        assert len(compressed) < len(compress_svg(svg, b"")) * 0.75
+        assert decompress_svg(compressed, dictionary) == svg
+
+    def test_formats_not_mixed(self, bills, path):
+        """Each reader only opens its own archive format."""
+        write_archive(path, bills)
+        with pytest.raises(ValueError):
+            SVGArchive(path)
+        with SVGArchiveWriter(path) as writer:
+            writer.append(bills[0])
+        with pytest.raises(ValueError):
+            Archive(path)
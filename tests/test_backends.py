@@ -0,0 +1,140 @@
+"""Tests for pluggable QR code backends."""
+
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, backends
+from chqr.backends import (
+    QRBackend,
+    SegnoBackend,
+    available_backends,
+    get_backend,
+    register_backend,
+    set_default_backend,
+)
+
+
+class RecordingBackend(SegnoBackend):
+    """segno backend which records the payloads it encodes."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, data, mask="full"):
+        self.encoded.append(data)
+        return super().encode(data, mask)
+
+    def to_svg(self, symbol):
+        return '<svg viewBox="0 0 1 1" class="recorded"/>'
+
+
+@pytest.fixture(autouse=True)
+def isolated_registry(monkeypatch):
+    """Keep backend registrations and defaults local to each test."""
+    monkeypatch.setattr(backends, "_backends", dict(backends._backends))
+    monkeypatch.setattr(backends, "_default_backend", None)
+    monkeypatch.delenv(backends.BACKEND_ENV_VAR, raising=False)
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a simple QR-bill for testing."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    return QRBill(
+        account="CH5800791123000889012",
+        creditor=creditor,
+        amount=Decimal("199.95"),
+        currency="CHF",
+    )
+
+
+class TestBackendSelection:
+    """Test how backends are resolved."""
+
+    def test_segno_is_default(self):
+        """Test that segno is used when nothing is configured."""
+        assert get_backend().name == "segno"
+        assert "segno" in available_backends()
+
+    def test_per_call_backend_instance(self, qr_bill):
+        """Test that a backend instance can be passed per call."""
+        engine = RecordingBackend()
+
+        svg = qr_bill.generate_svg(backend=engine, qr_style="backend")
+
+        assert engine.encoded == [qr_bill.build_data_string()]
+        assert 'class="recorded"' in svg
+
+    def test_per_call_backend_name(self, qr_bill):
+        """Test that a registered backend can be selected by name."""
+        engine = RecordingBackend()
+        register_backend(engine)
+
+        qr_bill.generate_qr_code(backend="recording")
+
+        assert len(engine.encoded) == 1
+
+    def test_process_default_backend(self, qr_bill):
+        """Test that the process default applies to calls without backend."""
+        engine = RecordingBackend()
+        set_default_backend(engine)
+
+        qr_bill.generate_svg()
+
+        assert get_backend() is engine
+        assert len(engine.encoded) == 1
+
+    def test_environment_variable(self, monkeypatch):
+        """Test that the default backend can be chosen by environment."""
+        engine = RecordingBackend()
+        register_backend(engine)
+        monkeypatch.setenv(backends.BACKEND_ENV_VAR, "recording")
+
+        assert get_backend() is engine
+
+    def test_unknown_backend_raises(self, qr_bill):
+        """Test that unknown backend names are rejected."""
+        with pytest.raises(ValueError, match="Unknown QR backend 'fastqr'"):
+            qr_bill.generate_qr_code(backend="fastqr")
+        with pytest.raises(ValueError, match="Unknown QR backend"):
+            set_default_backend("fastqr")
+
+    def test_register_invalid_backend_raises(self):
+        """Test that objects without the backend interface are rejected."""
+        with pytest.raises(TypeError):
+            register_backend(object())
+
+
+class TestSegnoBackend:
+    """Test the default segno backend."""
+
+    def test_implements_interface(self):
+        """Test that the segno backend satisfies the protocol."""
+        assert isinstance(SegnoBackend(), QRBackend)
+
+    def test_svg_fragment_spans_one_unit_per_module(self, qr_bill):
+        """Test that the SVG fragment has a module-sized viewBox."""
+        engine = SegnoBackend()
+        symbol = engine.encode(qr_bill.build_data_string())
+        size = len(symbol.matrix)
+
+        svg = engine.to_svg(symbol)
+
+        assert svg.startswith(f'<svg viewBox="0 0 {size} {size}">')
+
+    def test_png_output(self, qr_bill):
+        """Test that the PNG serialiser returns a PNG image."""
+        engine = SegnoBackend()
+        symbol = engine.encode(qr_bill.build_data_string())
+
+        png = engine.to_png(symbol, scale=2)
+
+        assert png.startswith(b"\x89PNG\r\n\x1a\n")
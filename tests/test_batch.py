@@ -0,0 +1,154 @@
+"""Tests for checkpointed batch runs."""
+
+import json
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr import batch as batch_module
+from chqr.batch import read_checkpoint, run_batch, verify_batch
+from chqr.sinks import MANIFEST_NAME
+
+
+def make_bills(count):
+    """Create bills with distinct amounts."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        street="Rue du Lac",
+        building_number="1268",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    return [
+        QRBill(
+            account="CH9300762011623852957",
+            creditor=creditor,
+            amount=Decimal(10 + i),
+            currency="CHF",
+        )
+        for i in range(count)
+    ]
+
+
+def crash_after(bills, count):
+    """Yield bills, then fail like a killed process."""
+    for i, qr_bill in enumerate(bills):
+        if i == count:
+            raise MemoryError
+        yield qr_bill
+
+
+def manifest(root):
+    """Return the manifest entries of a batch directory."""
+    lines = (root / MANIFEST_NAME).read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines]
+
+
+@pytest.fixture
+def bills():
+    """Create the input of a batch."""
+    return make_bills(7)
+
+
+class TestRunBatch:
+    """Test running and resuming batches."""
+
+    def test_complete_run(self, bills, tmp_path):
+        """All bills are written, listed in input order and checkpointed."""
+        result = run_batch(bills, tmp_path, "de")
+        assert (result.total, result.resumed_at, result.written) == (7, 0, 7)
+        assert [entry["name"] for entry in manifest(tmp_path)] == [
+            f"bill-{i}.svg" for i in range(1, 8)
+        ]
+        assert read_checkpoint(tmp_path).done == 7
+        assert verify_batch(tmp_path).ok
+
+    def test_resume_after_crash(self, bills, tmp_path, monkeypatch):
+        """A rerun resumes at the checkpoint without duplicates or gaps."""
+        with pytest.raises(MemoryError):
+            run_batch(crash_after(bills, 5), tmp_path, checkpoint_every=2)
+        assert read_checkpoint(tmp_path).done == 4
+        assert len(manifest(tmp_path)) == 5
+        assert not verify_batch(tmp_path).ok
+
+        rendered = []
+        render = batch_module.generate_svg
+        monkeypatch.setattr(
+            batch_module,
+            "generate_svg",
+            lambda qr_bill, *args: rendered.append(qr_bill) or render(qr_bill, *args),
+        )
+        result = run_batch(bills, tmp_path, checkpoint_every=2)
+        assert (result.total, result.resumed_at) == (7, 4)
+        assert rendered == bills[4:]
+        entries = manifest(tmp_path)
+        assert [entry["name"] for entry in entries] == [
+            f"bill-{i}.svg" for i in range(1, 8)
+        ]
+        content = (tmp_path / entries[6]["path"]).read_text(encoding="utf-8")
+        assert content == bills[6].generate_svg()
+        assert verify_batch(tmp_path).ok
+
+    def test_resume_without_new_bills(self, bills, tmp_path):
+        """The checkpoint records the size of the cut manifest."""
+        with pytest.raises(MemoryError):
+            run_batch(crash_after(bills, 5), tmp_path, checkpoint_every=2)
+
+        assert run_batch(bills[:4], tmp_path).written == 0
+        size = (tmp_path / MANIFEST_NAME).stat().st_size
+        assert read_checkpoint(tmp_path).manifest_size == size
+        assert len(manifest(tmp_path)) == 4
+        report = verify_batch(tmp_path)
+        assert (report.rows, report.missing, report.corrupt) == (4, [], [])
+
+    def test_rerun_of_complete_batch(self, bills, tmp_path):
+        """A finished batch is not rendered again."""
+        run_batch(bills, tmp_path)
+        assert run_batch(bills, tmp_path).written == 0
+        assert len(manifest(tmp_path)) == 7
+
+    def test_options_must_match(self, bills, tmp_path):
+        """A batch is not resumed with other rendering options."""
+        run_batch(bills[:2], tmp_path, "de")
+        with pytest.raises(ValueError, match="other options"):
+            run_batch(bills, tmp_path, "fr")
+
+
+class TestVerifyBatch:
+    """Test cross-checking the output of a batch."""
+
+    def test_names_match_write_bills(self, tmp_path):
+        """Documents are named like those of `write_bills`."""
+        reference = "RF18539007547034"
+        qr_bills = [
+            QRBill(
+                account="CH9300762011623852957",
+                creditor=make_bills(1)[0].creditor,
+                currency="CHF",
+                reference_type="SCOR",
+                reference=reference,
+            )
+        ] * 2
+        run_batch(qr_bills, tmp_path)
+        assert [entry["name"] for entry in manifest(tmp_path)] == [
+            f"bill-1-{reference}.svg",
+            f"bill-2-{reference}.svg",
+        ]
+        assert verify_batch(tmp_path).ok
+
+    def test_findings(self, bills, tmp_path):
+        """Missing, altered and unlisted files are reported."""
+        run_batch(bills[:3], tmp_path)
+        entries = manifest(tmp_path)
+        (tmp_path / entries[0]["path"]).unlink()
+        (tmp_path / entries[1]["path"]).write_text("<svg/>")
+        (tmp_path / "stray.svg").write_text("<svg/>")
+
+        report = verify_batch(tmp_path)
+        assert report.missing == [entries[0]["path"]]
+        assert report.corrupt == [entries[1]["path"]]
+        assert report.unlisted == ["stray.svg"]
+        assert (report.rows, report.checkpointed) == (3, 3)
+        assert not report.ok
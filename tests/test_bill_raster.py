@@ -0,0 +1,165 @@
+"""Tests for bitmap rendering of complete QR-bills."""
+
+import struct
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.bill_raster import rasterize_bill
+from chqr.glyphs import (
+    ATLAS_DPI,
+    ATLAS_FACES,
+    CHARSET,
+    decode_atlas,
+    encode_atlas,
+    get_face,
+    load_atlas,
+)
+from chqr.qr_raster import rasterize_qr
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a QR-bill with all optional fields."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        street="Rue du Lac",
+        building_number="1268",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    debtor = UltimateDebtor(
+        name="Pia-Maria Rutschmann-Schnyder",
+        street="Grosse Marktgasse",
+        building_number="28",
+        postal_code="9400",
+        city="Rorschach",
+        country="CH",
+    )
+    return QRBill(
+        account="CH4431999123000889012",
+        creditor=creditor,
+        amount=Decimal("1949.75"),
+        currency="CHF",
+        reference_type="QRR",
+        reference="210000000003139471430009017",
+        additional_information="Auftrag vom 15.06.2020",
+        debtor=debtor,
+    )
+
+
+def pixel(raster, x: int, y: int) -> int:
+    """Return a pixel of a raster, 1 for dark."""
+    return raster.rows[y][x // 8] >> (7 - x % 8) & 1
+
+
+def dark_pixels(raster, left_mm, top_mm, right_mm, bottom_mm) -> int:
+    """Count the dark pixels within a rectangle given in mm."""
+    scale = raster.dpi / 25.4
+    return sum(
+        pixel(raster, x, y)
+        for y in range(round(top_mm * scale), round(bottom_mm * scale))
+        for x in range(round(left_mm * scale), round(right_mm * scale))
+    )
+
+
+class TestGlyphAtlas:
+    """Test the bundled glyph atlas."""
+
+    def test_atlas_covers_character_set(self):
+        """Test that every face holds every character of the character set."""
+        atlas = load_atlas()
+
+        for dpi in ATLAS_DPI:
+            for size, bold in ATLAS_FACES:
+                face = atlas.faces[(dpi, size, bold)]
+                assert set(face.glyphs) == set(CHARSET)
+            assert ("scissors-top", dpi) in atlas.artwork
+            assert ("scissors-side", dpi) in atlas.artwork
+
+    def test_glyph_metrics_scale_with_resolution(self):
+        """Test that advances double from 300 to 600 dpi."""
+        low = get_face(10, False, 300).text_width("Zürich 8000")
+        high = get_face(10, False, 600).text_width("Zürich 8000")
+
+        assert high == pytest.approx(2 * low, rel=0.01)
+
+    def test_encode_decode_roundtrip(self):
+        """Test that an atlas survives encoding."""
+        atlas = load_atlas()
+        faces = [atlas.faces[(300, 8, False)]]
+
+        decoded = decode_atlas(encode_atlas(faces, atlas.artwork))
+
+        assert decoded.faces[(300, 8, False)] == faces[0]
+        assert decoded.artwork == atlas.artwork
+
+    def test_unknown_resolution(self):
+        """Test that resolutions outside of the atlas are rejected."""
+        with pytest.raises(ValueError, match="available resolutions: 300, 600"):
+            get_face(8, False, 200)
+
+    def test_replacement_character(self):
+        """Test that characters outside of the character set are replaced."""
+        face = get_face(8, False, 300)
+
+        assert face.glyph("中") == face.glyph("?")
+
+
+class TestBillRaster:
+    """Test rendering of the complete bill."""
+
+    @pytest.mark.parametrize("dpi, size", [(300, (2480, 1276)), (600, (4961, 2551))])
+    def test_page_size(self, qr_bill, dpi, size):
+        """Test that the raster covers 210 x 108 mm."""
+        raster = rasterize_bill(qr_bill, dpi=dpi)
+
+        assert (raster.width, raster.height) == size
+        assert len(raster.rows) == size[1]
+
+    def test_qr_code_is_placed(self, qr_bill):
+        """Test that the QR code raster is copied to 67 mm, 20 mm."""
+        raster = rasterize_bill(qr_bill, dpi=300)
+        qr = rasterize_qr(qr_bill.generate_qr_code().matrix, 300)
+        x, y = round(67 * 300 / 25.4), round(20 * 300 / 25.4)
+
+        for row in (0, 100, qr.height // 2, qr.height - 1):
+            for column in range(0, qr.width, 7):
+                assert pixel(raster, x + column, y + row) == pixel(qr, column, row)
+
+    def test_separator_lines(self, qr_bill):
+        """Test the horizontal and vertical separator lines."""
+        raster = rasterize_bill(qr_bill, dpi=300)
+
+        assert dark_pixels(raster, 10, 2.9, 11, 3.1) > 0
+        assert dark_pixels(raster, 61.9, 50, 62.1, 51) > 0
+        # Gap between the vertical line and its scissors
+        assert dark_pixels(raster, 61.9, 102.6, 62.1, 102.9) == 0
+
+    def test_text_is_drawn(self, qr_bill):
+        """Test that the text blocks contain ink and margins stay blank."""
+        raster = rasterize_bill(qr_bill, dpi=300)
+
+        # Receipt title and payment part information
+        assert dark_pixels(raster, 5, 7, 40, 11.5) > 0
+        assert dark_pixels(raster, 118, 5, 160, 30) > 0
+        # Right margin of the payment part
+        assert dark_pixels(raster, 205.5, 10, 210, 100) == 0
+
+    def test_language_changes_output(self, qr_bill):
+        """Test that the headings are translated."""
+        english = rasterize_bill(qr_bill, "en", 300)
+        german = rasterize_bill(qr_bill, "de", 300)
+
+        assert english.rows != german.rows
+
+    def test_qr_bill_bitmap(self, qr_bill):
+        """Test PNG and PBM output of QRBill.generate_bitmap."""
+        png = qr_bill.generate_bitmap(dpi=300)
+        pbm = qr_bill.generate_bitmap(format="pbm", dpi=300)
+
+        assert struct.unpack(">II", png[16:24]) == (2480, 1276)
+        assert pbm.startswith(b"P4\n2480 1276\n")
+        assert len(pbm) == len(b"P4\n2480 1276\n") + 310 * 1276
@@ -0,0 +1,105 @@
+"""Tests for the content-addressed render cache."""
+
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr import cache as cache_module
+from chqr.cache import RenderCache, fingerprint, render_cached
+
+
+def make_bill(amount):
+    """Create a QR-bill for an amount."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal(amount),
+        currency="CHF",
+    )
+
+
+@pytest.fixture
+def bills():
+    """Create bills with distinct amounts."""
+    return [make_bill("10.00"), make_bill("20.00"), make_bill("30.00")]
+
+
+class TestFingerprint:
+    """Test the cache keys."""
+
+    def test_stable(self, bills):
+        """Equal bills and options have equal fingerprints."""
+        assert fingerprint(bills[0]) == fingerprint(make_bill("10.00"))
+        assert len(fingerprint(bills[0])) == 64
+
+    def test_covers_inputs(self, bills, monkeypatch):
+        """Data, language, options and version all change the fingerprint."""
+        keys = {
+            fingerprint(bills[0]),
+            fingerprint(bills[1]),
+            fingerprint(bills[0], "de"),
+            fingerprint(bills[0], mask=2),
+            fingerprint(bills[0], qr_style="bitmap"),
+            fingerprint(bills[0], profile="minified"),
+        }
+        monkeypatch.setattr(cache_module, "CHQR_VERSION", "0.0.0")
+        keys.add(fingerprint(bills[0]))
+        assert len(keys) == 7
+
+
+class TestRenderCache:
+    """Test the memory and disk tiers."""
+
+    def test_render_once(self, bills, monkeypatch):
+        """A cached bill is not rendered again."""
+        cache = RenderCache()
+        svg = cache.render(bills[0], "fr")
+        assert svg == bills[0].generate_svg("fr")
+        monkeypatch.setattr(
+            cache_module, "generate_svg", lambda *args: pytest.fail("rendered")
+        )
+        assert cache.render(bills[0], "fr") == svg
+        assert (cache.stats.memory_hits, cache.stats.misses) == (1, 1)
+
+    def test_disk_tier_shared_by_runs(self, bills, tmp_path):
+        """A new cache on the same directory reuses earlier renderings."""
+        list(render_cached(bills, RenderCache(tmp_path)))
+        cache = RenderCache(tmp_path)
+        svgs = [svg for _, svg in render_cached(bills, cache)]
+        assert svgs == [qr_bill.generate_svg() for qr_bill in bills]
+        assert (cache.stats.disk_hits, cache.stats.misses) == (3, 0)
+        assert not list(tmp_path.glob("*/.tmp-*"))
+
+    def test_memory_eviction(self, bills):
+        """The memory tier keeps the most recently used documents."""
+        cache = RenderCache(memory_entries=2)
+        for key in ("a", "b", "c"):
+            cache.put(key, key.encode())
+        assert "a" not in cache
+        assert cache.get("b") == b"b"
+        assert cache.get("a") is None
+
+
+class TestIncremental:
+    """Test incremental re-runs."""
+
+    def test_only_changed_bills(self, bills, tmp_path):
+        """Only bills with a new fingerprint are rendered and yielded."""
+        list(render_cached(bills, RenderCache(tmp_path), "de"))
+        bills[1].amount = Decimal("25.00")
+        cache = RenderCache(tmp_path)
+        changed = list(render_cached(bills, cache, "de", incremental=True))
+        assert [qr_bill for qr_bill, _ in changed] == [bills[1]]
+        assert changed[0][1] == bills[1].generate_svg("de")
+        assert cache.stats.reused == 2
+        assert cache.stats.summary() == (
+            "reused 2 of 3 bills (66.7%; 0 from memory, 2 from disk), rendered 1"
+        )
@@ -0,0 +1,178 @@
+"""Tests for the Unix socket render daemon."""
+
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, ValidationError
+from chqr.daemon import (
+    MAX_PIPELINED,
+    DaemonClient,
+    RenderDaemon,
+    pack_request,
+    unpack_request,
+)
+from chqr.serve import RenderOptions, RenderService
+
+CREDITOR = Creditor(
+    name="Robert Schneider AG",
+    postal_code="2501",
+    city="Biel",
+    country="CH",
+)
+
+SVG = RenderOptions(backend="segno")
+
+
+def make_bill(amount):
+    """Create a QR-bill for an amount."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=CREDITOR,
+        amount=Decimal(amount),
+        currency="CHF",
+    )
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    """Run a daemon on a socket in a temporary directory."""
+    executor = ThreadPoolExecutor(2)
+    daemon = RenderDaemon(tmp_path / "chqr.sock", RenderService(executor))
+    thread = threading.Thread(
+        target=daemon.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield daemon
+    daemon.shutdown()
+    daemon.server_close()
+    executor.shutdown()
+
+
+class TestProtocol:
+    """Test the framing of requests."""
+
+    def test_request_round_trip(self):
+        """Requests decode to what was encoded."""
+        options = RenderOptions("png", "it", "fast", "segno", "path", "pretty", 600)
+        frame = pack_request(7, "SPC\nÄ", options)
+        assert unpack_request(frame[4:], "segno") == (7, "SPC\nÄ", options)
+        fixed = SVG._replace(mask=3, profile="minified")
+        assert unpack_request(pack_request(1, "", fixed)[4:], "segno")[2] == fixed
+
+    def test_unencodable_options(self):
+        """Options without a code are rejected by the client."""
+        with pytest.raises(ValueError):
+            pack_request(1, "", SVG._replace(format="gif"))
+
+    def test_unknown_codes(self):
+        """Unknown option codes are rejected by the daemon."""
+        frame = bytearray(pack_request(1, "", SVG))
+        frame[8] = 9
+        with pytest.raises(ValueError, match="Unknown option code"):
+            unpack_request(bytes(frame[4:]), "segno")
+
+
+class TestDaemon:
+    """Test rendering over the socket."""
+
+    def test_render(self, daemon):
+        """Documents equal those of the library."""
+        qr_bill = make_bill("12.50")
+        data = qr_bill.build_data_string()
+        with DaemonClient(daemon.path) as client:
+            options = SVG._replace(language="de", profile="minified")
+            svg = client.render(data, options).decode("utf-8")
+            assert svg == qr_bill.generate_svg("de", profile="minified")
+            png = client.render(data, SVG._replace(format="png"))
+            assert png == qr_bill.generate_bitmap()
+
+    def test_pipelining(self, daemon):
+        """Many requests on one connection are answered in order."""
+        bills = [make_bill(f"{i}.00") for i in range(1, 21)]
+        requests = [(qr_bill.build_data_string(), SVG) for qr_bill in bills] * 2
+        with DaemonClient(daemon.path, window=4) as client:
+            documents = list(client.render_many(requests))
+        expected = [qr_bill.generate_svg().encode("utf-8") for qr_bill in bills]
+        assert documents == expected * 2
+        assert daemon.service.cache.stats.reused >= 20
+
+    def test_full_window(self, daemon):
+        """The largest window keeps many requests flowing without a stall."""
+        qr_bill = make_bill("3.00")
+        requests = [(qr_bill.build_data_string(), SVG)] * (4 * MAX_PIPELINED + 1)
+        with DaemonClient(daemon.path, window=MAX_PIPELINED) as client:
+            documents = list(client.render_many(requests))
+        assert documents == [qr_bill.generate_svg().encode("utf-8")] * len(requests)
+
+    @pytest.mark.parametrize("window", [0, MAX_PIPELINED + 1, 4000])
+    def test_invalid_window(self, daemon, window):
+        """Windows the daemon cannot keep up with are rejected."""
+        with pytest.raises(ValueError, match="window"):
+            DaemonClient(daemon.path, window=window)
+
+    def test_errors(self, daemon):
+        """Errors are reported per request, the connection stays usable."""
+        data = make_bill("1.00").build_data_string()
+        with DaemonClient(daemon.path) as client:
+            with pytest.raises(ValidationError):
+                client.render("SPC\n0200")
+            with pytest.raises(ValidationError):
+                client.render(data, SVG._replace(format="png", dpi=72))
+            frame = bytearray(pack_request(5, data, SVG))
+            frame[9] = 7
+            client._send([bytes(frame)], [5])
+            with pytest.raises(ValueError, match="request 5"):
+                client._receive()
+            assert client.render(data).startswith(b"<?xml")
+
+    def test_stopped_early(self, daemon):
+        """Responses left by an interrupted stream are not taken for others."""
+        datas = [make_bill(f"{i}.00").build_data_string() for i in range(1, 9)]
+        requests = [(data, SVG) for data in datas]
+        requests.insert(2, ("SPC\n0200", SVG))
+        with DaemonClient(daemon.path, window=4) as client:
+            documents = client.render_many(requests)
+            next(documents)
+            with pytest.raises(ValidationError):
+                list(documents)
+            assert not client._outstanding
+            svg = client.render(datas[5]).decode("utf-8")
+            assert svg == QRBill.from_data_string(datas[5]).generate_svg()
+            documents = client.render_many(requests)
+            next(documents)
+            documents.close()
+            assert client.render(datas[6]) == client.render(datas[6])
+
+    def test_unexpected_response(self, daemon):
+        """A response to another request than expected ends the connection."""
+        data = make_bill("1.00").build_data_string()
+        with DaemonClient(daemon.path) as client:
+            client._send([pack_request(7, data, SVG)], [8])
+            with pytest.raises(ConnectionError, match="request 7"):
+                client._receive()
+            assert client._socket.fileno() == -1
+
+    def test_framing_error(self, daemon):
+        """A frame of impossible length ends the connection."""
+        with socket.socket(socket.AF_UNIX) as connection:
+            connection.connect(str(daemon.path))
+            connection.sendall(b"\x00\x00\x00\x01x")
+            assert connection.recv(1) == b""
+
+
+def test_socket_path(tmp_path):
+    """A stale socket is replaced, a live one is not."""
+    path = tmp_path / "chqr.sock"
+    with socket.socket(socket.AF_UNIX) as stale:
+        stale.bind(str(path))
+    service = RenderService(ThreadPoolExecutor(1))
+    with RenderDaemon(path, service):
+        with pytest.raises(OSError):
+            RenderDaemon(path, service)
+        assert path.exists()
+    assert not path.exists()
+    service.executor.shutdown()
@@ -3,7 +3,10 @@
 from chqr import QRBill, Creditor
 from decimal import Decimal
 
+import pytest
+
 from chqr.debtor import UltimateDebtor
+from chqr.exceptions import ValidationError
 
 
 class TestQRDataStructure:
@@ -217,3 +220,51 @@ class TestQRDataStructure:
         data = qr_bill.build_data_string()
 
         assert len(data) <= 997
+
+
+class TestFromDataString:
+    """Test rebuilding a QR-bill from its data string."""
+
+    def test_roundtrip(self):
+        """A rebuilt bill has the same data string as the original."""
+        qr_bill = QRBill(
+            account="CH4431999123000889012",
+            creditor=Creditor(
+                name="Robert Schneider AG",
+                street="Rue du Lac",
+                building_number="1268",
+                postal_code="2501",
+                city="Biel",
+                country="CH",
+            ),
+            amount=Decimal("1949.75"),
+            currency="CHF",
+            reference_type="QRR",
+            reference="210000000003139471430009017",
+            additional_information="Order of 15 June 2020",
+            debtor=UltimateDebtor(
+                name="Pia-Maria Rutschmann-Schnyder",
+                street="Grosse Marktgasse",
+                building_number="28",
+                postal_code="9400",
+                city="Rorschach",
+                country="CH",
+            ),
+            billing_information="//S1/10/10201409/11/200701/20/140.000-53",
+            alternative_procedures=["eBill/B/41010560425610173"],
+        )
+
+        data = qr_bill.build_data_string()
+        rebuilt = QRBill.from_data_string(data)
+
+        assert rebuilt.build_data_string() == data
+        assert rebuilt.amount == Decimal("1949.75")
+        assert rebuilt.debtor.city == "Rorschach"
+        assert rebuilt.alternative_procedures == ["eBill/B/41010560425610173"]
+
+    def test_invalid_data(self):
+        """Data strings other than QR-bill payloads are rejected."""
+        with pytest.raises(ValidationError):
+            QRBill.from_data_string("SPC\n0200\n1")
+        with pytest.raises(ValidationError):
+            QRBill.from_data_string("BCD\n002\n1\nSCT" + "\n" * 30)
@@ -0,0 +1,188 @@
+"""Tests for QR-bill HTML generation."""
+
+import io
+from decimal import Decimal
+from html.parser import HTMLParser
+
+import pytest
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.html_generator import generate_html, iter_html, write_html
+
+
+class ElementCounter(HTMLParser):
+    """Count start tags and classes and collect the text of a document."""
+
+    def __init__(self):
+        super().__init__()
+        self.tags = {}
+        self.classes = {}
+        self.text = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tags[tag] = self.tags.get(tag, 0) + 1
+        for name, value in attrs:
+            if name == "class":
+                for cls in value.split():
+                    self.classes[cls] = self.classes.get(cls, 0) + 1
+
+    def handle_data(self, data):
+        if data.strip():
+            self.text.append(data.strip())
+
+
+def parse(html: str) -> ElementCounter:
+    """Parse an HTML document."""
+    counter = ElementCounter()
+    counter.feed(html)
+    return counter
+
+
+@pytest.fixture
+def basic_qr_bill():
+    """Create a basic QR-bill for testing."""
+    creditor = Creditor(
+        name="Max Muster & Söhne",
+        street="Musterstrasse",
+        building_number="123",
+        postal_code="8000",
+        city="Seldwyla",
+        country="CH",
+    )
+
+    debtor = UltimateDebtor(
+        name="Simon Muster",
+        street="Musterstrasse",
+        building_number="1",
+        postal_code="8000",
+        city="Seldwyla",
+        country="CH",
+    )
+
+    return QRBill(
+        account="CH4431999123000889012",
+        creditor=creditor,
+        amount=Decimal("1949.75"),
+        currency="CHF",
+        reference_type="QRR",
+        reference="210000000003139471430009017",
+        additional_information="Auftrag vom 15.06.2020",
+        debtor=debtor,
+    )
+
+
+class TestHTMLStructure:
+    """Test HTML document structure."""
+
+    def test_single_bill_document(self, basic_qr_bill):
+        """Test that a single bill renders a complete document."""
+        html = basic_qr_bill.generate_html()
+        doc = parse(html)
+
+        assert html.startswith("<!DOCTYPE html>")
+        assert doc.classes["qr-bill"] == 1
+        assert doc.classes["receipt"] == 1
+        assert doc.classes["payment"] == 1
+        assert doc.classes["qr"] == 1
+
+    def test_shared_resources_defined_once(self, basic_qr_bill):
+        """Test that stylesheet and symbols are not repeated per bill."""
+        html = generate_html([basic_qr_bill] * 5)
+        doc = parse(html)
+
+        assert doc.classes["qr-bill"] == 5
+        assert doc.tags["style"] == 1
+        assert doc.tags["symbol"] == 3
+        assert html.count('<symbol id="chqr-swiss-cross"') == 1
+        assert html.count('href="#chqr-swiss-cross"') == 5
+
+    def test_qr_code_is_inline_path(self, basic_qr_bill):
+        """Test that the QR code is embedded as an inline SVG path."""
+        html = basic_qr_bill.generate_html()
+        size = len(basic_qr_bill.generate_qr_code().matrix)
+
+        assert f'<svg viewBox="0 0 {size} {size}"><path stroke="#000" d="M' in html
+
+
+class TestHTMLContent:
+    """Test HTML text content."""
+
+    def test_bill_content(self, basic_qr_bill):
+        """Test that all fields are shown on receipt and payment part."""
+        text = parse(basic_qr_bill.generate_html()).text
+
+        assert text.count("CH44 3199 9123 0008 8901 2") == 2
+        assert text.count("Max Muster & Söhne") == 2
+        assert text.count("21 00000 00003 13947 14300 09017") == 2
+        assert text.count("1 949.75") == 2
+        assert text.count("Auftrag vom 15.06.2020") == 1
+        assert "Acceptance point" in text
+
+    def test_special_characters_escaped(self, basic_qr_bill):
+        """Test that markup characters are escaped."""
+        html = basic_qr_bill.generate_html()
+
+        assert "Max Muster &amp; Söhne" in html
+
+    def test_without_debtor_and_amount(self):
+        """Test the blank headings without debtor and amount."""
+        creditor = Creditor(
+            name="Robert Schneider AG",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        )
+        qr_bill = QRBill(
+            account="CH5800791123000889012", creditor=creditor, currency="CHF"
+        )
+
+        text = parse(qr_bill.generate_html()).text
+
+        assert text.count("Payable by (name/address)") == 2
+        assert "Amount" in text
+
+    def test_german_language(self, basic_qr_bill):
+        """Test translated headings and document language."""
+        html = basic_qr_bill.generate_html(language="de")
+
+        assert '<html lang="de">' in html
+        assert "Zahlteil" in parse(html).text
+
+
+class TestHTMLStreaming:
+    """Test streaming HTML output."""
+
+    def test_write_to_text_file(self, basic_qr_bill):
+        """Test streaming into a text file object."""
+        buffer = io.StringIO()
+
+        count = write_html([basic_qr_bill] * 3, buffer)
+
+        assert count == 3
+        assert buffer.getvalue() == generate_html([basic_qr_bill] * 3)
+        assert write_html([], io.StringIO()) == 0
+
+    def test_write_to_binary_file(self, basic_qr_bill):
+        """Test streaming into a binary file object such as an HTTP response."""
+        buffer = io.BytesIO()
+
+        write_html([basic_qr_bill], buffer, language="fr")
+
+        assert "Récépissé" in buffer.getvalue().decode("utf-8")
+
+    def test_bills_are_rendered_lazily(self, basic_qr_bill):
+        """Test that the head is produced before any bill is consumed."""
+        consumed = []
+
+        def generate():
+            for _ in range(3):
+                consumed.append(1)
+                yield basic_qr_bill
+
+        chunks = iter_html(generate())
+        head = next(chunks)
+        assert consumed == []
+        assert head.rstrip().endswith("</svg>")
+
+        next(chunks)
+        assert consumed == [1]
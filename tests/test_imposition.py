@@ -0,0 +1,161 @@
+"""Tests for placing QR-bills onto pages."""
+
+import gzip
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr.imposition import PageLayout, iter_pages, make_layout, write_pages
+
+SVG_NS = {"svg": "http://www.w3.org/2000/svg"}
+XLINK_HREF = "{http://www.w3.org/1999/xlink}href"
+
+
+def make_bill(amount: str) -> QRBill:
+    """Create a simple QR-bill with the given amount."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        street="Rue du Lac",
+        building_number="1268",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    return QRBill(
+        account="CH5800791123000889012",
+        creditor=creditor,
+        amount=Decimal(amount),
+        currency="CHF",
+    )
+
+
+@pytest.fixture
+def bills():
+    """Create three QR-bills with distinct amounts."""
+    return [make_bill("10.00"), make_bill("20.00"), make_bill("30.00")]
+
+
+def page_slots(page: str) -> list[ET.Element]:
+    """Return the bill slots of a page document."""
+    return ET.fromstring(page).findall("svg:svg[@class='qr-bill']", SVG_NS)
+
+
+class TestLayouts:
+    """Test layout computation."""
+
+    def test_invoice_layout_places_bill_at_bottom(self):
+        """Test that a single bill sits on the bottom edge of A4."""
+        assert make_layout(1) == PageLayout(210, 297, (192,))
+
+    def test_two_up_layout(self):
+        """Test that two bills are stacked from the bottom of A4."""
+        assert make_layout(2).slots == (87, 192)
+
+    def test_three_up_does_not_fit_a4(self):
+        """Test that three 105 mm bills are rejected on A4."""
+        with pytest.raises(ValueError, match="do not fit"):
+            make_layout(3)
+
+    def test_three_up_on_taller_sheet(self):
+        """Test that custom page sizes hold more bills."""
+        assert make_layout(3, page_size=(210, 315)).slots == (0, 105, 210)
+
+    def test_unknown_layout_raises(self, bills):
+        """Test that unknown layout names are rejected."""
+        with pytest.raises(ValueError, match="Unknown layout"):
+            next(iter_pages(bills, "4-up"))
+
+
+class TestPages:
+    """Test page rendering."""
+
+    def test_invoice_page(self, bills):
+        """Test that every bill gets its own A4 page."""
+        pages = list(iter_pages(bills, "invoice"))
+
+        assert len(pages) == 3
+        root = ET.fromstring(pages[0])
+        assert root.get("width") == "210mm"
+        assert root.get("height") == "297mm"
+        slot = page_slots(pages[0])[0]
+        assert slot.get("y") == "189mm"
+        assert slot.get("height") == "108mm"
+
+    def test_two_up_pages(self, bills):
+        """Test that bills are distributed over the slots in order."""
+        pages = list(iter_pages(bills, "2-up"))
+
+        assert [len(page_slots(page)) for page in pages] == [2, 1]
+        first = "".join(page_slots(pages[0])[0].itertext())
+        last = "".join(page_slots(pages[1])[0].itertext())
+        assert "10.00" in first
+        assert "30.00" in last
+
+    def test_static_artwork_is_shared(self, bills):
+        """Test that scissors and cross are defined once per page."""
+        page = next(iter_pages(bills, "2-up"))
+        root = ET.fromstring(page)
+
+        symbols = root.findall("svg:defs/svg:symbol", SVG_NS)
+        uses = root.findall(".//svg:use", SVG_NS)
+
+        assert len(symbols) == 3
+        assert len(uses) == 6
+        ids = {symbol.get("id") for symbol in symbols}
+        assert {use.get(XLINK_HREF)[1:] for use in uses} == ids
+        assert page.count('font-family="') == 1
+
+    @pytest.mark.parametrize("profile", ["pretty", "minified"])
+    def test_ids_are_unique(self, bills, profile):
+        """Test that the QR codes of the bills on a page have distinct ids."""
+        page = next(iter_pages(bills, "2-up", profile=profile))
+
+        ids = [element.get("id") for element in ET.fromstring(page).iter()]
+        ids = [id_ for id_ in ids if id_ is not None]
+        assert len(ids) == len(set(ids))
+        assert "qr_code_svg-1" in ids and "qr_code_svg-2" in ids
+
+    def test_minified_pages(self, bills):
+        """Test that pages can use the minified profile."""
+        page = next(iter_pages(bills, "2-up", profile="minified"))
+        root = ET.fromstring(page)
+
+        assert root.get("viewBox") == "0 0 210 297"
+        assert page_slots(page)[1].get("y") == "189"
+
+    def test_bills_are_consumed_lazily(self):
+        """Test that pages are rendered before the input is exhausted."""
+        consumed = []
+
+        def generate():
+            for amount in ("1.00", "2.00", "3.00", "4.00"):
+                consumed.append(amount)
+                yield make_bill(amount)
+
+        pages = iter_pages(generate(), "2-up")
+        next(pages)
+
+        assert consumed == ["1.00", "2.00"]
+
+
+class TestWritePages:
+    """Test writing pages to files."""
+
+    def test_write_svg_pages(self, bills, tmp_path):
+        """Test that one file is written per page."""
+        count = write_pages(bills, str(tmp_path / "page-{:02d}.svg"), "2-up")
+
+        assert count == 2
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "page-01.svg",
+            "page-02.svg",
+        ]
+
+    def test_write_svgz_pages(self, bills, tmp_path):
+        """Test that a .svgz pattern writes compressed pages."""
+        write_pages(bills[:1], str(tmp_path / "page-{}.svgz"))
+
+        page = gzip.decompress((tmp_path / "page-1.svgz").read_bytes())
+        assert len(page_slots(page.decode("utf-8"))) == 1
@@ -0,0 +1,171 @@
+"""Tests for the format-neutral layout of QR-bills."""
+
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.backends import SegnoBackend
+from chqr.layout import (
+    MM_PER_PT,
+    BlockLine,
+    Layout,
+    Line,
+    QRCode,
+    Section,
+    Symbol,
+    TextBlock,
+    TextRun,
+)
+
+
+class RecordingBackend(SegnoBackend):
+    """segno backend which records the payloads it encodes."""
+
+    name = "recording"
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, data, mask="full"):
+        self.encoded.append(data)
+        return super().encode(data, mask)
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a QR-bill with all optional fields."""
+    return QRBill(
+        account="CH4431999123000889012",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal("1949.75"),
+        currency="CHF",
+        reference_type="QRR",
+        reference="210000000003139471430009017",
+        additional_information="Auftrag vom 15.06.2020",
+        debtor=UltimateDebtor(
+            name="Pia-Maria Rutschmann-Schnyder",
+            street="Grosse Marktgasse",
+            building_number="28",
+            postal_code="9400",
+            city="Rorschach",
+            country="CH",
+        ),
+    )
+
+
+def texts(layout: Layout) -> list[str]:
+    """Return the text of all runs of a layout."""
+    return [e.text for e in layout.flatten() if isinstance(e, TextRun)]
+
+
+class TestComputeLayout:
+    """Test the elements of a layout."""
+
+    def test_page_and_sections(self, qr_bill):
+        """The layout spans 210 x 108 mm with the receipt and payment part."""
+        layout = qr_bill.layout()
+        assert (layout.width, layout.height, layout.language) == (210, 108, "en")
+        sections = [e for e in layout.elements if isinstance(e, Section)]
+        assert [(s.name, s.x, s.y, s.width, s.height) for s in sections] == [
+            ("receipt", 0, 3, 62, 105),
+            ("payment", 62, 3, 148, 105),
+        ]
+
+    def test_separators_and_scissors(self, qr_bill):
+        """Separator lines leave gaps for both scissors."""
+        layout = qr_bill.layout()
+        lines = [e for e in layout.elements if isinstance(e, Line)]
+        symbols = [e for e in layout.elements if isinstance(e, Symbol)]
+        assert len(lines) == 4
+        assert all(line.width == 0.1 for line in lines)
+        assert [s.name for s in symbols] == ["scissors-top", "scissors-side"]
+
+    def test_texts(self, qr_bill):
+        """All fields appear in the language of the layout."""
+        content = texts(qr_bill.layout("de"))
+        assert "Empfangsschein" in content
+        assert "Zahlteil" in content
+        assert content.count("CH44 3199 9123 0008 8901 2") == 2
+        assert content.count("21 00000 00003 13947 14300 09017") == 2
+        assert content.count("1 949.75") == 2
+        assert content.count("Auftrag vom 15.06.2020") == 1
+        assert content.count("Zahlbar durch") == 2
+
+    def test_acceptance_point_right_aligned(self, qr_bill):
+        """The acceptance point ends at the right edge of the receipt."""
+        (run,) = [
+            e
+            for e in qr_bill.layout().flatten()
+            if isinstance(e, TextRun) and e.text == "Acceptance point"
+        ]
+        assert run.anchor == "end"
+        assert (run.x, run.y) == (57, 88)
+
+    def test_flatten_applies_section_offsets(self, qr_bill):
+        """Section contents are translated by the section and its padding."""
+        flat = qr_bill.layout().flatten()
+        assert not any(isinstance(e, (Section, TextBlock)) for e in flat)
+        (qr_code,) = [e for e in flat if isinstance(e, QRCode)]
+        assert (qr_code.x, qr_code.y, qr_code.size) == (67, 20, 46)
+        titles = [e for e in flat if isinstance(e, TextRun) and e.size == 11]
+        assert [(t.x, t.y) for t in titles] == [(5, 11), (67, 11)]
+
+    def test_text_block_baselines(self):
+        """Block lines are spaced by their dy in points."""
+        block = TextBlock(1, 2, (BlockLine(18, "a", 6, True), BlockLine(9, "b", 8)))
+        runs = block.runs()
+        assert [run.y for run in runs] == [
+            pytest.approx(2 + 18 * MM_PER_PT),
+            pytest.approx(2 + 27 * MM_PER_PT),
+        ]
+        assert [(run.x, run.size, run.bold) for run in runs] == [
+            (1, 6, True),
+            (1, 8, False),
+        ]
+
+    def test_without_optional_fields(self, qr_bill):
+        """Without amount and debtor, blank fields are announced."""
+        qr_bill.amount = None
+        qr_bill.debtor = None
+        content = texts(qr_bill.layout())
+        assert "1 949.75" not in content
+        assert content.count("Payable by (name/address)") == 2
+
+
+class TestLayoutCache:
+    """Test the per-bill layout cache."""
+
+    def test_shared_between_formats(self, qr_bill):
+        """SVG, HTML and bitmap output share one layout and one QR encoding."""
+        backend = RecordingBackend()
+        layout = qr_bill.layout(backend=backend)
+        qr_bill.generate_svg(backend=backend)
+        qr_bill.generate_svg(backend=backend, profile="minified")
+        qr_bill.generate_html(backend=backend)
+        qr_bill.generate_bitmap(format="pbm", backend=backend)
+        assert qr_bill.layout(backend=backend) is layout
+        assert len(backend.encoded) == 1
+
+    def test_keyed_by_language_and_mask(self, qr_bill):
+        """Languages and mask strategies are laid out separately."""
+        layout = qr_bill.layout("en")
+        assert qr_bill.layout("de") is not layout
+        assert qr_bill.layout("en", mask=0) is not layout
+        assert qr_bill.layout("en") is layout
+
+    def test_invalidated_on_change(self, qr_bill):
+        """Changing the bill's data recomputes the layout."""
+        layout = qr_bill.layout()
+        qr_bill.additional_information = "Order 42"
+        updated = qr_bill.layout()
+        assert updated is not layout
+        assert "Order 42" in texts(updated)
+        assert "Order 42" in qr_bill.generate_svg()
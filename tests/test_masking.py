@@ -0,0 +1,98 @@
+"""Tests for QR code data mask strategies."""
+
+from decimal import Decimal
+
+import pytest
+import segno
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.masking import make_qr_code, validate_mask
+
+
+@pytest.fixture
+def sample_qr_bill():
+    """Create a sample QR-bill for testing."""
+    creditor = Creditor(
+        name="Max Muster & Söhne",
+        street="Musterstrasse",
+        building_number="123",
+        postal_code="8000",
+        city="Seldwyla",
+        country="CH",
+    )
+
+    debtor = UltimateDebtor(
+        name="Simon Muster",
+        street="Musterstrasse",
+        building_number="1",
+        postal_code="8000",
+        city="Seldwyla",
+        country="CH",
+    )
+
+    return QRBill(
+        account="CH4431999123000889012",
+        creditor=creditor,
+        amount=Decimal("1949.75"),
+        currency="CHF",
+        reference_type="QRR",
+        reference="210000000003139471430009017",
+        additional_information="Order from 15.10.2020",
+        debtor=debtor,
+    )
+
+
+class TestMaskStrategies:
+    """Test the mask strategies of QR code generation."""
+
+    def test_full_strategy_is_default(self, sample_qr_bill):
+        """Test that the default strategy matches segno's own mask selection."""
+        data = sample_qr_bill.build_data_string()
+        expected = segno.make(data, error="M")
+
+        qr = sample_qr_bill.generate_qr_code()
+
+        assert qr.matrix == expected.matrix
+        assert qr.mask == expected.mask
+
+    @pytest.mark.parametrize("mask", range(8))
+    def test_fixed_mask(self, sample_qr_bill, mask):
+        """Test that a fixed mask is applied as given."""
+        qr = sample_qr_bill.generate_qr_code(mask=mask)
+
+        assert qr.mask == mask
+        assert qr.error == "M"
+
+    def test_fast_strategy_produces_valid_symbol(self, sample_qr_bill):
+        """Test that the fast strategy yields the same symbol as a fixed mask."""
+        data = sample_qr_bill.build_data_string()
+
+        qr = make_qr_code(data, "fast")
+        expected = segno.make(data, error="M", mask=qr.mask)
+
+        assert qr.matrix == expected.matrix
+        assert qr.version == expected.version
+        assert qr.error == "M"
+
+    def test_fast_strategy_is_deterministic(self, sample_qr_bill):
+        """Test that the fast strategy always picks the same mask."""
+        first = sample_qr_bill.generate_qr_code(mask="fast")
+        second = sample_qr_bill.generate_qr_code(mask="fast")
+
+        assert first.matrix == second.matrix
+
+    def test_generate_svg_accepts_mask(self, sample_qr_bill):
+        """Test that the mask strategy is passed through to the SVG output."""
+        svg_full = sample_qr_bill.generate_svg(mask="full")
+        svg_fixed = sample_qr_bill.generate_svg(
+            mask=(sample_qr_bill.generate_qr_code().mask + 1) % 8
+        )
+
+        assert svg_full == sample_qr_bill.generate_svg()
+        assert svg_full != svg_fixed
+
+    @pytest.mark.parametrize("mask", ["best", 8, -1, True, None])
+    def test_invalid_mask_raises(self, mask):
+        """Test that unknown mask strategies are rejected."""
+        with pytest.raises(ValueError, match="Invalid mask strategy"):
+            validate_mask(mask)
@@ -0,0 +1,171 @@
+"""Tests for the persistent QR matrix store."""
+
+import os
+import random
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr.backends import SegnoBackend
+from chqr.matrix_store import (
+    MatrixStore,
+    StoredBackend,
+    StoredSymbol,
+    pack_matrix,
+    unpack_matrix,
+)
+
+
+class RecordingBackend(SegnoBackend):
+    """segno backend which records the payloads it encodes."""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, data, mask="full"):
+        self.encoded.append((data, mask))
+        return super().encode(data, mask)
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a simple QR-bill for testing."""
+    return QRBill(
+        account="CH5800791123000889012",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal("199.95"),
+        currency="CHF",
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Return the path of a store file."""
+    return tmp_path / "qr.store"
+
+
+def test_pack_roundtrip():
+    """Matrices of any size survive packing, eight modules per byte."""
+    rng = random.Random(7)
+    for size in (1, 21, 25, 117):
+        matrix = tuple(
+            bytes(rng.randint(0, 1) for _ in range(size)) for _ in range(size)
+        )
+        packed = pack_matrix(matrix)
+        assert len(packed) == (size * size + 7) // 8
+        assert unpack_matrix(packed, size) == matrix
+
+
+class TestMatrixStore:
+    """Test storing and looking up matrices."""
+
+    def test_shared_between_instances(self, path, qr_bill):
+        """Matrices written by one store are found by another on the file."""
+        data = qr_bill.build_data_string()
+        symbol = SegnoBackend().encode(data)
+        with MatrixStore(path) as reader, MatrixStore(path) as writer:
+            assert reader.get(data, "full", "segno") is None
+            assert writer.put(data, "full", "segno", symbol)
+            stored = reader.get(data, "full", "segno")
+        assert tuple(map(bytes, symbol.matrix)) == stored.matrix
+        assert (stored.mask, stored.version, stored.error) == (
+            symbol.mask,
+            symbol.version,
+            symbol.error,
+        )
+
+    def test_keyed_by_mask_and_backend(self, path, qr_bill):
+        """The same data encoded differently is stored separately."""
+        data = qr_bill.build_data_string()
+        with MatrixStore(path) as store:
+            store.put(data, "full", "segno", SegnoBackend().encode(data))
+            assert store.get(data, "fast", "segno") is None
+            assert store.get(data, "full", "other") is None
+            assert len(store) == 1
+
+    def test_short_writes_completed(self, path, qr_bill, monkeypatch):
+        """Records are written in full when the system writes less."""
+        write = os.write
+        monkeypatch.setattr(os, "write", lambda fd, data: write(fd, data[:100]))
+        data = qr_bill.build_data_string()
+        symbol = SegnoBackend().encode(data)
+        with MatrixStore(path) as store:
+            assert store.put(data, "full", "segno", symbol)
+        monkeypatch.undo()
+        with MatrixStore(path) as store:
+            stored = store.get(data, "full", "segno")
+        assert tuple(map(bytes, symbol.matrix)) == stored.matrix
+
+    def test_unfinished_record_skipped(self, path, qr_bill):
+        """A record still being written is not read."""
+        data = qr_bill.build_data_string()
+        with MatrixStore(path) as store:
+            store.put(data, "full", "segno", SegnoBackend().encode(data))
+        content = path.read_bytes()
+        path.write_bytes(content[:-1] + bytes([content[-1] ^ 1]))
+        with MatrixStore(path) as store:
+            assert len(store) == 0
+
+    def test_torn_record_followed_by_appends(self, path, qr_bill):
+        """Records appended after a torn one are found again."""
+        data = qr_bill.build_data_string()
+        with MatrixStore(path) as store:
+            store.put(data, "full", "segno", SegnoBackend().encode(data))
+        path.write_bytes(path.read_bytes()[:-100])
+
+        payloads = [f"{data}\n{i}" for i in range(5)]
+        with MatrixStore(path) as store:
+            for payload in payloads:
+                store.put(payload, "full", "segno", SegnoBackend().encode(payload))
+        with MatrixStore(path) as store:
+            assert store.get(data, "full", "segno") is None
+            found = [store.get(payload, "full", "segno") for payload in payloads]
+        assert None not in found
+
+    def test_micro_qr_not_stored(self, path):
+        """Only QR codes of numbered versions are stored."""
+        with MatrixStore(path) as store:
+            assert not store.put("1", "full", "segno", SegnoBackend().encode("1"))
+
+    def test_not_a_store(self, path):
+        """Other files are rejected."""
+        path.write_bytes(b"<svg/>")
+        with pytest.raises(ValueError):
+            MatrixStore(path)
+
+
+class TestStoredBackend:
+    """Test encoding through the store."""
+
+    def test_encodes_once(self, path, qr_bill):
+        """A stored payload is not encoded again, also by a new process."""
+        engine = RecordingBackend()
+        with MatrixStore(path) as store:
+            svg = qr_bill.generate_svg(backend=StoredBackend(engine, store))
+        assert len(engine.encoded) == 1
+
+        qr_bill._layouts = {}
+        with MatrixStore(path) as store:
+            cached = StoredBackend(engine, store)
+            assert qr_bill.generate_svg(backend=cached) == svg
+            symbol = cached.encode(qr_bill.build_data_string())
+        assert isinstance(symbol, StoredSymbol)
+        assert len(engine.encoded) == 1
+
+    def test_backend_serialisation(self, path, qr_bill):
+        """The wrapped backend serialises stored symbols with their mask."""
+        engine = RecordingBackend()
+        data = qr_bill.build_data_string()
+        with MatrixStore(path) as store:
+            cached = StoredBackend(engine, store)
+            mask = cached.encode(data).mask
+            svg = qr_bill.generate_svg(backend=cached, qr_style="backend")
+        assert engine.encoded == [(data, "full"), (data, mask)]
+        qr_bill._layouts = {}
+        assert svg == qr_bill.generate_svg(backend=engine, qr_style="backend")
@@ -0,0 +1,133 @@
+"""Tests for pack files."""
+
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr import pack as pack_module
+from chqr.pack import Pack, PackWriter, write_pack
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a QR-bill with a creditor reference."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal("100.00"),
+        currency="CHF",
+        reference_type="SCOR",
+        reference="RF18539007547034",
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    """Return the path of a pack file."""
+    return tmp_path / "bills.cqpk"
+
+
+def write_documents(path, count=100):
+    """Write numbered documents to a pack."""
+    with PackWriter(path) as writer:
+        for i in range(count):
+            writer.write(f"key-{i}", f"<svg>{i}</svg>".encode())
+
+
+class TestPack:
+    """Test writing and looking up pack files."""
+
+    def test_bills(self, qr_bill, path):
+        """Rendered bills are found by their reference."""
+        assert write_pack(path, [qr_bill], "de", profile="minified") == 1
+        with Pack(path) as pack:
+            assert pack.read_svg("RF18539007547034") == qr_bill.generate_svg(
+                "de", profile="minified"
+            )
+
+    def test_key_defaults_to_hash(self, qr_bill, path):
+        """Bills without a reference are keyed by the hash of their SVG."""
+        qr_bill.reference_type = "NON"
+        qr_bill.reference = ""
+        with PackWriter(path) as writer:
+            key = writer.append(qr_bill)
+        assert len(key) == 32
+        with Pack(path) as pack:
+            assert pack.read_svg(key) == qr_bill.generate_svg()
+
+    def test_lookup(self, path):
+        """Every document is found by binary search over the sorted index."""
+        write_documents(path)
+        with Pack(path) as pack:
+            assert len(pack) == 100
+            for i in range(100):
+                assert pack.read(f"key-{i}") == f"<svg>{i}</svg>".encode()
+            assert "key-7" in pack
+            assert "key-100" not in pack
+            with pytest.raises(KeyError):
+                pack.read("key-100")
+
+    def test_iteration_in_file_order(self, path):
+        """Iteration yields the documents as written."""
+        write_documents(path, 5)
+        with Pack(path) as pack:
+            assert [key for key, _ in pack] == [f"key-{i}" for i in range(5)]
+
+    def test_reissued_key(self, path):
+        """The latest document of a key is the one found."""
+        with PackWriter(path) as writer:
+            writer.write("a", b"first")
+            writer.write("b", b"other")
+            writer.write("a", b"second")
+        with Pack(path) as pack:
+            assert pack.read("a") == b"second"
+
+    def test_hash_collision(self, path, monkeypatch):
+        """Keys sharing a hash are told apart by the stored key."""
+        monkeypatch.setattr(pack_module, "key_hash", lambda key: b"\0" * 8)
+        write_documents(path, 3)
+        with Pack(path) as pack:
+            assert pack.read("key-1") == b"<svg>1</svg>"
+            assert "key-3" not in pack
+
+    def test_recovery_without_index(self, path):
+        """The index of an unterminated pack is rebuilt from its records."""
+        write_documents(path, 10)
+        data = path.read_bytes()
+        path.write_bytes(data[: data.index(b"<svg>9</svg>") + 4])
+        with Pack(path) as pack:
+            assert len(pack) == 9
+            assert pack.read("key-8") == b"<svg>8</svg>"
+
+    def test_not_a_pack(self, path):
+        """Other files are rejected."""
+        path.write_bytes(b"<svg/>")
+        with pytest.raises(ValueError):
+            Pack(path)
+
+    def test_index_error_closes_map(self, path, monkeypatch):
+        """The mapping is released if the index cannot be read."""
+        write_documents(path, 2)
+        maps = []
+        mmap_type = pack_module.mmap.mmap
+
+        def record(*args, **kwargs):
+            maps.append(mmap_type(*args, **kwargs))
+            return maps[-1]
+
+        def fail(self):
+            raise ValueError("Corrupt index")
+
+        monkeypatch.setattr(pack_module.mmap, "mmap", record)
+        monkeypatch.setattr(Pack, "_read_index", fail)
+        with pytest.raises(ValueError, match="Corrupt index"):
+            Pack(path)
+        assert maps and all(mapped.closed for mapped in maps)
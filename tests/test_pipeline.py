@@ -0,0 +1,167 @@
+"""Tests for the multi-stage pipeline."""
+
+import random
+import threading
+import time
+
+import pytest
+
+from chqr import ValidationError
+from chqr.pipeline import BILL_STAGES, Pipeline, Stage, bill_pipeline
+from chqr.render import bill_from_row
+from chqr.sinks import write_bills
+
+ROW = {
+    "account": "CH9300762011623852957",
+    "creditor": {
+        "name": "Robert Schneider AG",
+        "postal_code": "2501",
+        "city": "Biel",
+        "country": "CH",
+    },
+    "currency": "CHF",
+}
+
+
+class MemorySink:
+    """Sink keeping the documents in a list."""
+
+    def __init__(self):
+        self.documents = []
+
+    def write(self, name, data):
+        self.documents.append((name, data))
+
+    def close(self):
+        pass
+
+
+def jitter(value):
+    """Return the value after a random delay."""
+    time.sleep(random.random() / 500)
+    return value
+
+
+def slow(value):
+    """Return the value after a fixed delay."""
+    time.sleep(0.01)
+    return value
+
+
+class TestPipeline:
+    """Test the generic pipeline engine."""
+
+    def test_order_and_stats(self):
+        """Results keep the input order across parallel workers."""
+        pipeline = Pipeline(
+            [
+                Stage("square", lambda x: jitter(x * x), workers=4),
+                Stage("slow", slow, workers=2),
+                Stage("check", lambda x: x, ordered=True),
+            ],
+            queue_size=2,
+        )
+        assert list(pipeline.run(range(40))) == [x * x for x in range(40)]
+        assert [stats.items for stats in pipeline.stats] == [40, 40, 40]
+        assert pipeline.bottleneck == "slow"
+        assert "bottleneck: slow" in pipeline.report()
+
+    def test_ordered_stage(self):
+        """An ordered stage sees the items in input order."""
+        seen = []
+        pipeline = Pipeline(
+            [
+                Stage("shuffle", jitter, workers=4),
+                Stage("record", seen.append, ordered=True),
+            ]
+        )
+        list(pipeline.run(range(30)))
+        assert seen == list(range(30))
+
+    def test_stage_error(self):
+        """An error is raised when its item is reached."""
+
+        def invert(x):
+            return 1 / x
+
+        outputs = Pipeline([Stage("invert", invert, workers=2)]).run([1, 2, 0, 4])
+        assert [next(outputs), next(outputs)] == [1, 0.5]
+        with pytest.raises(ZeroDivisionError):
+            next(outputs)
+
+    def test_input_error(self):
+        """An error of the input is raised after the items read before it."""
+
+        def rows():
+            yield 1
+            raise OSError("disk gone")
+
+        outputs = Pipeline([Stage("identity", lambda x: x)]).run(rows())
+        assert next(outputs) == 1
+        with pytest.raises(OSError, match="disk gone"):
+            next(outputs)
+
+    def test_close_stops_workers(self):
+        """Closing the results stops the workers and the input."""
+        pulled = []
+
+        def rows():
+            for i in range(1000):
+                pulled.append(i)
+                yield i
+
+        outputs = Pipeline([Stage("slow", slow, workers=2)], queue_size=2).run(rows())
+        next(outputs)
+        outputs.close()
+        assert len(pulled) < 10
+        assert not [t for t in threading.enumerate() if t.name == "chqr-slow"]
+
+    @pytest.mark.parametrize(
+        "stage",
+        [
+            Stage("x", abs, workers=0),
+            Stage("x", abs, kind="fiber"),
+            Stage("x", abs, workers=2, ordered=True),
+        ],
+    )
+    def test_invalid_stage(self, stage):
+        """Invalid stages are rejected."""
+        with pytest.raises(ValueError):
+            Pipeline([stage])
+
+
+class TestBillPipeline:
+    """Test the QR-bill pipeline."""
+
+    def test_sink(self):
+        """Documents match those of `write_bills`, in input order."""
+        rows = [{**ROW, "amount": f"{i}.50"} for i in range(1, 6)]
+        sink = MemorySink()
+        pipeline = bill_pipeline(sink, "it", workers={"encode": 2, "render": 2})
+        names = list(pipeline.run(rows))
+        assert names == [f"bill-{i}.svg" for i in range(1, 6)]
+        assert [stats.name for stats in pipeline.stats] == list(BILL_STAGES)
+
+        expected = MemorySink()
+        write_bills(expected, [bill_from_row(row) for row in rows], "it")
+        assert sink.documents == expected.documents
+
+    def test_names_restart_per_run(self):
+        """Every run names its documents from the input positions."""
+        pipeline = bill_pipeline(MemorySink(), workers={"encode": 1})
+        for _ in range(2):
+            assert list(pipeline.run([ROW, ROW])) == ["bill-1.svg", "bill-2.svg"]
+
+    def test_invalid_row(self):
+        """Invalid rows raise a validation error in order."""
+        outputs = bill_pipeline(workers={"encode": 1}).run(
+            [ROW, {**ROW, "currency": "USD"}]
+        )
+        assert next(outputs).startswith("<?xml")
+        with pytest.raises(ValidationError):
+            next(outputs)
+
+    def test_unknown_stage(self):
+        """Worker counts of unknown stages are rejected."""
+        with pytest.raises(ValueError, match="Unknown stages"):
+            bill_pipeline(workers={"decode": 2})
@@ -0,0 +1,71 @@
+"""Tests for the warm-up of pre-fork servers."""
+
+import gc
+
+import pytest
+
+import chqr
+from chqr import preload
+from chqr.glyphs import load_atlas
+from chqr.masking import _mask_deltas
+from chqr.qr_raster import _cross_masks, _module_masks
+from chqr.qr_svg import hidden_modules
+
+
+@pytest.fixture
+def fresh():
+    """Forget earlier warm-ups and thaw the objects frozen by them."""
+    preload._done.clear()
+    yield
+    preload._done.clear()
+    gc.unfreeze()
+
+
+def test_warmup_fills_caches(fresh):
+    """Tables of every QR code size and the glyph atlas are computed."""
+    chqr.warmup(languages=["en"], dpis=[300], freeze=False)
+
+    sizes = [17 + 4 * version for version in preload.QR_VERSIONS]
+    assert sizes[0] == 21 and sizes[-1] == 117
+    assert load_atlas.cache_info().currsize == 1
+    assert hidden_modules.cache_info().currsize >= len(sizes)
+    assert _mask_deltas.cache_info().currsize >= len(sizes)
+    assert _module_masks.cache_info().currsize >= len(sizes)
+    assert _cross_masks.cache_info().currsize >= 1
+
+
+def test_warmup_freezes(fresh):
+    gc.unfreeze()
+    chqr.warmup(languages=["en"], dpis=[], freeze=True)
+    assert gc.get_freeze_count() > 0
+
+
+def test_warmup_without_freeze(fresh):
+    gc.unfreeze()
+    chqr.warmup(languages=["en"], dpis=[], freeze=False)
+    assert gc.get_freeze_count() == 0
+
+
+def test_warmup_is_done_once(fresh, monkeypatch):
+    chqr.warmup(languages=["de"], dpis=[], freeze=False)
+
+    def fail():
+        raise AssertionError("Warmed up again")
+
+    monkeypatch.setattr(preload, "sample_bills", fail)
+    chqr.warmup(languages=["de"], dpis=[], freeze=False)
+    with pytest.raises(AssertionError):
+        chqr.warmup(languages=["fr"], dpis=[], freeze=False)
+
+
+def test_warmup_rejects_unknown_resolution(fresh):
+    with pytest.raises(ValueError):
+        chqr.warmup(languages=["en"], dpis=[123], freeze=False)
+
+
+def test_sample_bills():
+    """The samples cover a bill with all optional fields and one with none."""
+    minimal, complete = preload.sample_bills()
+    assert minimal.amount is None and minimal.debtor is None
+    assert complete.amount is not None and complete.debtor is not None
+    assert complete.reference_type == "QRR"
@@ -0,0 +1,129 @@
+"""Tests for direct QR code rasterisation."""
+
+import struct
+import zlib
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr.qr_raster import mm_to_pixels, rasterize_qr, render_qr_bitmap
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a simple QR-bill for testing."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        street="Rue du Lac",
+        building_number="1268",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    return QRBill(
+        account="CH5800791123000889012",
+        creditor=creditor,
+        amount=Decimal("199.95"),
+        currency="CHF",
+    )
+
+
+def pixel(rows: list[bytes], x: int, y: int) -> int:
+    """Return a pixel of packed rows, 1 for dark."""
+    return rows[y][x // 8] >> (7 - x % 8) & 1
+
+
+def pixel_at_mm(raster, x_mm: float, y_mm: float) -> int:
+    """Return the pixel at a position in millimetres."""
+    scale = raster.width / 46
+    return pixel(raster.rows, int(x_mm * scale), int(y_mm * scale))
+
+
+class TestRasterize:
+    """Test scaling of the module matrix."""
+
+    @pytest.mark.parametrize("dpi, pixels", [(300, 543), (600, 1087)])
+    def test_print_size(self, qr_bill, dpi, pixels):
+        """Test that the raster spans 46 mm at the given resolution."""
+        raster = rasterize_qr(qr_bill.generate_qr_code().matrix, dpi)
+
+        assert mm_to_pixels(46, dpi) == pixels
+        assert (raster.width, raster.height) == (pixels, pixels)
+        assert len(raster.rows) == pixels
+        assert all(len(row) == (pixels + 7) // 8 for row in raster.rows)
+
+    def test_pixels_match_modules(self, qr_bill):
+        """Test that every module centre has the colour of its module."""
+        matrix = qr_bill.generate_qr_code().matrix
+        size = len(matrix)
+        raster = rasterize_qr(matrix, 300, cross=False)
+
+        for i in range(size):
+            for j in range(size):
+                module_mm = 46 / size
+                value = pixel_at_mm(
+                    raster, (j + 0.5) * module_mm, (i + 0.5) * module_mm
+                )
+                assert value == matrix[i][j]
+
+    def test_swiss_cross(self, qr_bill):
+        """Test that the cross is painted in the centre."""
+        raster = rasterize_qr(qr_bill.generate_qr_code().matrix, 600)
+
+        # White border, black square, white cross
+        assert pixel_at_mm(raster, 19.6, 23) == 0
+        assert pixel_at_mm(raster, 20.2, 20.2) == 1
+        assert pixel_at_mm(raster, 23, 23) == 0
+        assert pixel_at_mm(raster, 23, 21.2) == 0
+        assert pixel_at_mm(raster, 21.2, 23) == 0
+        assert pixel_at_mm(raster, 21.2, 21.2) == 1
+
+    def test_resolution_too_low(self, qr_bill):
+        """Test that modules may not be smaller than a pixel."""
+        with pytest.raises(ValueError, match="too low"):
+            rasterize_qr(qr_bill.generate_qr_code().matrix, 20)
+
+
+class TestImageFormats:
+    """Test PNG and PBM encoding."""
+
+    def test_png(self, qr_bill):
+        """Test the 1-bit PNG with its print resolution."""
+        matrix = qr_bill.generate_qr_code().matrix
+        png = render_qr_bitmap(matrix, "png", 300)
+
+        assert png.startswith(b"\x89PNG\r\n\x1a\n")
+        width, height, depth, color = struct.unpack(">IIBB", png[16:26])
+        assert (width, height, depth, color) == (543, 543, 1, 0)
+        assert png[37:41] == b"pHYs"
+        assert struct.unpack(">IIB", png[41:50]) == (11811, 11811, 1)
+
+        idat = png.index(b"IDAT")
+        length = struct.unpack(">I", png[idat - 4 : idat])[0]
+        raw = zlib.decompress(png[idat + 4 : idat + 4 + length])
+        stride = 68
+        rows = rasterize_qr(matrix, 300).rows
+        for y in (0, 100, 271, 542):
+            line = raw[y * (stride + 1) : (y + 1) * (stride + 1)]
+            assert bytes(255 - b for b in line[1:]) == rows[y]
+
+    def test_pbm(self, qr_bill):
+        """Test the binary PBM image."""
+        matrix = qr_bill.generate_qr_code().matrix
+        pbm = render_qr_bitmap(matrix, "pbm", 600)
+
+        header = b"P4\n1087 1087\n"
+        assert pbm.startswith(header)
+        assert pbm[len(header) :] == b"".join(rasterize_qr(matrix, 600).rows)
+
+    def test_invalid_format(self, qr_bill):
+        """Test that unknown formats are rejected."""
+        with pytest.raises(ValueError, match="Invalid bitmap format"):
+            qr_bill.generate_qr_bitmap(format="gif")
+
+    def test_qr_bill_bitmap(self, qr_bill):
+        """Test that QRBill renders its own QR code."""
+        matrix = qr_bill.generate_qr_code().matrix
+
+        assert qr_bill.generate_qr_bitmap("pbm") == render_qr_bitmap(matrix, "pbm", 300)
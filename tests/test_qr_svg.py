@@ -0,0 +1,157 @@
+"""Tests for the compact QR code SVG serialisers."""
+
+import base64
+import re
+import struct
+import xml.etree.ElementTree as ET
+import zlib
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr.bitmap import pack_row
+from chqr.qr_svg import hidden_modules, qr_bitmap_svg, qr_path_data, qr_path_svg
+
+SVG_NS = {"svg": "http://www.w3.org/2000/svg"}
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a simple QR-bill for testing."""
+    creditor = Creditor(
+        name="Robert Schneider AG",
+        street="Rue du Lac",
+        building_number="1268",
+        postal_code="2501",
+        city="Biel",
+        country="CH",
+    )
+    return QRBill(
+        account="CH5800791123000889012",
+        creditor=creditor,
+        amount=Decimal("199.95"),
+        currency="CHF",
+        additional_information="Instruction of 15.09.2019",
+    )
+
+
+def decode_path(d: str, size: int) -> list[bytearray]:
+    """Rasterise path data drawn with 1 unit wide horizontal strokes."""
+    matrix = [bytearray(size) for _ in range(size)]
+    x = y = 0.0
+    for command, a, b in re.findall(r"([Mmh])(-?[\d.]+)(?: (-?[\d.]+))?", d):
+        if command == "M":
+            x, y = float(a), float(b)
+        elif command == "m":
+            x, y = x + float(a), y + float(b)
+        else:
+            row = matrix[int(y)]
+            for j in range(int(x), int(x + float(a))):
+                row[j] = 1
+            x += float(a)
+    return matrix
+
+
+class TestHiddenModules:
+    """Test the area covered by the Swiss cross."""
+
+    @pytest.mark.parametrize("size", [21, 25, 57, 97, 117])
+    def test_hidden_modules_lie_inside_cross(self, size):
+        """Test that only modules fully beneath the 7 mm cross are hidden."""
+        hidden = hidden_modules(size)
+        module = 46 / size
+
+        assert len(hidden) > 0
+        assert hidden.start * module >= 19.5
+        assert hidden.stop * module <= 26.5
+        # The neighbouring modules are at least partially visible
+        assert (hidden.start - 1) * module < 19.5
+        assert (hidden.stop + 1) * module > 26.5
+
+
+class TestPathSerialiser:
+    """Test the run-merging path serialiser."""
+
+    def test_path_without_occlusion_reproduces_matrix(self, qr_bill):
+        """Test that the path draws exactly the dark modules."""
+        matrix = qr_bill.generate_qr_code().matrix
+
+        d = qr_path_data(matrix, occlude=False)
+
+        assert decode_path(d, len(matrix)) == [bytearray(row) for row in matrix]
+
+    def test_path_omits_modules_under_cross(self, qr_bill):
+        """Test that only the modules beneath the cross are dropped."""
+        matrix = qr_bill.generate_qr_code().matrix
+        hidden = hidden_modules(len(matrix))
+
+        drawn = decode_path(qr_path_data(matrix), len(matrix))
+
+        for i, row in enumerate(matrix):
+            for j, module in enumerate(row):
+                if i in hidden and j in hidden:
+                    assert drawn[i][j] == 0
+                else:
+                    assert drawn[i][j] == module
+
+    def test_path_is_smaller_than_full_matrix(self, qr_bill):
+        """Test that occlusion shrinks the fragment."""
+        matrix = qr_bill.generate_qr_code().matrix
+
+        assert len(qr_path_svg(matrix)) < len(qr_path_svg(matrix, occlude=False))
+
+    def test_svg_uses_path_by_default(self, qr_bill):
+        """Test that generate_svg embeds the compact path serialisation."""
+        matrix = qr_bill.generate_qr_code().matrix
+
+        svg = qr_bill.generate_svg()
+
+        assert qr_path_svg(matrix) in svg
+        ET.fromstring(svg)
+
+
+class TestBitmapSerialiser:
+    """Test the embedded 1-bit PNG serialiser."""
+
+    def test_png_contains_matrix(self, qr_bill):
+        """Test that the embedded PNG holds the modules as 1-bit pixels."""
+        matrix = qr_bill.generate_qr_code().matrix
+        size = len(matrix)
+
+        fragment = qr_bitmap_svg(matrix, occlude=False)
+        image = ET.fromstring(fragment).find("image")
+        png = base64.b64decode(image.get("href").split(",", 1)[1])
+
+        assert png.startswith(b"\x89PNG\r\n\x1a\n")
+        width, height, depth, color = struct.unpack(">IIBB", png[16:26])
+        assert (width, height, depth, color) == (size, size, 1, 0)
+        idat_length = struct.unpack(">I", png[33:37])[0]
+        raw = zlib.decompress(png[41 : 41 + idat_length])
+        stride = len(pack_row(matrix[0])) + 1
+        for i, row in enumerate(matrix):
+            line = raw[i * stride : (i + 1) * stride]
+            assert line[0] == 0
+            # Black pixels are stored as 0 bits
+            assert bytes(255 - b for b in line[1:]) == pack_row(row)
+
+    def test_svg_with_bitmap_style(self, qr_bill):
+        """Test that generate_svg can embed the QR code as a bitmap."""
+        svg = qr_bill.generate_svg(qr_style="bitmap")
+        root = ET.fromstring(svg)
+
+        qr_code_svg = root.find(".//svg:svg[@id='qr_code_svg']", SVG_NS)
+        assert qr_code_svg.find(".//svg:image", SVG_NS) is not None
+
+    def test_invalid_style_raises(self, qr_bill):
+        """Test that unknown QR styles are rejected."""
+        with pytest.raises(ValueError, match="Invalid QR style"):
+            qr_bill.generate_svg(qr_style="ascii")
+
+
+class TestPackRow:
+    """Test bit packing of module rows."""
+
+    def test_pack_row_pads_with_light_modules(self):
+        """Test that rows are packed MSB first and padded with zeros."""
+        assert pack_row(b"\x01\x00\x01\x01\x00\x00\x00\x00\x01") == b"\xb0\x80"
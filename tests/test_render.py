@@ -0,0 +1,133 @@
+"""Tests for lazy rendering of input rows."""
+
+from decimal import Decimal
+
+import pytest
+
+from chqr import QRBill, ValidationError
+from chqr.render import bill_from_row, iter_render
+
+CREDITOR = {
+    "name": "Robert Schneider AG",
+    "street": "Rue du Lac",
+    "building_number": "1268",
+    "postal_code": "2501",
+    "city": "Biel",
+    "country": "CH",
+}
+
+
+def make_row(amount):
+    """Create an input row as read from a CSV file."""
+    return {
+        "account": "CH9300762011623852957",
+        "creditor": dict(CREDITOR),
+        "amount": amount,
+        "currency": "CHF",
+        "reference": "",
+    }
+
+
+def counted(rows, pulled):
+    """Yield rows, recording how many were pulled."""
+    for row in rows:
+        pulled.append(row)
+        yield row
+
+
+@pytest.fixture
+def rows():
+    """Create input rows with distinct amounts."""
+    return [make_row(f"{10 + i}.50") for i in range(5)]
+
+
+class TestBillFromRow:
+    """Test building bills from input rows."""
+
+    def test_mapping(self, rows):
+        """Nested mappings and string amounts are converted."""
+        qr_bill = bill_from_row(rows[0])
+        assert qr_bill.amount == Decimal("10.50")
+        assert qr_bill.creditor.city == "Biel"
+        assert qr_bill.reference_type == "NON"
+
+    def test_data_string_and_bill(self, rows):
+        """Data strings are parsed, bills are passed through."""
+        qr_bill = bill_from_row(rows[0])
+        assert bill_from_row(qr_bill) is qr_bill
+        data = qr_bill.build_data_string()
+        assert bill_from_row(data).build_data_string() == data
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            {"amount": "ten"},
+            {"amount": "nan"},
+            {"amount": "Infinity"},
+            {"amount": "1e400"},
+            {"currency": "USD"},
+            {"colour": "red"},
+            {"creditor": {"foo": 1}},
+            {"creditor": {**CREDITOR, "name": 1}},
+            {"creditor": "Robert Schneider AG"},
+            {"debtor": "bob"},
+            {"account": 5},
+            {"alternative_procedures": "abc"},
+            {"alternative_procedures": [1]},
+        ],
+    )
+    def test_invalid(self, rows, change):
+        """Invalid rows raise a validation error."""
+        with pytest.raises(ValidationError):
+            bill_from_row({**rows[0], **change})
+
+    def test_alternative_procedures(self, rows):
+        """Alternative procedures are taken from a list."""
+        qr_bill = bill_from_row({**rows[0], "alternative_procedures": ["eBill/B/x"]})
+        assert qr_bill.alternative_procedures == ["eBill/B/x"]
+
+
+class TestIterRender:
+    """Test the lazy renderer."""
+
+    def test_in_process(self, rows):
+        """Rows are rendered in order, one at a time."""
+        pulled = []
+        outputs = iter_render(counted(rows, pulled), "de")
+        first = next(outputs)
+        assert len(pulled) == 1
+        assert first == bill_from_row(rows[0]).generate_svg("de")
+        assert len(list(outputs)) == 4
+
+    def test_workers(self, rows):
+        """A worker pool yields the same documents, with bounded prefetch."""
+        pulled = []
+        outputs = iter_render(counted(rows, pulled), workers=1, max_in_flight=2)
+        first = next(outputs)
+        assert len(pulled) == 2
+        expected = [bill_from_row(row).generate_svg() for row in rows]
+        assert [first, *outputs] == expected
+
+    def test_invalid_row(self, rows):
+        """A validation error is raised when its row is reached."""
+        rows[2]["amount"] = "-1"
+        outputs = iter_render(rows)
+        assert len([next(outputs), next(outputs)]) == 2
+        with pytest.raises(ValidationError):
+            next(outputs)
+
+    def test_options(self, rows):
+        """Invalid options are rejected."""
+        with pytest.raises(ValueError):
+            next(iter_render(rows, workers=-1))
+        with pytest.raises(ValueError):
+            next(iter_render(rows, workers=1, max_in_flight=0))
+        with pytest.raises(ValueError):
+            next(iter_render(rows, profile="tiny"))
+
+
+def test_bill_instances():
+    """QR-bill instances are valid rows."""
+    qr_bill = bill_from_row(make_row("1.00"))
+    assert isinstance(qr_bill, QRBill)
+    assert list(iter_render([qr_bill])) == [qr_bill.generate_svg()]
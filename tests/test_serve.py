@@ -0,0 +1,208 @@
+"""Tests for the HTTP rendering service."""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from chqr import serve
+from chqr.render import bill_from_row
+from chqr.serve import Histogram, RenderOptions, RenderServer, RenderService
+
+ROW = {
+    "account": "CH9300762011623852957",
+    "currency": "CHF",
+    "amount": 12.5,
+    "creditor": {
+        "name": "Muster AG",
+        "postal_code": "8000",
+        "city": "Zürich",
+        "country": "CH",
+    },
+}
+
+
+@pytest.fixture
+def server():
+    """Run a server on a free local port, rendering in threads."""
+    executor = ThreadPoolExecutor(2)
+    server = RenderServer(("127.0.0.1", 0), RenderService(executor), quiet=True)
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+    )
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    executor.shutdown()
+
+
+def request(server, path, body=None, headers=None):
+    """Send a request and return the status, headers and body."""
+    data = None if body is None else json.dumps(body).encode("utf-8")
+    req = urllib.request.Request(server.url + path, data, headers or {})
+    try:
+        with urllib.request.urlopen(req) as response:
+            return response.status, response.headers, response.read()
+    except urllib.error.HTTPError as error:
+        return error.code, error.headers, error.read()
+
+
+class TestRender:
+    """Test the render endpoint."""
+
+    def test_svg(self, server):
+        """The SVG equals the library's, with an ETag."""
+        status, headers, body = request(server, "/render?language=de", ROW)
+        assert status == 200
+        assert headers["Content-Type"] == "image/svg+xml"
+        assert body.decode("utf-8") == bill_from_row(ROW).generate_svg("de")
+        assert len(headers["ETag"]) == 66
+
+    def test_data_string(self, server):
+        """A QR code data string is accepted as a JSON string."""
+        data = bill_from_row(ROW).build_data_string()
+        assert request(server, "/render", data)[2] == request(server, "/render", ROW)[2]
+
+    def test_not_modified(self, server):
+        """A matching If-None-Match header is answered without a body."""
+        etag = request(server, "/render", ROW)[1]["ETag"]
+        status, _, body = request(server, "/render", ROW, {"If-None-Match": etag})
+        assert (status, body) == (304, b"")
+        other = request(server, "/render?profile=minified", ROW)[1]["ETag"]
+        assert other != etag
+
+    @pytest.mark.parametrize(
+        "query, prefix",
+        [
+            ("format=png&dpi=600", b"\x89PNG"),
+            ("format=pbm", b"P4"),
+            ("format=html&language=fr", b"<!DOCTYPE html>"),
+        ],
+    )
+    def test_formats(self, server, query, prefix):
+        """Bitmaps and HTML are rendered as well."""
+        status, headers, body = request(server, f"/render?{query}", ROW)
+        assert status == 200
+        assert headers["Content-Type"] == serve.CONTENT_TYPES[query.split("&")[0][7:]]
+        assert body.startswith(prefix)
+
+    @pytest.mark.parametrize(
+        "path, body, status",
+        [
+            ("/render?format=gif", ROW, 400),
+            ("/render?colour=red", ROW, 400),
+            ("/render?mask=9", ROW, 400),
+            ("/render", [ROW], 400),
+            ("/render", {**ROW, "currency": "USD"}, 422),
+            ("/render", {**ROW, "creditor": {"foo": 1}}, 422),
+            ("/render", {**ROW, "debtor": "bob"}, 422),
+            ("/render", {**ROW, "amount": "nan"}, 422),
+            ("/render?format=png&dpi=72", ROW, 422),
+            ("/bills", ROW, 404),
+        ],
+    )
+    def test_errors(self, server, path, body, status):
+        """Invalid requests are answered with a JSON error."""
+        response = request(server, path, body)
+        assert response[0] == status
+        assert json.loads(response[2])["error"]
+
+    def test_internal_error(self, server, monkeypatch):
+        """Unexpected failures are answered with a JSON error as well."""
+
+        def fail(*args):
+            raise RuntimeError("Worker died")
+
+        monkeypatch.setattr(server.service, "document", fail)
+        status, headers, body = request(server, "/render", ROW)
+        assert status == 500
+        assert headers["Content-Type"] == "application/json"
+        assert json.loads(body)["error"] == "Internal server error"
+
+
+class TestMonitoring:
+    """Test the health and metrics endpoints."""
+
+    def test_health(self, server):
+        """The health endpoint answers."""
+        assert request(server, "/health")[:3:2] == (200, b"ok\n")
+
+    def test_metrics(self, server):
+        """Requests, cache use and latencies are exposed."""
+        request(server, "/render", ROW)
+        request(server, "/render", ROW)
+        request(server, "/render?format=gif", ROW)
+        request(server, '/a"b', ROW)
+        request(server, "/c")
+        metrics = request(server, "/metrics")[2].decode("utf-8")
+        assert 'chqr_requests_total{route="/render",status="200"} 2' in metrics
+        assert 'chqr_requests_total{route="/render",status="400"} 1' in metrics
+        assert 'chqr_requests_total{route="other",status="404"} 2' in metrics
+        assert 'chqr_request_duration_seconds_count{route="/render"} 3' in metrics
+        assert '"/c"' not in metrics and 'a"b' not in metrics
+        assert "chqr_render_duration_seconds_count 1" in metrics
+        assert "chqr_cache_hits_total 1" in metrics
+
+    def test_histogram(self):
+        """Buckets are cumulative."""
+        histogram = Histogram((0.1, 1))
+        for seconds in (0.05, 0.5, 0.7, 3):
+            histogram.observe(seconds)
+        lines = histogram.exposition("latency", 'path="/"')
+        assert lines[:3] == [
+            'latency_bucket{path="/",le="0.1"} 1',
+            'latency_bucket{path="/",le="1"} 3',
+            'latency_bucket{path="/",le="+Inf"} 4',
+        ]
+        assert lines[4] == 'latency_count{path="/"} 4'
+
+
+class TestRenderService:
+    """Test caching and coalescing."""
+
+    def test_coalescing(self, monkeypatch):
+        """Identical concurrent requests share one rendering."""
+        release = threading.Event()
+        calls = []
+        render_document = serve.render_document
+
+        def blocking(data, options):
+            calls.append(data)
+            release.wait(5)
+            return render_document(data, options)
+
+        monkeypatch.setattr(serve, "render_document", blocking)
+        data = bill_from_row(ROW).build_data_string()
+        options = RenderOptions(backend="segno")
+        key = serve.document_key(data, options)
+        with ThreadPoolExecutor(2) as executor:
+            service = RenderService(executor)
+            with ThreadPoolExecutor(3) as clients:
+                results = [
+                    clients.submit(service.document, key, data, options)
+                    for _ in range(3)
+                ]
+                while service.coalesced < 2:
+                    threading.Event().wait(0.01)
+                release.set()
+                documents = {result.result() for result in results}
+        assert len(documents) == 1 and len(calls) == 1
+        assert service.document(key, data, options) in documents
+        assert service.cache.stats.memory_hits == 1
+
+    def test_process_pool(self):
+        """The default executor is a pool of warmed-up processes."""
+        service = RenderService(workers=1)
+        try:
+            data = bill_from_row(ROW).build_data_string()
+            options = RenderOptions("pbm", backend="segno")
+            document = service.document(
+                serve.document_key(data, options), data, options
+            )
+        finally:
+            service.close()
+        assert document == bill_from_row(ROW).generate_bitmap(format="pbm")
@@ -0,0 +1,202 @@
+"""Tests for the output sinks."""
+
+import gzip
+import io
+import json
+import tarfile
+import zipfile
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, sinks
+from chqr.pack import Pack, PackWriter
+from chqr.sinks import (
+    MANIFEST_NAME,
+    ShardedDirectorySink,
+    Sink,
+    TarSink,
+    WriteBehindSink,
+    ZipSink,
+    write_bills,
+)
+
+DOCUMENTS = [(f"bill-{i}.svg", f"<svg>{i}</svg>".encode() * 20) for i in range(50)]
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a QR-bill with a creditor reference."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal("100.00"),
+        currency="CHF",
+        reference_type="SCOR",
+        reference="RF18539007547034",
+    )
+
+
+def write_documents(sink):
+    """Write the test documents to a sink and close it."""
+    with sink:
+        for name, data in DOCUMENTS:
+            sink.write(name, data)
+
+
+class TestShardedDirectorySink:
+    """Test the sharded directory layout."""
+
+    def test_layout_and_manifest(self, tmp_path):
+        """Documents land in hash-prefixed directories listed in the manifest."""
+        write_documents(ShardedDirectorySink(tmp_path))
+        lines = (tmp_path / MANIFEST_NAME).read_text().splitlines()
+        entries = [json.loads(line) for line in lines]
+        assert [entry["name"] for entry in entries] == [n for n, _ in DOCUMENTS]
+        for entry, (_, data) in zip(entries, DOCUMENTS):
+            parts = entry["path"].split("/")
+            assert len(parts) == 3
+            assert all(len(part) == 2 for part in parts[:2])
+            assert (tmp_path / entry["path"]).read_bytes() == data
+            assert entry["size"] == len(data)
+
+    def test_rejects_paths(self, tmp_path):
+        """Document names cannot escape the shard directory."""
+        with ShardedDirectorySink(tmp_path) as sink:
+            with pytest.raises(ValueError):
+                sink.write("../bill.svg", b"")
+
+    def test_fsync_policy(self, tmp_path):
+        """Unknown fsync policies are rejected."""
+        with pytest.raises(ValueError, match="fsync"):
+            ShardedDirectorySink(tmp_path, fsync="sometimes")
+
+    @pytest.mark.parametrize("fsync", ["close", "always"])
+    def test_syncs_files_and_directories(self, tmp_path, monkeypatch, fsync):
+        """The documents and the directories holding them are synced."""
+        synced = []
+        monkeypatch.setattr(sinks, "_sync_path", synced.append)
+        monkeypatch.delattr(sinks.os, "sync", raising=False)
+        root = tmp_path / "out"
+        with ShardedDirectorySink(root, fsync=fsync) as sink:
+            sink.write("a.svg", b"<svg/>")
+        document = root / sink.path("a.svg")
+        expected = {tmp_path, root, root / document.parts[-3], document.parent}
+        assert expected <= set(synced)
+        assert document in synced or fsync == "always"
+
+
+class TestArchiveSinks:
+    """Test the streamed tar and zip sinks."""
+
+    def test_zip(self):
+        """Deflated members read back in order."""
+        stream = io.BytesIO()
+        write_documents(ZipSink(stream, workers=3))
+        with zipfile.ZipFile(stream) as archive:
+            assert archive.testzip() is None
+            assert [
+                (info.filename, archive.read(info)) for info in archive.infolist()
+            ] == DOCUMENTS
+            assert archive.infolist()[0].compress_type == zipfile.ZIP_DEFLATED
+
+    def test_zip_stored(self, tmp_path):
+        """Members may be stored uncompressed."""
+        path = tmp_path / "bills.zip"
+        write_documents(ZipSink(path, compress=False))
+        with zipfile.ZipFile(path) as archive:
+            assert archive.read("bill-7.svg") == DOCUMENTS[7][1]
+            assert archive.infolist()[0].compress_type == zipfile.ZIP_STORED
+
+    def test_zip64(self, monkeypatch):
+        """Offsets and counts move to ZIP64 records beyond their limits."""
+        monkeypatch.setattr(sinks, "_ZIP64_OFFSET", 100)
+        monkeypatch.setattr(sinks, "_ZIP64_COUNT", 10)
+        stream = io.BytesIO()
+        write_documents(ZipSink(stream))
+        with zipfile.ZipFile(stream) as archive:
+            assert len(archive.infolist()) == 50
+            assert archive.read("bill-49.svg") == DOCUMENTS[49][1]
+
+    def test_tar(self):
+        """Members are stored in order in an uncompressed tar stream."""
+        stream = io.BytesIO()
+        write_documents(TarSink(stream))
+        stream.seek(0)
+        with tarfile.open(fileobj=stream, mode="r:") as archive:
+            members = [(m.name, archive.extractfile(m).read()) for m in archive]
+        assert members == DOCUMENTS
+
+    def test_tar_compressed_members(self, tmp_path):
+        """Compressed members are gzipped SVG files."""
+        path = tmp_path / "bills.tar"
+        write_documents(TarSink(path, compress=True))
+        with tarfile.open(path) as archive:
+            member = archive.getmember("bill-3.svgz")
+            data = archive.extractfile(member).read()
+        assert gzip.decompress(data) == DOCUMENTS[3][1]
+
+
+class TestWriteBehindSink:
+    """Test writing on a background thread."""
+
+    def test_writes_in_order(self):
+        """Documents reach the wrapped sink in order, which is closed."""
+        stream = io.BytesIO()
+        write_documents(WriteBehindSink(ZipSink(stream), max_pending=4))
+        with zipfile.ZipFile(stream) as archive:
+            assert archive.namelist() == [name for name, _ in DOCUMENTS]
+
+    def test_error_raised(self, tmp_path):
+        """Errors of the background thread surface in the caller."""
+        sink = WriteBehindSink(ShardedDirectorySink(tmp_path))
+        sink.write("..", b"")
+        with pytest.raises(ValueError, match="Invalid document name"):
+            sink.close()
+
+    def test_error_sticky(self, tmp_path):
+        """After a failure, every write and the close raise the error."""
+        sink = WriteBehindSink(ShardedDirectorySink(tmp_path))
+        sink.write("..", b"")
+        while sink._error is None:
+            sink._thread.join(0.01)
+        for _ in range(2):
+            with pytest.raises(ValueError, match="Invalid document name"):
+                sink.write("late.svg", b"<svg/>")
+        with pytest.raises(ValueError, match="Invalid document name"):
+            sink.close()
+        assert not list(tmp_path.rglob("late.svg"))
+
+
+def test_write_bills(qr_bill, tmp_path):
+    """Bills are rendered and named after their position and reference."""
+    with PackWriter(tmp_path / "bills.cqpk") as pack:
+        assert isinstance(pack, Sink)
+        qr_bill_without_reference = QRBill(
+            account="CH9300762011623852957",
+            creditor=qr_bill.creditor,
+            currency="CHF",
+        )
+        assert write_bills(pack, [qr_bill, qr_bill_without_reference], "fr") == 2
+    with Pack(tmp_path / "bills.cqpk") as pack:
+        svg = pack.read_svg("bill-1-RF18539007547034.svg")
+        assert svg == qr_bill.generate_svg("fr")
+        assert "bill-2.svg" in pack
+
+
+def test_write_bills_same_reference(qr_bill, tmp_path):
+    """Bills sharing a reference are stored side by side."""
+    with ShardedDirectorySink(tmp_path) as sink:
+        assert write_bills(sink, [qr_bill, qr_bill]) == 2
+    entries = [
+        json.loads(line) for line in (tmp_path / MANIFEST_NAME).read_text().splitlines()
+    ]
+    assert len({entry["path"] for entry in entries}) == 2
+    assert all((tmp_path / entry["path"]).is_file() for entry in entries)
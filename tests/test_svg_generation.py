@@ -5,6 +5,9 @@ from pathlib import Path
 import xml.etree.ElementTree as ET
 import pytest
 from chqr import QRBill, Creditor, UltimateDebtor
+from chqr import backends
+from chqr.backends import SegnoBackend
+from chqr.svg_generator import render_payment_part, render_qr_block, render_receipt
 
 
 # SVG namespace
@@ -718,3 +721,66 @@ class TestLanguageSupport:
         assert "Payment part" in all_text
         assert "Receipt" in all_text
         assert "Account / Payable to" in all_text
+
+
+class TestComponentRenderers:
+    """Test rendering the payment part, receipt and QR code on their own."""
+
+    class RecordingBackend(SegnoBackend):
+        """segno backend which records the payloads it encodes."""
+
+        name = "recording"
+
+        def __init__(self):
+            self.encoded = []
+
+        def encode(self, data, mask="full"):
+            self.encoded.append(data)
+            return super().encode(data, mask)
+
+    @staticmethod
+    def _size(root):
+        return root.get("width"), root.get("height")
+
+    def test_payment_part(self, basic_qr_bill):
+        """The payment part has its own size and no receipt or scissors."""
+        root = ET.fromstring(render_payment_part(basic_qr_bill, language="de"))
+        assert self._size(root) == ("148mm", "105mm")
+        payment = root.find(".//svg:svg[@class='payment']", SVG_NS)
+        assert (payment.get("x"), payment.get("y")) == ("0mm", "0mm")
+        assert root.find(".//svg:svg[@class='receipt']", SVG_NS) is None
+        assert root.find(".//svg:line", SVG_NS) is None
+        assert root.find(".//svg:svg[@id='qr_code_svg']", SVG_NS) is not None
+        all_text = TestReceiptContent._get_all_text_content(root)
+        assert "Zahlteil" in all_text
+        assert "Empfangsschein" not in all_text
+
+    def test_receipt_does_not_encode(self, basic_qr_bill, monkeypatch):
+        """The receipt is rendered without encoding the QR code."""
+        backend = self.RecordingBackend()
+        monkeypatch.setattr(backends, "_default_backend", backend)
+        root = ET.fromstring(render_receipt(basic_qr_bill))
+        assert backend.encoded == []
+        assert self._size(root) == ("62mm", "105mm")
+        assert root.find(".//svg:svg[@id='qr_code_svg']", SVG_NS) is None
+        assert "Receipt" in TestReceiptContent._get_all_text_content(root)
+
+    def test_qr_block(self, basic_qr_bill):
+        """The QR block holds the QR code and the Swiss cross only."""
+        backend = self.RecordingBackend()
+        root = ET.fromstring(render_qr_block(basic_qr_bill, backend=backend))
+        assert self._size(root) == ("46mm", "46mm")
+        assert root.find(".//svg:text", SVG_NS) is None
+        qr = root.find("svg:svg[@id='qr_code_svg']", SVG_NS)
+        assert (qr.get("x"), qr.get("y")) == ("0mm", "0mm")
+        assert backend.encoded == [basic_qr_bill.build_data_string()]
+
+    def test_minified_profile(self, basic_qr_bill):
+        """Components support the minified profile."""
+        svg = render_qr_block(basic_qr_bill, profile="minified")
+        assert svg.startswith('<svg width="46mm" height="46mm" viewBox="0 0 46 46"')
+
+    def test_unknown_component(self, basic_qr_bill):
+        """Unknown components are rejected."""
+        with pytest.raises(ValueError, match="Invalid component"):
+            basic_qr_bill.layout(component="envelope")
@@ -0,0 +1,162 @@
+"""Tests for SVG output profiles and compressed writers."""
+
+import gzip
+import io
+import re
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.svg_output import format_number, write_svgz
+
+SVG_NS = {"svg": "http://www.w3.org/2000/svg"}
+
+
+@pytest.fixture
+def basic_qr_bill():
+    """Create a basic QR-bill for testing."""
+    creditor = Creditor(
+        name="Max Muster & Söhne",
+        street="Musterstrasse",
+        building_number="123",
+        postal_code="8000",
+        city="Seldwyla",
+        country="CH",
+    )
+
+    debtor = UltimateDebtor(
+        name="Simon Muster",
+        street="Musterstrasse",
+        building_number="1",
+        postal_code="8000",
+        city="Seldwyla",
+        country="CH",
+    )
+
+    return QRBill(
+        account="CH4431999123000889012",
+        creditor=creditor,
+        amount=Decimal("1949.75"),
+        currency="CHF",
+        reference_type="QRR",
+        reference="210000000003139471430009017",
+        additional_information="Auftrag vom 15.06.2020",
+        debtor=debtor,
+    )
+
+
+def text_content(root: ET.Element) -> list[str]:
+    """Collect all non-empty text nodes of a document."""
+    return [text.strip() for text in root.itertext() if text.strip()]
+
+
+class TestFormatNumber:
+    """Test shortest number formatting."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"),
+        [
+            (62.0, "62"),
+            (0.1, ".1"),
+            (-4.76, "-4.76"),
+            (11 * 25.4 / 72, "3.881"),
+            (0.0, "0"),
+            (-0.0001, "0"),
+            (-0.5, "-.5"),
+        ],
+    )
+    def test_format_number(self, value, expected):
+        """Test that numbers are formatted without redundant characters."""
+        assert format_number(value) == expected
+
+
+class TestMinifiedProfile:
+    """Test the minified SVG profile."""
+
+    def test_minified_is_valid_and_smaller(self, basic_qr_bill):
+        """Test that minified output parses and is smaller than pretty."""
+        pretty = basic_qr_bill.generate_svg()
+        minified = basic_qr_bill.generate_svg(profile="minified")
+
+        root = ET.fromstring(minified)
+
+        assert len(minified) < len(pretty)
+        assert "\n" not in minified
+        assert root.get("width") == "210mm"
+        assert root.get("viewBox") == "0 0 210 108"
+
+    def test_minified_keeps_content(self, basic_qr_bill):
+        """Test that minification does not alter the text content."""
+        pretty = ET.fromstring(basic_qr_bill.generate_svg())
+        minified = ET.fromstring(basic_qr_bill.generate_svg(profile="minified"))
+
+        assert text_content(minified) == text_content(pretty)
+
+    def test_minified_lengths_are_unitless_millimetres(self, basic_qr_bill):
+        """Test that nested lengths are converted to millimetre user units."""
+        root = ET.fromstring(basic_qr_bill.generate_svg(profile="minified"))
+
+        payment = root.find(".//svg:svg[@class='payment']", SVG_NS)
+        title = payment.find(".//svg:text", SVG_NS)
+
+        assert payment.get("x") == "62"
+        assert payment.get("width") == "148"
+        assert title.get("font-size") == "3.881"  # 11pt
+
+    def test_separator_lines_share_style(self, basic_qr_bill):
+        """Test that the separator lines are grouped under one style."""
+        root = ET.fromstring(basic_qr_bill.generate_svg(profile="minified"))
+
+        group = root.find("svg:g", SVG_NS)
+
+        assert group.get("stroke") == "#000"
+        assert len(group.findall("svg:line", SVG_NS)) == 4
+        assert all(line.get("stroke") is None for line in group)
+
+    @pytest.mark.parametrize("qr_style", ["path", "bitmap"])
+    def test_minified_markup_is_compact(self, basic_qr_bill, qr_style):
+        """Test that the minified profile is serialised without padding."""
+        svg = basic_qr_bill.generate_svg(qr_style=qr_style, profile="minified")
+        root, _, body = svg.partition(">")
+
+        assert "\n" not in svg and "> <" not in svg and " />" not in svg
+        assert 'mm"' in root and not re.search(r'\d(mm|pt)"', body)
+
+    def test_invalid_profile_raises(self, basic_qr_bill):
+        """Test that unknown profiles are rejected."""
+        with pytest.raises(ValueError, match="Invalid profile"):
+            basic_qr_bill.generate_svg(profile="tiny")
+
+
+class TestSVGZWriter:
+    """Test the gzip-compressed SVG writer."""
+
+    def test_write_to_file_object(self, basic_qr_bill):
+        """Test that the written stream decompresses to the document."""
+        svg = basic_qr_bill.generate_svg()
+        buffer = io.BytesIO()
+
+        written = write_svgz(svg, buffer)
+
+        assert written == len(buffer.getvalue())
+        assert gzip.decompress(buffer.getvalue()).decode("utf-8") == svg
+
+    def test_write_to_path(self, basic_qr_bill, tmp_path):
+        """Test writing an .svgz file to a path."""
+        svg = basic_qr_bill.generate_svg(profile="minified")
+        path = tmp_path / "bill.svgz"
+
+        write_svgz(svg, path, level=1)
+
+        assert gzip.decompress(path.read_bytes()).decode("utf-8") == svg
+
+    def test_write_fragments(self, basic_qr_bill):
+        """Test that iterables of fragments are streamed."""
+        svg = basic_qr_bill.generate_svg()
+        buffer = io.BytesIO()
+
+        write_svgz(iter(svg.splitlines(keepends=True)), buffer)
+
+        assert gzip.decompress(buffer.getvalue()).decode("utf-8") == svg
@@ -0,0 +1,152 @@
+"""Tests for compiled invoice templates."""
+
+import xml.etree.ElementTree as ET
+from decimal import Decimal
+
+import pytest
+
+from chqr import Creditor, QRBill, UltimateDebtor
+from chqr.templates import Markup, Template, bill_fields, fill_bills
+
+SVG_NS = {"svg": "http://www.w3.org/2000/svg"}
+
+INVOICE = """<?xml version="1.0" encoding="UTF-8"?>
+<svg width="210mm" height="297mm" xmlns="http://www.w3.org/2000/svg">
+  <text x="20mm" y="40mm">Rechnung {{ invoice }} für {{debtor_name}}</text>
+  <text x="20mm" y="50mm">{{ currency }} {{ amount }}</text>
+  <svg x="0mm" y="186mm">{{ bill }}</svg>
+</svg>"""
+
+
+@pytest.fixture
+def qr_bill():
+    """Create a QR-bill with a debtor."""
+    return QRBill(
+        account="CH4431999123000889012",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        amount=Decimal("1949.75"),
+        currency="CHF",
+        reference_type="QRR",
+        reference="210000000003139471430009017",
+        debtor=UltimateDebtor(
+            name="Pia-Maria Rutschmann-Schnyder",
+            street="Grosse Marktgasse",
+            building_number="28",
+            postal_code="9400",
+            city="Rorschach",
+            country="CH",
+        ),
+    )
+
+
+class TestTemplate:
+    """Test compiling and filling templates."""
+
+    def test_slots_in_order(self):
+        """Slots are listed in order of appearance, names once."""
+        template = Template("Grüezi {{ name }}, {{name}} and {{ other }}!")
+        assert template.slots == ("name", "name", "other")
+        assert template.names == {"name", "other"}
+
+    def test_render(self):
+        """Slots are replaced by their values."""
+        template = Template("<p>{{ a }} and {{ b }}</p>")
+        assert template.render({"a": "x", "b": "y"}) == "<p>x and y</p>"
+
+    def test_without_slots(self):
+        """A template without slots renders as is."""
+        assert Template("<p>static</p>").render({}) == "<p>static</p>"
+
+    def test_escaping(self):
+        """Plain values are escaped, markup is inserted verbatim."""
+        template = Template("{{ text }}|{{ markup }}")
+        result = template.render({"text": "A & B <c>", "markup": Markup("<b/>")})
+        assert result == "A &amp; B &lt;c&gt;|<b/>"
+
+    def test_render_bytes(self):
+        """Byte output matches the encoded text output."""
+        template = Template("Zürich {{ city }}")
+        values = {"city": "Genève"}
+        assert template.render_bytes(values) == template.render(values).encode()
+
+    def test_missing_value(self):
+        """A slot without a value is rejected."""
+        with pytest.raises(ValueError, match="'amount'"):
+            Template("{{ amount }}").render({})
+
+    def test_from_path(self, tmp_path):
+        """Templates are read from UTF-8 files."""
+        path = tmp_path / "invoice.svg"
+        path.write_text(INVOICE, encoding="utf-8")
+        assert Template.from_path(path).source == INVOICE
+
+
+class TestFillBills:
+    """Test pairing templates with bill rendering."""
+
+    def test_invoice(self, qr_bill):
+        """The bill and its fields fill an SVG invoice."""
+        (svg,) = fill_bills(
+            Template(INVOICE), [qr_bill], fields=[{"invoice": "R-17"}], language="de"
+        )
+        root = ET.fromstring(svg.encode("utf-8"))
+        texts = [text.text for text in root.findall("svg:text", SVG_NS)]
+        assert texts == [
+            "Rechnung R-17 für Pia-Maria Rutschmann-Schnyder",
+            "CHF 1 949.75",
+        ]
+        bill = root.find("svg:svg/svg:svg", SVG_NS)
+        assert (bill.get("width"), bill.get("height")) == ("210mm", "108mm")
+        assert "Zahlteil" in svg
+
+    def test_only_used_fields_rendered(self, qr_bill, monkeypatch):
+        """Bill components absent from the template are not rendered."""
+        monkeypatch.setattr(
+            QRBill, "layout", lambda *args, **kwargs: pytest.fail("rendered")
+        )
+        template = Template("{{ creditor_name }}: {{ reference }}")
+        assert list(fill_bills(template, [qr_bill])) == [
+            "Robert Schneider AG: 21 00000 00003 13947 14300 09017"
+        ]
+
+    def test_fields_override_bill_fields(self, qr_bill):
+        """Per-bill fields take precedence over computed ones."""
+        template = Template("{{ amount }}")
+        result = fill_bills(template, [qr_bill], fields=[{"amount": "see invoice"}])
+        assert list(result) == ["see invoice"]
+
+    def test_fields_length_mismatch(self, qr_bill):
+        """Fields must pair up with the bills."""
+        with pytest.raises(ValueError):
+            list(fill_bills(Template("x"), [qr_bill], fields=[{}, {}]))
+
+    def test_components(self, qr_bill):
+        """Component slots hold embeddable SVG elements."""
+        values = bill_fields(qr_bill, ["payment_part", "receipt", "qr_code"])
+        for value in values.values():
+            assert isinstance(value, Markup)
+            assert value.startswith("<svg ")
+            ET.fromstring(value)
+
+    def test_fields_without_debtor(self, qr_bill):
+        """Optional fields are empty when absent."""
+        qr_bill.debtor = None
+        qr_bill.amount = None
+        values = bill_fields(qr_bill, ["debtor_name", "debtor_address", "amount"])
+        assert values == {"debtor_name": "", "debtor_address": "", "amount": ""}
+
+    def test_html_template(self, qr_bill):
+        """HTML templates embed the bill as inline SVG."""
+        template = Template(
+            "<html><body><h1>{{ creditor_name }}</h1>{{ bill }}</body></html>"
+        )
+        (html,) = fill_bills(template, [qr_bill])
+        assert html.startswith("<html><body><h1>Robert Schneider AG</h1><svg ")
+        assert "<?xml" not in html
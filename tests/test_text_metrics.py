@@ -0,0 +1,143 @@
+"""Tests for text measurement and wrapping."""
+
+import pytest
+
+from chqr import Creditor, QRBill
+from chqr.glyphs import CHARSET, get_face
+from chqr.layout import PAYMENT_COLUMN_MM, TextRun
+from chqr.text_metrics import (
+    ELLIPSIS,
+    MM_PER_PT,
+    text_width,
+    truncate_text,
+    wrap_text,
+)
+
+LONG_TEXT = (
+    "Facture mensuelle, abonnement annuel, période du 01.01. au 31.12., "
+    "veuillez indiquer le numéro de client lors de tout paiement"
+)
+
+
+class TestTextWidth:
+    """Test the width tables."""
+
+    def test_known_widths(self):
+        """Widths match the Arial metrics."""
+        assert text_width("H", 10) == pytest.approx(0.722 * 10 * MM_PER_PT)
+        assert text_width("i", 10) == pytest.approx(0.222 * 10 * MM_PER_PT)
+        assert text_width("i", 10, bold=True) == pytest.approx(0.278 * 10 * MM_PER_PT)
+
+    def test_scales_with_size(self):
+        """Widths are proportional to the font size."""
+        assert text_width("Zahlteil", 10) == pytest.approx(
+            2 * text_width("Zahlteil", 5)
+        )
+
+    def test_whole_charset_measured(self):
+        """Every character of the character set has a width."""
+        for char in CHARSET:
+            assert text_width(char, 10) > 0
+            assert text_width(char, 10, bold=True) > 0
+
+    def test_unknown_character(self):
+        """Characters outside of the character set measure as "?"."""
+        assert text_width("–", 10) == text_width("?", 10)
+
+    def test_matches_glyph_atlas(self):
+        """Regular widths agree with the advances of the bitmap glyphs."""
+        face = get_face(10, False, 600)
+        text = "Robert Schneider AG, Rue du Lac 1268"
+        pixels = face.text_width(text) / 600 * 25.4
+        assert text_width(text, 10) == pytest.approx(pixels, rel=0.002)
+
+
+class TestWrapText:
+    """Test line breaking."""
+
+    def test_fitting_text_unchanged(self):
+        """Text fitting the column is a single line."""
+        assert wrap_text("Robert Schneider AG", 87, 10) == ("Robert Schneider AG",)
+
+    def test_wraps_at_spaces(self):
+        """Long text breaks at spaces into lines fitting the column."""
+        lines = wrap_text(LONG_TEXT, 87, 10)
+        assert len(lines) == 3
+        assert " ".join(lines) == LONG_TEXT
+        assert all(text_width(line, 10) <= 87 for line in lines)
+
+    def test_breaks_long_words(self):
+        """Words wider than the column break between characters."""
+        lines = wrap_text("X" * 60, 52, 8)
+        assert "".join(lines) == "X" * 60
+        assert all(text_width(line, 8) <= 52 for line in lines)
+
+    def test_truncates_beyond_max_lines(self):
+        """Text beyond the last line is dropped with an ellipsis."""
+        lines = wrap_text(LONG_TEXT, 52, 8, max_lines=2)
+        assert len(lines) == 2
+        assert lines[-1].endswith(ELLIPSIS)
+        assert all(text_width(line, 8) <= 52 for line in lines)
+
+    def test_keeps_spacing(self):
+        """Spaces between the words of a line are kept as they are."""
+        text = "Rechnung  Nr.   42 " + LONG_TEXT
+        lines = wrap_text(text, 87, 10)
+        assert lines[0].startswith("Rechnung  Nr.   42 ")
+        assert " ".join(lines) == text
+
+    def test_whitespace_only(self):
+        """Spaces wider than the column leave a single empty line."""
+        assert wrap_text(" " * 200, 20, 10) == ("",)
+
+    def test_truncation_keeps_spacing(self):
+        """The truncated last line is cut from the text as it is."""
+        text = LONG_TEXT.replace(" ", "  ")
+        lines = wrap_text(text, 52, 8, max_lines=2)
+        assert lines[1].endswith(ELLIPSIS) and "  " in lines[1]
+        assert text.startswith(lines[0]) and lines[1][: -len(ELLIPSIS)] in text
+
+    def test_cached(self):
+        """Repeated measurements are served from the cache."""
+        wrap_text.cache_clear()
+        first = wrap_text(LONG_TEXT, 87, 10)
+        assert wrap_text(LONG_TEXT, 87, 10) is first
+        assert wrap_text.cache_info().hits == 1
+
+    def test_truncate_text(self):
+        """Truncation keeps text fitting the column as is."""
+        assert truncate_text("Zahlteil", 87, 10) == "Zahlteil"
+        short = truncate_text(LONG_TEXT, 30, 10, bold=True)
+        assert short.endswith(ELLIPSIS)
+        assert text_width(short, 10, bold=True) <= 30
+
+
+@pytest.fixture
+def qr_bill_with_long_fields():
+    """Create a QR-bill with long additional information."""
+    return QRBill(
+        account="CH9300762011623852957",
+        creditor=Creditor(
+            name="Robert Schneider AG",
+            street="Rue du Lac",
+            building_number="1268",
+            postal_code="2501",
+            city="Biel",
+            country="CH",
+        ),
+        currency="CHF",
+        additional_information=LONG_TEXT,
+    )
+
+
+def test_layout_wraps_long_fields(qr_bill_with_long_fields):
+    """Long fields wrap within the payment part's information column."""
+    runs = [
+        element
+        for element in qr_bill_with_long_fields.layout().flatten()
+        if isinstance(element, TextRun) and element.size == 10 and element.x > 100
+    ]
+    texts = [run.text for run in runs]
+    start = texts.index("Facture mensuelle, abonnement annuel, période du")
+    assert " ".join(texts[start : start + 3]) == LONG_TEXT
+    assert all(text_width(text, 10) <= PAYMENT_COLUMN_MM for text in texts)
@@ -0,0 +1,260 @@
+"""Build the glyph atlas bundled in src/chqr/data.
+
+Rasterises the QR-bill character set from a TrueType font and the scissors
+artwork to 1-bit bitmaps, using 4x4 supersampling and a 50 % coverage
+threshold. Bold faces are synthesised from the regular outlines by widening
+every stroke horizontally by 1/24 em, like FreeType's emboldening, unless a
+bold font file is given.
+
+Requires fontTools (build time only, the package does not depend on it).
+
+Usage:
+    python tools/build_glyph_atlas.py LiberationSans-Regular.ttf
+        [--bold LiberationSans-Bold.ttf] [--output src/chqr/data/glyphs.bin]
+"""
+
+import argparse
+import math
+from pathlib import Path
+
+from fontTools.pens.basePen import BasePen
+from fontTools.pens.transformPen import TransformPen
+from fontTools.svgLib.path import parse_path
+from fontTools.ttLib import TTFont
+
+from chqr.glyphs import (
+    ATLAS_DPI,
+    ATLAS_FACES,
+    CHARSET,
+    Bitmap,
+    Face,
+    Glyph,
+    encode_atlas,
+)
+from chqr.layout import SCISSORS_ROTATIONS
+from chqr.svg_generator import SCISSORS_PATHS
+
+SUPERSAMPLING = 4
+CURVE_STEPS = 8
+EMBOLDEN_EM = 1 / 24
+MM_PER_INCH = 25.4
+
+DEFAULT_OUTPUT = Path(__file__).parent.parent / "src" / "chqr" / "data" / "glyphs.bin"
+
+
+class FlatteningPen(BasePen):
+    """Collect the contours of an outline as closed polygons."""
+
+    def __init__(self, glyph_set=None):
+        super().__init__(glyph_set)
+        self.polygons = []
+        self._current = None
+
+    def _moveTo(self, pt):
+        self._current = [pt]
+        self.polygons.append(self._current)
+
+    def _lineTo(self, pt):
+        self._current.append(pt)
+
+    def _curveToOne(self, pt1, pt2, pt3):
+        (x0, y0) = self._getCurrentPoint()
+        for step in range(1, CURVE_STEPS + 1):
+            t = step / CURVE_STEPS
+            u = 1 - t
+            self._current.append(
+                (
+                    u**3 * x0
+                    + 3 * u * u * t * pt1[0]
+                    + 3 * u * t * t * pt2[0]
+                    + t**3 * pt3[0],
+                    u**3 * y0
+                    + 3 * u * u * t * pt1[1]
+                    + 3 * u * t * t * pt2[1]
+                    + t**3 * pt3[1],
+                )
+            )
+
+    def _qCurveToOne(self, pt1, pt2):
+        (x0, y0) = self._getCurrentPoint()
+        for step in range(1, CURVE_STEPS + 1):
+            t = step / CURVE_STEPS
+            u = 1 - t
+            self._current.append(
+                (
+                    u * u * x0 + 2 * u * t * pt1[0] + t * t * pt2[0],
+                    u * u * y0 + 2 * u * t * pt1[1] + t * t * pt2[1],
+                )
+            )
+
+    def _closePath(self):
+        self._current = None
+
+    _endPath = _closePath
+
+
+def rasterize(polygons, embolden: float = 0.0) -> Bitmap:
+    """Fill polygons (pixel coordinates, y down) with the nonzero rule.
+
+    Args:
+        polygons: Closed polygons as lists of points
+        embolden: Extra width added to the right of every span, in pixels
+
+    Returns:
+        The bitmap, positioned relative to the origin.
+    """
+    points = [point for polygon in polygons for point in polygon]
+    if not points:
+        return Bitmap(0, 0, 0, ())
+    left = math.floor(min(x for x, _ in points))
+    right = math.ceil(max(x for x, _ in points) + embolden)
+    top = math.floor(min(y for _, y in points))
+    bottom = math.ceil(max(y for _, y in points))
+    width = right - left
+
+    edges = []
+    for polygon in polygons:
+        for (x0, y0), (x1, y1) in zip(polygon, polygon[1:] + polygon[:1]):
+            if y0 != y1:
+                edges.append((x0, y0, x1, y1, 1 if y1 > y0 else -1))
+
+    ss = SUPERSAMPLING
+    rows = []
+    for y in range(top, bottom):
+        coverage = [0] * width
+        for sub in range(ss):
+            yc = y + (sub + 0.5) / ss
+            crossings = sorted(
+                (x0 + (yc - y0) * (x1 - x0) / (y1 - y0), direction)
+                for x0, y0, x1, y1, direction in edges
+                if min(y0, y1) <= yc < max(y0, y1)
+            )
+            for start, stop in _merge(_spans(crossings, embolden)):
+                _cover(coverage, (start - left) * ss, (stop - left) * ss)
+        threshold = ss * ss / 2
+        bits = 0
+        for value in coverage:
+            bits = bits << 1 | (value >= threshold)
+        rows.append(bits)
+
+    # Trim empty rows and columns
+    while rows and not rows[0]:
+        rows.pop(0)
+        top += 1
+    while rows and not rows[-1]:
+        rows.pop()
+    if not rows:
+        return Bitmap(0, 0, 0, ())
+    combined = 0
+    for row in rows:
+        combined |= row
+    trailing = (combined & -combined).bit_length() - 1
+    rows = [row >> trailing for row in rows]
+    width -= trailing
+    leading = width - combined.bit_length() + trailing
+    return Bitmap(left + leading, top, width - leading, tuple(rows))
+
+
+def _spans(crossings, embolden):
+    """Yield the filled spans of a scanline from its sorted edge crossings."""
+    winding = 0
+    start = None
+    for x, direction in crossings:
+        previous = winding
+        winding += direction
+        if previous == 0 and winding != 0:
+            start = x
+        elif previous != 0 and winding == 0:
+            yield start, x + embolden
+
+
+def _merge(spans):
+    """Merge overlapping spans."""
+    merged = []
+    for start, stop in sorted(spans):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return merged
+
+
+def _cover(coverage, start, stop):
+    """Add the subsample columns start..stop (subsample units) to coverage."""
+    ss = SUPERSAMPLING
+    first = max(0, math.ceil(start - 0.5))
+    last = min(len(coverage) * ss, math.ceil(stop - 0.5))
+    for column in range(first, last):
+        coverage[column // ss] += 1
+
+
+def build_face(
+    font: TTFont, size: float, bold: bool, dpi: int, synthetic: bool
+) -> Face:
+    """Rasterise the character set of a font at a size and resolution."""
+    glyph_set = font.getGlyphSet()
+    cmap = font.getBestCmap()
+    metrics = font["hmtx"].metrics
+    em = size / 72 * dpi
+    scale = em / font["head"].unitsPerEm
+    embolden = em * EMBOLDEN_EM if synthetic else 0.0
+
+    glyphs = {}
+    for char in CHARSET:
+        name = cmap[ord(char)]
+        pen = FlatteningPen(glyph_set)
+        glyph_set[name].draw(TransformPen(pen, (scale, 0, 0, -scale, 0, 0)))
+        advance = metrics[name][0] * scale + embolden
+        glyphs[char] = Glyph(advance, rasterize(pen.polygons, embolden))
+    return Face(dpi, size, bold, glyphs)
+
+
+def build_scissors(rotation: int, dpi: int) -> Bitmap:
+    """Rasterise the 3 mm scissors rotated around their centre."""
+    scale = 3 / 12 * dpi / MM_PER_INCH
+    angle = math.radians(rotation)
+    cos, sin = math.cos(angle), math.sin(angle)
+    # Rotation around (6, 6), then scaling to pixels
+    transform = (
+        scale * cos,
+        scale * sin,
+        -scale * sin,
+        scale * cos,
+        scale * (6 - 6 * cos + 6 * sin),
+        scale * (6 - 6 * sin - 6 * cos),
+    )
+    pen = FlatteningPen()
+    for path_data in SCISSORS_PATHS:
+        parse_path(path_data, TransformPen(pen, transform))
+    return rasterize(pen.polygons)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("font", type=Path, help="regular TrueType font")
+    parser.add_argument("--bold", type=Path, help="bold TrueType font")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    args = parser.parse_args()
+
+    regular = TTFont(args.font)
+    bold = TTFont(args.bold) if args.bold else None
+
+    faces = []
+    for dpi in ATLAS_DPI:
+        for size, is_bold in ATLAS_FACES:
+            font = bold if is_bold and bold else regular
+            synthetic = is_bold and bold is None
+            faces.append(build_face(font, size, is_bold, dpi, synthetic))
+
+    artwork = {}
+    for dpi in ATLAS_DPI:
+        for name, rotation in SCISSORS_ROTATIONS.items():
+            artwork[(name, dpi)] = build_scissors(rotation, dpi)
+
+    data = encode_atlas(faces, artwork)
+    args.output.write_bytes(data)
+    print(f"Wrote {args.output} ({len(data)} bytes)")
+
+
+if __name__ == "__main__":
+    main()